@@ -217,8 +217,8 @@ class AdvancedSearch:
         if depth <= 0:
             return self._quiescence(position, mask, alpha, beta)
         
-        # Null move pruning
-        if can_null and depth > 3:
+        # Null move pruning (needs a finite beta for its null window)
+        if can_null and depth > 3 and beta != float('inf'):
             # Make null move (pass)
             null_score = -self._negamax(position ^ mask, mask, 
                                         depth - self.NULL_MOVE_R - 1, 
@@ -9,6 +9,7 @@ import pickle
 import numpy as np
 from enum import Enum
 from advanced_bitboard_engine import AdvancedBitboardEngine
+from bitboard_core import book_candidates, from_moves
 from transposition_table import TranspositionTable, TTFlag, MoveOrderingTable
 
 class SearchEngine:
@@ -33,8 +34,9 @@ class SearchEngine:
         self.time_limit = 0.5  # 500ms default
         self.start_time = 0
         
-        # Opening book
+        # Opening book: move-sequence lines, and positions by canonical key
         self.opening_book = {}
+        self.position_book = {}
         if opening_book_file:
             self.load_opening_book(opening_book_file)
         
@@ -60,20 +62,25 @@ class SearchEngine:
         try:
             with open(filename, 'r') as f:
                 book = json.load(f)
-                # Convert string keys back to tuples
+                # Convert string keys back to tuples, or to canonical keys
+                # for books written by opening_stats.OpeningStats.to_book
                 self.opening_book = {}
+                self.position_book = {}
                 for key, value in book.items():
+                    if key.isdigit():
+                        self.position_book[int(key)] = value
+                        continue
                     # Parse string representation of tuple
                     moves = eval(key) if key.startswith('(') else None
                     if moves:
                         self.opening_book[moves] = value
-                print(f"Loaded opening book with {len(self.opening_book)} positions")
+                print(f"Loaded opening book with {len(self.opening_book) + len(self.position_book)} positions")
         except Exception as e:
             print(f"Could not load opening book: {e}")
     
     def get_opening_move(self, moves_played):
         """Get move from opening book if available"""
-        if not self.opening_book:
+        if not self.opening_book and not self.position_book:
             return None
         
         # Look for current position
@@ -81,6 +88,13 @@ class SearchEngine:
         
         # Find all possible next moves
         candidates = []
+        if self.position_book:
+            # Any move order or mirror image of the game reaches these entries
+            mover = 'wins' if len(moves_played) % 2 == 0 else 'losses'
+            for move, stats in book_candidates(self.position_book, *from_moves(moves_played)):
+                total = stats.get('total', 0)
+                if total >= 10:
+                    candidates.append((move, stats[mover] / total, total))
         for book_pos, stats in self.opening_book.items():
             if len(book_pos) == len(position) + 1:
                 if book_pos[:-1] == position:
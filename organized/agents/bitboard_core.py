@@ -0,0 +1,180 @@
+"""
+Bitboard Core Primitives
+Shared column-major bitboard helpers for the search, MCTS and training tools
+
+Layout: bit = col * 7 + row_from_bottom, with one sentinel bit on top of each
+column. `position` holds the stones of the side to move, `mask` all stones.
+"""
+
+WIDTH = 7
+HEIGHT = 6
+H1 = HEIGHT + 1
+
+BOTTOM_MASK = sum(1 << (col * H1) for col in range(WIDTH))
+BOARD_MASK = BOTTOM_MASK * ((1 << HEIGHT) - 1)
+COLUMN_MASKS = [((1 << HEIGHT) - 1) << (col * H1) for col in range(WIDTH)]
+TOP_MASKS = [1 << (HEIGHT - 1 + col * H1) for col in range(WIDTH)]
+BOTTOM_MASKS = [1 << (col * H1) for col in range(WIDTH)]
+
+# Center-first ordering used by every searcher
+CENTER_ORDER = [3, 2, 4, 1, 5, 0, 6]
+
+
+def encode_position(board, mark):
+    """Convert a Kaggle board (row-major, top row first) to (position, mask)"""
+    position = 0
+    mask = 0
+    for col in range(WIDTH):
+        for row in range(HEIGHT):
+            piece = board[row * WIDTH + col]
+            if piece != 0:
+                bit = 1 << (col * H1 + (HEIGHT - 1 - row))
+                mask |= bit
+                if piece == mark:
+                    position |= bit
+    return position, mask
+
+
+def decode_position(position, mask, mark):
+    """Convert (position, mask) back to a Kaggle board, `mark` to move"""
+    board = [0] * (WIDTH * HEIGHT)
+    other = 3 - mark
+    for col in range(WIDTH):
+        for row in range(HEIGHT):
+            bit = 1 << (col * H1 + (HEIGHT - 1 - row))
+            if mask & bit:
+                board[row * WIDTH + col] = mark if position & bit else other
+    return board
+
+
+def popcount(x):
+    """Count set bits"""
+    return bin(x).count('1')
+
+
+def can_play(mask, col):
+    """Column still has an empty cell"""
+    return (mask & TOP_MASKS[col]) == 0
+
+
+def play(position, mask, col):
+    """Play `col`; returns the position from the opponent's point of view"""
+    return position ^ mask, mask | (mask + BOTTOM_MASKS[col])
+
+
+def move_bit(mask, col):
+    """Bit of the cell a stone dropped into `col` would occupy"""
+    return (mask + BOTTOM_MASKS[col]) & COLUMN_MASKS[col]
+
+
+def possible(mask):
+    """Bitmask of all playable cells"""
+    return (mask + BOTTOM_MASK) & BOARD_MASK
+
+
+def alignment(position):
+    """True if `position` contains four in a row"""
+    # Horizontal
+    m = position & (position >> H1)
+    if m & (m >> (2 * H1)):
+        return True
+    # Diagonal \
+    m = position & (position >> HEIGHT)
+    if m & (m >> (2 * HEIGHT)):
+        return True
+    # Diagonal /
+    m = position & (position >> (H1 + 1))
+    if m & (m >> (2 * (H1 + 1))):
+        return True
+    # Vertical
+    m = position & (position >> 1)
+    if m & (m >> 2):
+        return True
+    return False
+
+
+def winning_position(position, mask):
+    """Bitmask of empty cells that would complete four for `position`"""
+    # Vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+
+    # Horizontal and both diagonals
+    for shift in (H1, HEIGHT, H1 + 1):
+        p = (position << shift) & (position << (2 * shift))
+        r |= p & (position << (3 * shift))
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> (2 * shift))
+        r |= p & (position << shift)
+        r |= p & (position >> (3 * shift))
+
+    return r & (BOARD_MASK ^ mask)
+
+
+def winning_moves(position, mask):
+    """Bitmask of playable cells that win immediately for the side to move"""
+    return winning_position(position, mask) & possible(mask)
+
+
+def is_winning_move(position, mask, col):
+    """Playing `col` wins immediately for the side to move"""
+    return (winning_position(position, mask) & move_bit(mask, col)) != 0
+
+
+def columns_of(bits):
+    """Columns that contain at least one bit of `bits`"""
+    return [col for col in range(WIDTH) if bits & COLUMN_MASKS[col]]
+
+
+def valid_columns(mask):
+    """Playable columns in center-first order"""
+    return [col for col in CENTER_ORDER if (mask & TOP_MASKS[col]) == 0]
+
+
+def is_full(mask):
+    """All 42 cells are occupied"""
+    return mask == BOARD_MASK
+
+
+def key(position, mask):
+    """Unique key of a position (side to move is implied by stone parity)"""
+    return position + mask
+
+
+def mirror(bitboard):
+    """Mirror a bitboard left to right"""
+    result = 0
+    col_bits = (1 << H1) - 1
+    for col in range(WIDTH):
+        result |= ((bitboard >> (col * H1)) & col_bits) << ((WIDTH - 1 - col) * H1)
+    return result
+
+
+def canonical_key(position, mask):
+    """Symmetry-reduced key; returns (key, mirrored) with mirrored=True if the mirror won"""
+    k = position + mask
+    mk = mirror(position) + mirror(mask)
+    if mk < k:
+        return mk, True
+    return k, False
+
+
+def book_candidates(book, position, mask):
+    """
+    (column, entry) for every legal move whose resulting position is in an
+    opening book keyed by canonical_key (opening_stats.OpeningStats.to_book
+    with int keys), whatever move order or mirror image reached it
+    """
+    candidates = []
+    for col in valid_columns(mask):
+        entry = book.get(canonical_key(*play(position, mask, col))[0])
+        if entry is not None:
+            candidates.append((col, entry))
+    return candidates
+
+
+def from_moves(moves):
+    """Replay a column sequence from the empty board; returns (position, mask)"""
+    position, mask = 0, 0
+    for col in moves:
+        position, mask = play(position, mask, col)
+    return position, mask
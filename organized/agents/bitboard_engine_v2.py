@@ -10,6 +10,17 @@ class BitboardEngine:
     Each position uses 2 bitboards: one for each player
     Bit layout: column-major order with extra row for move detection
     """
+
+    # Static evaluation weights (ChampionEngine installs tuned ones)
+    EVAL_WEIGHTS = {
+        'center': 10,
+        'adjacent': 5,
+        'three': 50,
+        'two': 10,
+        'one': 1,
+        'opp_three': 50,
+        'opp_two': 10
+    }
     
     def __init__(self):
         self.WIDTH = 7
@@ -27,6 +38,8 @@ class BitboardEngine:
         # Column masks for fast access
         self.COLUMN_MASK = [(0x7F << (self.H1 * i)) for i in range(self.WIDTH)]
         
+        self.eval_weights = dict(self.EVAL_WEIGHTS)
+        
         # Precompute winning positions for each cell
         self._precompute_win_masks()
         
@@ -192,6 +205,7 @@ class BitboardEngine:
         Evaluate position using bitboard operations
         Returns score from current player's perspective
         """
+        w = self.eval_weights
         score = 0
         opponent = position ^ mask
         
@@ -213,14 +227,14 @@ class BitboardEngine:
         center_mask = self.COLUMN_MASK[center]
         my_center = self.popcount(position & center_mask)
         opp_center = self.popcount(opponent & center_mask)
-        score += (my_center - opp_center) * 10
+        score += (my_center - opp_center) * w['center']
         
         # Adjacent columns
         for col in [2, 4]:
             col_mask = self.COLUMN_MASK[col]
             my_pieces = self.popcount(position & col_mask)
             opp_pieces = self.popcount(opponent & col_mask)
-            score += (my_pieces - opp_pieces) * 5
+            score += (my_pieces - opp_pieces) * w['adjacent']
         
         # Count potential winning positions
         score += self._count_potential_wins(position, opponent, mask)
@@ -229,6 +243,7 @@ class BitboardEngine:
     
     def _count_potential_wins(self, position, opponent, mask):
         """Count potential winning positions"""
+        w = self.eval_weights
         score = 0
         
         # For each possible 4-in-a-row position
@@ -244,16 +259,16 @@ class BitboardEngine:
                 
                 if opp_pieces == 0:
                     if my_pieces == 3:
-                        score += 50
+                        score += w['three']
                     elif my_pieces == 2:
-                        score += 10
+                        score += w['two']
                     elif my_pieces == 1:
-                        score += 1
+                        score += w['one']
                 elif my_pieces == 0:
                     if opp_pieces == 3:
-                        score -= 50
+                        score -= w['opp_three']
                     elif opp_pieces == 2:
-                        score -= 10
+                        score -= w['opp_two']
         
         # Similar for vertical and diagonals...
         # (Abbreviated for space, but would include all directions)
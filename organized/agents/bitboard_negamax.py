@@ -0,0 +1,241 @@
+"""
+Bitboard Negamax
+Budgeted alpha-beta search for self-play and data generation
+
+- Negamax on bitboard_core (side-to-move stones + occupancy mask)
+- Transposition table of (depth, score, flag, move), mate scores stored
+  relative to the node so they stay valid across moves of a game
+- Iterative deepening under a depth, node or time budget; an iteration
+  cut short by the budget is discarded
+- Moves that hand the opponent an immediate win are never searched
+- Static evaluation: open threat cells plus a center-weighted cell table
+- Optional root noise: every root move gets a random score bonus, and the
+  search finds the best noisy score with ordinary pruning
+"""
+
+import random
+import time
+
+from bitboard_core import (
+    WIDTH, HEIGHT, H1, CENTER_ORDER, COLUMN_MASKS, BOARD_MASK, play, possible,
+    winning_position, winning_moves, popcount, key, columns_of
+)
+from bitboard_solver import non_losing_moves
+
+WIN_SCORE = 10000
+MATE_BOUND = WIN_SCORE - WIDTH * HEIGHT - 2
+INF = 2 * WIN_SCORE
+EXACT, LOWER, UPPER = 0, 1, 2
+THREAT_WEIGHT = 40
+
+
+def _cell_groups():
+    """(value, cell mask) pairs of the classic windows-through-cell table"""
+    groups = {}
+    for col in range(WIDTH):
+        for row in range(HEIGHT):
+            count = 0
+            for dc, dr in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                for start in range(-3, 1):
+                    cells = [(col + (start + i) * dc, row + (start + i) * dr) for i in range(4)]
+                    if all(0 <= c < WIDTH and 0 <= r < HEIGHT for c, r in cells):
+                        count += 1
+            groups[count] = groups.get(count, 0) | 1 << (col * H1 + row)
+    return sorted(groups.items())
+
+
+CELL_GROUPS = _cell_groups()
+
+
+def evaluate(position, mask):
+    """Static score for the side to move"""
+    opponent = position ^ mask
+    score = THREAT_WEIGHT * (popcount(winning_position(position, mask)) -
+                             popcount(winning_position(opponent, mask)))
+    for value, cells in CELL_GROUPS:
+        score += value * (popcount(position & cells) - popcount(opponent & cells))
+    return score
+
+
+class BitboardNegamax:
+    """
+    Negamax searcher with a per-move budget
+    Budgets set here are defaults; search() can override them per call.
+    """
+
+    def __init__(self, max_depth=42, max_nodes=None, time_limit=None, tt_size=1000000):
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.tt_size = tt_size
+        self.tt = {}
+        self.nodes = 0
+        self.stopped = False
+
+    def new_game(self):
+        self.tt.clear()
+
+    def search(self, position, mask, max_depth=None, max_nodes=None, time_limit=None,
+               noise=0.0, rng=None):
+        """
+        (move, score, depth) for the side to move
+        noise: standard deviation of the per-move root bonus, in score units
+        """
+        max_depth = max_depth or self.max_depth
+        self._max_nodes = max_nodes if max_nodes is not None else self.max_nodes
+        time_limit = time_limit if time_limit is not None else self.time_limit
+        self._deadline = time.time() + time_limit if time_limit else None
+        self.nodes = 0
+        self.stopped = False
+
+        wins = winning_moves(position, mask)
+        if wins:
+            return columns_of(wins)[0], WIN_SCORE - 1, 0
+
+        candidates = non_losing_moves(position, mask)
+        if not candidates:
+            # Lost either way - play anything legal
+            return columns_of(possible(mask))[0], -(WIN_SCORE - 2), 0
+
+        rng = rng or random
+        bonuses = [int(round(rng.gauss(0, noise))) if noise else 0 for _ in range(WIDTH)]
+        empty = WIDTH * HEIGHT - popcount(mask)
+
+        best_move, best_score, completed = columns_of(candidates)[0], 0, 0
+        for depth in range(1, min(max_depth, empty) + 1):
+            move, score = self._root(position, mask, candidates, depth, bonuses)
+            if self.stopped:
+                break
+            best_move, best_score, completed = move, score, depth
+            if abs(score) >= MATE_BOUND:
+                break
+        return best_move, best_score, completed
+
+    def _root(self, position, mask, candidates, depth, bonuses):
+        """Best (move, unbiased score) by score + bonus"""
+        alpha = -INF
+        best_move, best_score = None, 0
+        for col in self._ordered_moves(position, mask, candidates, self._tt_move(position, mask)):
+            child_position, child_mask = play(position, mask, col)
+            bonus = bonuses[col]
+            score = -self._negamax(child_position, child_mask, depth - 1, -INF, -(alpha - bonus), 1)
+            if self.stopped:
+                break
+            if best_move is None or score + bonus > alpha:
+                alpha = score + bonus
+                best_move, best_score = col, score
+        if best_move is not None and not self.stopped:
+            self._store(position, mask, depth, best_score, EXACT, best_move, 0)
+        return best_move, best_score
+
+    def _negamax(self, position, mask, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self._max_nodes and self.nodes >= self._max_nodes:
+            self.stopped = True
+        if self._deadline and self.nodes & 1023 == 0 and time.time() > self._deadline:
+            self.stopped = True
+        if self.stopped:
+            return 0
+
+        if winning_moves(position, mask):
+            return WIN_SCORE - ply - 1
+        if mask == BOARD_MASK:
+            return 0
+        candidates = non_losing_moves(position, mask)
+        if not candidates:
+            return -(WIN_SCORE - ply - 2)
+        if depth <= 0:
+            return evaluate(position, mask)
+
+        tt_key = key(position, mask)
+        entry = self.tt.get(tt_key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, score, flag, tt_move = entry
+            if entry_depth >= depth:
+                score = self._from_tt(score, ply)
+                if flag == EXACT:
+                    return score
+                if flag == LOWER and score >= beta:
+                    return score
+                if flag == UPPER and score <= alpha:
+                    return score
+
+        original_alpha = alpha
+        best_score, best_move = -INF, None
+        for col in self._ordered_moves(position, mask, candidates, tt_move):
+            child_position, child_mask = play(position, mask, col)
+            score = -self._negamax(child_position, child_mask, depth - 1, -beta, -alpha, ply + 1)
+            if self.stopped:
+                return 0
+            if score > best_score:
+                best_score, best_move = score, col
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._store(position, mask, depth, best_score, flag, best_move, ply)
+        return best_score
+
+    def _ordered_moves(self, position, mask, candidates, tt_move):
+        """TT move, then most threat cells created, center first on ties"""
+        scored = []
+        for col in CENTER_ORDER:
+            move = candidates & COLUMN_MASKS[col]
+            if not move:
+                continue
+            if col == tt_move:
+                priority = -1000
+            else:
+                priority = -popcount(winning_position(position | move, mask))
+            scored.append((priority, len(scored), col))
+        scored.sort()
+        return [col for _, _, col in scored]
+
+    def _tt_move(self, position, mask):
+        entry = self.tt.get(key(position, mask))
+        return entry[3] if entry else None
+
+    def _store(self, position, mask, depth, score, flag, move, ply):
+        if len(self.tt) >= self.tt_size:
+            self.tt.clear()
+        self.tt[key(position, mask)] = (depth, self._to_tt(score, ply), flag, move)
+
+    @staticmethod
+    def _to_tt(score, ply):
+        """Mate scores relative to the node instead of the root"""
+        if score >= MATE_BOUND:
+            return score + ply
+        if score <= -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _from_tt(score, ply):
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
+        return score
+
+
+def make_searcher(backend='auto', **kwargs):
+    """
+    Negamax searcher for self-play: NumbaNegamax when numba is installed,
+    otherwise BitboardNegamax ('numba' / 'python' force one or the other)
+    """
+    if backend != 'python':
+        try:
+            from bitboard_negamax_numba import NumbaNegamax
+            return NumbaNegamax(**kwargs)
+        except ImportError:
+            if backend == 'numba':
+                raise
+    return BitboardNegamax(**kwargs)
@@ -0,0 +1,264 @@
+"""
+Bitboard Negamax (numba)
+Compiled core for BitboardNegamax, for self-play at scale
+
+- Same search as bitboard_negamax: alpha-beta with threat-ordered moves,
+  losing moves pruned, threat + cell-table evaluation, mate scores stored
+  relative to the node, root noise and depth / node / time budgets
+- Positions are uint64 bitboards all the way down; nothing is allocated
+  per node (move lists live in a preallocated per-ply buffer)
+- Transposition table: a preallocated (tt_size, 2) uint64 array of
+  (key, packed depth/score/flag/move), always-replace on collision
+- Only the iterative-deepening loop and root checks stay in Python
+
+Requires numba; bitboard_negamax.make_searcher() falls back to the pure
+Python searcher when it is missing.
+"""
+
+import time
+
+import numpy as np
+from numba import njit, objmode
+
+from bitboard_core import WIDTH, HEIGHT, H1, BOARD_MASK, BOTTOM_MASK, BOTTOM_MASKS, COLUMN_MASKS, CENTER_ORDER
+from bitboard_negamax import (
+    BitboardNegamax, CELL_GROUPS, EXACT, LOWER, UPPER, INF, MATE_BOUND, THREAT_WEIGHT, WIN_SCORE
+)
+
+# Every constant is typed uint64: mixing uint64 and int64 in numba gives float64
+ZERO, ONE, TWO, THREE = np.uint64(0), np.uint64(1), np.uint64(2), np.uint64(3)
+BOARD = np.uint64(BOARD_MASK)
+BOTTOM = np.uint64(BOTTOM_MASK)
+BOTTOMS = np.array(BOTTOM_MASKS, dtype=np.uint64)
+COLUMNS = np.array(COLUMN_MASKS, dtype=np.uint64)
+SHIFTS = np.array([H1, HEIGHT, H1 + 1], dtype=np.uint64)
+ORDER = np.array(CENTER_ORDER, dtype=np.int64)
+GROUP_VALUES = np.array([value for value, _ in CELL_GROUPS], dtype=np.int64)
+GROUP_CELLS = np.array([cells for _, cells in CELL_GROUPS], dtype=np.uint64)
+NO_MOVE = -1
+
+# Search state shared with Python: node count, node budget (0 = none), stopped flag
+NODES, MAX_NODES, STOPPED = range(3)
+
+# Packed TT data: score + SCORE_OFFSET in bits 0-15, depth 16-23, flag 24-27,
+# move + 1 in 28-31 (never zero, so zero marks an empty slot)
+SCORE_OFFSET = 1 << 15
+
+
+@njit(cache=True)
+def _popcount(x):
+    n = 0
+    while x:
+        x &= x - ONE
+        n += 1
+    return n
+
+
+@njit(cache=True)
+def _winning_position(position, mask):
+    r = (position << ONE) & (position << TWO) & (position << THREE)
+    for i in range(3):
+        s = SHIFTS[i]
+        p = (position << s) & (position << (TWO * s))
+        r |= p & (position << (THREE * s))
+        r |= p & (position >> s)
+        p = (position >> s) & (position >> (TWO * s))
+        r |= p & (position << s)
+        r |= p & (position >> (THREE * s))
+    return r & (BOARD ^ mask)
+
+
+@njit(cache=True)
+def _possible(mask):
+    return (mask + BOTTOM) & BOARD
+
+
+@njit(cache=True)
+def _non_losing_moves(position, mask):
+    moves = _possible(mask)
+    opponent_win = _winning_position(position ^ mask, mask)
+    forced = moves & opponent_win
+    if forced:
+        if forced & (forced - ONE):
+            return ZERO
+        moves = forced
+    return moves & ~(opponent_win >> ONE)
+
+
+@njit(cache=True)
+def _evaluate(position, mask):
+    opponent = position ^ mask
+    score = THREAT_WEIGHT * (_popcount(_winning_position(position, mask)) -
+                             _popcount(_winning_position(opponent, mask)))
+    for i in range(len(GROUP_VALUES)):
+        score += GROUP_VALUES[i] * (_popcount(position & GROUP_CELLS[i]) -
+                                    _popcount(opponent & GROUP_CELLS[i]))
+    return score
+
+
+@njit(cache=True)
+def _ordered_moves(position, mask, candidates, tt_move, out):
+    """
+    Fill out[:n] like BitboardNegamax._ordered_moves and return n
+    out[WIDTH:] holds the priorities while sorting.
+    """
+    priorities = out[WIDTH:]
+    n = 0
+    for i in range(WIDTH):
+        col = ORDER[i]
+        move = candidates & COLUMNS[col]
+        if not move:
+            continue
+        if col == tt_move:
+            priority = -1000
+        else:
+            priority = -_popcount(_winning_position(position | move, mask))
+        # Insertion sort, stable so ties stay in center order
+        j = n
+        while j > 0 and priorities[j - 1] > priority:
+            priorities[j] = priorities[j - 1]
+            out[j] = out[j - 1]
+            j -= 1
+        priorities[j] = priority
+        out[j] = col
+        n += 1
+    return n
+
+
+@njit(cache=True)
+def _probe(tt, k):
+    """Packed entry for key k, or 0"""
+    slot = k % np.uint64(len(tt))
+    if tt[slot, 0] == k:
+        return np.int64(tt[slot, 1])
+    return 0
+
+
+@njit(cache=True)
+def _store(tt, k, depth, score, flag, move, ply):
+    if score >= MATE_BOUND:
+        score += ply
+    elif score <= -MATE_BOUND:
+        score -= ply
+    slot = k % np.uint64(len(tt))
+    tt[slot, 0] = k
+    tt[slot, 1] = np.uint64((score + SCORE_OFFSET) | depth << 16 | flag << 24 | (move + 1) << 28)
+
+
+# Not cached: numba cannot reload a cached recursive function
+@njit
+def _negamax(position, mask, depth, alpha, beta, ply, tt, state, deadline, buffer):
+    state[NODES] += 1
+    if state[MAX_NODES] and state[NODES] >= state[MAX_NODES]:
+        state[STOPPED] = 1
+    if deadline > 0.0 and state[NODES] & 1023 == 0:
+        with objmode(now='float64'):
+            now = time.time()
+        if now > deadline:
+            state[STOPPED] = 1
+    if state[STOPPED]:
+        return 0
+
+    if _winning_position(position, mask) & _possible(mask):
+        return WIN_SCORE - ply - 1
+    if mask == BOARD:
+        return 0
+    candidates = _non_losing_moves(position, mask)
+    if not candidates:
+        return -(WIN_SCORE - ply - 2)
+    if depth <= 0:
+        return _evaluate(position, mask)
+
+    k = position + mask
+    entry = _probe(tt, k)
+    tt_move = NO_MOVE
+    if entry:
+        score = (entry & 0xFFFF) - SCORE_OFFSET
+        flag = (entry >> 24) & 0xF
+        tt_move = ((entry >> 28) & 0xF) - 1
+        if ((entry >> 16) & 0xFF) >= depth:
+            if score >= MATE_BOUND:
+                score -= ply
+            elif score <= -MATE_BOUND:
+                score += ply
+            if flag == EXACT:
+                return score
+            if flag == LOWER and score >= beta:
+                return score
+            if flag == UPPER and score <= alpha:
+                return score
+
+    original_alpha = alpha
+    best_score, best_move = -INF, NO_MOVE
+    moves = buffer[ply]
+    for i in range(_ordered_moves(position, mask, candidates, tt_move, moves)):
+        col = moves[i]
+        score = -_negamax(position ^ mask, mask | (mask + BOTTOMS[col]), depth - 1,
+                          -beta, -alpha, ply + 1, tt, state, deadline, buffer)
+        if state[STOPPED]:
+            return 0
+        if score > best_score:
+            best_score, best_move = score, col
+        if score > alpha:
+            alpha = score
+        if alpha >= beta:
+            break
+
+    if best_score <= original_alpha:
+        flag = UPPER
+    elif best_score >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    _store(tt, k, depth, best_score, flag, best_move, ply)
+    return best_score
+
+
+@njit
+def _root(position, mask, candidates, depth, bonuses, tt, state, deadline, buffer):
+    """BitboardNegamax._root: best (move, unbiased score) by score + bonus"""
+    k = position + mask
+    entry = _probe(tt, k)
+    tt_move = ((entry >> 28) & 0xF) - 1 if entry else NO_MOVE
+
+    alpha = -INF
+    best_move, best_score = NO_MOVE, 0
+    moves = buffer[0]
+    for i in range(_ordered_moves(position, mask, candidates, tt_move, moves)):
+        col = moves[i]
+        bonus = bonuses[col]
+        score = -_negamax(position ^ mask, mask | (mask + BOTTOMS[col]), depth - 1,
+                          -INF, -(alpha - bonus), 1, tt, state, deadline, buffer)
+        if state[STOPPED]:
+            break
+        if best_move == NO_MOVE or score + bonus > alpha:
+            alpha = score + bonus
+            best_move, best_score = col, score
+    if best_move != NO_MOVE and not state[STOPPED]:
+        _store(tt, k, depth, best_score, EXACT, best_move, 0)
+    return best_move, best_score
+
+
+class NumbaNegamax(BitboardNegamax):
+    """
+    BitboardNegamax with the tree search compiled by numba
+    Same interface, budgets and (up to TT replacement) the same moves.
+    """
+
+    def __init__(self, max_depth=42, max_nodes=None, time_limit=None, tt_size=1000000):
+        super().__init__(max_depth, max_nodes, time_limit, tt_size)
+        self.tt = np.zeros((tt_size, 2), dtype=np.uint64)
+        self._state = np.zeros(3, dtype=np.int64)
+        self._buffer = np.zeros((WIDTH * HEIGHT + 1, 2 * WIDTH), dtype=np.int64)
+
+    def new_game(self):
+        self.tt.fill(0)
+
+    def _root(self, position, mask, candidates, depth, bonuses):
+        state = self._state
+        state[NODES], state[MAX_NODES], state[STOPPED] = self.nodes, self._max_nodes or 0, 0
+        move, score = _root(np.uint64(position), np.uint64(mask), np.uint64(candidates), depth,
+                            np.array(bonuses, dtype=np.int64), self.tt, state,
+                            self._deadline or 0.0, self._buffer)
+        self.nodes, self.stopped = int(state[NODES]), bool(state[STOPPED])
+        return (None if move == NO_MOVE else int(move)), int(score)
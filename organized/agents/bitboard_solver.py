@@ -0,0 +1,209 @@
+"""
+Exact Bitboard Solver
+Perfect-play negamax on bitboard_core (after Pascal Pons' Connect 4 solver)
+
+Score of a position for the side to move:
+- positive: wins; (43 - stones after its winning move) // 2, so faster wins score higher
+- 0: draw
+- negative: loses, mirrored
+
+Alpha-beta on a null window with iterative narrowing, a transposition
+table of upper bounds, only non-losing moves searched, and moves ordered
+by how many winning cells they create.
+"""
+
+import time
+
+from bitboard_core import (
+    WIDTH, HEIGHT, CENTER_ORDER, COLUMN_MASKS, BOARD_MASK,
+    play, possible, winning_position, popcount, key, from_moves
+)
+
+MIN_SCORE = -(WIDTH * HEIGHT // 2) + 3
+
+
+def non_losing_moves(position, mask):
+    """Playable cells that do not hand the opponent an immediate win"""
+    moves = possible(mask)
+    opponent_win = winning_position(position ^ mask, mask)
+    forced = moves & opponent_win
+    if forced:
+        if forced & (forced - 1):
+            # Two threats - every move loses
+            return 0
+        moves = forced
+    # Never play directly below an opponent winning cell
+    return moves & ~(opponent_win >> 1)
+
+
+class Solver:
+    """Exact solver with a dict transposition table (cleared between solves on request)"""
+
+    def __init__(self, max_tt_entries=2_000_000):
+        self.tt = {}
+        self.max_tt_entries = max_tt_entries
+        self.nodes = 0
+
+    def reset(self):
+        """Forget the transposition table and node count"""
+        self.tt.clear()
+        self.nodes = 0
+
+    def _negamax(self, position, mask, moves_played, alpha, beta):
+        """Score within (alpha, beta); assumes no immediate win for the side to move"""
+        self.nodes += 1
+
+        candidates = non_losing_moves(position, mask)
+        if not candidates:
+            return -((WIDTH * HEIGHT - moves_played) // 2)
+
+        if moves_played >= WIDTH * HEIGHT - 2:
+            return 0
+
+        # Lower bound: we cannot win faster than next move, opponent cannot lose it
+        lower = -((WIDTH * HEIGHT - 2 - moves_played) // 2)
+        if alpha < lower:
+            alpha = lower
+            if alpha >= beta:
+                return alpha
+
+        # Upper bound: we cannot win immediately (checked by the caller)
+        upper = (WIDTH * HEIGHT - 1 - moves_played) // 2
+        stored = self.tt.get(key(position, mask))
+        if stored is not None:
+            upper = stored + MIN_SCORE - 1
+        if beta > upper:
+            beta = upper
+            if alpha >= beta:
+                return beta
+
+        # Order: most new winning cells first, center first on ties
+        ordered = []
+        for col in CENTER_ORDER:
+            move = candidates & COLUMN_MASKS[col]
+            if move:
+                threats = popcount(winning_position(position | move, mask))
+                ordered.append((-threats, len(ordered), col))
+        ordered.sort()
+
+        for _, _, col in ordered:
+            new_position, new_mask = play(position, mask, col)
+            score = -self._negamax(new_position, new_mask, moves_played + 1, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        if len(self.tt) >= self.max_tt_entries:
+            self.tt.clear()
+        self.tt[key(position, mask)] = alpha - MIN_SCORE + 1
+        return alpha
+
+    def solve(self, position, mask, weak=False):
+        """
+        Exact score for the side to move
+        weak=True only resolves win / draw / loss (returns 1, 0, -1), which is faster.
+        """
+        moves_played = popcount(mask)
+        if winning_position(position, mask) & possible(mask):
+            score = (WIDTH * HEIGHT + 1 - moves_played) // 2
+            return 1 if weak else score
+
+        low = -((WIDTH * HEIGHT - moves_played) // 2)
+        high = (WIDTH * HEIGHT + 1 - moves_played) // 2
+        if weak:
+            low, high = -1, 1
+
+        # Null-window searches narrowing [low, high] onto the exact value
+        while low < high:
+            mid = low + (high - low) // 2
+            # Probe near zero first (halving toward zero, as in C)
+            if mid <= 0 and int(low / 2) < mid:
+                mid = int(low / 2)
+            elif mid >= 0 and high // 2 > mid:
+                mid = high // 2
+            result = self._negamax(position, mask, moves_played, mid, mid + 1)
+            if result <= mid:
+                high = result
+            else:
+                low = result
+        if weak:
+            return (low > 0) - (low < 0)
+        return low
+
+    def analyze(self, position, mask, weak=False):
+        """Exact score of every legal column (None for full columns)"""
+        scores = [None] * WIDTH
+        moves = possible(mask)
+        wins = winning_position(position, mask) & moves
+        moves_played = popcount(mask)
+        for col in range(WIDTH):
+            if not moves & COLUMN_MASKS[col]:
+                continue
+            if wins & COLUMN_MASKS[col]:
+                scores[col] = 1 if weak else (WIDTH * HEIGHT + 1 - moves_played) // 2
+                continue
+            new_position, new_mask = play(position, mask, col)
+            if new_mask == BOARD_MASK:
+                scores[col] = 0
+            else:
+                scores[col] = -self.solve(new_position, new_mask, weak)
+        return scores
+
+    def best_moves(self, position, mask, weak=False):
+        """
+        (exact score, every column achieving it)
+        After one solve, each column costs a single null-window search.
+        """
+        if weak:
+            scores = self.analyze(position, mask, weak)
+            best = max(s for s in scores if s is not None)
+            return best, [col for col, s in enumerate(scores) if s == best]
+
+        score = self.solve(position, mask)
+        moves = possible(mask)
+        wins = winning_position(position, mask) & moves
+        if wins:
+            return score, [col for col in range(WIDTH) if wins & COLUMN_MASKS[col]]
+        moves_played = popcount(mask) + 1
+        best = []
+        for col in range(WIDTH):
+            if not moves & COLUMN_MASKS[col]:
+                continue
+            new_position, new_mask = play(position, mask, col)
+            if new_mask == BOARD_MASK:
+                achieves = score == 0
+            elif winning_position(new_position, new_mask) & possible(new_mask):
+                achieves = -((WIDTH * HEIGHT + 1 - moves_played) // 2) == score
+            else:
+                # The opponent holds us to at most -result: a result <= -score means we get score
+                achieves = self._negamax(new_position, new_mask, moves_played, -score, -score + 1) <= -score
+            if achieves:
+                best.append(col)
+        return score, best
+
+
+def make_solver(backend='auto', **kwargs):
+    """
+    Exact solver: NumbaSolver when numba is installed, otherwise Solver
+    ('numba' / 'python' force one or the other)
+    """
+    if backend != 'python':
+        try:
+            from bitboard_solver_numba import NumbaSolver
+            return NumbaSolver(**kwargs)
+        except ImportError:
+            if backend == 'numba':
+                raise
+    return Solver(**kwargs)
+
+
+if __name__ == "__main__":
+    solver = Solver()
+    for moves in ([3, 3, 3, 3, 2, 2, 4, 4, 2, 4, 4, 2, 1, 1, 5, 5, 0],
+                  [3, 3, 3, 3, 3, 3, 2, 2, 2, 2, 2, 2, 4, 4, 4, 4]):
+        position, mask = from_moves(moves)
+        start = time.time()
+        score, best = solver.best_moves(position, mask)
+        print(f"{len(moves)} moves played: score {score:+d}, best {best}, "
+              f"{solver.nodes:,} nodes, {time.time() - start:.2f}s")
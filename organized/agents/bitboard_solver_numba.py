@@ -0,0 +1,89 @@
+"""
+Exact Bitboard Solver (numba)
+Compiled search for bitboard_solver.Solver, for building solved-position sets
+
+- Same algorithm and scores as Solver: null-window negamax over
+  non-losing moves ordered by new winning cells, a transposition table
+  of upper bounds, and the same iterative narrowing in solve()
+- The table is a preallocated (tt_size, 2) uint64 array of (key, bound),
+  always-replace on collision, kept across solves until reset()
+- Move lists live in a preallocated per-ply buffer; the low-level
+  bitboard kernels are shared with bitboard_negamax_numba
+
+Requires numba; bitboard_solver.make_solver() falls back to the pure
+Python solver when it is missing.
+"""
+
+import numpy as np
+from numba import njit
+
+from bitboard_core import WIDTH, HEIGHT
+from bitboard_negamax_numba import BOTTOMS, NO_MOVE, _non_losing_moves, _ordered_moves
+from bitboard_solver import MIN_SCORE, Solver
+
+SIZE = WIDTH * HEIGHT
+
+
+# Not cached: numba cannot reload a cached recursive function
+@njit
+def _negamax(position, mask, moves_played, alpha, beta, tt, nodes, buffer):
+    """Solver._negamax; nodes[0] counts visited positions"""
+    nodes[0] += 1
+
+    candidates = _non_losing_moves(position, mask)
+    if not candidates:
+        return -((SIZE - moves_played) // 2)
+
+    if moves_played >= SIZE - 2:
+        return 0
+
+    lower = -((SIZE - 2 - moves_played) // 2)
+    if alpha < lower:
+        alpha = lower
+        if alpha >= beta:
+            return alpha
+
+    upper = (SIZE - 1 - moves_played) // 2
+    k = position + mask
+    slot = k % np.uint64(len(tt))
+    if tt[slot, 0] == k:
+        upper = np.int64(tt[slot, 1]) + MIN_SCORE - 1
+    if beta > upper:
+        beta = upper
+        if alpha >= beta:
+            return beta
+
+    moves = buffer[moves_played]
+    for i in range(_ordered_moves(position, mask, candidates, NO_MOVE, moves)):
+        col = moves[i]
+        score = -_negamax(position ^ mask, mask | (mask + BOTTOMS[col]), moves_played + 1,
+                          -beta, -alpha, tt, nodes, buffer)
+        if score >= beta:
+            return score
+        if score > alpha:
+            alpha = score
+
+    tt[slot, 0] = k
+    tt[slot, 1] = np.uint64(alpha - MIN_SCORE + 1)
+    return alpha
+
+
+class NumbaSolver(Solver):
+    """Solver with the search compiled by numba; same scores, its own node counts"""
+
+    def __init__(self, tt_size=1 << 23):
+        super().__init__()
+        self.tt = np.zeros((tt_size, 2), dtype=np.uint64)
+        self._nodes = np.zeros(1, dtype=np.int64)
+        self._buffer = np.zeros((SIZE + 1, 2 * WIDTH), dtype=np.int64)
+
+    def reset(self):
+        self.tt.fill(0)
+        self.nodes = 0
+
+    def _negamax(self, position, mask, moves_played, alpha, beta):
+        self._nodes[0] = 0
+        score = _negamax(np.uint64(position), np.uint64(mask), moves_played, alpha, beta,
+                         self.tt, self._nodes, self._buffer)
+        self.nodes += int(self._nodes[0])
+        return int(score)
@@ -6,6 +6,7 @@ Combines all advanced techniques for maximum performance
 import time
 import json
 import pickle
+from bitboard_core import book_candidates
 from bitboard_engine_v2 import BitboardEngine
 from advanced_search import AdvancedSearch, TranspositionTable
 
@@ -16,6 +17,7 @@ class ChampionEngine:
         self.bitboard = BitboardEngine()
         self.search = AdvancedSearch(self.bitboard)
         self.opening_book = {}
+        self.position_book = {}  # opening_stats books, by canonical key
         self.endgame_tb = {}
         self.pattern_weights = {}
         
@@ -47,9 +49,12 @@ class ChampionEngine:
                 # Convert to internal format
                 self.opening_book = {}
                 for moves_str, data in json_book.items():
-                    moves = eval(moves_str)
-                    self.opening_book[moves] = data
-                print(f"Loaded JSON opening book with {len(self.opening_book)} positions")
+                    if moves_str.isdigit():
+                        self.position_book[int(moves_str)] = data
+                    else:
+                        self.opening_book[eval(moves_str)] = data
+                print(f"Loaded JSON opening book with "
+                      f"{len(self.opening_book) + len(self.position_book)} positions")
             except:
                 print("No opening book found - using defaults")
                 self._create_default_opening_book()
@@ -77,16 +82,15 @@ class ChampionEngine:
             print("No endgame tablebase found")
     
     def _load_pattern_weights(self):
-        """Load pattern recognition weights"""
-        # These would be trained through self-play
-        self.pattern_weights = {
-            'open_three': 50,
-            'blocked_three': 25,
-            'open_two': 10,
-            'blocked_two': 5,
-            'fork': 100,
-            'threat_multiplier': 1.5
-        }
+        """Load evaluation weights tuned by texel_tuner.py into the engine"""
+        self.pattern_weights = dict(BitboardEngine.EVAL_WEIGHTS)
+        try:
+            with open('eval_weights.json', 'r') as f:
+                self.pattern_weights.update(json.load(f).get('champion_engine', {}))
+            print("Loaded tuned evaluation weights")
+        except (OSError, ValueError):
+            pass
+        self.bitboard.eval_weights = self.pattern_weights
     
     def get_best_move(self, board, mark, time_limit=0.9):
         """Get best move for current position"""
@@ -99,7 +103,7 @@ class ChampionEngine:
         moves = self._reconstruct_moves(board)
         
         # 1. Check opening book
-        book_move = self._check_opening_book(moves)
+        book_move = self._check_opening_book(moves, position, mask)
         if book_move is not None:
             self.stats['book_hits'] += 1
             return book_move
@@ -137,7 +141,7 @@ class ChampionEngine:
                 moves.append(col)
         return moves[:20]  # Limit to opening book depth
     
-    def _check_opening_book(self, moves):
+    def _check_opening_book(self, moves, position=None, mask=None, min_games=10):
         """Check if position is in opening book"""
         move_tuple = tuple(moves)
         
@@ -149,8 +153,14 @@ class ChampionEngine:
             else:
                 return entry[0]  # Binary format
         
-        # Check transpositions (simplified)
-        # Real implementation would handle all transpositions
+        # Position-keyed book: transpositions and mirror images included
+        if self.position_book and position is not None:
+            mover = 'wins' if self.bitboard.popcount(mask) % 2 == 0 else 'losses'
+            candidates = [(entry[mover] / entry['total'], col)
+                          for col, entry in book_candidates(self.position_book, position, mask)
+                          if entry['total'] >= min_games]
+            if candidates:
+                return max(candidates)[1]
         
         return None
     
@@ -5,7 +5,8 @@ Evaluates all agents to find the best one
 
 import time
 import json
-from kaggle_environments import evaluate, make
+from agent_workers import AgentWorker
+from referee import CONFIGURATION, OVERAGE_TIME, Struct, play_game
 
 # List of agents to test
 AGENTS = [
@@ -15,17 +16,9 @@ AGENTS = [
     ('deep_rl_agent.py', 'Deep RL Agent'),
 ]
 
-def test_agent_speed(agent_file):
+def test_agent_speed(agent):
     """Test agent execution speed"""
     try:
-        # Import agent
-        with open(agent_file, 'r') as f:
-            code = f.read()
-        
-        exec_globals = {}
-        exec(code, exec_globals)
-        agent_func = exec_globals['agent']
-        
         # Test positions
         test_boards = [
             [0] * 42,  # Empty
@@ -33,24 +26,15 @@ def test_agent_speed(agent_file):
             [1,2,1,2,1,2,0]*3 + [0]*21,  # Mid game
         ]
         
-        class TestObs:
-            def __init__(self, board, mark):
-                self.board = board
-                self.mark = mark
-        
-        class TestConfig:
-            def __init__(self):
-                self.columns = 7
-                self.rows = 6
-        
         times = []
-        config = TestConfig()
+        config = Struct(CONFIGURATION)
         
         for board in test_boards:
-            obs = TestObs(board, 1)
+            obs = Struct(board=board, mark=1, step=sum(1 for cell in board if cell),
+                         remainingOverageTime=OVERAGE_TIME)
             
             start = time.time()
-            move = agent_func(obs, config)
+            move = agent(obs, config)
             elapsed = time.time() - start
             times.append(elapsed)
         
@@ -69,23 +53,14 @@ def test_agent_speed(agent_file):
             'max_time': 999
         }
 
-def test_agent_performance(agent_file, num_games=10):
+def test_agent_performance(agent_func, num_games=10):
     """Test agent win rate"""
     try:
-        # Import agent
-        with open(agent_file, 'r') as f:
-            code = f.read()
-        
-        exec_globals = {}
-        exec(code, exec_globals)
-        agent_func = exec_globals['agent']
-        
         # Test vs Random
         random_wins = 0
         for _ in range(num_games):
             try:
-                result = evaluate("connectx", [agent_func, "random"], num_episodes=1)
-                if result[0][0] > result[0][1]:
+                if play_game(agent_func, "random")['winner'] == 1:
                     random_wins += 1
             except:
                 pass
@@ -94,8 +69,7 @@ def test_agent_performance(agent_file, num_games=10):
         negamax_wins = 0
         for _ in range(5):
             try:
-                result = evaluate("connectx", [agent_func, "negamax"], num_episodes=1)
-                if result[0][0] > result[0][1]:
+                if play_game(agent_func, "negamax")['winner'] == 1:
                     negamax_wins += 1
             except:
                 pass
@@ -125,9 +99,17 @@ def main():
         print(f"\nTesting: {agent_name} ({agent_file})")
         print("-" * 50)
         
+        # Load the agent once into its own worker process
+        try:
+            worker = AgentWorker(agent_file, agent_name)
+        except RuntimeError as e:
+            print(f"  Error: {e}")
+            continue
+        print(f"  Init time: {worker.init_seconds*1000:.2f}ms")
+        
         # Test speed
         print("Testing speed...")
-        speed_results = test_agent_speed(agent_file)
+        speed_results = test_agent_speed(worker)
         
         if 'error' not in speed_results:
             print(f"  Average time: {speed_results['avg_time']*1000:.2f}ms")
@@ -137,7 +119,7 @@ def main():
         
         # Test performance
         print("Testing performance...")
-        perf_results = test_agent_performance(agent_file, num_games=20)
+        perf_results = test_agent_performance(worker, num_games=20)
         
         if 'error' not in perf_results:
             print(f"  vs Random: {perf_results['vs_random']:.1f}%")
@@ -145,6 +127,10 @@ def main():
         else:
             print(f"  Error: {perf_results['error']}")
         
+        memory = worker.memory()
+        worker.close()
+        print(f"  Memory: {memory['rss'] / 2**20:.1f}MB resident, {memory['load'] / 2**20:.1f}MB from loading")
+        
         # Calculate score
         score = 0
         if 'error' not in speed_results:
@@ -163,6 +149,8 @@ def main():
             'file': agent_file,
             'speed': speed_results,
             'performance': perf_results,
+            'init_time': worker.init_seconds,
+            'memory': memory,
             'score': score
         }
         
@@ -0,0 +1,323 @@
+"""
+Monte Carlo Tree Search Engine
+Reusable bitboard MCTS derived from mcts_optimized.py
+
+Same playout policy (win, block, otherwise center-weighted random) and UCB1
+selection as the Kaggle agent, but on bitboards and at module level so the
+engine can be driven from worker processes and analysis tools.
+
+Optional RAVE/AMAF: every node also keeps all-moves-as-first statistics per
+column, blended into the UCB value with beta = sqrt(k / (3n + k)).
+"""
+
+import math
+import random
+import time
+
+from bitboard_core import (
+    H1, CENTER_ORDER, COLUMN_MASKS, play, possible, winning_position,
+    is_winning_move, is_full, encode_position, valid_columns, from_moves
+)
+
+# Playout column weights - center columns preferred
+PLAYOUT_WEIGHTS = [1, 2, 3, 4, 3, 2, 1]
+
+
+def bit_to_column(bit):
+    """Column of a single-bit bitboard"""
+    return (bit.bit_length() - 1) // H1
+
+
+class MCTSNode:
+    """Node in the Monte Carlo Tree
+
+    `wins` is kept from the point of view of the player who moved into this
+    node, so a parent simply maximizes its children's average. The AMAF
+    arrays are indexed by column and seen from the player to move here.
+    """
+
+    __slots__ = ('position', 'mask', 'parent', 'move', 'children',
+                 'untried', 'wins', 'visits', 'terminal',
+                 'amaf_wins', 'amaf_visits')
+
+    def __init__(self, position, mask, parent=None, move=None, terminal=None, rave=False):
+        self.position = position
+        self.mask = mask
+        self.parent = parent
+        self.move = move
+        self.children = []
+        # Reversed so pop() expands the center first
+        self.untried = [] if terminal is not None else valid_columns(mask)[::-1]
+        self.wins = 0.0
+        self.visits = 0
+        # None, or the result for the player who moved in (1 win, 0 draw)
+        self.terminal = terminal
+        # RAVE statistics for moves played from this node
+        self.amaf_wins = [0.0] * 7 if rave else None
+        self.amaf_visits = [0] * 7 if rave else None
+
+    def select_child(self, c):
+        """Select best child using UCB1"""
+        log_visits = math.log(self.visits)
+        best = None
+        best_score = -float('inf')
+        for child in self.children:
+            if child.visits == 0:
+                return child
+            score = child.wins / child.visits + c * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best = child
+        return best
+
+    def select_child_rave(self, c, beta_fn):
+        """Select best child using UCB1 on the RAVE-blended value"""
+        log_visits = math.log(self.visits)
+        best = None
+        best_score = -float('inf')
+        for child in self.children:
+            if child.visits == 0:
+                return child
+            value = child.wins / child.visits
+            amaf_visits = self.amaf_visits[child.move]
+            if amaf_visits:
+                beta = beta_fn(child.visits)
+                value = (1 - beta) * value + beta * self.amaf_wins[child.move] / amaf_visits
+            score = value + c * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best_score = score
+                best = child
+        return best
+
+    def best_amaf_untried(self):
+        """Untried column with the best AMAF average (center first on ties)"""
+        best = self.untried[-1]
+        best_value = -float('inf')
+        for col in reversed(self.untried):
+            visits = self.amaf_visits[col]
+            value = self.amaf_wins[col] / visits if visits else 0.0
+            if value > best_value:
+                best_value = value
+                best = col
+        return best
+
+    def expand(self, col=None):
+        """Expand node by adding a new child (`col` defaults to the next untried)"""
+        if col is None:
+            col = self.untried.pop()
+        else:
+            self.untried.remove(col)
+        terminal = 1 if is_winning_move(self.position, self.mask, col) else None
+        new_position, new_mask = play(self.position, self.mask, col)
+        if terminal is None and is_full(new_mask):
+            terminal = 0
+        child = MCTSNode(new_position, new_mask, parent=self, move=col, terminal=terminal,
+                         rave=self.amaf_visits is not None)
+        self.children.append(child)
+        return child
+
+
+class MCTSEngine:
+    """
+    Bitboard MCTS with smart playouts
+    - UCB1 tree policy
+    - Win/block/center-weighted playouts
+    - Iteration or wall-clock budget
+    - Optional RAVE/AMAF with equivalence parameter `rave_k`
+    """
+
+    DEFAULT_ITERATIONS = 1000
+
+    def __init__(self, c=math.sqrt(2), seed=None, rave=False, rave_k=300):
+        self.c = c
+        self.rng = random.Random(seed)
+        self.playouts = 0
+        self.rave = rave
+        self.rave_k = rave_k
+
+    def rave_beta(self, visits):
+        """Weight of the AMAF value for a child with `visits` real visits"""
+        return math.sqrt(self.rave_k / (3 * visits + self.rave_k))
+
+    def rollout(self, position, mask, played=None):
+        """Play out to the end; result for the side to move at the start
+
+        If `played` is a list, the playout's columns are appended to it.
+        """
+        rng = self.rng
+        sign = 1
+        while True:
+            moves = possible(mask)
+            if not moves:
+                return 0
+
+            wins = winning_position(position, mask) & moves
+            if wins:
+                if played is not None:
+                    played.append(bit_to_column(wins & -wins))
+                return sign
+
+            threats = winning_position(position ^ mask, mask) & moves
+            if threats:
+                if threats & (threats - 1):
+                    # Two threats cannot both be blocked
+                    return -sign
+                col = bit_to_column(threats)
+            else:
+                cols = [c for c in range(7) if moves & COLUMN_MASKS[c]]
+                total = 0
+                for c in cols:
+                    total += PLAYOUT_WEIGHTS[c]
+                r = rng.random() * total
+                for col in cols:
+                    r -= PLAYOUT_WEIGHTS[col]
+                    if r < 0:
+                        break
+
+            if played is not None:
+                played.append(col)
+            position, mask = play(position, mask, col)
+            sign = -sign
+
+    def run(self, position, mask, iterations=None, time_limit=None):
+        """Grow a tree from (position, mask) and return its root"""
+        if iterations is None and time_limit is None:
+            iterations = self.DEFAULT_ITERATIONS
+
+        root = MCTSNode(position, mask, rave=self.rave)
+        start = time.time()
+        done = 0
+
+        while True:
+            if iterations is not None and done >= iterations:
+                break
+            if time_limit is not None and done % 16 == 0 and time.time() - start > time_limit:
+                break
+            self.iterate(root)
+            done += 1
+
+        return root
+
+    def iterate(self, root):
+        """One selection / expansion / simulation / backpropagation pass"""
+        node = root
+        path = [root]
+
+        # Selection
+        while not node.untried and node.children:
+            if self.rave:
+                node = node.select_child_rave(self.c, self.rave_beta)
+            else:
+                node = node.select_child(self.c)
+            path.append(node)
+
+        # Expansion
+        if node.untried:
+            node = node.expand(node.best_amaf_untried() if self.rave else None)
+            path.append(node)
+
+        # Simulation - result for the player who moved into `node`
+        played = [n.move for n in path[1:]] if self.rave else None
+        if node.terminal is not None:
+            result = node.terminal
+        else:
+            result = -self.rollout(node.position, node.mask, played)
+
+        if self.rave:
+            # Result for the side to move at the root
+            root_result = result if len(path) % 2 == 0 else -result
+            self._update_amaf(path, played, root_result)
+
+        # Backpropagation
+        while node is not None:
+            node.visits += 1
+            node.wins += result
+            result = -result
+            node = node.parent
+
+        self.playouts += 1
+
+    def _update_amaf(self, path, played, root_result):
+        """Credit every column a player chose later in the episode to that player's nodes"""
+        for depth, node in enumerate(path):
+            if node.terminal is not None:
+                continue
+            value = root_result if depth % 2 == 0 else -root_result
+            seen = 0
+            # played[j] was chosen by the side to move at depth j % 2
+            for j in range(depth, len(played), 2):
+                col = played[j]
+                if not seen & (1 << col):
+                    seen |= 1 << col
+                    node.amaf_visits[col] += 1
+                    node.amaf_wins[col] += value
+
+    def child_stats(self, root):
+        """Per-column (visits, wins) of the root's children"""
+        visits = [0] * 7
+        wins = [0.0] * 7
+        for child in root.children:
+            visits[child.move] = child.visits
+            wins[child.move] = child.wins
+        return visits, wins
+
+    def best_move(self, position, mask, iterations=None, time_limit=None):
+        """Immediate tactics first, then the most visited root child"""
+        moves = possible(mask)
+        if not moves:
+            return None
+
+        wins = winning_position(position, mask) & moves
+        if wins:
+            return bit_to_column(wins & -wins)
+
+        threats = winning_position(position ^ mask, mask) & moves
+        if threats:
+            return bit_to_column(threats & -threats)
+
+        root = self.run(position, mask, iterations, time_limit)
+        if root.children:
+            return max(root.children, key=lambda c: c.visits).move
+        return next(c for c in CENTER_ORDER if moves & COLUMN_MASKS[c])
+
+    def search(self, board, mark, iterations=None, time_limit=None):
+        """Best move for a Kaggle board"""
+        position, mask = encode_position(board, mark)
+        return self.best_move(position, mask, iterations, time_limit)
+
+
+def convergence_report(moves=(3, 3, 2, 4), budgets=(50, 100, 200, 400, 800, 1600), trials=10):
+    """How often plain UCT and RAVE agree with their own 4x-budget answer"""
+    position, mask = from_moves(moves)
+    report = {}
+
+    for rave in (False, True):
+        reference = MCTSEngine(seed=12345, rave=rave).run(position, mask, budgets[-1] * 4)
+        target = max(reference.children, key=lambda c: c.visits).move
+
+        agreement = []
+        for budget in budgets:
+            hits = 0
+            for trial in range(trials):
+                root = MCTSEngine(seed=trial, rave=rave).run(position, mask, budget)
+                if max(root.children, key=lambda c: c.visits).move == target:
+                    hits += 1
+            agreement.append(hits / trials)
+
+        name = 'rave' if rave else 'uct'
+        report[name] = dict(zip(budgets, agreement))
+        print(f"{name:>5}: " + "  ".join(f"{b}:{a:.0%}" for b, a in zip(budgets, agreement)))
+
+    return report
+
+
+def agent(observation, configuration):
+    """MCTS engine agent with a wall-clock budget"""
+    if not hasattr(agent, 'engine'):
+        agent.engine = MCTSEngine(rave=True)
+    return agent.engine.search(observation.board, observation.mark, time_limit=0.8)
+
+
+if __name__ == "__main__":
+    print("Best-move stability by iteration budget")
+    convergence_report()
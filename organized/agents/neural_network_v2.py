@@ -5,11 +5,78 @@ Implements a CNN-based value and policy network
 """
 
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+import base64
 import json
+import struct
+import sys
 import time
-from collections import deque
+import zlib
+from collections import OrderedDict
 import random
 
+from bitboard_core import encode_position, decode_position, canonical_key, play
+
+# Binary weight file: magic, version, header length, JSON header, aligned tensors
+WEIGHTS_MAGIC = b'CXNW'
+WEIGHTS_VERSION = 1
+WEIGHTS_ALIGN = 64
+
+
+def pack_weights(meta, tensors):
+    """
+    Binary weight file: magic, version, header length, JSON header, then
+    every tensor little-endian and 64-byte aligned in its own dtype
+    """
+    entries = []
+    offset = 0
+    for name, tensor in tensors.items():
+        data = np.ascontiguousarray(tensor, dtype=np.asarray(tensor).dtype.newbyteorder('<'))
+        entries.append({'name': name, 'dtype': data.dtype.str, 'shape': list(data.shape),
+                        'offset': offset})
+        offset += -(-data.nbytes // WEIGHTS_ALIGN) * WEIGHTS_ALIGN
+    
+    header = json.dumps(dict(meta, tensors=entries)).encode('utf-8')
+    
+    # Pad so tensor data starts on an aligned offset
+    prefix_len = len(WEIGHTS_MAGIC) + 8 + len(header)
+    header += b' ' * (-prefix_len % WEIGHTS_ALIGN)
+    data_start = prefix_len + (-prefix_len % WEIGHTS_ALIGN)
+    
+    out = bytearray(data_start + offset)
+    out[:8] = WEIGHTS_MAGIC + struct.pack('<I', WEIGHTS_VERSION)
+    out[8:12] = struct.pack('<I', len(header))
+    out[12:12 + len(header)] = header
+    for entry, tensor in zip(entries, tensors.values()):
+        raw = np.ascontiguousarray(tensor, dtype=entry['dtype']).tobytes()
+        start = data_start + entry['offset']
+        out[start:start + len(raw)] = raw
+    
+    return bytes(out)
+
+
+def unpack_weights(buffer):
+    """Parse a binary weight file; returns (header, {name: read-only view})"""
+    buffer = memoryview(buffer)
+    if bytes(buffer[:4]) != WEIGHTS_MAGIC:
+        raise ValueError("Not a ConnectXNetwork weight file")
+    version, header_len = struct.unpack('<II', bytes(buffer[4:12]))
+    if version != WEIGHTS_VERSION:
+        raise ValueError(f"Unsupported weight format version {version}")
+    
+    header = json.loads(bytes(buffer[12:12 + header_len]).decode('utf-8'))
+    data_start = 12 + header_len
+    
+    tensors = {}
+    for entry in header['tensors']:
+        count = int(np.prod(entry['shape'], dtype=np.int64))
+        tensors[entry['name']] = np.frombuffer(
+            buffer, dtype=entry['dtype'], count=count,
+            offset=data_start + entry['offset']).reshape(entry['shape'])
+    
+    return header, tensors
+
+
 class ConnectXNetwork:
     """
     Neural network for Connect X position evaluation and move prediction
@@ -37,22 +104,27 @@ class ConnectXNetwork:
             'policy_head': self._xavier_init((hidden_size, 7)),
             
             # Biases
-            'b_conv1': np.zeros((32,)),
-            'b_conv2': np.zeros((64,)),
-            'b_fc1': np.zeros((hidden_size,)),
-            'b_fc2': np.zeros((hidden_size,)),
-            'b_value': np.zeros((1,)),
-            'b_policy': np.zeros((7,))
+            'b_conv1': np.zeros((32,), dtype=np.float32),
+            'b_conv2': np.zeros((64,), dtype=np.float32),
+            'b_fc1': np.zeros((hidden_size,), dtype=np.float32),
+            'b_fc2': np.zeros((hidden_size,), dtype=np.float32),
+            'b_value': np.zeros((1,), dtype=np.float32),
+            'b_policy': np.zeros((7,), dtype=np.float32)
         }
         
-        # Adam optimizer parameters
+        self._init_optimizer_state()
+    
+    def _init_optimizer_state(self):
+        """Adam moments and preallocated gradient buffers, one per weight"""
         self.adam_params = {}
+        self.gradients = {}
         for key in self.weights:
             self.adam_params[key] = {
                 'm': np.zeros_like(self.weights[key]),
                 'v': np.zeros_like(self.weights[key]),
                 't': 0
             }
+            self.gradients[key] = np.zeros_like(self.weights[key])
     
     def _xavier_init(self, shape):
         """Xavier weight initialization"""
@@ -63,48 +135,54 @@ class ConnectXNetwork:
             fan_out = shape[-1]
         
         std = np.sqrt(2.0 / (fan_in + fan_out))
-        return np.random.normal(0, std, shape)
+        return np.random.normal(0, std, shape).astype(np.float32)
     
     def _relu(self, x):
         """ReLU activation"""
         return np.maximum(0, x)
     
     def _softmax(self, x):
-        """Softmax activation"""
-        exp_x = np.exp(x - np.max(x))
-        return exp_x / np.sum(exp_x)
+        """Softmax activation (row-wise for batches)"""
+        exp_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+        return exp_x / np.sum(exp_x, axis=-1, keepdims=True)
     
     def _tanh(self, x):
         """Tanh activation"""
         return np.tanh(x)
     
-    def _conv2d(self, input_data, kernel, bias, stride=1):
-        """Simple 2D convolution"""
+    def _im2col(self, input_data, k_h, k_w, stride=1):
+        """
+        Gather every k_h x k_w patch with same (zero) padding
+        (N, H, W, C) -> (N, H', W', k_h * k_w * C)
+        """
         batch, in_h, in_w, in_c = input_data.shape
-        k_h, k_w, k_in_c, k_out_c = kernel.shape
+        pad_h, pad_w = k_h // 2, k_w // 2
+        padded = np.pad(input_data, ((0, 0), (pad_h, pad_h), (pad_w, pad_w), (0, 0)))
         
-        out_h = (in_h - k_h) // stride + 1
-        out_w = (in_w - k_w) // stride + 1
+        # (N, H, W, C, k_h, k_w) view, no copy
+        windows = sliding_window_view(padded, (k_h, k_w), axis=(1, 2))
+        windows = windows[:, ::stride, ::stride]
+        out_h, out_w = windows.shape[1], windows.shape[2]
         
-        output = np.zeros((batch, out_h, out_w, k_out_c))
+        # Patch layout (k_h, k_w, C) matches kernel.reshape(-1, out_c)
+        return windows.transpose(0, 1, 2, 4, 5, 3).reshape(batch, out_h, out_w, k_h * k_w * in_c)
+    
+    def _conv2d(self, input_data, kernel, bias, stride=1):
+        """2D convolution with same padding: im2col + a single matmul"""
+        k_h, k_w, k_in_c, k_out_c = kernel.shape
         
-        for b in range(batch):
-            for i in range(out_h):
-                for j in range(out_w):
-                    for k in range(k_out_c):
-                        # Extract patch
-                        patch = input_data[b, i*stride:i*stride+k_h, j*stride:j*stride+k_w, :]
-                        # Convolve
-                        output[b, i, j, k] = np.sum(patch * kernel[:, :, :, k]) + bias[k]
+        cols = self._im2col(input_data, k_h, k_w, stride)
+        batch, out_h, out_w, patch = cols.shape
         
-        return output
+        output = np.dot(cols.reshape(-1, patch), kernel.reshape(patch, k_out_c)) + bias
+        return output.reshape(batch, out_h, out_w, k_out_c)
     
     def board_to_input(self, board, player):
         """
         Convert board to neural network input
         3 channels: current player pieces, opponent pieces, valid moves
         """
-        input_data = np.zeros((1, 6, 7, 3))
+        input_data = np.zeros((1, 6, 7, 3), dtype=np.float32)
         
         # Reshape board to 6x7
         board_2d = np.array(board).reshape(6, 7)
@@ -123,14 +201,38 @@ class ConnectXNetwork:
         
         return input_data
     
+    def boards_to_input(self, boards, players):
+        """
+        Vectorized board_to_input for N boards
+        Returns an (N, 6, 7, 3) array
+        """
+        boards_2d = np.asarray(boards).reshape(-1, 6, 7)
+        players = np.asarray(players).reshape(-1, 1, 1)
+        
+        input_data = np.zeros(boards_2d.shape + (3,), dtype=np.float32)
+        input_data[..., 0] = boards_2d == players
+        input_data[..., 1] = (boards_2d != 0) & (boards_2d != players)
+        input_data[:, 0, :, 2] = boards_2d[:, 0, :] == 0
+        
+        return input_data
+    
     def forward(self, board, player):
         """
         Forward pass through the network
         Returns value estimate and move probabilities
         """
-        # Convert board to input format
-        x = self.board_to_input(board, player)
-        
+        values, policies = self.forward_batch([board], [player])
+        return values[0], policies[0]
+    
+    def forward_batch(self, boards, players):
+        """
+        Forward pass for N positions in one set of matrix operations
+        Returns values (N,) and policies (N, 7)
+        """
+        return self._forward_inputs(self.boards_to_input(boards, players))
+    
+    def _forward_inputs(self, x):
+        """Run the layer stack on encoded inputs of shape (N, 6, 7, 3)"""
         # Convolutional layers
         x = self._conv2d(x, self.weights['conv1'], self.weights['b_conv1'])
         x = self._relu(x)
@@ -149,14 +251,14 @@ class ConnectXNetwork:
         x = self._relu(x)
         
         # Value head
-        value = np.dot(x, self.weights['value_head']) + self.weights['b_value']
-        value = self._tanh(value[0, 0])  # Output between -1 and 1
+        values = np.dot(x, self.weights['value_head']) + self.weights['b_value']
+        values = self._tanh(values[:, 0])  # Output between -1 and 1
         
         # Policy head
         policy_logits = np.dot(x, self.weights['policy_head']) + self.weights['b_policy']
-        policy = self._softmax(policy_logits[0])
+        policies = self._softmax(policy_logits)
         
-        return value, policy
+        return values, policies
     
     def predict_move(self, board, player, temperature=0.0):
         """
@@ -202,80 +304,124 @@ class ConnectXNetwork:
         
         return move, value
     
-    def train_on_batch(self, positions, values, policies):
+    def _col2im(self, d_cols, input_shape, k_h, k_w):
         """
-        Train network on a batch of positions
-        positions: list of (board, player) tuples
-        values: list of target values (-1 to 1)
-        policies: list of target policy distributions
+        Adjoint of _im2col (stride 1, same padding)
+        (N, H, W, k_h * k_w * C) -> (N, H, W, C)
         """
-        batch_size = len(positions)
-        
-        # Prepare batch inputs
-        batch_inputs = []
-        for board, player in positions:
-            batch_inputs.append(self.board_to_input(board, player))
-        batch_input = np.concatenate(batch_inputs, axis=0)
+        batch, in_h, in_w, in_c = input_shape
+        pad_h, pad_w = k_h // 2, k_w // 2
+        d_cols = d_cols.reshape(batch, in_h, in_w, k_h, k_w, in_c)
         
-        # Forward pass
-        # Store activations for backprop
-        activations = {}
+        d_padded = np.zeros((batch, in_h + 2 * pad_h, in_w + 2 * pad_w, in_c), dtype=d_cols.dtype)
+        for i in range(k_h):
+            for j in range(k_w):
+                d_padded[:, i:i + in_h, j:j + in_w, :] += d_cols[:, :, :, i, j, :]
         
-        # Conv1
-        z_conv1 = self._conv2d(batch_input, self.weights['conv1'], self.weights['b_conv1'])
-        a_conv1 = self._relu(z_conv1)
-        activations['conv1'] = (batch_input, z_conv1, a_conv1)
+        return d_padded[:, pad_h:pad_h + in_h, pad_w:pad_w + in_w, :]
+    
+    def compute_gradients(self, inputs, values, policies):
+        """
+        Forward and analytic backward pass for a whole batch
+        inputs: (N, 6, 7, 3) encoded boards
+        values: (N,) target values (-1 to 1)
+        policies: (N, 7) target policy distributions
+        Fills self.gradients and returns (total_loss, value_loss, policy_loss)
+        """
+        w = self.weights
+        g = self.gradients
+        batch_size = inputs.shape[0]
+        values = np.asarray(values, dtype=inputs.dtype).reshape(batch_size)
+        policies = np.asarray(policies, dtype=inputs.dtype).reshape(batch_size, 7)
         
-        # Conv2
-        z_conv2 = self._conv2d(a_conv1, self.weights['conv2'], self.weights['b_conv2'])
-        a_conv2 = self._relu(z_conv2)
-        activations['conv2'] = (a_conv1, z_conv2, a_conv2)
+        # Forward pass, keeping what backprop needs
+        k1 = w['conv1'].shape
+        cols1 = self._im2col(inputs, k1[0], k1[1]).reshape(-1, k1[0] * k1[1] * k1[2])
+        z_conv1 = np.dot(cols1, w['conv1'].reshape(-1, k1[3])) + w['b_conv1']
+        a_conv1 = self._relu(z_conv1).reshape(batch_size, 6, 7, k1[3])
         
-        # Flatten
-        a_flat = a_conv2.reshape(batch_size, -1)
+        k2 = w['conv2'].shape
+        cols2 = self._im2col(a_conv1, k2[0], k2[1]).reshape(-1, k2[0] * k2[1] * k2[2])
+        z_conv2 = np.dot(cols2, w['conv2'].reshape(-1, k2[3])) + w['b_conv2']
+        a_flat = self._relu(z_conv2).reshape(batch_size, -1)
         
-        # FC1
-        z_fc1 = np.dot(a_flat, self.weights['fc1']) + self.weights['b_fc1']
+        z_fc1 = np.dot(a_flat, w['fc1']) + w['b_fc1']
         a_fc1 = self._relu(z_fc1)
-        activations['fc1'] = (a_flat, z_fc1, a_fc1)
         
-        # FC2
-        z_fc2 = np.dot(a_fc1, self.weights['fc2']) + self.weights['b_fc2']
+        z_fc2 = np.dot(a_fc1, w['fc2']) + w['b_fc2']
         a_fc2 = self._relu(z_fc2)
-        activations['fc2'] = (a_fc1, z_fc2, a_fc2)
         
-        # Value head
-        z_value = np.dot(a_fc2, self.weights['value_head']) + self.weights['b_value']
-        pred_values = np.tanh(z_value).flatten()
+        pred_values = np.tanh(np.dot(a_fc2, w['value_head']) + w['b_value'])[:, 0]
+        pred_policies = self._softmax(np.dot(a_fc2, w['policy_head']) + w['b_policy'])
         
-        # Policy head
-        z_policy = np.dot(a_fc2, self.weights['policy_head']) + self.weights['b_policy']
-        pred_policies = np.array([self._softmax(z_policy[i]) for i in range(batch_size)])
+        # Losses
+        value_error = pred_values - values
+        value_loss = np.mean(value_error ** 2)
+        policy_loss = -np.mean(np.sum(policies * np.log(pred_policies + 1e-8), axis=1))
         
-        # Calculate losses
-        value_loss = np.mean((pred_values - np.array(values)) ** 2)
-        policy_loss = -np.mean(np.sum(np.array(policies) * np.log(pred_policies + 1e-8), axis=1))
-        total_loss = value_loss + policy_loss
+        # Heads
+        dz_value = (2.0 / batch_size) * value_error * (1 - pred_values ** 2)
+        dz_value = dz_value.reshape(-1, 1)
+        dz_policy = (pred_policies * policies.sum(axis=1, keepdims=True) - policies) / batch_size
+        
+        np.dot(a_fc2.T, dz_value, out=g['value_head'])
+        np.sum(dz_value, axis=0, out=g['b_value'])
+        np.dot(a_fc2.T, dz_policy, out=g['policy_head'])
+        np.sum(dz_policy, axis=0, out=g['b_policy'])
+        
+        # FC2
+        dz_fc2 = np.dot(dz_value, w['value_head'].T) + np.dot(dz_policy, w['policy_head'].T)
+        dz_fc2 *= z_fc2 > 0
+        np.dot(a_fc1.T, dz_fc2, out=g['fc2'])
+        np.sum(dz_fc2, axis=0, out=g['b_fc2'])
+        
+        # FC1
+        dz_fc1 = np.dot(dz_fc2, w['fc2'].T)
+        dz_fc1 *= z_fc1 > 0
+        np.dot(a_flat.T, dz_fc1, out=g['fc1'])
+        np.sum(dz_fc1, axis=0, out=g['b_fc1'])
         
-        # Backward pass (simplified gradient computation)
-        # This is a simplified version - full implementation would compute proper gradients
-        gradients = {}
+        # Conv2 (rows of z_conv2 are the N*6*7 output cells)
+        dz_conv2 = np.dot(dz_fc1, w['fc1'].T).reshape(-1, k2[3])
+        dz_conv2 *= z_conv2 > 0
+        np.dot(cols2.T, dz_conv2, out=g['conv2'].reshape(-1, k2[3]))
+        np.sum(dz_conv2, axis=0, out=g['b_conv2'])
         
-        # Value gradient
-        d_value = 2 * (pred_values - np.array(values)) / batch_size
-        d_value = d_value.reshape(-1, 1)
+        # Conv1
+        d_cols2 = np.dot(dz_conv2, w['conv2'].reshape(-1, k2[3]).T)
+        dz_conv1 = self._col2im(d_cols2, a_conv1.shape, k2[0], k2[1]).reshape(-1, k1[3])
+        dz_conv1 *= z_conv1 > 0
+        np.dot(cols1.T, dz_conv1, out=g['conv1'].reshape(-1, k1[3]))
+        np.sum(dz_conv1, axis=0, out=g['b_conv1'])
         
-        # Policy gradient
-        d_policy = (pred_policies - np.array(policies)) / batch_size
+        return value_loss + policy_loss, value_loss, policy_loss
+    
+    def train_step(self, inputs, values, policies):
+        """
+        One Adam step on pre-encoded inputs
+        inputs: (N, 6, 7, 3) float32 array (see boards_to_input)
+        """
+        inputs = np.asarray(inputs, dtype=self.weights['fc1'].dtype)
+        losses = self.compute_gradients(inputs, values, policies)
         
-        # Update weights using Adam optimizer
-        self._adam_update('value_head', -d_value * self.learning_rate)
-        self._adam_update('policy_head', -d_policy * self.learning_rate)
+        for param_name in self.weights:
+            self._adam_update(param_name, self.gradients[param_name])
         
-        return total_loss, value_loss, policy_loss
+        return losses
+    
+    def train_on_batch(self, positions, values, policies):
+        """
+        Train network on a batch of positions
+        positions: list of (board, player) tuples
+        values: list of target values (-1 to 1)
+        policies: list of target policy distributions
+        """
+        boards = [board for board, _ in positions]
+        players = [player for _, player in positions]
+        return self.train_step(self.boards_to_input(boards, players), values, policies)
     
     def _adam_update(self, param_name, gradient):
-        """Adam optimizer update"""
+        """Adam optimizer update (in place)"""
         beta1 = 0.9
         beta2 = 0.999
         epsilon = 1e-8
@@ -284,34 +430,297 @@ class ConnectXNetwork:
         params['t'] += 1
         
         # Update biased moments
-        params['m'] = beta1 * params['m'] + (1 - beta1) * gradient
-        params['v'] = beta2 * params['v'] + (1 - beta2) * (gradient ** 2)
+        params['m'] *= beta1
+        params['m'] += (1 - beta1) * gradient
+        params['v'] *= beta2
+        params['v'] += (1 - beta2) * (gradient ** 2)
         
         # Bias correction
         m_hat = params['m'] / (1 - beta1 ** params['t'])
         v_hat = params['v'] / (1 - beta2 ** params['t'])
         
         # Update weights
-        self.weights[param_name] += self.learning_rate * m_hat / (np.sqrt(v_hat) + epsilon)
+        self.weights[param_name] -= self.learning_rate * m_hat / (np.sqrt(v_hat) + epsilon)
     
-    def save(self, filepath):
-        """Save network weights"""
-        save_dict = {
-            'weights': {k: v.tolist() for k, v in self.weights.items()},
+    def to_bytes(self):
+        """
+        Serialize weights in the binary format
+        Each tensor is float32, little-endian and 64-byte aligned, so the
+        file can be memory-mapped without copying.
+        """
+        weights = {name: np.asarray(w, dtype='<f4') for name, w in self.weights.items()}
+        return pack_weights({
             'hidden_size': self.hidden_size,
             'learning_rate': self.learning_rate
-        }
-        with open(filepath, 'w') as f:
-            json.dump(save_dict, f)
+        }, weights)
+    
+    def load_bytes(self, buffer, copy=True):
+        """
+        Load weights from the binary format
+        With copy=False the arrays are read-only views into `buffer`
+        (inference only - training updates weights in place).
+        """
+        header, weights = unpack_weights(buffer)
+        if header.get('quantized'):
+            raise ValueError("Quantized weight file - load it with QuantizedNetwork")
+        
+        self.hidden_size = header['hidden_size']
+        self.learning_rate = header['learning_rate']
+        if copy:
+            weights = {name: w.astype(np.float32) for name, w in weights.items()}
+        self.weights = weights
+        if copy:
+            self._init_optimizer_state()
+    
+    def save(self, filepath):
+        """Save network weights (binary format; JSON for .json paths)"""
+        if filepath.endswith('.json'):
+            save_dict = {
+                'weights': {k: v.tolist() for k, v in self.weights.items()},
+                'hidden_size': self.hidden_size,
+                'learning_rate': self.learning_rate
+            }
+            with open(filepath, 'w') as f:
+                json.dump(save_dict, f)
+            return
+        
+        with open(filepath, 'wb') as f:
+            f.write(self.to_bytes())
     
-    def load(self, filepath):
-        """Load network weights"""
+    def load(self, filepath, mmap=False):
+        """
+        Load network weights from either format
+        mmap=True maps a binary file read-only instead of reading it
+        """
+        with open(filepath, 'rb') as f:
+            magic = f.read(len(WEIGHTS_MAGIC))
+        
+        if magic == WEIGHTS_MAGIC:
+            if mmap:
+                self.load_bytes(np.memmap(filepath, dtype=np.uint8, mode='r'), copy=False)
+            else:
+                with open(filepath, 'rb') as f:
+                    self.load_bytes(f.read())
+            return
+        
         with open(filepath, 'r') as f:
             save_dict = json.load(f)
         
         self.hidden_size = save_dict['hidden_size']
         self.learning_rate = save_dict['learning_rate']
-        self.weights = {k: np.array(v) for k, v in save_dict['weights'].items()}
+        self.weights = {k: np.array(v, dtype=np.float32) for k, v in save_dict['weights'].items()}
+        self._init_optimizer_state()
+    
+    def encode(self):
+        """Compact text form (zlib + base64) for embedding in a submission file"""
+        return base64.b64encode(zlib.compress(self.to_bytes(), 9)).decode('ascii')
+    
+    @classmethod
+    def from_encoded(cls, text, copy=False):
+        """Rebuild a network from encode() output"""
+        network = cls.__new__(cls)
+        network.input_size = 42
+        network.output_size = 7
+        network.load_bytes(zlib.decompress(base64.b64decode(text)), copy=copy)
+        return network
+
+
+class QuantizedNetwork(ConnectXNetwork):
+    """
+    Int8 inference copy of a ConnectXNetwork
+    Weights are int8 with one float32 scale per output channel; each layer's
+    input is rounded onto an int8 grid whose scale comes from a calibration
+    pass over real positions. Products of the two grids are summed by float32
+    BLAS (NumPy's int32 matmul has no BLAS path and is ~100x slower): each
+    product is exact in float32 and the sum is within float32 rounding of
+    the int32 sum, then one per-channel scale brings it back to float.
+    Inference only: the training methods do not apply.
+    """
+    
+    # Quantized layers in forward order with their (float32) biases
+    LAYERS = [
+        ('conv1', 'b_conv1'),
+        ('conv2', 'b_conv2'),
+        ('fc1', 'b_fc1'),
+        ('fc2', 'b_fc2'),
+        ('value_head', 'b_value'),
+        ('policy_head', 'b_policy')
+    ]
+    
+    def __init__(self, hidden_size=256):
+        self.input_size = 42
+        self.hidden_size = hidden_size
+        self.output_size = 7
+        self.learning_rate = 0.0
+        self.weights = {}
+        self._kernels = {}
+    
+    @classmethod
+    def from_network(cls, network, boards, players, percentile=99.99):
+        """
+        Quantize `network`, calibrating activation scales on the given positions
+        `percentile` of each layer's input magnitudes maps to 127.
+        """
+        quantized = cls(network.hidden_size)
+        weights = network.weights
+        
+        # Float activations feeding each layer
+        x = network.boards_to_input(boards, players)
+        inputs = {'conv1': x}
+        x = network._relu(network._conv2d(x, weights['conv1'], weights['b_conv1']))
+        inputs['conv2'] = x
+        x = network._relu(network._conv2d(x, weights['conv2'], weights['b_conv2']))
+        x = x.reshape(x.shape[0], -1)
+        inputs['fc1'] = x
+        x = network._relu(np.dot(x, weights['fc1']) + weights['b_fc1'])
+        inputs['fc2'] = x
+        x = network._relu(np.dot(x, weights['fc2']) + weights['b_fc2'])
+        inputs['value_head'] = inputs['policy_head'] = x
+        
+        for name, bias in cls.LAYERS:
+            kernel = np.asarray(weights[name], dtype=np.float32)
+            columns = kernel.reshape(-1, kernel.shape[-1])
+            scale = np.abs(columns).max(axis=0) / 127.0
+            scale[scale == 0] = 1.0
+            
+            limit = np.percentile(np.abs(inputs[name]), percentile)
+            input_scale = limit / 127.0 if limit > 0 else 1.0 / 127.0
+            
+            quantized.weights[name] = np.clip(np.rint(kernel / scale), -127, 127).astype(np.int8)
+            quantized.weights[name + '_scale'] = scale.astype(np.float32)
+            quantized.weights[name + '_input_scale'] = np.array([input_scale], dtype=np.float32)
+            quantized.weights[bias] = np.array(weights[bias], dtype=np.float32)
+        
+        quantized._prepare()
+        return quantized
+    
+    def _prepare(self):
+        """
+        Int8 kernels as 2-D float32 matrices for the BLAS accumulation, and
+        each layer's combined output scale (input scale x per-channel weight scale)
+        """
+        self._kernels = {}
+        for name, _ in self.LAYERS:
+            kernel = self.weights[name]
+            self._kernels[name] = kernel.reshape(-1, kernel.shape[-1]).astype(np.float32)
+            self._kernels[name + '_scale'] = (self.weights[name + '_input_scale'][0] *
+                                              self.weights[name + '_scale']).astype(np.float32)
+    
+    def _quantize_input(self, x, name):
+        """Round activations onto the layer's int8 grid (kept as integer-valued float32)"""
+        scale = self.weights[name + '_input_scale'][0]
+        x = np.rint(np.asarray(x, dtype=np.float32) / scale)
+        return np.clip(x, -127, 127, out=x)
+    
+    def _dequantize(self, accumulator, name, bias):
+        """Grid sums back to float: one per-channel scale, plus bias"""
+        accumulator *= self._kernels[name + '_scale']
+        accumulator += self.weights[bias]
+        return accumulator
+    
+    def _dense(self, x, name, bias):
+        """Quantized fully connected layer"""
+        accumulator = np.dot(self._quantize_input(x, name), self._kernels[name])
+        return self._dequantize(accumulator, name, bias)
+    
+    def _quantized_conv(self, x, name, bias):
+        """Quantized same-padded convolution (zero padding is exact on the grid)"""
+        k_h, k_w = self.weights[name].shape[:2]
+        cols = self._im2col(self._quantize_input(x, name), k_h, k_w)
+        batch, out_h, out_w, patch = cols.shape
+        accumulator = np.dot(cols.reshape(-1, patch), self._kernels[name])
+        return self._dequantize(accumulator, name, bias).reshape(batch, out_h, out_w, -1)
+    
+    def _forward_inputs(self, x):
+        """Run the int8 layer stack on encoded inputs of shape (N, 6, 7, 3)"""
+        x = self._relu(self._quantized_conv(x, 'conv1', 'b_conv1'))
+        x = self._relu(self._quantized_conv(x, 'conv2', 'b_conv2'))
+        x = x.reshape(x.shape[0], -1)
+        
+        x = self._relu(self._dense(x, 'fc1', 'b_fc1'))
+        x = self._relu(self._dense(x, 'fc2', 'b_fc2'))
+        
+        values = self._tanh(self._dense(x, 'value_head', 'b_value')[:, 0])
+        policies = self._softmax(self._dense(x, 'policy_head', 'b_policy'))
+        
+        return values, policies
+    
+    def to_bytes(self):
+        """Serialize in the binary format, kernels kept as int8"""
+        return pack_weights({'hidden_size': self.hidden_size, 'quantized': True}, self.weights)
+    
+    def load_bytes(self, buffer, copy=True):
+        """Load int8 weights written by to_bytes (copy=False keeps read-only views)"""
+        header, weights = unpack_weights(buffer)
+        if not header.get('quantized'):
+            raise ValueError("Float weight file - quantize it with QuantizedNetwork.from_network")
+        
+        self.hidden_size = header['hidden_size']
+        self.learning_rate = 0.0
+        self.weights = {name: w.copy() for name, w in weights.items()} if copy else weights
+        self._prepare()
+    
+    def save(self, filepath):
+        """Save int8 weights (binary format only)"""
+        with open(filepath, 'wb') as f:
+            f.write(self.to_bytes())
+    
+    def load(self, filepath, mmap=False):
+        """Load int8 weights, optionally memory-mapped"""
+        if mmap:
+            self.load_bytes(np.memmap(filepath, dtype=np.uint8, mode='r'), copy=False)
+        else:
+            with open(filepath, 'rb') as f:
+                self.load_bytes(f.read())
+
+
+def positions_from_games(games, max_positions=5000):
+    """
+    Replay self-play game records ({'moves': [...]}) into the boards seen by
+    the side to move - calibration and evaluation data for the network
+    """
+    boards = []
+    players = []
+    for game in games:
+        position, mask = 0, 0
+        for turn, col in enumerate(game['moves']):
+            if len(boards) >= max_positions:
+                return boards, players
+            player = 1 if turn % 2 == 0 else 2
+            boards.append(decode_position(position, mask, player))
+            players.append(player)
+            position, mask = play(position, mask, col)
+    return boards, players
+
+
+def quantization_report(network, quantized, boards, players):
+    """Value/policy error, size and latency of the int8 network versus float32"""
+    values, policies = network.forward_batch(boards, players)
+    q_values, q_policies = quantized.forward_batch(boards, players)
+    
+    value_error = np.abs(values - q_values)
+    policy_error = 0.5 * np.abs(policies - q_policies).sum(axis=1)  # total variation
+    
+    def latency(net, batch_size, repeats=20):
+        start = time.time()
+        for _ in range(repeats):
+            net.forward_batch(boards[:batch_size], players[:batch_size])
+        return (time.time() - start) * 1000 / repeats / batch_size
+    
+    return {
+        'positions': len(boards),
+        'value_mae': float(value_error.mean()),
+        'value_max_error': float(value_error.max()),
+        'policy_tv_mean': float(policy_error.mean()),
+        'policy_tv_max': float(policy_error.max()),
+        'top_move_agreement': float(np.mean(policies.argmax(axis=1) == q_policies.argmax(axis=1))),
+        'float_bytes': len(network.to_bytes()),
+        'int8_bytes': len(quantized.to_bytes()),
+        'float_encoded_chars': len(network.encode()),
+        'int8_encoded_chars': len(quantized.encode()),
+        'float_ms_per_board': {n: latency(network, n) for n in (1, 16)},
+        'int8_ms_per_board': {n: latency(quantized, n) for n in (1, 16)}
+    }
 
 
 class MCTSNode:
@@ -378,59 +787,216 @@ class MCTSNode:
         return check_winner(self.board) != 0 or all(self.board[i] != 0 for i in range(7))
     
     def backup(self, value):
-        """Backup value through tree"""
+        """Backup value through tree (value is for the player who moved here)"""
         self.visits += 1
         self.value_sum += value
         if self.parent:
             self.parent.backup(-value)  # Flip value for opponent
+    
+    def add_virtual_loss(self, amount):
+        """Count a pending evaluation as a loss so other leaves get picked"""
+        node = self
+        while node is not None:
+            node.visits += amount
+            node.value_sum -= amount
+            node = node.parent
+    
+    def revert_virtual_loss(self, amount):
+        """Undo add_virtual_loss once the real value is known"""
+        node = self
+        while node is not None:
+            node.visits -= amount
+            node.value_sum += amount
+            node = node.parent
+
+
+def _cache_entry_bytes():
+    """
+    Measured bytes of one EvaluationCache entry: the int key, the (value,
+    policy) tuple, the float and the 7-float policy array, plus the
+    OrderedDict's per-entry hash-table and link overhead
+    """
+    key, entry = 1 << 48, (0.0, np.zeros(7))
+    objects = sum(sys.getsizeof(obj) for obj in (key, entry, entry[0], entry[1]))
+    table = OrderedDict.fromkeys(range(1 << 12))
+    return objects + sys.getsizeof(table) // len(table)
+
+
+class EvaluationCache:
+    """
+    LRU cache of network (value, policy) results
+    Keyed by the symmetry-reduced bitboard key, so a position and its mirror
+    share one entry; the policy is stored in canonical orientation and
+    flipped on the way out.
+    """
+    
+    # Bytes per entry (key, value, 7-float policy array, LRU table and links)
+    ENTRY_BYTES = _cache_entry_bytes()
+    
+    def __init__(self, max_mb=32):
+        self.max_entries = max(1, int(max_mb * 1024 * 1024) // self.ENTRY_BYTES)
+        self.table = OrderedDict()
+        
+        # Statistics
+        self.hits = 0
+        self.mirrored_hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def key(self, board, player):
+        """Canonical key and mirror flag for a board with `player` to move"""
+        position, mask = encode_position(board, player)
+        return canonical_key(position, mask)
+    
+    def lookup(self, board, player):
+        """Return (value, policy) or None"""
+        key, mirrored = self.key(board, player)
+        entry = self.table.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        
+        self.table.move_to_end(key)
+        self.hits += 1
+        value, policy = entry
+        if mirrored:
+            self.mirrored_hits += 1
+            policy = policy[::-1]
+        return value, policy
+    
+    def store(self, board, player, value, policy):
+        """Insert a result, evicting the least recently used entry if full"""
+        key, mirrored = self.key(board, player)
+        policy = np.asarray(policy, dtype=np.float64)
+        self.table[key] = (float(value), policy[::-1].copy() if mirrored else policy.copy())
+        self.table.move_to_end(key)
+        
+        if len(self.table) > self.max_entries:
+            self.table.popitem(last=False)
+            self.evictions += 1
+    
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+    
+    def clear(self):
+        """Drop all entries (call after the network weights change)"""
+        self.table.clear()
+    
+    def get_stats(self):
+        return {
+            'entries': len(self.table),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'mirrored_hits': self.mirrored_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hit_rate()
+        }
 
 
 class NeuralMCTS:
-    """MCTS with neural network guidance"""
+    """MCTS with neural network guidance
+    
+    Leaves are collected `batch_size` at a time under virtual loss and
+    evaluated with a single network.forward_batch call. Leaves already in
+    the evaluation cache are expanded straight away without the network.
+    """
     
-    def __init__(self, network, simulations=100, c_puct=1.0, temperature=1.0):
+    def __init__(self, network, simulations=100, c_puct=1.0, temperature=1.0,
+                 batch_size=16, virtual_loss=1.0, cache_mb=32):
         self.network = network
         self.simulations = simulations
         self.c_puct = c_puct
         self.temperature = temperature
+        self.batch_size = batch_size
+        self.virtual_loss = virtual_loss
+        self.cache = EvaluationCache(cache_mb) if cache_mb else None
+        
+        # Statistics
+        self.evaluations = 0
+        self.batches = 0
     
-    def search(self, board, player):
-        """Run MCTS simulations and return move probabilities"""
-        root = MCTSNode(board, player)
+    def _terminal_value(self, node):
+        """Outcome for the player to move at a finished node"""
+        winner = check_winner(node.board)
+        if winner == node.player:
+            return 1
+        elif winner == 3 - node.player:
+            return -1
+        return 0
+    
+    def _collect_leaves(self, root, count):
+        """
+        Descend up to `count` times under virtual loss.
+        Returns leaves needing evaluation and the number of simulations
+        finished without the network (terminal nodes and cache hits).
+        """
+        pending = []
+        resolved = 0
         
-        for _ in range(self.simulations):
+        for _ in range(count):
             node = root
-            path = [node]
             
             # Selection
             while node.is_expanded and not node.is_terminal():
                 node = node.select_child(self.c_puct)
-                path.append(node)
             
-            # Expansion and Evaluation
-            if not node.is_terminal():
-                # Get neural network evaluation
-                value, priors = self.network.forward(node.board, node.player)
-                node.expand(priors)
-                
-                # Backup
-                for n in reversed(path):
-                    n.backup(value)
-                    value = -value
-            else:
+            if node.is_terminal():
                 # Terminal node - get actual outcome
-                winner = check_winner(node.board)
-                if winner == node.player:
-                    value = 1
-                elif winner == 3 - node.player:
-                    value = -1
-                else:
-                    value = 0
-                
-                # Backup
-                for n in reversed(path):
-                    n.backup(value)
-                    value = -value
+                node.backup(-self._terminal_value(node))
+                resolved += 1
+                continue
+            
+            if any(node is leaf for leaf in pending):
+                # Collision - every path leads to a leaf already queued
+                break
+            
+            if self.cache is not None:
+                cached = self.cache.lookup(node.board, node.player)
+                if cached is not None:
+                    value, priors = cached
+                    node.expand(priors)
+                    node.backup(-value)
+                    resolved += 1
+                    continue
+            
+            node.add_virtual_loss(self.virtual_loss)
+            pending.append(node)
+        
+        return pending, resolved
+    
+    def search(self, board, player):
+        """Run MCTS simulations and return move probabilities and root value"""
+        root = MCTSNode(board, player)
+        done = 0
+        
+        while done < self.simulations:
+            count = min(self.batch_size, self.simulations - done)
+            pending, resolved = self._collect_leaves(root, count)
+            done += resolved
+            
+            if not pending:
+                if resolved == 0:
+                    break
+                continue
+            
+            # Expansion and Evaluation - one batched forward pass
+            values, priors = self.network.forward_batch(
+                [leaf.board for leaf in pending],
+                [leaf.player for leaf in pending]
+            )
+            self.evaluations += len(pending)
+            self.batches += 1
+            
+            # Backup
+            for leaf, value, leaf_priors in zip(pending, values, priors):
+                if self.cache is not None:
+                    self.cache.store(leaf.board, leaf.player, value, leaf_priors)
+                leaf.revert_virtual_loss(self.virtual_loss)
+                leaf.expand(leaf_priors)
+                leaf.backup(-float(value))
+            done += len(pending)
         
         # Extract visit counts
         visits = np.zeros(7)
@@ -452,7 +1018,8 @@ class NeuralMCTS:
                     probs[col] = 0
             probs /= np.sum(probs)
         
-        return probs, root.value()
+        # Root value from the perspective of the player to move
+        return probs, -root.value()
 
 
 def check_winner(board):
@@ -504,6 +1071,21 @@ if __name__ == "__main__":
     print(f"Value: {value:.3f}")
     print(f"Policy: {policy}")
     
+    # Forward latency, single board and batched
+    start = time.time()
+    for _ in range(100):
+        net.forward(test_board, 1)
+    print(f"\nForward (N=1): {(time.time() - start) * 10:.3f}ms per board")
+    
+    for batch_size in [16, 64]:
+        boards = [test_board] * batch_size
+        players = [1] * batch_size
+        start = time.time()
+        for _ in range(10):
+            net.forward_batch(boards, players)
+        per_board = (time.time() - start) * 100 / batch_size
+        print(f"Forward (N={batch_size}): {per_board:.3f}ms per board")
+    
     # Test MCTS
     mcts = NeuralMCTS(net, simulations=50)
     probs, root_value = mcts.search(test_board, 1)
@@ -0,0 +1,474 @@
+"""
+NNUE-Style Evaluator
+Efficiently updatable network for the bitboard negamax
+
+Input is 42 cells x 2 sides seen from each player's perspective. The first
+layer lives in two integer accumulators (one per player) that are updated by
+adding one weight row when a stone is played and subtracting it when the move
+is taken back, so a leaf evaluation only pays for two tiny dense layers.
+
+Weights are trained in float32 on self-play outcomes, then the first layer is
+quantized to integers (scale QA) so make/unmake is exact.
+"""
+
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+from bitboard_core import (
+    WIDTH, HEIGHT, H1, CENTER_ORDER, COLUMN_MASKS, play, possible,
+    winning_position, winning_moves, move_bit, popcount, key, columns_of,
+    encode_position, from_moves
+)
+from neural_network_v2 import pack_weights, unpack_weights
+
+FEATURES = 2 * WIDTH * HEIGHT
+QA = 64              # first-layer quantization scale
+EVAL_SCALE = 100     # score units per logit of predicted outcome
+MAX_EVAL = 5000      # static evaluations stay clear of mate scores
+
+# Feature cell (col * 6 + row) of each bitboard bit; -1 for sentinel bits
+CELL_OF_BIT = [-1] * (WIDTH * H1)
+for _col in range(WIDTH):
+    for _row in range(HEIGHT):
+        CELL_OF_BIT[_col * H1 + _row] = _col * HEIGHT + _row
+BOARD_BITS = np.array([b for b, cell in enumerate(CELL_OF_BIT) if cell >= 0], dtype=np.uint64)
+
+DEFAULT_WEIGHTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'nnue_weights.bin')
+
+
+def cell_window_counts():
+    """Number of four-in-a-row windows through each cell (the classic 3..13 table)"""
+    counts = np.zeros(WIDTH * HEIGHT, dtype=np.float32)
+    for col in range(WIDTH):
+        for row in range(HEIGHT):
+            for dc, dr in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                for start in range(-3, 1):
+                    cells = [(col + (start + i) * dc, row + (start + i) * dr) for i in range(4)]
+                    if all(0 <= c < WIDTH and 0 <= r < HEIGHT for c, r in cells):
+                        counts[col * HEIGHT + row] += 1
+    return counts
+
+
+class NNUEEvaluator:
+    """
+    (84 -> hidden) x 2 perspectives -> hidden2 -> 1
+    Feature i < 42 is an own stone on cell i, 42 + i an opponent stone.
+    """
+
+    def __init__(self, hidden=32, hidden2=16, seed=None):
+        rng = np.random.RandomState(seed)
+        self.hidden = hidden
+        self.hidden2 = hidden2
+        self.weights = {
+            'w1': (rng.randn(FEATURES, hidden) * np.sqrt(2.0 / FEATURES)).astype(np.float32),
+            'b1': np.zeros(hidden, dtype=np.float32),
+            'w2': (rng.randn(2 * hidden, hidden2) * np.sqrt(2.0 / (2 * hidden))).astype(np.float32),
+            'b2': np.zeros(hidden2, dtype=np.float32),
+            'w3': (rng.randn(hidden2) * np.sqrt(1.0 / hidden2)).astype(np.float32),
+            'b3': np.zeros(1, dtype=np.float32)
+        }
+        self.quantize()
+
+    @classmethod
+    def from_cell_values(cls, hidden=32, hidden2=16):
+        """
+        Untrained evaluator equal to (own - opponent) window counts
+        Two hidden units carry +/- the linear score so ReLU passes it through.
+        """
+        evaluator = cls(hidden, hidden2, seed=0)
+        table = cell_window_counts() / 100.0
+        w = evaluator.weights
+        for name in w:
+            w[name][...] = 0
+        w['w1'][:42, 0], w['w1'][42:, 0] = table, -table
+        w['w1'][:42, 1], w['w1'][42:, 1] = -table, table
+        # Side to move's perspective in the first half of the concatenation
+        w['w2'][0, 0], w['w2'][1, 1] = 1.0, 1.0
+        w['w3'][0], w['w3'][1] = 1.0, -1.0
+        evaluator.quantize()
+        return evaluator
+
+    def quantize(self):
+        """Integer first layer and per-move delta table; resets the accumulators"""
+        w = self.weights
+        w1q = np.rint(w['w1'] * QA).astype(np.int32)
+        self.b1q = np.rint(w['b1'] * QA).astype(np.int32)
+
+        # delta[color, cell] is added to both accumulators when `color` plays `cell`
+        self.delta = np.zeros((2, 42, 2, self.hidden), dtype=np.int32)
+        for color in (0, 1):
+            self.delta[color, :, color] = w1q[:42]
+            self.delta[color, :, color ^ 1] = w1q[42:]
+
+        # w2 with rows ordered (side to move, other) for each side-to-move color
+        w2 = w['w2'] / QA
+        swapped = np.concatenate([w2[self.hidden:], w2[:self.hidden]])
+        self.w2_by_color = [w2.astype(np.float32), swapped.astype(np.float32)]
+        self.b2 = w['b2']
+        self.w3 = w['w3']
+        self.b3 = float(w['b3'][0])
+
+        self.acc = np.tile(self.b1q, (2, 1))
+
+    def refresh(self, position, mask):
+        """Rebuild both accumulators from scratch"""
+        color = popcount(mask) & 1
+        self.acc = np.tile(self.b1q, (2, 1))
+        for stones, stone_color in ((position, color), (position ^ mask, color ^ 1)):
+            while stones:
+                bit = stones & -stones
+                self.acc += self.delta[stone_color, CELL_OF_BIT[bit.bit_length() - 1]]
+                stones ^= bit
+
+    def push(self, mask, col, color):
+        """Add the stone `color` drops into `col`; returns the cell for pop()"""
+        cell = CELL_OF_BIT[move_bit(mask, col).bit_length() - 1]
+        self.acc += self.delta[color, cell]
+        return cell
+
+    def pop(self, cell, color):
+        """Take back a stone added by push()"""
+        self.acc -= self.delta[color, cell]
+
+    def evaluate(self, color):
+        """Score for the side to move (`color` = stones already played % 2)"""
+        h = np.maximum(self.acc, 0).reshape(-1)
+        h2 = np.maximum(np.dot(h, self.w2_by_color[color]) + self.b2, 0)
+        score = int((np.dot(h2, self.w3) + self.b3) * EVAL_SCALE)
+        return max(-MAX_EVAL, min(MAX_EVAL, score))
+
+    # === Training (float32, batched) ===
+
+    def features(self, positions, masks):
+        """
+        Side-to-move and opponent-perspective inputs, each (N, 84)
+        `positions` holds the side-to-move stones, as everywhere else.
+        """
+        positions = np.asarray(positions, dtype=np.uint64)
+        masks = np.asarray(masks, dtype=np.uint64)
+        own = ((positions[:, None] >> BOARD_BITS) & np.uint64(1)).astype(np.float32)
+        occupied = ((masks[:, None] >> BOARD_BITS) & np.uint64(1)).astype(np.float32)
+        other = occupied - own
+        return np.hstack([own, other]), np.hstack([other, own])
+
+    def _forward(self, x_own, x_other):
+        """Float forward pass keeping what backprop needs"""
+        w = self.weights
+        a_own = np.dot(x_own, w['w1']) + w['b1']
+        a_other = np.dot(x_other, w['w1']) + w['b1']
+        h = np.maximum(np.hstack([a_own, a_other]), 0)
+        z2 = np.dot(h, w['w2']) + w['b2']
+        h2 = np.maximum(z2, 0)
+        logits = np.dot(h2, w['w3']) + w['b3']
+        return logits, (a_own, a_other, h, z2, h2)
+
+    def loss_and_gradients(self, x_own, x_other, targets):
+        """Sigmoid cross-entropy against outcomes in [-1, 1] (side to move)"""
+        w = self.weights
+        logits, (a_own, a_other, h, z2, h2) = self._forward(x_own, x_other)
+        p = 1.0 / (1.0 + np.exp(-logits))
+        y = (np.asarray(targets, dtype=np.float32) + 1) / 2
+        eps = 1e-7
+        loss = -np.mean(y * np.log(p + eps) + (1 - y) * np.log(1 - p + eps))
+
+        d_logits = (p - y) / len(y)
+        grads = {'w3': np.dot(h2.T, d_logits), 'b3': np.array([d_logits.sum()])}
+        d_z2 = np.outer(d_logits, w['w3']) * (z2 > 0)
+        grads['w2'] = np.dot(h.T, d_z2)
+        grads['b2'] = d_z2.sum(axis=0)
+        d_h = np.dot(d_z2, w['w2'].T)
+        d_own = d_h[:, :self.hidden] * (a_own > 0)
+        d_other = d_h[:, self.hidden:] * (a_other > 0)
+        grads['w1'] = np.dot(x_own.T, d_own) + np.dot(x_other.T, d_other)
+        grads['b1'] = d_own.sum(axis=0) + d_other.sum(axis=0)
+
+        return loss, grads
+
+    def train(self, positions, masks, targets, epochs=20, batch_size=256,
+              learning_rate=0.003, seed=0, verbose=True):
+        """Adam on minibatches; re-quantizes when done and returns per-epoch losses"""
+        x_own, x_other = self.features(positions, masks)
+        targets = np.asarray(targets, dtype=np.float32)
+        rng = np.random.RandomState(seed)
+        m = {name: np.zeros_like(w) for name, w in self.weights.items()}
+        v = {name: np.zeros_like(w) for name, w in self.weights.items()}
+        beta1, beta2, step = 0.9, 0.999, 0
+        history = []
+
+        for epoch in range(epochs):
+            order = rng.permutation(len(targets))
+            total = 0.0
+            for start in range(0, len(order), batch_size):
+                batch = order[start:start + batch_size]
+                loss, grads = self.loss_and_gradients(x_own[batch], x_other[batch], targets[batch])
+                total += loss * len(batch)
+                step += 1
+                for name, grad in grads.items():
+                    m[name] = beta1 * m[name] + (1 - beta1) * grad
+                    v[name] = beta2 * v[name] + (1 - beta2) * grad ** 2
+                    m_hat = m[name] / (1 - beta1 ** step)
+                    v_hat = v[name] / (1 - beta2 ** step)
+                    self.weights[name] -= (learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)).astype(np.float32)
+            history.append(total / len(order))
+            if verbose:
+                print(f"Epoch {epoch + 1}/{epochs}: loss {history[-1]:.4f}")
+
+        self.quantize()
+        return history
+
+    def save(self, filepath):
+        """Save float weights in the binary weight format"""
+        with open(filepath, 'wb') as f:
+            f.write(pack_weights({'nnue': True, 'hidden': self.hidden, 'hidden2': self.hidden2},
+                                 self.weights))
+
+    @classmethod
+    def load(cls, filepath):
+        """Load weights written by save()"""
+        with open(filepath, 'rb') as f:
+            header, weights = unpack_weights(f.read())
+        if not header.get('nnue'):
+            raise ValueError("Not an NNUE weight file")
+        evaluator = cls(header['hidden'], header['hidden2'])
+        evaluator.weights = {name: w.astype(np.float32) for name, w in weights.items()}
+        evaluator.quantize()
+        return evaluator
+
+
+class NNUESearch:
+    """
+    Bitboard negamax driving the evaluator incrementally
+    - Alpha-beta with a transposition table and iterative deepening
+    - Immediate wins / forced blocks resolved before the evaluation
+    - One accumulator add per move, one subtract on the way back
+    """
+
+    WIN_SCORE = 10000
+    EXACT, LOWER, UPPER = 0, 1, 2
+
+    def __init__(self, evaluator, max_depth=42, time_limit=0.8):
+        self.evaluator = evaluator
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.tt = {}
+        self.nodes = 0
+        self.evaluations = 0
+        self.stopped = False
+
+    def search(self, position, mask, max_depth=None, time_limit=None):
+        """Iterative deepening; returns (best column, score, completed depth)"""
+        max_depth = max_depth or self.max_depth
+        time_limit = self.time_limit if time_limit is None else time_limit
+        self.deadline = time.time() + time_limit
+        self.stopped = False
+        self.nodes = 0
+        self.evaluations = 0
+        self.evaluator.refresh(position, mask)
+        color = popcount(mask) & 1
+
+        best_move, best_score, depth_done = None, 0, 0
+        moves_left = 42 - popcount(mask)
+        for depth in range(1, min(max_depth, moves_left) + 1):
+            score, move = self._root(position, mask, depth, color)
+            if self.stopped:
+                break
+            best_move, best_score, depth_done = move, score, depth
+            if abs(score) >= self.WIN_SCORE - 42:
+                break
+
+        if best_move is None:
+            best_move = columns_of(possible(mask))[0]
+        return best_move, best_score, depth_done
+
+    def _ordered_moves(self, position, mask, tt_move):
+        """TT move first, then center-first; only the block if the opponent threatens"""
+        moves = possible(mask)
+        threats = winning_position(position ^ mask, mask) & moves
+        if threats:
+            moves = threats
+        cols = [col for col in CENTER_ORDER if moves & COLUMN_MASKS[col]]
+        if tt_move in cols:
+            cols.remove(tt_move)
+            cols.insert(0, tt_move)
+        return cols, threats
+
+    def _root(self, position, mask, depth, color):
+        """Search the root moves; returns (score, column)"""
+        return self._negamax(position, mask, depth, -self.WIN_SCORE, self.WIN_SCORE, color, 0, True)
+
+    def _negamax(self, position, mask, depth, alpha, beta, color, ply, root=False):
+        """Score for the side to move; with root=True returns (score, column)"""
+        self.nodes += 1
+        if self.nodes & 1023 == 0 and time.time() > self.deadline:
+            self.stopped = True
+        if self.stopped:
+            return (0, None) if root else 0
+
+        # Win now
+        wins = winning_moves(position, mask)
+        if wins:
+            score = self.WIN_SCORE - ply - 1
+            return (score, columns_of(wins)[0]) if root else score
+
+        if not possible(mask):
+            return (0, None) if root else 0
+
+        if depth == 0:
+            self.evaluations += 1
+            return self.evaluator.evaluate(color)
+
+        original_alpha = alpha
+        tt_key = key(position, mask)
+        entry = self.tt.get(tt_key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, flag, tt_move = entry
+            if entry_depth >= depth and not root:
+                if flag == self.EXACT:
+                    return entry_score
+                if flag == self.LOWER:
+                    alpha = max(alpha, entry_score)
+                elif flag == self.UPPER:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    return entry_score
+
+        cols, threats = self._ordered_moves(position, mask, tt_move)
+        if threats & (threats - 1):
+            # Two threats - the opponent wins next move whatever we do
+            score = -(self.WIN_SCORE - ply - 2)
+            return (score, cols[0]) if root else score
+
+        evaluator = self.evaluator
+        best_score = -self.WIN_SCORE
+        best_move = cols[0]
+        for col in cols:
+            cell = evaluator.push(mask, col, color)
+            new_position, new_mask = play(position, mask, col)
+            score = -self._negamax(new_position, new_mask, depth - 1, -beta, -alpha,
+                                   color ^ 1, ply + 1)
+            evaluator.pop(cell, color)
+
+            if score > best_score:
+                best_score = score
+                best_move = col
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+
+        if not self.stopped:
+            if best_score <= original_alpha:
+                flag = self.UPPER
+            elif best_score >= beta:
+                flag = self.LOWER
+            else:
+                flag = self.EXACT
+            self.tt[tt_key] = (depth, best_score, flag, best_move)
+
+        return (best_score, best_move) if root else best_score
+
+
+def training_positions(games):
+    """
+    Replay self-play records ({'moves', 'winner'}) into (positions, masks,
+    targets) with targets the final result for the side to move
+    """
+    positions, masks, targets = [], [], []
+    for game in games:
+        winner = game['winner']
+        position, mask = 0, 0
+        for turn, col in enumerate(game['moves']):
+            mover = 1 if turn % 2 == 0 else 2
+            positions.append(position)
+            masks.append(mask)
+            targets.append(0 if winner == 0 else (1 if winner == mover else -1))
+            position, mask = play(position, mask, col)
+    return positions, masks, targets
+
+
+def self_play_games(evaluator, count, depth=4, random_moves=4, seed=0):
+    """Games between two NNUESearch players with random openings"""
+    rng = np.random.RandomState(seed)
+    search = NNUESearch(evaluator)
+    games = []
+    for _ in range(count):
+        position, mask = 0, 0
+        moves = []
+        winner = 0
+        while possible(mask):
+            if len(moves) < random_moves:
+                col = int(rng.choice(columns_of(possible(mask))))
+            else:
+                col, _, _ = search.search(position, mask, max_depth=depth, time_limit=10)
+            won = winning_moves(position, mask) & COLUMN_MASKS[col]
+            moves.append(col)
+            position, mask = play(position, mask, col)
+            if won:
+                winner = 1 if len(moves) % 2 == 1 else 2
+                break
+        games.append({'moves': moves, 'winner': winner})
+        search.tt.clear()
+    return games
+
+
+def agent(observation, configuration):
+    """NNUE negamax agent (trained weights if present, else the cell table)"""
+    if not hasattr(agent, 'search'):
+        if os.path.exists(DEFAULT_WEIGHTS):
+            evaluator = NNUEEvaluator.load(DEFAULT_WEIGHTS)
+        else:
+            evaluator = NNUEEvaluator.from_cell_values()
+        agent.search = NNUESearch(evaluator)
+    position, mask = encode_position(observation.board, observation.mark)
+    move, _, _ = agent.search.search(position, mask)
+    return move
+
+
+def main():
+    """Train on self-play games and report evaluation speed"""
+    games_path = sys.argv[1] if len(sys.argv) > 1 else 'self_play_games.pkl'
+    if os.path.exists(games_path):
+        with open(games_path, 'rb') as f:
+            games = pickle.load(f)
+        print(f"Loaded {len(games):,} games from {games_path}")
+    else:
+        print(f"{games_path} not found - generating games with the cell-table evaluator")
+        games = self_play_games(NNUEEvaluator.from_cell_values(), 300)
+
+    positions, masks, targets = training_positions(games)
+    print(f"Training positions: {len(targets):,}")
+
+    evaluator = NNUEEvaluator(seed=0)
+    evaluator.train(positions, masks, targets)
+    evaluator.save(DEFAULT_WEIGHTS)
+    print(f"Saved {DEFAULT_WEIGHTS}")
+
+    # Incremental update + evaluation versus a full refresh
+    position, mask = from_moves([3, 3, 2, 4, 2, 2])
+    evaluator.refresh(position, mask)
+    runs = 20000
+    start = time.time()
+    for _ in range(runs):
+        cell = evaluator.push(mask, 3, 0)
+        evaluator.evaluate(1)
+        evaluator.pop(cell, 0)
+    incremental = (time.time() - start) / runs * 1e6
+    start = time.time()
+    for _ in range(runs // 10):
+        evaluator.refresh(position, mask)
+        evaluator.evaluate(0)
+    refresh = (time.time() - start) / (runs // 10) * 1e6
+    print(f"push + evaluate + pop: {incremental:.1f}us   refresh + evaluate: {refresh:.1f}us")
+
+    search = NNUESearch(evaluator)
+    move, score, depth = search.search(*from_moves([3, 3]), time_limit=1.0)
+    print(f"Search from [3, 3]: move {move}, score {score}, depth {depth}, "
+          f"{search.nodes / 1.0:,.0f} nodes/s")
+
+
+if __name__ == "__main__":
+    main()
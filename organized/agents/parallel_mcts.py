@@ -0,0 +1,316 @@
+"""
+Parallel Monte Carlo Tree Search
+Multi-core MCTS for offline analysis and self-play
+
+Two modes on top of mcts_engine.MCTSEngine:
+- Root parallelism: independent trees in a process pool, visit counts merged
+- Tree parallelism: one struct-of-arrays tree in shared memory, worker
+  processes kept on different paths by virtual loss
+"""
+
+import math
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from bitboard_core import (
+    CENTER_ORDER, play, is_winning_move, is_full, can_play, from_moves
+)
+from mcts_engine import MCTSEngine
+
+NOT_TERMINAL = -1
+
+
+def _root_worker(args):
+    """Grow one independent tree and return its root child statistics"""
+    position, mask, iterations, c, seed, rave = args
+    engine = MCTSEngine(c=c, seed=seed, rave=rave)
+    root = engine.run(position, mask, iterations)
+    visits, wins = engine.child_stats(root)
+    return visits, wins, engine.playouts
+
+
+def root_parallel_search(position, mask, iterations, workers=None, c=math.sqrt(2),
+                         seed=0, pool=None, rave=False):
+    """
+    Root parallelism: `workers` independent trees of `iterations` playouts each.
+    Returns merged per-column visits, wins and the total playout count.
+    """
+    workers = workers or mp.cpu_count()
+    tasks = [(position, mask, iterations, c, seed + i, rave) for i in range(workers)]
+
+    if pool is not None:
+        results = pool.map(_root_worker, tasks)
+    else:
+        with mp.Pool(workers) as own_pool:
+            results = own_pool.map(_root_worker, tasks)
+
+    visits = [0] * 7
+    wins = [0.0] * 7
+    playouts = 0
+    for worker_visits, worker_wins, worker_playouts in results:
+        for col in range(7):
+            visits[col] += worker_visits[col]
+            wins[col] += worker_wins[col]
+        playouts += worker_playouts
+
+    return visits, wins, playouts
+
+
+class SharedTree:
+    """
+    Struct-of-arrays MCTS tree in one shared memory block.
+    Node 0 is the root; `value` is from the view of the player who moved in.
+    """
+
+    FIELDS = [
+        ('position', np.uint64, ()),
+        ('mask', np.uint64, ()),
+        ('parent', np.int32, ()),
+        ('move', np.int8, ()),
+        ('terminal', np.int8, ()),
+        ('expanded', np.int8, ()),
+        ('children', np.int32, (7,)),
+        ('visits', np.float64, ()),
+        ('value', np.float64, ()),
+    ]
+
+    def __init__(self, capacity, name=None):
+        self.capacity = capacity
+        size = 8 + sum(self._field_bytes(dtype, shape) for _, dtype, shape in self.FIELDS)
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+        # Node counter followed by the field arrays, each 8-byte aligned
+        self.count = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        offset = 8
+        for field, dtype, shape in self.FIELDS:
+            array = np.ndarray((capacity,) + shape, dtype=dtype,
+                               buffer=self.shm.buf, offset=offset)
+            setattr(self, field, array)
+            offset += self._field_bytes(dtype, shape)
+
+        if self.owner:
+            self.count[0] = 0
+            self.children.fill(-1)
+            self.visits.fill(0)
+            self.value.fill(0)
+            self.expanded.fill(0)
+
+    def _field_bytes(self, dtype, shape):
+        """Bytes used by one field, rounded up to 8"""
+        nbytes = self.capacity * np.dtype(dtype).itemsize * int(np.prod(shape, dtype=np.int64))
+        return (nbytes + 7) // 8 * 8
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def add_node(self, position, mask, parent, move, terminal):
+        """Append a node (caller holds the allocation lock); -1 if full"""
+        index = int(self.count[0])
+        if index >= self.capacity:
+            return -1
+        self.position[index] = position
+        self.mask[index] = mask
+        self.parent[index] = parent
+        self.move[index] = move
+        self.terminal[index] = terminal
+        self.count[0] = index + 1
+        return index
+
+    def root_visits(self):
+        """Visit counts of the root's children by column"""
+        visits = [0] * 7
+        for col in range(7):
+            child = self.children[0, col]
+            if child >= 0:
+                visits[col] = int(self.visits[child])
+        return visits
+
+    def close(self):
+        """Detach (and free, if this process created the block)"""
+        # Drop array views before closing the buffer
+        for field, _, _ in self.FIELDS:
+            setattr(self, field, None)
+        self.count = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _select(tree, node, c):
+    """UCB1 over a node's children with virtual loss already in the stats"""
+    log_visits = math.log(max(tree.visits[node], 1.0))
+    best = -1
+    best_score = -float('inf')
+    for col in CENTER_ORDER:
+        child = tree.children[node, col]
+        if child < 0:
+            continue
+        visits = tree.visits[child]
+        if visits <= 0:
+            return child
+        score = tree.value[child] / visits + c * math.sqrt(log_visits / visits)
+        if score > best_score:
+            best_score = score
+            best = child
+    return best
+
+
+def _expand(tree, node):
+    """Create all children of `node` (caller holds the allocation lock)"""
+    position = int(tree.position[node])
+    mask = int(tree.mask[node])
+    for col in CENTER_ORDER:
+        if not can_play(mask, col):
+            continue
+        terminal = 1 if is_winning_move(position, mask, col) else NOT_TERMINAL
+        new_position, new_mask = play(position, mask, col)
+        if terminal == NOT_TERMINAL and is_full(new_mask):
+            terminal = 0
+        child = tree.add_node(new_position, new_mask, node, col, terminal)
+        if child < 0:
+            return False
+        tree.children[node, col] = child
+    tree.expanded[node] = 1
+    return True
+
+
+def _tree_worker(name, capacity, locks, alloc_lock, iterations, c, virtual_loss,
+                 seed, result_queue):
+    """Worker process running playouts on the shared tree"""
+    tree = SharedTree(capacity, name=name)
+    engine = MCTSEngine(c=c, seed=seed)
+    stripes = len(locks)
+
+    for _ in range(iterations):
+        node = 0
+        path = [0]
+        with locks[0]:
+            tree.visits[0] += virtual_loss
+            tree.value[0] -= virtual_loss
+
+        # Selection, applying virtual loss along the way
+        while tree.terminal[node] == NOT_TERMINAL:
+            leaf = not tree.expanded[node]
+            if leaf:
+                with alloc_lock:
+                    if not tree.expanded[node]:
+                        _expand(tree, node)
+                if not tree.expanded[node]:
+                    # Tree is full - simulate from here
+                    break
+            node = _select(tree, node, c)
+            with locks[node % stripes]:
+                tree.visits[node] += virtual_loss
+                tree.value[node] -= virtual_loss
+            path.append(node)
+            if leaf:
+                break
+
+        # Simulation - result for the player who moved into `node`
+        terminal = int(tree.terminal[node])
+        if terminal != NOT_TERMINAL:
+            result = terminal
+        else:
+            result = -engine.rollout(int(tree.position[node]), int(tree.mask[node]))
+
+        # Backpropagation, replacing the virtual loss with the real result
+        for index in reversed(path):
+            with locks[index % stripes]:
+                tree.visits[index] += 1 - virtual_loss
+                tree.value[index] += result + virtual_loss
+            result = -result
+
+    result_queue.put(iterations)
+    tree.close()
+
+
+def tree_parallel_search(position, mask, iterations, workers=None, c=math.sqrt(2),
+                         virtual_loss=1.0, lock_stripes=64, seed=0):
+    """
+    Tree parallelism: `workers` processes share one tree, `iterations`
+    playouts each. Returns per-column root visits and the total playout count.
+    """
+    workers = workers or mp.cpu_count()
+    capacity = 7 * iterations * workers + 8
+    tree = SharedTree(capacity)
+
+    try:
+        tree.add_node(position, mask, -1, -1, NOT_TERMINAL)
+
+        locks = [mp.Lock() for _ in range(lock_stripes)]
+        alloc_lock = mp.Lock()
+        result_queue = mp.Queue()
+
+        processes = []
+        for i in range(workers):
+            p = mp.Process(
+                target=_tree_worker,
+                args=(tree.name, capacity, locks, alloc_lock, iterations, c,
+                      virtual_loss, seed + i, result_queue)
+            )
+            p.start()
+            processes.append(p)
+
+        playouts = sum(result_queue.get() for _ in processes)
+
+        for p in processes:
+            p.join()
+
+        return tree.root_visits(), playouts
+    finally:
+        tree.close()
+
+
+def parallel_best_move(position, mask, iterations, workers=None, mode='root'):
+    """Most visited column from a root- or tree-parallel search"""
+    if mode == 'tree':
+        visits, _ = tree_parallel_search(position, mask, iterations, workers)
+    else:
+        visits, _, _ = root_parallel_search(position, mask, iterations, workers)
+    return max(range(7), key=lambda col: visits[col])
+
+
+def benchmark(worker_counts=None, playouts_per_worker=500, moves=(3, 3, 2, 4)):
+    """Playouts/sec versus worker count for both parallel modes"""
+    if worker_counts is None:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= mp.cpu_count():
+            worker_counts.append(worker_counts[-1] * 2)
+
+    position, mask = from_moves(moves)
+    results = {}
+
+    print(f"{'workers':>8} {'root pps':>12} {'tree pps':>12} {'root x':>8} {'tree x':>8}")
+    for workers in worker_counts:
+        start = time.time()
+        _, _, root_playouts = root_parallel_search(position, mask, playouts_per_worker, workers)
+        root_rate = root_playouts / (time.time() - start)
+
+        start = time.time()
+        _, tree_playouts = tree_parallel_search(position, mask, playouts_per_worker, workers)
+        tree_rate = tree_playouts / (time.time() - start)
+
+        results[workers] = {'root': root_rate, 'tree': tree_rate}
+        base = results[worker_counts[0]]
+        print(f"{workers:>8} {root_rate:>12.0f} {tree_rate:>12.0f} "
+              f"{root_rate / base['root']:>8.2f} {tree_rate / base['tree']:>8.2f}")
+
+    return results
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("PARALLEL MCTS BENCHMARK")
+    print("=" * 60)
+    print(f"CPUs: {mp.cpu_count()}\n")
+    benchmark()
@@ -9,6 +9,7 @@ Implements all strategies from deep research to achieve 1400-1600 ELO rating
 - Opening book from perfect play theory
 """
 
+import json
 import random
 import time
 
@@ -203,8 +204,23 @@ class EliteEvaluation:
         [1, 2, 3, 4, 3, 2, 1]
     ]
     
+    # Per-phase weights (texel_tuner.py writes tuned ones to eval_weights.json)
+    PHASE_WEIGHTS = {
+        "opening": {"center_mult": 2.0, "defense_mult": 1.0, "threat": 10.0, "fork": 25.0, "l_shape": 12.0},
+        "midgame": {"center_mult": 1.0, "defense_mult": 1.0, "threat": 15.0, "fork": 37.5, "l_shape": 18.0},
+        "endgame": {"center_mult": 0.5, "defense_mult": 3.0, "threat": 10.0, "fork": 25.0, "l_shape": 12.0}
+    }
+    
     def __init__(self, engine):
         self.engine = engine
+        self.phase_weights = {phase: dict(w) for phase, w in self.PHASE_WEIGHTS.items()}
+        try:
+            with open('eval_weights.json', 'r') as f:
+                tuned = json.load(f).get('elite_evaluation', {})
+            for phase, weights in tuned.items():
+                self.phase_weights[phase].update(weights)
+        except (OSError, ValueError):
+            pass
     
     def evaluate(self, board, mark, move_count):
         """Multi-layered evaluation with dynamic weights"""
@@ -225,38 +241,30 @@ class EliteEvaluation:
         if move_count <= 8:
             phase = "opening"
             values = self.OPENING_VALUES
-            center_mult = 2.0
-            threat_mult = 1.0
-            defense_mult = 1.0
         elif move_count <= 20:
             phase = "midgame"
             values = self.MIDGAME_VALUES
-            center_mult = 1.0
-            threat_mult = 1.5
-            defense_mult = 1.0
         else:
             phase = "endgame"
             values = self.ENDGAME_VALUES
-            center_mult = 0.5
-            threat_mult = 1.0
-            defense_mult = 3.0
+        weights = self.phase_weights[phase]
         
         # Position evaluation
         for row in range(6):
             for col in range(7):
                 idx = row * 7 + col
                 if board[idx] == mark:
-                    score += values[row][col] * center_mult
+                    score += values[row][col] * weights["center_mult"]
                 elif board[idx] != 0:
-                    score -= values[row][col] * defense_mult
+                    score -= values[row][col] * weights["defense_mult"]
         
         # Threat evaluation
         threats = self._count_threats(board, mark)
         opp_threats = self._count_threats(board, 3 - mark)
-        score += (threats - opp_threats) * 10 * threat_mult
+        score += (threats - opp_threats) * weights["threat"]
         
         # Pattern recognition
-        score += self._evaluate_patterns(board, mark) * threat_mult
+        score += self._evaluate_patterns(board, mark, weights)
         
         return score
     
@@ -293,7 +301,7 @@ class EliteEvaluation:
         
         return threats
     
-    def _evaluate_patterns(self, board, mark):
+    def _evaluate_patterns(self, board, mark, weights):
         """Detect complex patterns (L-shapes, forks, etc.)"""
         score = 0
         
@@ -311,7 +319,7 @@ class EliteEvaluation:
                 # Count threats created
                 new_threats = self._count_threats(temp_board, mark)
                 if new_threats >= 2:
-                    score += 25  # Fork bonus
+                    score += weights["fork"]  # Fork bonus
         
         # L-shape detection
         for row in range(4):
@@ -320,7 +328,7 @@ class EliteEvaluation:
                 if (board[row * 7 + col] == mark and
                     board[row * 7 + col + 1] == mark and
                     board[(row + 1) * 7 + col] == mark):
-                    score += 12
+                    score += weights["l_shape"]
         
         return score
 
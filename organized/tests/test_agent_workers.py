@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the persistent agent workers
+"""
+
+import os
+import tempfile
+
+from agent_workers import AgentWorker, play_match
+from referee import play_game
+
+# Counts its loads in a file next to it and its moves in memory; new_game() resets
+# the moves. Only plays first.
+COUNTING_AGENT = '''
+with open(__file__ + '.loads', 'a') as f:
+    f.write('x')
+BALLAST = bytearray(64 << 20)
+moves = []
+
+def new_game():
+    moves.clear()
+
+def agent(observation, configuration):
+    if observation.mark == 2:
+        raise ValueError('only plays first')
+    moves.append(observation.step)
+    if len(moves) != observation.step // 2 + 1:
+        raise RuntimeError('state leaked between games')
+    return next(c for c in range(configuration.columns) if observation.board[c] == 0)
+'''
+
+HANGING_AGENT = '''
+import time
+
+def agent(observation, configuration):
+    time.sleep(30)
+    return 0
+'''
+
+# Its process dies outright on its second move of a game
+CRASHING_AGENT = '''
+import os
+
+def agent(observation, configuration):
+    if observation.step >= 2:
+        os._exit(1)
+    return next(c for c in range(configuration.columns) if observation.board[c] == 0)
+'''
+
+
+def _write_agent(source):
+    path = os.path.join(tempfile.mkdtemp(), 'agent.py')
+    with open(path, 'w') as f:
+        f.write(source)
+    return path
+
+
+def test_loads_once_and_resets_per_game():
+    """One load serves every game; new_game() runs before each one"""
+    path = _write_agent(COUNTING_AGENT)
+    with AgentWorker(path) as worker:
+        for _ in range(3):
+            game = play_game(worker, 'random')
+            assert game['reason'] in ('four', 'draw'), game['reason']
+        memory = worker.memory()
+    with open(path + '.loads') as f:
+        assert f.read() == 'x'
+    assert memory['load'] >= 60 << 20 and memory['peak'] >= memory['rss'] > memory['load']
+
+
+def test_errors_and_hangs():
+    """Agent exceptions forfeit the game; a hung worker is replaced and times out"""
+    path = _write_agent(COUNTING_AGENT)
+    with AgentWorker(path) as worker:
+        game = play_game('random', worker)
+        assert (game['reason'], game['rewards']) == ('error', [0, None])
+        assert play_game(worker, 'random')['reason'] != 'error'
+
+    with AgentWorker(_write_agent(HANGING_AGENT)) as worker:
+        game = play_game(worker, 'random', configuration={'actTimeout': -59.5})
+        assert (game['reason'], game['rewards']) == ('timeout', [None, 0])
+        assert worker.restarts == 1
+
+    # Abandoned well inside the overage budget: still a timeout, not an illegal move
+    with AgentWorker(_write_agent(HANGING_AGENT), max_seconds=0.5) as worker:
+        game = play_game('random', worker)
+        assert (game['reason'], game['rewards']) == ('timeout', [0, None])
+        assert worker.restarts == 1 and len(game['times'][1]) == 1
+
+
+def test_crashed_worker_is_replaced():
+    """A worker process that dies costs its game and is reloaded for the next one"""
+    with AgentWorker(_write_agent(CRASHING_AGENT)) as worker:
+        for _ in range(3):
+            game = play_game(worker, 'random')
+            assert (game['reason'], game['rewards']) == ('error', [None, 0])
+            assert len(game['moves']) == 2
+        assert worker.restarts == 3
+        worker.new_game()
+        assert worker.restarts == 3
+
+
+def test_play_match_alternates_colors():
+    """play_match scores from agent1's side over both colors"""
+    result = play_match('negamax', 'random', games=4)
+    assert [game['swapped'] for game in result['games']] == [False, True, False, True]
+    assert sum(result['score']) == 4 and result['score'][0] >= 3
+    assert len(result['memory']) == 2 and all(seconds >= 0 for seconds in result['init_seconds'])
+
+
+if __name__ == "__main__":
+    print("=== Agent Worker Tests ===\n")
+    for test in [test_loads_once_and_resets_per_game, test_errors_and_hangs,
+                 test_crashed_worker_is_replaced, test_play_match_alternates_colors]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Tests for the AlphaZero loop's inference server
+"""
+
+import multiprocessing as mp
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+import alphazero_loop
+from alphazero_loop import InferenceClient, InferenceSlots, inference_server
+from neural_network_v2 import ConnectXNetwork
+
+
+def _dying_worker(*args):
+    os._exit(1)
+
+
+def test_inference_server_matches_local_forward():
+    """Batches answered through shared memory equal a local forward pass"""
+    network = ConnectXNetwork(hidden_size=16)
+    path = os.path.join(tempfile.mkdtemp(), 'weights.bin')
+    network.save(path)
+
+    slots = InferenceSlots(workers=1, batch_size=4)
+    worker_end, server_end = mp.Pipe()
+    control, server_control = mp.Pipe()
+    server = mp.Process(target=inference_server,
+                        args=(slots.name, 1, 4, path, [server_end], server_control))
+    server.start()
+    try:
+        boards = [[0] * 42, [0] * 41 + [1], [0] * 35 + [2] + [0] * 6]
+        players = [1, 2, 1]
+        client = InferenceClient(slots, 0, worker_end)
+        values, policies = client.forward_batch(boards, players)
+        expected_values, expected_policies = network.forward_batch(boards, players)
+        assert np.allclose(values, expected_values, atol=1e-6)
+        assert np.allclose(policies, expected_policies, atol=1e-6)
+
+        worker_end.send(None)
+        control.send(('stop',))
+        stats = control.recv()
+        assert stats['evaluated'] == 3
+        server.join()
+    finally:
+        slots.close()
+
+
+def test_inference_server_survives_dead_workers():
+    """A worker whose pipe closes, or that the trainer drops, no longer stops the server"""
+    network = ConnectXNetwork(hidden_size=16)
+    path = os.path.join(tempfile.mkdtemp(), 'weights.bin')
+    network.save(path)
+
+    slots = InferenceSlots(workers=3, batch_size=4)
+    pipes = [mp.Pipe() for _ in range(3)]
+    control, server_control = mp.Pipe()
+    # A thread holds no other copy of the worker ends, so closing one is seen as EOF
+    server = threading.Thread(target=inference_server,
+                              args=(slots.name, 3, 4, path, [end for _, end in pipes], server_control))
+    server.start()
+    try:
+        pipes[0][0].close()
+        control.send(('drop', 1))
+        values, _ = InferenceClient(slots, 2, pipes[2][0]).forward_batch([[0] * 42], [1])
+        assert np.allclose(values, network.forward_batch([[0] * 42], [1])[0], atol=1e-6)
+
+        pipes[2][0].send(None)
+        control.send(('stop',))
+        assert control.recv()['evaluated'] == 1
+        server.join()
+    finally:
+        slots.close()
+
+
+def test_run_raises_when_every_worker_dies():
+    """The trainer gives up instead of waiting forever for games"""
+    original = alphazero_loop.selfplay_worker
+    alphazero_loop.selfplay_worker = _dying_worker
+    try:
+        alphazero_loop.run(workers=2, generations=1, games_per_generation=2, hidden_size=16,
+                           output_dir=tempfile.mkdtemp())
+    except RuntimeError as e:
+        assert 'Every self-play worker died' in str(e)
+    else:
+        assert False, "run() returned without any worker"
+    finally:
+        alphazero_loop.selfplay_worker = original
+
+
+if __name__ == "__main__":
+    print("=== AlphaZero Loop Tests ===\n")
+    for test in [test_inference_server_matches_local_forward,
+                 test_inference_server_survives_dead_workers,
+                 test_run_raises_when_every_worker_dies]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Tests for the budgeted bitboard negamax and the self-play engine built on it
+"""
+
+import random
+
+from bitboard_core import from_moves, is_winning_move, play, popcount
+from bitboard_negamax import BitboardNegamax, MATE_BOUND, make_searcher
+from bitboard_solver import Solver
+from self_play_generator import SelfPlayEngine
+
+
+def _late_positions(count, plies=30, seed=0):
+    """Random non-terminal positions with few empty cells"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        position, mask = 0, 0
+        for _ in range(plies):
+            cols = [c for c in range(7) if not mask >> (c * 7 + 5) & 1]
+            col = rng.choice(cols)
+            if is_winning_move(position, mask, col):
+                break
+            position, mask = play(position, mask, col)
+        else:
+            positions.append((position, mask))
+    return positions
+
+
+def test_full_depth_agrees_with_solver():
+    """With depth to spare the search plays a move of the solved value"""
+    searcher, solver = BitboardNegamax(), Solver()
+    for position, mask in _late_positions(20):
+        scores = solver.analyze(position, mask, weak=True)
+        move, score, _ = searcher.search(position, mask)
+        assert scores[move] == max(s for s in scores if s is not None)
+        if abs(score) >= MATE_BOUND:
+            assert (score > 0) == (scores[move] > 0)
+
+
+def test_node_budget_is_respected():
+    """A node budget stops the search and reports the last completed depth"""
+    searcher = BitboardNegamax()
+    move, _, depth = searcher.search(0, 0, max_nodes=2000)
+    assert searcher.nodes <= 2000
+    assert 1 <= depth < 42 and 0 <= move < 7
+    _, _, deeper = searcher.search(0, 0, max_nodes=20000)
+    assert deeper >= depth
+
+
+def test_root_noise_still_takes_wins_and_blocks():
+    """Noise varies quiet moves but never skips a win or a forced block"""
+    searcher = BitboardNegamax()
+    win = from_moves([3, 0, 3, 0, 3, 1])
+    block = from_moves([1, 0, 2, 2, 3])
+    rng = random.Random(0)
+    for _ in range(10):
+        assert searcher.search(*win, max_depth=4, noise=1000, rng=rng)[0] == 3
+        assert searcher.search(*block, max_depth=4, noise=1000, rng=rng)[0] == 4
+    openings = {searcher.search(0, 0, max_depth=4, noise=50, rng=rng)[0] for _ in range(20)}
+    assert len(openings) > 1
+
+
+def test_compiled_backend_matches_python():
+    """make_searcher (numba when installed) finds the same move, score and depth"""
+    searcher, reference = make_searcher(tt_size=1 << 22), BitboardNegamax()
+    for position, mask in _late_positions(10, plies=10, seed=1):
+        searcher.new_game()
+        reference.new_game()
+        assert searcher.search(position, mask, max_depth=7) == reference.search(position, mask, max_depth=7)
+    move, _, depth = searcher.search(0, 0, max_nodes=2000)
+    assert searcher.nodes <= 2000 and searcher.stopped
+    assert 1 <= depth < 42 and 0 <= move < 7
+
+
+def test_self_play_game_record():
+    """Self-play games are legal and end on the winner's move"""
+    engine = SelfPlayEngine(search_depth=6, num_workers=1, node_budget=3000, seed=0)
+    for game_id in range(3):
+        game = engine.play_game(game_id)
+        assert game['length'] == len(game['moves'])
+        position, mask = 0, 0
+        for ply, col in enumerate(game['moves']):
+            assert not mask >> (col * 7 + 5) & 1
+            won = is_winning_move(position, mask, col)
+            assert won == (ply == game['length'] - 1 and game['winner'] != 0)
+            position, mask = play(position, mask, col)
+        assert game['winner'] in (0, 1, 2)
+        assert game['winner'] != 0 or popcount(mask) == 42
+
+
+if __name__ == "__main__":
+    print("=== Bitboard Negamax Tests ===\n")
+    for test in [test_full_depth_agrees_with_solver,
+                 test_node_budget_is_respected,
+                 test_root_noise_still_takes_wins_and_blocks,
+                 test_compiled_backend_matches_python,
+                 test_self_play_game_record]:
+        test()
+        print(f"✓ {test.__name__}")
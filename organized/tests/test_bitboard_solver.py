@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the exact bitboard solver
+"""
+
+import random
+
+from bitboard_core import (can_play, play, possible, winning_position, valid_columns,
+                           is_winning_move, from_moves)
+from bitboard_solver import Solver, make_solver
+
+
+def brute_force(position, mask, moves_played):
+    """Plain minimax with the solver's scoring"""
+    if winning_position(position, mask) & possible(mask):
+        return (43 - moves_played) // 2
+    if moves_played == 42:
+        return 0
+    return max(-brute_force(*play(position, mask, col), moves_played + 1)
+               for col in range(7) if can_play(mask, col))
+
+
+def late_positions(count, plies, seed=0):
+    """Random non-terminal positions with `plies` stones"""
+    rng = random.Random(seed)
+    found = []
+    while len(found) < count:
+        position, mask = 0, 0
+        for _ in range(plies):
+            col = rng.choice(valid_columns(mask))
+            if is_winning_move(position, mask, col):
+                break
+            position, mask = play(position, mask, col)
+        else:
+            found.append((position, mask))
+    return found
+
+
+def test_solver_matches_brute_force():
+    """Strong and weak scores agree with exhaustive minimax"""
+    solver = Solver()
+    for position, mask in late_positions(20, 33):
+        expected = brute_force(position, mask, 33)
+        assert solver.solve(position, mask) == expected
+        assert solver.solve(position, mask, weak=True) == (expected > 0) - (expected < 0)
+
+
+def test_best_moves_takes_immediate_win():
+    """Three in a row on the bottom: finishing it is the only best move"""
+    position, mask = from_moves([2, 2, 3, 3, 4, 4])
+    score, best = Solver().best_moves(position, mask)
+    assert score == (43 - 6) // 2
+    assert set(best) == {1, 5}
+
+
+def test_best_moves_match_analyze():
+    """The null-window best-move test picks the columns full analysis scores best"""
+    solver = Solver()
+    for position, mask in late_positions(30, 26, seed=1):
+        scores = solver.analyze(position, mask)
+        best = max(s for s in scores if s is not None)
+        assert solver.best_moves(position, mask) == (best, [c for c, s in enumerate(scores) if s == best])
+
+
+def test_compiled_solver_matches_python():
+    """The numba solver gives the Python solver's scores and best moves"""
+    compiled = make_solver('numba', tt_size=1 << 16)
+    solver = Solver()
+    for position, mask in late_positions(30, 22, seed=2):
+        assert compiled.best_moves(position, mask) == solver.best_moves(position, mask)
+    compiled.reset()
+    assert compiled.nodes == 0 and not compiled.tt.any()
+
+
+if __name__ == "__main__":
+    print("=== Bitboard Solver Tests ===\n")
+    for test in [test_solver_matches_brute_force,
+                 test_best_moves_takes_immediate_win, test_best_moves_match_analyze,
+                 test_compiled_solver_matches_python]:
+        test()
+        print(f"✓ {test.__name__}")
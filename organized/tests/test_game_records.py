@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for packed game records
+"""
+
+import os
+import pickle
+import random
+import tempfile
+
+from bitboard_core import from_moves
+from game_records import GameRecordWriter, GameRecords, write_games
+from selfplay_dataset import iter_games
+
+
+def _random_games(count, seed=0):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        moves = [rng.randrange(7) for _ in range(rng.randint(1, 42))]
+        games.append({'moves': moves, 'winner': rng.choice([0, 1, 2]),
+                      'generator': rng.choice(['negamax', 'mcts'])})
+    return games
+
+
+def test_round_trip():
+    """Games, winners and generator names survive packing"""
+    games = _random_games(300)
+    path = os.path.join(tempfile.mkdtemp(), 'games.c4g')
+    assert write_games(games, path, generator=lambda game: game['generator']) == 300
+
+    records = GameRecords(path)
+    assert len(records) == 300
+    for game, record in zip(games, records):
+        assert record['moves'] == game['moves']
+        assert record['winner'] == game['winner'] and record['length'] == len(game['moves'])
+        assert record['generator'] == game['generator']
+    assert records[137]['moves'] == games[137]['moves']
+    assert [g['moves'] for g in iter_games(path)] == [g['moves'] for g in games]
+
+    with open(os.path.join(os.path.dirname(path), 'games.pkl'), 'wb') as f:
+        pickle.dump(games, f)
+        pickled = f.tell()
+    assert os.path.getsize(path) * 2 < pickled
+
+
+def test_positions_match_replay():
+    """Vectorized position replay agrees with bitboard_core, chunk boundaries included"""
+    games = [{'moves': [3, 3, 2, 4, 2, 2, 1, 0], 'winner': 1},
+             {'moves': [0], 'winner': 0},
+             {'moves': [6, 5, 4, 3, 2, 1, 0, 0, 1], 'winner': 2}]
+    path = os.path.join(tempfile.mkdtemp(), 'games.c4g')
+    write_games(games, path)
+
+    seen = 0
+    for positions, masks, moves, game_ids, plies in GameRecords(path).iter_positions(chunk_size=2):
+        for position, mask, col, game_id, ply in zip(positions, masks, moves, game_ids, plies):
+            expected = from_moves(games[game_id]['moves'][:ply])
+            assert (int(position), int(mask)) == expected
+            assert col == games[game_id]['moves'][ply]
+            seen += 1
+    assert seen == sum(len(g['moves']) for g in games)
+
+
+def test_unclosed_file_reads_empty():
+    """A writer that never closed leaves a valid, empty file"""
+    path = os.path.join(tempfile.mkdtemp(), 'partial.c4g')
+    writer = GameRecordWriter(path)
+    writer.add([3, 3, 3], 0)
+    writer.file.flush()
+    assert len(GameRecords(path)) == 0
+    writer.close()
+    assert GameRecords(path)[0]['moves'] == [3, 3, 3]
+
+
+if __name__ == "__main__":
+    print("=== Game Records Tests ===\n")
+    for test in [test_round_trip,
+                 test_positions_match_replay,
+                 test_unclosed_file_reads_empty]:
+        test()
+        print(f"✓ {test.__name__}")
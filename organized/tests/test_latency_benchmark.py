@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-move latency benchmark
+"""
+
+import os
+import random
+import tempfile
+
+from bitboard_core import from_moves, possible, winning_position
+from latency_benchmark import PHASES, _random_line, benchmark_agent, discover_agents, position_suite
+
+# Sleeps on its first call, reports a depth, plays off-board in the endgame and
+# hangs on 38-stone positions
+TEST_AGENT = '''
+import time
+
+def agent(observation, configuration):
+    if not hasattr(agent, 'ready'):
+        time.sleep(0.2)
+        agent.ready = True
+    agent.last_depth = 3
+    stones = sum(1 for cell in observation.board if cell)
+    if stones == 38:
+        time.sleep(30)
+    if stones >= 26:
+        return 7
+    return next(c for c in range(configuration.columns) if observation.board[c] == 0)
+'''
+
+
+def test_position_suite():
+    """The suite is deterministic, distinct and sorted into the right phases"""
+    suite = position_suite(per_phase=20, seed=3)
+    assert suite == position_suite(per_phase=20, seed=3)
+    assert len(suite) == 80 and len({tuple(entry['moves']) for entry in suite}) == 80
+    for entry in suite:
+        position, mask = from_moves(entry['moves'])
+        tactical = bool((winning_position(position, mask) | winning_position(position ^ mask, mask))
+                        & possible(mask))
+        assert tactical == (entry['phase'] == 'tactical')
+        if not tactical:
+            lo, hi = PHASES[entry['phase']]
+            assert lo <= len(entry['moves']) <= hi
+
+
+def test_benchmark_agent_reports():
+    """First call, depth, illegal moves and abandoned moves are all reported"""
+    path = os.path.join(tempfile.mkdtemp(), 'agent.py')
+    with open(path, 'w') as f:
+        f.write(TEST_AGENT)
+    rng = random.Random(0)
+    endgames = []
+    for length in (28, 38):
+        moves = []
+        while len(moves) != length:
+            moves = _random_line(rng, length)[0]
+        endgames.append({'phase': 'endgame', 'moves': moves})
+    positions = [{'phase': 'opening', 'moves': []}, {'phase': 'opening', 'moves': [3, 3]}] + endgames
+    result = benchmark_agent(path, positions, {'actTimeout': 0.3}, margin=0.05, max_seconds=0.5)
+
+    assert result['first_call_seconds'] >= 0.2 and result['restarts'] == 1
+    opening, endgame = result['phases']['opening'], result['phases']['endgame']
+    assert opening['moves'] == 2 and opening['illegal'] == 0 and opening['p99'] < 0.2
+    assert opening['depth'] == {'mean': 3.0, 'min': 3, 'max': 3}
+    assert endgame['illegal'] == 1 and endgame['errors'] == 0  # The hang counts as a timeout only
+    assert endgame['max'] == 0.5 and endgame['timeouts'] == 1
+    assert result['overall']['margin_violations'] == 1
+
+
+def test_discovers_agent_files():
+    """Every file defining agent() is found, helper modules are not"""
+    names = [name for name, _ in discover_agents()]
+    assert 'submission' in names and 'deep_rl_agent' in names
+    assert 'bitboard_core' not in names and 'final_agent_comparison' not in names
+
+
+if __name__ == "__main__":
+    print("=== Latency Benchmark Tests ===\n")
+    for test in [test_position_suite, test_benchmark_agent_reports, test_discovers_agent_files]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for NeuralMCTS batched leaf evaluation
+"""
+
+import tracemalloc
+
+import numpy as np
+from neural_network_v2 import NeuralMCTS, MCTSNode, EvaluationCache
+
+
+class UniformNetwork:
+    """Stand-in network: flat priors, zero value, records batch sizes"""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def forward_batch(self, boards, players):
+        self.batch_sizes.append(len(boards))
+        return np.zeros(len(boards)), np.full((len(boards), 7), 1 / 7)
+
+
+def test_leaves_are_evaluated_in_batches():
+    """Simulations are grouped into forward_batch calls of up to batch_size"""
+    network = UniformNetwork()
+    mcts = NeuralMCTS(network, simulations=64, batch_size=16)
+    probs, _ = mcts.search([0] * 42, 1)
+    assert abs(probs.sum() - 1) < 1e-9
+    assert max(network.batch_sizes) > 1
+    assert max(network.batch_sizes) <= 16
+    assert mcts.evaluations == sum(network.batch_sizes)
+
+
+def test_virtual_loss_spreads_and_reverts():
+    """Virtual loss sends each descent to a different leaf and is undone cleanly"""
+    mcts = NeuralMCTS(UniformNetwork(), batch_size=7)
+    root = MCTSNode([0] * 42, 1)
+    root.expand(np.full(7, 1 / 7))
+    root.visits = 1
+
+    pending, terminals = mcts._collect_leaves(root, 7)
+    assert terminals == 0
+    assert sorted(leaf.move for leaf in pending) == list(range(7))
+
+    for leaf in pending:
+        leaf.revert_virtual_loss(mcts.virtual_loss)
+    assert root.visits == 1 and root.value_sum == 0
+    assert all(child.visits == 0 for child in root.children.values())
+
+
+def test_cache_reuses_mirrored_policy():
+    """A mirrored board hits the same entry with a flipped policy"""
+    cache = EvaluationCache(max_mb=1)
+    board = [0] * 42
+    board[35] = 1  # Bottom-left corner
+    mirrored = [0] * 42
+    mirrored[41] = 1  # Bottom-right corner
+    policy = np.arange(7) / 21
+
+    cache.store(board, 2, 0.25, policy)
+    value, cached_policy = cache.lookup(mirrored, 2)
+    assert value == 0.25
+    assert np.allclose(cached_policy, policy[::-1])
+    assert cache.mirrored_hits == 1
+
+
+def test_cache_is_bounded_lru():
+    """Oldest entries are evicted at the memory cap"""
+    cache = EvaluationCache(max_mb=1)
+    cache.max_entries = 2
+    boards = []
+    for col in range(3):
+        board = [0] * 42
+        board[35 + col] = 1
+        boards.append(board)
+        cache.store(board, 2, 0.0, np.full(7, 1 / 7))
+    assert len(cache.table) == 2 and cache.evictions == 1
+    assert cache.lookup(boards[0], 2) is None
+    assert cache.lookup(boards[2], 2) is not None
+
+
+def test_cache_memory_stays_within_cap():
+    """A full cache holds about max_mb of memory, not several times more"""
+    cache = EvaluationCache(max_mb=1)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(cache.max_entries):
+        cache.table[(1 << 45) + i] = (0.0, np.full(7, 1 / 7))
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert 0.7 * (1 << 20) < used < 1.3 * (1 << 20)
+
+
+def test_repeated_search_hits_cache():
+    """A second search of the same position skips most network calls"""
+    network = UniformNetwork()
+    mcts = NeuralMCTS(network, simulations=32, batch_size=8)
+    mcts.search([0] * 42, 1)
+    first = mcts.evaluations
+    mcts.search([0] * 42, 1)
+    assert mcts.evaluations - first < first
+    assert mcts.cache.hit_rate() > 0
+
+
+if __name__ == "__main__":
+    print("=== NeuralMCTS Tests ===\n")
+    for test in [test_leaves_are_evaluated_in_batches,
+                 test_virtual_loss_spreads_and_reverts,
+                 test_cache_reuses_mirrored_policy,
+                 test_cache_is_bounded_lru,
+                 test_cache_memory_stays_within_cap,
+                 test_repeated_search_hits_cache]:
+        test()
+        print(f"✓ {test.__name__}")
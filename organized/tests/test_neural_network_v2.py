@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Tests for the ConnectXNetwork value/policy network
+"""
+
+import os
+import tempfile
+
+import numpy as np
+from bitboard_core import decode_position, from_moves
+from neural_network_v2 import ConnectXNetwork, QuantizedNetwork
+
+
+def reference_conv(x, kernel, bias):
+    """Loop convolution with same padding, for checking the fast path"""
+    k_h, k_w, _, k_out = kernel.shape
+    padded = np.pad(x, ((0, 0), (k_h // 2, k_h // 2), (k_w // 2, k_w // 2), (0, 0)))
+    out = np.zeros(x.shape[:3] + (k_out,))
+    for n in range(x.shape[0]):
+        for i in range(x.shape[1]):
+            for j in range(x.shape[2]):
+                for f in range(k_out):
+                    out[n, i, j, f] = np.sum(padded[n, i:i + k_h, j:j + k_w] * kernel[..., f]) + bias[f]
+    return out
+
+
+def test_conv_matches_reference():
+    """im2col convolution equals the loop version"""
+    net = ConnectXNetwork(hidden_size=32)
+    x = np.random.rand(2, 6, 7, 3)
+    kernel = np.random.rand(3, 3, 3, 4)
+    bias = np.random.rand(4)
+    assert np.allclose(net._conv2d(x, kernel, bias), reference_conv(x, kernel, bias))
+
+
+def test_batch_forward_matches_single():
+    """forward_batch gives the same answers as per-board forward (to float32 precision)"""
+    np.random.seed(0)
+    net = ConnectXNetwork(hidden_size=32)
+    boards = [[0] * 42 for _ in range(3)]
+    boards[1][38] = 1
+    boards[2][38], boards[2][31] = 1, 2
+    players = [1, 2, 1]
+
+    values, policies = net.forward_batch(boards, players)
+    assert values.shape == (3,) and policies.shape == (3, 7)
+    for i in range(3):
+        value, policy = net.forward(boards[i], players[i])
+        assert np.isclose(value, values[i], rtol=1e-4, atol=1e-6)
+        assert np.allclose(policy, policies[i], rtol=1e-4, atol=1e-6)
+        assert np.isclose(policy.sum(), 1)
+
+
+def test_gradients_match_finite_differences():
+    """Analytic backprop agrees with central differences for every weight"""
+    rng = np.random.RandomState(0)
+    net = ConnectXNetwork(hidden_size=8)
+    net.weights = {k: v.astype(np.float64) + rng.normal(0, 0.05, v.shape)
+                   for k, v in net.weights.items()}
+    net._init_optimizer_state()
+
+    inputs = (rng.rand(4, 6, 7, 3) > 0.6).astype(np.float64)
+    values = rng.uniform(-1, 1, 4)
+    policies = rng.dirichlet(np.ones(7), 4)
+
+    net.compute_gradients(inputs, values, policies)
+    for name, weight in net.weights.items():
+        grad = net.gradients[name]
+        idx = np.unravel_index(np.argmax(np.abs(grad)), grad.shape)
+        original = weight[idx]
+        weight[idx] = original + 1e-6
+        loss_plus = net.compute_gradients(inputs, values, policies)[0]
+        weight[idx] = original - 1e-6
+        loss_minus = net.compute_gradients(inputs, values, policies)[0]
+        weight[idx] = original
+        net.compute_gradients(inputs, values, policies)
+        numeric = (loss_plus - loss_minus) / 2e-6
+        assert np.isclose(net.gradients[name][idx], numeric, rtol=1e-4, atol=1e-8), name
+
+
+def test_train_step_reduces_loss():
+    """Repeated steps on one batch drive its loss down"""
+    net = ConnectXNetwork(hidden_size=32, learning_rate=0.001)
+    boards = [[0] * 42 for _ in range(8)]
+    inputs = net.boards_to_input(boards, [1] * 8)
+    values = np.full(8, 0.5)
+    policies = np.tile(np.eye(7)[3], (8, 1))
+
+    first = net.train_step(inputs, values, policies)[0]
+    for _ in range(20):
+        last = net.train_step(inputs, values, policies)[0]
+    assert last < first
+
+
+def test_binary_weights_round_trip():
+    """Binary save/load (copied and memory-mapped) restores every tensor"""
+    net = ConnectXNetwork(hidden_size=16)
+    path = os.path.join(tempfile.mkdtemp(), 'weights.bin')
+    net.save(path)
+
+    for mmap in (False, True):
+        loaded = ConnectXNetwork(hidden_size=8)
+        loaded.load(path, mmap=mmap)
+        assert loaded.hidden_size == 16
+        for name, weight in net.weights.items():
+            assert np.array_equal(loaded.weights[name], weight)
+
+
+def test_encoded_weights_round_trip():
+    """The embeddable zlib+base64 text rebuilds an identical network"""
+    net = ConnectXNetwork(hidden_size=16)
+    rebuilt = ConnectXNetwork.from_encoded(net.encode())
+    value, policy = net.forward([0] * 42, 1)
+    rebuilt_value, rebuilt_policy = rebuilt.forward([0] * 42, 1)
+    assert value == rebuilt_value
+    assert np.array_equal(policy, rebuilt_policy)
+
+
+def sample_positions(count, seed=0):
+    """Boards from short random move sequences, with the side to move"""
+    rng = np.random.RandomState(seed)
+    boards, players = [], []
+    for _ in range(count):
+        moves = list(rng.randint(0, 7, size=rng.randint(0, 12)))
+        moves = [col for i, col in enumerate(moves) if moves[:i + 1].count(col) <= 6]
+        player = 1 if len(moves) % 2 == 0 else 2
+        boards.append(decode_position(*from_moves(moves), player))
+        players.append(player)
+    return boards, players
+
+
+def test_int8_network_tracks_float():
+    """Quantized outputs stay close to float32 and survive serialization"""
+    net = ConnectXNetwork(hidden_size=32)
+    boards, players = sample_positions(200)
+    quantized = QuantizedNetwork.from_network(net, boards[:100], players[:100])
+    assert quantized.weights['fc1'].dtype == np.int8
+
+    values, policies = net.forward_batch(boards[100:], players[100:])
+    q_values, q_policies = quantized.forward_batch(boards[100:], players[100:])
+    assert np.max(np.abs(values - q_values)) < 0.1
+    assert np.max(np.abs(policies - q_policies)) < 0.05
+
+    rebuilt = QuantizedNetwork.from_encoded(quantized.encode())
+    assert np.array_equal(rebuilt.forward_batch(boards, players)[1],
+                          quantized.forward_batch(boards, players)[1])
+    assert len(quantized.to_bytes()) < len(net.to_bytes()) / 3
+
+
+def test_int8_accumulation_matches_int32():
+    """Float32 BLAS accumulation of the int8 products agrees with int32 accumulation"""
+    net = ConnectXNetwork(hidden_size=32)
+    boards, players = sample_positions(50)
+    quantized = QuantizedNetwork.from_network(net, boards, players)
+    x = np.random.rand(50, 6 * 7 * 64) * 10
+    q_x = quantized._quantize_input(x, 'fc1')
+    assert q_x.dtype == np.float32 and quantized._kernels['fc1'].dtype == np.float32
+    exact = np.dot(q_x.astype(np.int32), quantized.weights['fc1'].astype(np.int32))
+    error = np.abs(np.dot(q_x, quantized._kernels['fc1']) - exact)
+    assert error.max() <= 1e-6 * np.abs(exact).max() + 1
+
+
+if __name__ == "__main__":
+    print("=== ConnectXNetwork Tests ===\n")
+    for test in [test_conv_matches_reference,
+                 test_batch_forward_matches_single,
+                 test_gradients_match_finite_differences,
+                 test_train_step_reduces_loss,
+                 test_binary_weights_round_trip,
+                 test_encoded_weights_round_trip,
+                 test_int8_network_tracks_float,
+                 test_int8_accumulation_matches_int32]:
+        test()
+        print(f"✓ {test.__name__}")
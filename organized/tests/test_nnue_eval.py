@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the NNUE-style evaluator and its negamax
+"""
+
+import random
+
+import numpy as np
+
+from bitboard_core import from_moves, play, popcount, valid_columns
+from nnue_eval import NNUEEvaluator, NNUESearch, cell_window_counts, training_positions
+
+
+def test_incremental_accumulator_matches_refresh():
+    """push/pop along random lines leaves the same accumulators as a refresh"""
+    evaluator = NNUEEvaluator(seed=1)
+    rng = random.Random(0)
+    position, mask = 0, 0
+    evaluator.refresh(position, mask)
+    stack = []
+    for _ in range(20):
+        col = rng.choice(valid_columns(mask))
+        color = popcount(mask) & 1
+        stack.append((evaluator.push(mask, col, color), color))
+        position, mask = play(position, mask, col)
+
+    incremental = evaluator.acc.copy()
+    evaluator.refresh(position, mask)
+    assert np.array_equal(incremental, evaluator.acc)
+
+    for cell, color in reversed(stack):
+        evaluator.pop(cell, color)
+    evaluator.refresh(0, 0)
+    assert np.array_equal(evaluator.acc, np.tile(evaluator.b1q, (2, 1)))
+
+
+def test_cell_value_init_is_the_window_table():
+    """Untrained evaluator scores own minus opponent window counts"""
+    evaluator = NNUEEvaluator.from_cell_values()
+    table = cell_window_counts()
+    position, mask = from_moves([3, 0])
+    evaluator.refresh(position, mask)
+    # Side to move (first player) owns the center stone, opponent a corner
+    expected = int((table[3 * 6] - table[0]) / 100.0 * 100)
+    assert abs(evaluator.evaluate(0) - expected) <= 1
+
+
+def test_training_reduces_loss():
+    """Training on replayed games lowers the outcome loss"""
+    games = [{'moves': [3, 2, 3, 2, 3, 2, 3], 'winner': 1},
+             {'moves': [0, 3, 1, 3, 6, 3, 5, 3], 'winner': 2}] * 20
+    positions, masks, targets = training_positions(games)
+    evaluator = NNUEEvaluator(seed=0)
+    history = evaluator.train(positions, masks, targets, epochs=10, verbose=False)
+    assert history[-1] < history[0]
+
+
+def test_search_finds_win_and_block():
+    """Negamax takes an immediate win and blocks a single threat"""
+    search = NNUESearch(NNUEEvaluator.from_cell_values())
+    position, mask = from_moves([3, 3, 2, 2, 1, 1])
+    move, score, _ = search.search(position, mask, max_depth=4, time_limit=5)
+    assert move in (0, 4)
+    assert score > NNUESearch.WIN_SCORE - 42
+
+    position, mask = from_moves([3, 0, 3, 0, 3])
+    move, _, _ = search.search(position, mask, max_depth=4, time_limit=5)
+    assert move == 3
+
+
+if __name__ == "__main__":
+    print("=== NNUE Evaluator Tests ===\n")
+    for test in [test_incremental_accumulator_matches_refresh,
+                 test_cell_value_init_is_the_window_table,
+                 test_training_reduces_loss,
+                 test_search_finds_win_and_block]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the opening-statistics aggregator
+"""
+
+import json
+import os
+import pickle
+import random
+import tempfile
+
+import numpy as np
+
+from advanced_search_engine import SearchEngine
+from bitboard_core import book_candidates, canonical_key, from_moves
+from opening_stats import OpeningStats
+
+
+def _random_games(count, seed=0):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        heights, moves = [0] * 7, []
+        for _ in range(rng.randint(1, 10)):
+            col = rng.choice([c for c in (2, 3, 3, 4, 1, 5) if heights[c] < 6])
+            heights[col] += 1
+            moves.append(col)
+        games.append({'moves': moves, 'winner': rng.choice([0, 1, 2])})
+    return games
+
+
+def _reference(games, max_depth):
+    """Per canonical position: [games, P1 wins, draws, P2 wins]"""
+    counts = {}
+    for game in games:
+        moves = game['moves'][:max_depth]
+        for length in range(1, len(moves) + 1):
+            k, _ = canonical_key(*from_moves(moves[:length]))
+            entry = counts.setdefault(k, [0, 0, 0, 0])
+            entry[0] += 1
+            entry[{1: 1, 0: 2, 2: 3}[game['winner']]] += 1
+    return counts
+
+
+def test_matches_per_position_counts():
+    """Buffered bulk updates give the same counts as a per-prefix dict"""
+    games = _random_games(300)
+    stats = OpeningStats(max_depth=6, buffer_size=64)
+    stats.add_games(games, chunk_size=50)
+    expected = _reference(games, 6)
+
+    assert len(stats) == len(expected) and stats.games == 300
+    assert stats.keys.tolist() == sorted(expected)
+    assert stats.counts.tolist() == [expected[k] for k in sorted(expected)]
+    scores = stats.counts[:, 1].astype(np.int64) - stats.counts[:, 3]
+    assert np.array_equal(stats.sums[:, 0], scores)
+
+
+def test_merge_equals_single_pass():
+    """Shards aggregated separately merge to the single-pass result"""
+    games = _random_games(200, seed=1)
+    whole = OpeningStats(max_depth=8)
+    whole.add_games(games)
+    left, right = OpeningStats(max_depth=8), OpeningStats(max_depth=8)
+    left.add_games(games[:70])
+    right.add_games(games[70:])
+    left.merge(right)
+    whole.flush()
+
+    assert np.array_equal(left.keys, whole.keys)
+    assert np.array_equal(left.counts, whole.counts)
+    assert np.allclose(left.sums, whole.sums)
+    assert left.games == whole.games
+
+
+def _book_key(moves):
+    return str(canonical_key(*from_moves(moves))[0])
+
+
+def test_book_has_one_entry_per_position():
+    """Transposed and mirrored lines share one entry, keyed by canonical position"""
+    games = [{'moves': [3, 2, 4], 'winner': 1}, {'moves': [4, 2, 3], 'winner': 2},
+             {'moves': [3, 4, 2], 'winner': 0}]
+    stats = OpeningStats(max_depth=3)
+    stats.add_games(games)
+    book = stats.to_book(min_games=1)
+
+    assert len(book) == 5  # 3 / 2 (mirrors 4) / 3, 2 / 2, 4 (mirrors 4, 2) / 3, 2, 4
+    assert book[_book_key([3])]['count'] == 2
+    assert book[_book_key([3, 2, 4])] is book[_book_key([4, 2, 3])] is book[_book_key([3, 4, 2])]
+    assert book[_book_key([3, 2, 4])]['count'] == 3 and book[_book_key([3, 2, 4])]['score'] == 0
+    assert book[_book_key([3, 2, 4])]['line'] == [2, 4, 3]
+    assert book[_book_key([4])]['count'] == 1 and _book_key([0]) not in book
+    assert stats.get(*from_moves([4, 2, 3]))['wins'] == 1
+    assert stats.get(*from_moves([0])) is None
+    assert stats.to_book(min_games=3) == {}  # (3,) itself was only reached twice
+
+
+def test_book_size_bounded_by_positions():
+    """Heavily transposing games give at most one book entry per distinct position"""
+    games = _random_games(2000, seed=3)
+    stats = OpeningStats(max_depth=10)
+    stats.add_games(games)
+    book = stats.to_book(min_games=1)
+
+    assert len(book) <= len(stats)
+    assert all(_book_key(entry['line']) == k for k, entry in book.items())
+    assert len(stats.to_book(min_games=3)) <= len(book)
+
+
+def test_book_answers_mirrored_and_transposed_lines():
+    """Agents reading the book find moves after any move order or mirror image of a line"""
+    games = _random_games(2000, seed=4)
+    stats = OpeningStats(max_depth=6)
+    stats.add_games(games)
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'book.json')
+    with open(path, 'w') as f:
+        json.dump(stats.to_book(min_games=10), f)
+
+    cwd = os.getcwd()
+    os.chdir(directory)  # The engine caches its tables in the working directory
+    try:
+        engine = SearchEngine(tt_size_mb=1, opening_book_file=path)
+    finally:
+        os.chdir(cwd)
+    book = engine.position_book
+    line = [3, 2, 4]
+    for moves in (line, [4, 2, 3], [3, 4, 2], [2, 4, 3]):  # transposed, mirrored, both
+        assert book_candidates(book, *from_moves(moves))
+        assert engine.get_opening_move(moves) is not None
+    answers = {col for col, _ in book_candidates(book, *from_moves(line))}
+    assert {col for col, _ in book_candidates(book, *from_moves([4, 2, 3]))} == answers
+    assert {6 - col for col, _ in book_candidates(book, *from_moves([3, 4, 2]))} == answers
+
+
+def test_save_load_and_pickle():
+    """Saved and pickled aggregators round-trip, pending updates included"""
+    stats = OpeningStats(max_depth=5)
+    stats.add_games(_random_games(50, seed=2))
+    path = os.path.join(tempfile.mkdtemp(), 'stats.npz')
+    stats.save(path)
+    for copy in (OpeningStats.load(path), pickle.loads(pickle.dumps(stats))):
+        assert copy.to_book(min_games=1) == stats.to_book(min_games=1)
+        assert copy.games == 50
+
+
+if __name__ == "__main__":
+    print("=== Opening Stats Tests ===\n")
+    for test in [test_matches_per_position_counts, test_merge_equals_single_pass,
+                 test_book_has_one_entry_per_position, test_book_size_bounded_by_positions,
+                 test_book_answers_mirrored_and_transposed_lines,
+                 test_save_load_and_pickle]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Tests for the bitboard MCTS engine and its parallel modes
+"""
+
+from bitboard_core import from_moves
+from mcts_engine import MCTSEngine
+from parallel_mcts import root_parallel_search, tree_parallel_search
+
+
+def test_engine_takes_immediate_win():
+    """Engine plays the winning column"""
+    engine = MCTSEngine(seed=1)
+    position, mask = from_moves([3, 3, 2, 2, 1, 1])
+    assert engine.best_move(position, mask, iterations=50) in (0, 4)
+
+
+def test_rave_collects_amaf_statistics():
+    """RAVE fills per-column AMAF stats at the root and still finds the win"""
+    engine = MCTSEngine(seed=1, rave=True)
+    position, mask = from_moves([3, 3])
+    root = engine.run(position, mask, iterations=200)
+    assert sum(root.amaf_visits) >= 200
+    position, mask = from_moves([3, 3, 2, 2, 1, 1])
+    assert engine.best_move(position, mask, iterations=50) in (0, 4)
+
+
+def test_root_parallel_merges_visits():
+    """Merged visit counts cover every playout"""
+    position, mask = from_moves([3, 3])
+    visits, _, playouts = root_parallel_search(position, mask, 100, workers=2)
+    assert playouts == 200
+    assert sum(visits) == 200
+
+
+def test_tree_parallel_removes_virtual_loss():
+    """Root child visits add up once virtual loss is backed out"""
+    position, mask = from_moves([3, 3])
+    visits, playouts = tree_parallel_search(position, mask, 100, workers=2)
+    assert playouts == 200
+    assert sum(visits) == 200
+
+
+if __name__ == "__main__":
+    print("=== Parallel MCTS Tests ===\n")
+    for test in [test_engine_takes_immediate_win,
+                 test_rave_collects_amaf_statistics,
+                 test_root_parallel_merges_visits,
+                 test_tree_parallel_removes_virtual_loss]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Tests for the local referee
+"""
+
+import random
+import time
+
+from referee import AgentTimeout, board_after, cross_check, play_game
+
+
+def leftmost_agent(observation, configuration):
+    return next(c for c in range(configuration.columns) if observation.board[c] == 0)
+
+
+def test_observations_and_four():
+    """Agents see kaggle observations; four in a row wins with rewards 1 / -1"""
+    seen = []
+
+    def recording_agent(observation, configuration):
+        seen.append((observation.step, observation.mark, list(observation.board)))
+        return 0
+
+    game = play_game(recording_agent, lambda observation, configuration: 6)
+    assert (game['winner'], game['reason'], game['rewards']) == (1, 'four', [1, -1])
+    assert game['moves'] == [0, 6, 0, 6, 0, 6, 0]
+    assert [(step, mark) for step, mark, _ in seen] == [(0, 1), (2, 1), (4, 1), (6, 1)]
+    assert seen[-1][2] == board_after([0, 6, 0, 6, 0, 6])
+
+
+def test_failures_forfeit():
+    """Illegal moves, exceptions, exhausted overage and abandoned moves lose with reward None"""
+    full_column = play_game(lambda observation, configuration: 0, leftmost_agent, opening=[0] * 6)
+    assert (full_column['winner'], full_column['reason'], full_column['rewards']) == (2, 'illegal', [None, 0])
+    assert play_game(leftmost_agent, lambda observation, configuration: 1.5)['reason'] == 'illegal'
+
+    def crashing_agent(observation, configuration):
+        raise RuntimeError
+
+    assert play_game(crashing_agent, leftmost_agent)['rewards'] == [None, 0]
+
+    def slow_agent(observation, configuration):
+        time.sleep(0.03)
+        return leftmost_agent(observation, configuration)
+
+    slow = play_game(slow_agent, leftmost_agent, configuration={'actTimeout': 0.01})
+    assert slow['reason'] == 'four'  # The first overruns come out of the overage budget
+    timeout = play_game(leftmost_agent, slow_agent, configuration={'actTimeout': -59.99})
+    assert (timeout['winner'], timeout['reason'], timeout['rewards']) == (1, 'timeout', [0, None])
+    assert play_game(leftmost_agent, slow_agent, configuration={'actTimeout': -59.99},
+                     enforce_timeouts=False)['reason'] != 'timeout'
+
+    def abandoned_agent(observation, configuration):
+        raise AgentTimeout
+
+    abandoned = play_game(abandoned_agent, leftmost_agent)
+    assert (abandoned['reason'], abandoned['rewards']) == ('timeout', [None, 0])
+
+
+def test_builtin_agents():
+    """'random' and 'negamax' play like kaggle's: negamax beats random"""
+    random.seed(0)
+    wins = sum(play_game('negamax', 'random')['winner'] == 1 for _ in range(5))
+    assert wins >= 4
+    game = play_game('random', 'random')
+    assert game['reason'] in ('four', 'draw') and len(game['times'][0]) >= len(game['moves']) // 2
+
+
+def test_cross_check_with_kaggle():
+    """kaggle_environments replays local games with the same observations and rewards"""
+    random.seed(1)
+
+    def crashing_agent(observation, configuration):
+        raise RuntimeError
+
+    games = [play_game('random', 'random') for _ in range(6)]
+    games.append(play_game(leftmost_agent, lambda observation, configuration: 7))
+    games.append(play_game(crashing_agent, leftmost_agent))
+    assert cross_check(games) == []
+    assert cross_check(games, sample=3) == []
+
+    games[0] = dict(games[0], rewards=[1, 1])
+    assert [index for index, _ in cross_check(games)] == [0]
+
+
+if __name__ == "__main__":
+    print("=== Referee Tests ===\n")
+    for test in [test_observations_and_four, test_failures_forfeit, test_builtin_agents,
+                 test_cross_check_with_kaggle]:
+        test()
+        print(f"✓ {test.__name__}")
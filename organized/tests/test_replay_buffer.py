@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Tests for the ring replay buffer
+"""
+
+import tempfile
+
+import numpy as np
+
+from neural_network_v2 import ConnectXNetwork
+from replay_buffer import ReplayBuffer, planes_from_bitboards
+from selfplay_dataset import encode_games
+
+GAME = {'moves': [3, 3, 2, 4, 2, 2, 1, 0], 'winner': 1}
+
+
+def test_planes_match_dataset_encoding():
+    """Bitboard-packed positions decode to the same planes as the dataset"""
+    buffer = ReplayBuffer(16)
+    buffer.add_game(GAME)
+    index = np.arange(len(GAME['moves']))
+    planes, values, policies = buffer.sample(1, np.random.RandomState(0))
+    assert planes.shape == (1, 6, 7, 3)
+
+    expected_planes, expected_values, expected_policies = encode_games([GAME])
+    decoded = planes_from_bitboards(buffer.positions[index], buffer.masks[index])
+    assert np.array_equal(decoded, expected_planes)
+    assert np.array_equal(buffer.values[index], expected_values)
+    assert np.array_equal(buffer.policies[index], expected_policies)
+    ConnectXNetwork(hidden_size=8).train_step(planes, values, policies)
+
+
+def test_ring_overwrites_oldest():
+    """Once full, appends replace the oldest entries"""
+    buffer = ReplayBuffer(5)
+    for i in range(7):
+        buffer.append(0, 0, float(i), np.zeros(7), game_id=i)
+    assert len(buffer) == 5
+    assert sorted(buffer.values) == [2, 3, 4, 5, 6]
+    assert buffer.get_stats()['games'] == 5
+
+
+def test_recency_sampling_prefers_new_positions():
+    """A short half-life concentrates samples on the newest entries"""
+    buffer = ReplayBuffer(1000)
+    for i in range(1000):
+        buffer.append(0, 0, float(i), np.zeros(7))
+    rng = np.random.RandomState(0)
+    uniform = buffer.values[buffer.sample_indices(2000, rng)]
+    recent = buffer.values[buffer.sample_indices(2000, rng, half_life=50)]
+    assert recent.mean() > 900 > uniform.mean()
+    assert recent.min() >= 0 and recent.max() <= 999
+
+
+def test_memmap_buffer_survives_reopen():
+    """A persisted buffer reopens with its contents and ring position"""
+    path = tempfile.mkdtemp()
+    buffer = ReplayBuffer(8, path=path)
+    buffer.add_game(GAME, game_id=7, generation=2)
+    buffer.flush()
+    del buffer
+
+    reopened = ReplayBuffer(8, path=path)
+    assert len(reopened) == 8 and reopened.next == 0
+    assert reopened.get_stats()['newest_generation'] == 2
+    reopened.append(1, 1, 0.5, np.zeros(7))
+    assert reopened.values[0] == 0.5
+
+
+if __name__ == "__main__":
+    print("=== Replay Buffer Tests ===\n")
+    for test in [test_planes_match_dataset_encoding,
+                 test_ring_overwrites_oldest,
+                 test_recency_sampling_prefers_new_positions,
+                 test_memmap_buffer_survives_reopen]:
+        test()
+        print(f"✓ {test.__name__}")
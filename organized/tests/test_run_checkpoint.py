@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for checkpointed, resumable self-play runs
+"""
+
+import multiprocessing as mp
+import os
+import random
+import tempfile
+
+import overnight_self_play as overnight
+from diverse_self_play import DiverseSelfPlay
+from game_records import GameRecords
+from run_checkpoint import RunCheckpoint
+
+
+def _games(checkpoint):
+    return [(tuple(game['moves']), game['winner'])
+            for path in sorted(checkpoint.shard_paths()) for game in GameRecords(path)]
+
+
+def _fresh_run(run_dir):
+    checkpoint = RunCheckpoint(run_dir)
+    overnight.new_run(checkpoint, phases=[6, 4], num_workers=2, seed=7)
+    return checkpoint
+
+
+def test_resumed_run_matches_uninterrupted_run():
+    """A run killed mid-phase resumes to exactly the games and statistics of an uninterrupted one"""
+    depths, cwd = overnight.DEPTHS, os.getcwd()
+    overnight.DEPTHS = [(2, 3), (3, 2)]
+    root = tempfile.mkdtemp()
+    os.chdir(root)  # The runner also writes latest_opening_book.json here
+    try:
+        _check_resume(root)
+    finally:
+        overnight.DEPTHS = depths
+        os.chdir(cwd)
+
+
+def _check_resume(root):
+
+    full = _fresh_run(os.path.join(root, 'full'))
+    overnight.run(full, batch_size=2, checkpoint_seconds=0)
+    assert full.manifest['games'] == 10 and full.manifest['phase'] == 2
+
+    # Kill the parent after it has written its third shard but before the checkpoint
+    interrupted = _fresh_run(os.path.join(root, 'interrupted'))
+    add_opening_stats = overnight.add_opening_stats
+    calls = []
+
+    def crash(stats, games):
+        calls.append(1)
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+        add_opening_stats(stats, games)
+
+    overnight.add_opening_stats = crash
+    try:
+        overnight.run(interrupted, batch_size=2, checkpoint_seconds=0)
+        assert False, "run should have been interrupted"
+    except KeyboardInterrupt:
+        pass
+    finally:
+        overnight.add_opening_stats = add_opening_stats
+        for p in mp.active_children():
+            p.terminate()
+
+    resumed = RunCheckpoint(interrupted.run_dir)
+    manifest, _ = resumed.resume()
+    assert len(manifest['shards']) == 2 and manifest['games'] in (3, 4)
+    assert sorted(os.listdir(resumed.shard_dir)) == sorted(manifest['shards'])  # The orphan is gone
+    overnight.run(resumed, batch_size=2, checkpoint_seconds=0)
+
+    assert _games(resumed) == _games(full)
+    assert resumed.stats.to_book(min_games=1) == full.stats.to_book(min_games=1)
+    assert resumed.stats.games == full.stats.games == 10
+
+
+def _diverse_generator():
+    generator = DiverseSelfPlay()
+    for style in generator.styles:
+        style['depth'] = min(style['depth'], 3)
+    return generator
+
+
+def test_resumed_diverse_run_matches_uninterrupted_run():
+    """An interrupted diverse run resumes to the same games, styles and opening book"""
+    root = tempfile.mkdtemp()
+    random.seed(11)
+    full = _diverse_generator()
+    full_games = full.generate_diverse_games(7, run_dir=os.path.join(root, 'full'), checkpoint_every=2)
+    assert len(full_games) == 7
+
+    # Interrupt the fifth game, after the second checkpoint
+    random.seed(11)
+    interrupted = _diverse_generator()
+    play_game, calls = interrupted.play_game, []
+
+    def crash(style1_idx, style2_idx):
+        calls.append(1)
+        if len(calls) == 5:
+            raise KeyboardInterrupt
+        return play_game(style1_idx, style2_idx)
+
+    interrupted.play_game = crash
+    try:
+        interrupted.generate_diverse_games(7, run_dir=os.path.join(root, 'interrupted'), checkpoint_every=2)
+        assert False, "run should have been interrupted"
+    except KeyboardInterrupt:
+        pass
+    assert RunCheckpoint(os.path.join(root, 'interrupted')).resume()[0]['games'] == 4
+
+    random.seed(0)  # Resuming restores the checkpointed RNG state
+    resumed = _diverse_generator()
+    games = resumed.generate_diverse_games(run_dir=os.path.join(root, 'interrupted'), resume=True,
+                                           checkpoint_every=2)
+    assert [(g['moves'], g['winner'], g['styles']) for g in games] == [
+        (g['moves'], g['winner'], g['styles']) for g in full_games]
+    assert all(isinstance(g['styles'], tuple) and len(g['styles']) == 2 for g in games)
+    assert dict(resumed.opening_book) == dict(full.opening_book)
+    assert sum(full.opening_book[(move,)]['total'] for move in range(7)) == 7
+
+
+if __name__ == "__main__":
+    print("=== Run Checkpoint Tests ===\n")
+    for test in [test_resumed_run_matches_uninterrupted_run,
+                 test_resumed_diverse_run_matches_uninterrupted_run]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests for the search distillation pipeline
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from advanced_search import AdvancedSearch
+from bitboard_core import from_moves
+from search_distillation import (CoreEngine, fit_evaluator, label_positions,
+                                 load_labels, sample_positions, save_labels)
+
+GAMES = [
+    {'moves': [3, 3, 2, 4, 2, 2, 1, 0, 4, 5, 1, 1], 'winner': 0},
+    {'moves': [3, 2, 3, 2, 4, 4, 5, 1, 0, 6, 6, 0], 'winner': 0},
+]
+
+
+def test_core_engine_search_finds_win_and_block():
+    """AdvancedSearch on CoreEngine completes a three and blocks one"""
+    search = AdvancedSearch(CoreEngine())
+    search.time_limit = float('inf')
+    position, mask = from_moves([2, 2, 3, 3, 4, 0])
+    move, score = search.search(position, mask, 4, 0)
+    assert move in (1, 5) and score >= 9000
+
+    position, mask = from_moves([1, 0, 2, 2, 3])
+    move, _ = search.search(position, mask, 4, 0)
+    assert move == 4
+
+
+def test_labels_route_exact_and_round_trip():
+    """Late positions are solved, early ones searched; labels survive save/load"""
+    positions, masks = sample_positions(GAMES, per_game=8, min_ply=0)
+    late = from_moves([3, 3, 3, 3, 3, 3, 2, 2, 2, 2, 2, 2, 4, 4, 4, 4, 4, 4,
+                       1, 1, 1, 1, 1, 1, 5, 5, 5, 5, 5, 5])
+    positions = np.append(positions, np.uint64(late[0]))
+    masks = np.append(masks, np.uint64(late[1]))
+
+    labels, rate = label_positions(positions, masks, workers=1, depth=4, exact_empties=12)
+    assert rate > 0
+    assert labels['exact'][-1] == 1 and labels['exact'][:-1].sum() == 0
+    assert np.all(np.abs(labels['targets']) <= 1)
+
+    path = os.path.join(tempfile.mkdtemp(), 'labels.npz')
+    save_labels(labels, path)
+    loaded = load_labels(path)
+    for name, values in labels.items():
+        assert np.array_equal(loaded[name], values)
+
+
+def test_sampling_drops_mirrored_positions():
+    """A game and its mirror image contribute each position once"""
+    mirrored = [{'moves': [6 - col for col in game['moves']], 'winner': 0} for game in GAMES]
+    positions, _ = sample_positions(GAMES, per_game=12, min_ply=0)
+    both, _ = sample_positions(GAMES + mirrored, per_game=12, min_ply=0)
+    assert len(both) == len(positions)
+
+
+def test_fit_reports_error():
+    """Fitting produces an evaluator and train/validation errors"""
+    positions, masks = sample_positions(GAMES, per_game=8, min_ply=0)
+    labels, _ = label_positions(positions, masks, workers=1, depth=2, exact_empties=12)
+    evaluator, report = fit_evaluator(labels, hidden=8, hidden2=4, epochs=2, holdout=0.25,
+                                      verbose=False)
+    assert 0 <= report['train_mae'] <= 2 and 0 <= report['val_mae'] <= 2
+    assert isinstance(evaluator.evaluate(0), int)
+
+
+if __name__ == "__main__":
+    print("=== Search Distillation Tests ===\n")
+    for test in [test_core_engine_search_finds_win_and_block,
+                 test_labels_route_exact_and_round_trip,
+                 test_sampling_drops_mirrored_positions,
+                 test_fit_reports_error]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Tests for streaming self-play generation
+"""
+
+import os
+import tempfile
+
+from self_play_generator import SelfPlayEngine, iter_shard_games
+
+
+class FlakyEngine(SelfPlayEngine):
+    """Fails on one game id, as a crashing worker would"""
+
+    def play_game(self, game_id=0, explore_prob=0.1):
+        if game_id == 4:
+            raise RuntimeError("worker failure")
+        return super().play_game(game_id, explore_prob)
+
+
+class DyingEngine(SelfPlayEngine):
+    """Kills its worker process outright on one game id, the first time only"""
+
+    marker = None
+
+    def play_game(self, game_id=0, explore_prob=0.1):
+        if game_id == 4 and not os.path.exists(self.marker):
+            open(self.marker, 'w').close()
+            os._exit(1)
+        return super().play_game(game_id, explore_prob)
+
+
+def test_games_stream_to_worker_shards():
+    """Every game lands exactly once in a per-worker shard; counters agree"""
+    shard_dir = tempfile.mkdtemp()
+    engine = SelfPlayEngine(search_depth=3, num_workers=2, seed=0)
+    totals = engine.generate_games(7, shard_dir=shard_dir, chunk_size=3)
+
+    games = list(iter_shard_games(shard_dir))
+    assert sorted(g['game_id'] for g in games) == list(range(7))
+    assert totals['games'] == 7 and totals['errors'] == 0
+    assert totals['p1_wins'] == sum(g['winner'] == 1 for g in games)
+    assert totals['moves'] == sum(len(g['moves']) for g in games)
+    assert sum(map(sum, totals['first_moves'])) == 7
+    assert engine.games_played == 7
+    assert all(name.startswith('games-') for name in os.listdir(shard_dir))
+    engine.analyze_games(games)  # Shard records carry no 'length'
+
+
+def test_failed_chunk_keeps_finished_games():
+    """A failure mid-chunk keeps the games written before it, and a torn last line is skipped"""
+    shard_dir = tempfile.mkdtemp()
+    engine = FlakyEngine(search_depth=2, num_workers=2, seed=0)
+    totals = engine.generate_games(6, shard_dir=shard_dir, chunk_size=3)
+    assert totals['errors'] == 1 and 'game 4' in totals['last_error']
+    assert totals['games'] == 4
+
+    shard = os.path.join(shard_dir, os.listdir(shard_dir)[0])
+    with open(shard, 'a') as f:
+        f.write('{"moves": [3, 3')
+    assert sorted(g['game_id'] for g in iter_shard_games(shard_dir)) == [0, 1, 2, 3]
+
+
+def test_dead_worker_chunk_is_requeued():
+    """A worker killed mid-chunk is replaced and every game is still played exactly once"""
+    shard_dir = tempfile.mkdtemp()
+    engine = DyingEngine(search_depth=2, num_workers=2, seed=0)
+    engine.marker = os.path.join(tempfile.mkdtemp(), 'died')
+    totals = engine.generate_games(8, shard_dir=shard_dir, chunk_size=3)
+
+    assert os.path.exists(engine.marker)
+    assert totals['games'] == 8 and totals['errors'] == 0
+    assert sorted(g['game_id'] for g in iter_shard_games(shard_dir)) == list(range(8))
+    assert len(os.listdir(shard_dir)) == 3
+
+
+if __name__ == "__main__":
+    print("=== Self-Play Generator Tests ===\n")
+    for test in [test_games_stream_to_worker_shards,
+                 test_failed_chunk_keeps_finished_games, test_dead_worker_chunk_is_requeued]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming self-play dataset
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+from bitboard_core import decode_position, play
+from neural_network_v2 import ConnectXNetwork
+from selfplay_dataset import SelfPlayDataset, encode_games, write_shard
+
+GAMES = [
+    {'moves': [3, 3, 3, 2, 3], 'winner': 1},
+    {'moves': [0, 1, 0, 1, 2, 1, 6, 1], 'winner': 2},
+    {'moves': [6, 6, 5], 'winner': 0},
+]
+
+
+def test_encoding_matches_network_input():
+    """Vectorized replay equals boards_to_input on each replayed board"""
+    planes, values, policies = encode_games(GAMES)
+
+    boards, players, expected_values = [], [], []
+    for game in GAMES:
+        position, mask = 0, 0
+        for turn, col in enumerate(game['moves']):
+            player = 1 if turn % 2 == 0 else 2
+            boards.append(decode_position(position, mask, player))
+            players.append(player)
+            expected_values.append(0 if game['winner'] == 0 else
+                                   (1 if game['winner'] == player else -1))
+            position, mask = play(position, mask, col)
+
+    expected = ConnectXNetwork(hidden_size=8).boards_to_input(boards, players)
+    assert np.array_equal(planes.astype(np.float32), expected)
+    assert np.array_equal(values, expected_values)
+    assert np.array_equal(policies.argmax(axis=1), np.concatenate([g['moves'] for g in GAMES]))
+
+
+def test_stream_yields_every_position_once():
+    """All positions come out exactly once per epoch through a small buffer"""
+    directory = tempfile.mkdtemp()
+    for i in range(3):
+        write_shard(GAMES * 10, os.path.join(directory, f'shard_{i}.jsonl'))
+
+    dataset = SelfPlayDataset(os.path.join(directory, '*.jsonl'), batch_size=16,
+                              shuffle_buffer=32, games_per_chunk=7, epochs=2)
+    values = []
+    for planes, batch_values, policies in dataset:
+        assert planes.dtype == np.float32 and planes.shape[1:] == (6, 7, 3)
+        assert len(batch_values) <= 16
+        # Mirroring keeps the policy on the column that was actually played
+        assert np.all(planes[np.arange(len(policies)), 0, policies.argmax(axis=1), 2] == 1)
+        values.extend(batch_values)
+
+    _, expected, _ = encode_games(GAMES * 30)
+    assert len(values) == 2 * len(expected)
+    assert sorted(values) == sorted(np.concatenate([expected, expected]))
+
+
+if __name__ == "__main__":
+    print("=== Self-Play Dataset Tests ===\n")
+    for test in [test_encoding_matches_network_input,
+                 test_stream_yields_every_position_once]:
+        test()
+        print(f"✓ {test.__name__}")
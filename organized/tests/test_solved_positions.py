@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the solved-position corpus and benchmark
+"""
+
+import os
+import random
+import tempfile
+
+from bitboard_core import is_winning_move, play, popcount, possible, valid_columns, winning_position
+from bitboard_solver import Solver
+from solved_positions import (benchmark, build_corpus, compare, load_corpus, make_engine, phase_of,
+                              sample_positions, save_corpus)
+
+PHASES = {'late': (30, 36), 'mid': (22, 27)}
+
+
+def _random_games(count, length, seed=0):
+    """Random games of up to `length` moves that steer clear of fours"""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        position, mask, moves = 0, 0, []
+        while len(moves) < length:
+            columns = [c for c in valid_columns(mask) if not is_winning_move(position, mask, c)]
+            if not columns:
+                break
+            moves.append(rng.choice(columns))
+            position, mask = play(position, mask, moves[-1])
+        games.append({'moves': moves})
+    return games
+
+
+def test_sampling_by_phase():
+    """Samples fill each phase with distinct, undecided positions the game played on from"""
+    games = _random_games(200, 37)
+    positions = sample_positions(games, per_phase=15, phases=PHASES, seed=1)
+    phases = [phase_of(popcount(mask), PHASES) for _, mask in positions]
+    assert phases.count('late') == 15 and phases.count('mid') == 15
+    assert len({position + mask for position, mask in positions}) == 30
+    assert not any(winning_position(position, mask) & possible(mask) for position, mask in positions)
+
+
+def test_corpus_round_trip_and_benchmark():
+    """Solved corpora round-trip; the seeded corpus grades engines exactly and a regression is flagged"""
+    games = _random_games(100, 37, seed=2)
+    corpus = build_corpus(games, per_phase=8, phases=PHASES, solver=Solver())
+    path = os.path.join(tempfile.mkdtemp(), 'corpus.npz')
+    save_corpus(path, corpus)
+    loaded = load_corpus(path)
+    assert all((loaded[name] == corpus[name]).all() for name in corpus)
+    assert all(best for best in loaded['best'].tolist())
+
+    exact = benchmark(make_engine('solver-python'), loaded, PHASES)
+    assert exact['late']['positions'] == exact['mid']['positions'] == 8
+    assert exact['late']['accuracy'] == exact['mid']['accuracy'] == 1.0
+    assert exact['mid']['mean_nodes'] > 0
+
+    leftmost = benchmark(lambda position, mask: (valid_columns(mask)[0], None, 1, 0.0), loaded, PHASES)
+    assert leftmost['late']['accuracy'] == leftmost['mid']['accuracy'] == 5 / 8
+    shallow = benchmark(make_engine('negamax-python:depth=1'), loaded, PHASES)
+    assert shallow['late']['accuracy'] == shallow['mid']['accuracy'] == 1.0
+    assert 0 < shallow['mid']['mean_nodes'] < exact['mid']['mean_nodes']
+    assert compare(exact, exact) == []
+    worse = dict(exact, mid=dict(exact['mid'], mean_nodes=exact['mid']['mean_nodes'] * 2, accuracy=0.5))
+    assert [problem.split(':')[0] for problem in compare(worse, exact)] == ['mid', 'mid']
+
+
+if __name__ == "__main__":
+    print("=== Solved Positions Tests ===\n")
+    for test in [test_sampling_by_phase, test_corpus_round_trip_and_benchmark]:
+        test()
+        print(f"✓ {test.__name__}")
@@ -11,6 +11,7 @@ import numpy as np
 # Import our agents
 import submission  # Current ultra-fast agent
 from top3_agent import agent as top3_agent
+from tournament import elo_difference, rounds_for, run_tournament
 
 def test_agent_performance(agent_func, agent_name, num_games=50):
     """Test an agent's performance against various opponents"""
@@ -162,43 +163,34 @@ def test_agent_performance(agent_func, agent_name, num_games=50):
     return results
 
 def compare_agents_head_to_head(agent1_func, agent1_name, agent2_func, agent2_name, num_games=20):
-    """Compare two agents directly against each other"""
+    """
+    Compare two agents directly against each other (at least num_games
+    games over the default opening suite, both colors, on all cores)
+    See tournament.run_tournament for opening suites and SPRT.
+    """
     print(f"\n{'='*60}")
     print(f"Head-to-head: {agent1_name} vs {agent2_name}")
     print(f"{'='*60}")
     
-    agent1_wins = 0
-    agent2_wins = 0
-    draws = 0
-    
-    for i in range(num_games):
-        env = make("connectx")
-        env.reset()
-        
-        try:
-            if i % 2 == 0:
-                env.run([agent1_func, agent2_func])
-                if env.state[0].reward == 1:
-                    agent1_wins += 1
-                elif env.state[1].reward == 1:
-                    agent2_wins += 1
-                else:
-                    draws += 1
-            else:
-                env.run([agent2_func, agent1_func])
-                if env.state[0].reward == 1:
-                    agent2_wins += 1
-                elif env.state[1].reward == 1:
-                    agent1_wins += 1
-                else:
-                    draws += 1
-        except Exception as e:
-            print(f"Error in game {i+1}: {e}")
+    result = run_tournament([(agent1_name, agent1_func), (agent2_name, agent2_func)],
+                            rounds=rounds_for(num_games), verbose=False)
+    games = result['games']
+    agent1_wins = agent2_wins = draws = 0
+    for game in games:
+        players = (game['first'], game['second'])
+        if not game['winner']:
+            draws += 1
+        elif players[game['winner'] - 1] == agent1_name:
+            agent1_wins += 1
+        else:
+            agent2_wins += 1
     
-    print(f"\nResults after {num_games} games:")
-    print(f"{agent1_name}: {agent1_wins} wins ({agent1_wins/num_games*100:.1f}%)")
-    print(f"{agent2_name}: {agent2_wins} wins ({agent2_wins/num_games*100:.1f}%)")
+    print(f"\nResults after {len(games)} games:")
+    print(f"{agent1_name}: {agent1_wins} wins ({agent1_wins/len(games)*100:.1f}%)")
+    print(f"{agent2_name}: {agent2_wins} wins ({agent2_wins/len(games)*100:.1f}%)")
     print(f"Draws: {draws}")
+    elo, error = elo_difference(agent1_wins, draws, agent2_wins)
+    print(f"Elo difference: {elo:+.1f} ± {error:.1f}")
     
     if agent1_wins > agent2_wins:
         print(f"\nWinner: {agent1_name}")
@@ -206,6 +198,8 @@ def compare_agents_head_to_head(agent1_func, agent1_name, agent2_func, agent2_na
         print(f"\nWinner: {agent2_name}")
     else:
         print(f"\nResult: Draw")
+    
+    return agent1_wins, draws, agent2_wins
 
 if __name__ == "__main__":
     print("CONNECT X STRATEGY TESTING SUITE")
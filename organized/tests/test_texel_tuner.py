@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the Texel evaluation tuner
+"""
+
+import importlib.util
+import os
+import random
+import tempfile
+
+from bitboard_core import decode_position, is_winning_move, play, popcount, valid_columns
+from bitboard_engine_v2 import BitboardEngine
+from pattern_recognition import PatternRecognition
+from texel_tuner import SPECS, quiet_positions, run, write_weights
+from top5_elite_agent import BitboardEngineOptimized, EliteEvaluation
+
+SUBMISSION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'submission.py')
+
+
+def load_submission():
+    spec = importlib.util.spec_from_file_location('submission', SUBMISSION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def random_games(count, seed=0):
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        position, mask, moves, winner = 0, 0, [], 0
+        while valid_columns(mask):
+            col = rng.choice(valid_columns(mask))
+            won = is_winning_move(position, mask, col)
+            moves.append(col)
+            position, mask = play(position, mask, col)
+            if won:
+                winner = 2 - len(moves) % 2
+                break
+        games.append({'moves': moves, 'winner': winner})
+    return games
+
+
+def scalar_evaluators():
+    pattern_evaluator = load_submission().PatternEvaluator()
+    recognizer = PatternRecognition()
+    engine = BitboardEngine()
+    elite = EliteEvaluation(BitboardEngineOptimized())
+
+    def elite_eval(position, mask):
+        mark = 1 + popcount(mask) % 2
+        return elite.evaluate(decode_position(position, mask, mark), mark, popcount(mask))
+
+    return {'pattern_evaluator': pattern_evaluator.evaluate,
+            'pattern_recognition': recognizer.evaluate_position,
+            'champion_engine': engine.evaluate_position,
+            'elite_evaluation': elite_eval}
+
+
+def test_features_reproduce_evaluators():
+    """features @ default weights + fixed equals each evaluator's static score"""
+    positions, masks, _ = quiet_positions(random_games(40))
+    evaluators = scalar_evaluators()
+    for name, spec_class in SPECS.items():
+        spec = spec_class()
+        rows = spec.applies(positions, masks)
+        X, fixed = spec.features(positions[rows], masks[rows])
+        vectorized = X @ spec.defaults() + fixed
+        for i, (position, mask) in enumerate(zip(positions[rows], masks[rows])):
+            expected = evaluators[name](int(position), int(mask))
+            if abs(expected) == 10000:
+                # Mate-score branch of an engine's own threat check
+                continue
+            assert abs(expected - vectorized[i]) < 1e-3, (name, expected, vectorized[i])
+
+
+def test_tuning_lowers_training_loss():
+    """Adam never ends above the hand-picked weights' loss"""
+    positions, masks, results = quiet_positions(random_games(150, seed=1))
+    for spec_class in SPECS.values():
+        _, report = run(spec_class(), positions, masks, results, steps=100, verbose=False)
+        assert report['k'] > 0
+        assert report['train_loss_after'] <= report['train_loss_before'] + 1e-9
+
+
+def test_agents_load_tuned_weights():
+    """Written sections replace the defaults of each evaluator"""
+    cwd = os.getcwd()
+    os.chdir(tempfile.mkdtemp())
+    try:
+        write_weights({'pattern_evaluator': {'three': 64.0},
+                       'pattern_recognition': {'open_3': 120.0},
+                       'elite_evaluation': {'endgame': {'threat': 33.0}}})
+        assert load_submission().PatternEvaluator().weights['three'] == 64.0
+        assert PatternRecognition().pattern_values['open_3'] == 120.0
+        elite = EliteEvaluation(BitboardEngineOptimized())
+        assert elite.phase_weights['endgame']['threat'] == 33.0
+        assert elite.phase_weights['opening']['threat'] == 10.0
+    finally:
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    print("=== Texel Tuner Tests ===\n")
+    for test in [test_features_reproduce_evaluators,
+                 test_tuning_lowers_training_loss,
+                 test_agents_load_tuned_weights]:
+        test()
+        print(f"✓ {test.__name__}")
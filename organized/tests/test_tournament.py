@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for the parallel tournament runner
+"""
+
+from bitboard_core import CENTER_ORDER, encode_position
+from bitboard_negamax import BitboardNegamax
+from tournament import (elo_difference, expected_score, opening_suite, play_game, rounds_for,
+                        run_tournament, schedule, sprt_llr)
+
+_searcher = BitboardNegamax()
+
+
+def negamax_agent(observation, configuration):
+    position, mask = encode_position(observation.board, observation.mark)
+    return _searcher.search(position, mask, max_depth=4)[0]
+
+
+def center_agent(observation, configuration):
+    return next(c for c in CENTER_ORDER if observation.board[c] == 0)
+
+
+def leftmost_agent(observation, configuration):
+    return next(c for c in range(7) if observation.board[c] == 0)
+
+
+def illegal_agent(observation, configuration):
+    return 9
+
+
+def test_elo_and_sprt_math():
+    """Elo differences and the SPRT statistic behave at known points"""
+    assert abs(expected_score(0) - 0.5) < 1e-12
+    elo, error = elo_difference(75, 0, 25)
+    assert abs(elo - 190.85) < 0.1 and 0 < error < 100
+    assert elo_difference(10, 80, 10)[0] == 0
+    assert abs(sprt_llr(50, 0, 50, -10, 10)) < 1e-9  # Halfway between the hypotheses
+    assert sprt_llr(60, 0, 40, 0, 20) > 0 > sprt_llr(40, 0, 60, 0, 20)
+
+
+def test_schedule_alternates_colors_over_shared_openings():
+    """Every pairing plays every opening once with each color"""
+    openings = opening_suite(2)
+    assert len(openings) == 49 and [3, 3] in openings
+    games = schedule(['a', 'b', 'c'], 'gauntlet', openings[:5])
+    assert len(games) == 2 * 2 * 5
+    assert sorted(g for g in games if {'a', 'b'} == set(g[:2])) == sorted(
+        [('a', 'b', tuple(o)) for o in openings[:5]] + [('b', 'a', tuple(o)) for o in openings[:5]])
+    assert rounds_for(20) == 1 and rounds_for(99) == 2 and rounds_for(21, openings[:5]) == 3
+
+
+def test_illegal_move_loses():
+    """An illegal move forfeits the game"""
+    game = play_game(center_agent, illegal_agent, opening=[0])
+    assert (game['winner'], game['reason']) == (1, 'illegal') and game['moves'] == [0]
+
+
+def test_round_robin_ratings():
+    """Stronger agents get higher ratings; every pairing plays the full suite"""
+    agents = [('negamax', negamax_agent), ('center', center_agent), ('leftmost', leftmost_agent)]
+    result = run_tournament(agents, openings=opening_suite(1), processes=2, verbose=False)
+    assert len(result['games']) == 3 * 7 * 2
+    assert sum(sum(record) for record in result['records'].values()) == 42
+    ratings = result['ratings']
+    assert ratings['negamax'][0] > max(ratings['center'][0], ratings['leftmost'][0])
+    assert result['records']['center vs negamax'] == [0, 0, 14]
+    assert abs(sum(elo for elo, _ in ratings.values())) < 1e-6
+
+
+def test_sprt_stops_early():
+    """A lopsided head-to-head stops long before the schedule ends"""
+    result = run_tournament([('negamax', negamax_agent), ('leftmost', leftmost_agent)],
+                            sprt={'elo0': 0, 'elo1': 50}, processes=2, verbose=False)
+    assert result['sprt']['result'] == 'H1'
+    assert len(result['games']) < 98
+
+
+if __name__ == "__main__":
+    print("=== Tournament Tests ===\n")
+    for test in [test_elo_and_sprt_math, test_schedule_alternates_colors_over_shared_openings,
+                 test_illegal_move_loses, test_round_robin_ratings, test_sprt_stops_early]:
+        test()
+        print(f"✓ {test.__name__}")
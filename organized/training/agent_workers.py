@@ -0,0 +1,210 @@
+"""
+Agent Workers
+Persistent worker processes that host agents for match harnesses
+
+- Each agent is loaded once, in its own process, and reused for every
+  game: opening books, precomputed tables and TT allocations are paid
+  for once, and one agent's memory never leaks into another's
+- Per-game state is reset through the agent file's new_game() hook,
+  which the referee calls before every game
+- Observations go to the worker and moves come back over a pipe; an
+  AgentWorker is an agent(observation, configuration) callable, so
+  referee.play_game() plays it like any other agent
+- A worker that hangs past its time budget is replaced and the call
+  raises referee.AgentTimeout, which the referee scores as a timeout;
+  one that crashes (segfault, os._exit, OOM kill) is replaced and the
+  call raises RuntimeError, so only the game it crashed in is lost
+- memory() reports each worker's resident and peak memory and what
+  loading the agent added, per agent in isolation
+- After each move, last_seconds holds the time the agent took inside
+  the worker and last_depth the search depth the agent reported by
+  setting its own `last_depth` attribute (None if it does not)
+"""
+
+import multiprocessing as mp
+import resource
+import time
+
+from referee import OVERAGE_TIME, AgentTimeout, Struct, load_agent, play_game
+
+# Extra seconds to wait for a move past its time budget before giving up
+HANG_GRACE = 1.0
+
+
+def _memory():
+    """(resident, peak resident) bytes of this process"""
+    try:
+        fields = {}
+        with open('/proc/self/status') as f:
+            for line in f:
+                name, _, value = line.partition(':')
+                fields[name] = value
+        return int(fields['VmRSS'].split()[0]) * 1024, int(fields['VmHWM'].split()[0]) * 1024
+    except (OSError, KeyError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return peak, peak
+
+
+def _serve(conn, agent):
+    """Worker loop: load the agent, then answer commands until 'close'"""
+    baseline = _memory()[0]
+    start = time.perf_counter()
+    try:
+        function = load_agent(agent)
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__}: {e}"))
+        return
+    loaded = _memory()[0] - baseline
+    conn.send(('ready', time.perf_counter() - start, loaded))
+
+    while True:
+        try:
+            command, *args = conn.recv()
+        except EOFError:
+            return
+        if command == 'act':
+            try:
+                start = time.perf_counter()
+                move = function(Struct(args[0]), Struct(args[1]))
+                conn.send(('move', move, time.perf_counter() - start, getattr(function, 'last_depth', None)))
+            except Exception as e:
+                conn.send(('error', f"{type(e).__name__}: {e}"))
+        elif command == 'new_game':
+            if callable(getattr(function, 'new_game', None)):
+                function.new_game()
+            conn.send(('ok',))
+        elif command == 'memory':
+            rss, peak = _memory()
+            conn.send(('memory', {'rss': rss, 'peak': peak, 'load': loaded}))
+        elif command == 'close':
+            return
+
+
+class AgentWorker:
+    """
+    An agent (file path, built-in name or picklable callable) hosted in its
+    own long-lived process
+    Raises RuntimeError if the agent fails to load; an agent that raises
+    during a move has the error re-raised here as RuntimeError, one whose
+    process dies raises RuntimeError, and one still thinking when its
+    budget runs out raises AgentTimeout; the worker is replaced in both
+    of the last two cases. max_seconds optionally caps the wait for a move
+    below the game's budget.
+    """
+
+    def __init__(self, agent, name=None, max_seconds=None):
+        self.agent = agent
+        self.name = name or str(agent)
+        self.max_seconds = max_seconds
+        self.init_seconds = None
+        self.last_seconds = self.last_depth = None
+        self.restarts = 0
+        self._process = None
+        self._start()
+
+    def _start(self):
+        self._conn, child = mp.Pipe()
+        self._process = mp.Process(target=_serve, args=(child, self.agent), daemon=True)
+        self._process.start()
+        child.close()
+        reply = self._conn.recv()
+        if reply[0] == 'error':
+            self.close()
+            raise RuntimeError(f"Could not load {self.name}: {reply[1]}")
+        self.init_seconds = reply[1]
+
+    def restart(self):
+        """Replace the worker process with a freshly loaded one"""
+        self._process.kill()
+        self._process.join()
+        self._conn.close()
+        self.restarts += 1
+        self._start()
+
+    def _crashed(self):
+        """Replace a worker whose process died; the RuntimeError to raise"""
+        self._process.join(1)
+        exitcode = self._process.exitcode
+        self.last_seconds = self.last_depth = None
+        self.restart()
+        return RuntimeError(f"{self.name} worker died (exit code {exitcode})")
+
+    def __call__(self, observation, configuration):
+        wait = configuration['actTimeout'] + observation.get('remainingOverageTime', OVERAGE_TIME) + HANG_GRACE
+        if self.max_seconds is not None:
+            wait = min(wait, self.max_seconds)
+        try:
+            self._conn.send(('act', dict(observation), dict(configuration)))
+            if not self._conn.poll(wait):
+                self.last_seconds, self.last_depth = wait, None
+                self.restart()
+                raise AgentTimeout(f"{self.name} gave no move within {wait:.1f}s")
+            reply = self._conn.recv()
+        except (EOFError, OSError):
+            raise self._crashed()
+        if reply[0] == 'error':
+            self.last_seconds = self.last_depth = None
+            raise RuntimeError(reply[1])
+        _, move, self.last_seconds, self.last_depth = reply
+        return move
+
+    def new_game(self):
+        """Run the agent's new_game() hook, if it has one"""
+        try:
+            self._conn.send(('new_game',))
+            self._conn.recv()
+        except (EOFError, OSError):
+            # Died since its last move: a fresh worker has fresh state
+            self._crashed()
+
+    def memory(self):
+        """{'rss', 'peak', 'load'}: resident and peak bytes, and the bytes loading the agent added"""
+        self._conn.send(('memory',))
+        return self._conn.recv()[1]
+
+    def close(self):
+        if self._process is None:
+            return
+        if self._process.is_alive():
+            try:
+                self._conn.send(('close',))
+            except (BrokenPipeError, OSError):
+                pass
+            self._process.join(1)
+            if self._process.is_alive():
+                self._process.kill()
+                self._process.join()
+        self._conn.close()
+        self._process = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def play_match(agent1, agent2, games=2, openings=None):
+    """
+    Play agent1 against agent2 in persistent workers, alternating colors
+    (each opening, if given, is played once per color)
+    Returns {'games', 'score': [agent1 wins, draws, agent2 wins], 'memory',
+    'init_seconds', 'seconds'}.
+    """
+    pairings = [(opening, swap) for opening in openings for swap in (False, True)] if openings \
+        else [((), i % 2 == 1) for i in range(games)]
+    with AgentWorker(agent1) as first, AgentWorker(agent2) as second:
+        results, score = [], [0, 0, 0]
+        start = time.time()
+        for opening, swap in pairings:
+            game = play_game(second, first, opening) if swap else play_game(first, second, opening)
+            winner = game['winner'] if not swap or not game['winner'] else 3 - game['winner']
+            score[{1: 0, 0: 1, 2: 2}[winner]] += 1
+            results.append(dict(game, swapped=swap))
+        return {
+            'games': results,
+            'score': score,
+            'memory': [first.memory(), second.memory()],
+            'init_seconds': [first.init_seconds, second.init_seconds],
+            'seconds': time.time() - start
+        }
@@ -0,0 +1,423 @@
+"""
+AlphaZero-Style Training Loop
+Closed self-play -> replay -> train -> arena -> publish cycle
+
+Processes:
+- N self-play workers run NeuralMCTS. Their leaf batches go through a
+  per-worker shared memory slot; a pipe message says how many rows are ready
+- One inference server gathers whatever requests are pending (waiting a
+  moment for stragglers), runs a single forward pass for all of them and
+  answers each worker. It reloads weights when the trainer publishes, and
+  drops a worker whose pipe closes or that the trainer reports dead
+- The trainer (this process) keeps a ReplayBuffer of encoded positions,
+  trains a candidate network and publishes it only if it wins the arena
+  match against the current best. It carries on without dead workers and
+  raises if all of them (or the server) die
+
+Reports games/hour, self-play positions/sec and inference batch fill.
+"""
+
+import copy
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+
+import numpy as np
+
+from bitboard_core import decode_position, is_winning_move, play, is_full
+from neural_network_v2 import ConnectXNetwork, NeuralMCTS
+from replay_buffer import ReplayBuffer
+
+
+class InferenceSlots:
+    """
+    Per-worker request/response arrays in one shared memory block
+    Worker w writes boards[w, :n] and players[w, :n]; the server fills
+    values[w, :n] and policies[w, :n].
+    """
+
+    FIELDS = [
+        ('boards', np.int8, (42,)),
+        ('players', np.int8, ()),
+        ('values', np.float32, ()),
+        ('policies', np.float32, (7,)),
+    ]
+
+    def __init__(self, workers, batch_size, name=None):
+        self.workers = workers
+        self.batch_size = batch_size
+        size = sum(self._field_bytes(dtype, shape) for _, dtype, shape in self.FIELDS)
+
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+            self.owner = True
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+
+        offset = 0
+        for field, dtype, shape in self.FIELDS:
+            array = np.ndarray((workers, batch_size) + shape, dtype=dtype,
+                               buffer=self.shm.buf, offset=offset)
+            setattr(self, field, array)
+            offset += self._field_bytes(dtype, shape)
+
+    def _field_bytes(self, dtype, shape):
+        """Bytes used by one field, rounded up to 8"""
+        count = self.workers * self.batch_size * int(np.prod(shape, dtype=np.int64))
+        return (count * np.dtype(dtype).itemsize + 7) // 8 * 8
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        """Detach (and free, if this process created the block)"""
+        for field, _, _ in self.FIELDS:
+            setattr(self, field, None)
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class InferenceClient:
+    """Stands in for the network inside a worker's NeuralMCTS"""
+
+    def __init__(self, slots, worker_id, conn):
+        self.slots = slots
+        self.worker_id = worker_id
+        self.conn = conn
+        self.generation = 0
+
+    def forward_batch(self, boards, players):
+        """Ship a batch to the inference server and wait for the answer"""
+        w = self.worker_id
+        count = len(boards)
+        self.slots.boards[w, :count] = boards
+        self.slots.players[w, :count] = players
+        self.conn.send(count)
+        self.generation = self.conn.recv()
+        return self.slots.values[w, :count].copy(), self.slots.policies[w, :count].copy()
+
+
+def _receive(conn):
+    """A worker's row count, or None once it stops or its pipe closes"""
+    try:
+        return conn.recv()
+    except (EOFError, OSError):
+        return None
+
+
+def inference_server(slots_name, workers, batch_size, weights_path, worker_conns,
+                     control, gather_wait=0.002):
+    """
+    Batch leaf evaluations from every worker into single forward passes
+    Control messages: ('load', path, generation), ('drop', worker) for a
+    worker that died, and ('stop',).
+    """
+    slots = InferenceSlots(workers, batch_size, name=slots_name)
+    network = ConnectXNetwork()
+    network.load(weights_path)
+    generation = 0
+
+    live = {conn: w for w, conn in enumerate(worker_conns)}
+    batches = 0
+    evaluated = 0
+    capacity = 0
+
+    while True:
+        ready = wait(list(live) + [control])
+        if control in ready:
+            message = control.recv()
+            if message[0] == 'stop':
+                break
+            if message[0] == 'drop':
+                dead = worker_conns[message[1]]
+                live.pop(dead, None)
+                if dead in ready:
+                    ready.remove(dead)
+            else:
+                # ('load', path, generation)
+                network.load(message[1])
+                generation = message[2]
+            ready.remove(control)
+
+        requests = []
+        for conn in ready:
+            count = _receive(conn)
+            if count is None:
+                del live[conn]
+            else:
+                requests.append((conn, live[conn], count))
+
+        # Give workers that are about to ask a moment to join this batch
+        waiting = [conn for conn in live if conn not in ready]
+        if requests and waiting:
+            for conn in wait(waiting, timeout=gather_wait):
+                count = _receive(conn)
+                if count is None:
+                    del live[conn]
+                else:
+                    requests.append((conn, live[conn], count))
+
+        if not requests:
+            continue
+
+        boards = np.concatenate([slots.boards[w, :n] for _, w, n in requests])
+        players = np.concatenate([slots.players[w, :n] for _, w, n in requests])
+        values, policies = network.forward_batch(boards, players)
+
+        offset = 0
+        for conn, w, n in requests:
+            slots.values[w, :n] = values[offset:offset + n]
+            slots.policies[w, :n] = policies[offset:offset + n]
+            offset += n
+            try:
+                conn.send(generation)
+            except OSError:
+                # Died while waiting for its answer
+                live.pop(conn, None)
+
+        batches += 1
+        evaluated += len(boards)
+        capacity += (len(live) or 1) * batch_size
+
+    control.send({'batches': batches, 'evaluated': evaluated,
+                  'batch_fill': evaluated / capacity if capacity else 0.0})
+    slots.close()
+
+
+def play_selfplay_game(mcts, temperature_moves, rng):
+    """One NeuralMCTS self-play game with visit distributions as policy targets"""
+    board = [0] * 42
+    position, mask = 0, 0
+    player = 1
+    moves = []
+    policies = []
+    winner = 0
+
+    while True:
+        probs, _ = mcts.search(board, player)
+        if len(moves) < temperature_moves:
+            col = int(rng.choice(7, p=probs))
+        else:
+            col = int(np.argmax(probs))
+
+        won = is_winning_move(position, mask, col)
+        moves.append(col)
+        policies.append([float(p) for p in probs])
+        position, mask = play(position, mask, col)
+        if won:
+            winner = player
+            break
+        if is_full(mask):
+            break
+        player = 3 - player
+        board = decode_position(position, mask, player)
+
+    return {'moves': moves, 'winner': winner, 'policies': policies}
+
+
+def selfplay_worker(worker_id, slots_name, workers, batch_size, conn, game_queue,
+                    stop_event, simulations, temperature_moves, seed):
+    """Play games until told to stop, sending each finished game to the trainer"""
+    slots = InferenceSlots(workers, batch_size, name=slots_name)
+    client = InferenceClient(slots, worker_id, conn)
+    mcts = NeuralMCTS(client, simulations=simulations, batch_size=batch_size)
+    rng = np.random.RandomState(seed)
+    generation = 0
+
+    while not stop_event.is_set():
+        game = play_selfplay_game(mcts, temperature_moves, rng)
+        game['generation'] = client.generation
+        game_queue.put(game)
+        if client.generation != generation:
+            # Cached evaluations belong to the old weights
+            mcts.cache.clear()
+            generation = client.generation
+
+    conn.send(None)
+    slots.close()
+
+
+def arena(candidate, best, games=10, simulations=32, seed=0):
+    """Candidate's score against best (1 win, 0.5 draw), alternating colors"""
+    rng = np.random.RandomState(seed)
+    score = 0.0
+    for game in range(games):
+        players = {1: candidate, 2: best} if game % 2 == 0 else {1: best, 2: candidate}
+        searches = {mark: NeuralMCTS(net, simulations=simulations, temperature=0)
+                    for mark, net in players.items()}
+        board = [0] * 42
+        position, mask = 0, 0
+        player = 1
+        winner = 0
+        for ply in range(42):
+            if ply < 2:
+                # Random opening plies so the games differ
+                col = int(rng.choice([c for c in range(7) if board[c] == 0]))
+            else:
+                probs, _ = searches[player].search(board, player)
+                col = int(np.argmax(probs))
+            won = is_winning_move(position, mask, col)
+            position, mask = play(position, mask, col)
+            if won:
+                winner = player
+                break
+            player = 3 - player
+            board = decode_position(position, mask, player)
+
+        if winner == 0:
+            score += 0.5
+        elif players[winner] is candidate:
+            score += 1.0
+    return score / games
+
+
+def run(workers=4, generations=3, games_per_generation=20, simulations=64,
+        batch_size=8, train_steps=50, train_batch=128, replay_capacity=100000,
+        arena_games=10, gate=0.55, temperature_moves=8, hidden_size=128,
+        output_dir='alphazero_run', replay_path=None, recency_half_life=None, seed=0):
+    """Run the full loop; returns the throughput report"""
+    os.makedirs(output_dir, exist_ok=True)
+    rng = np.random.RandomState(seed)
+
+    best = ConnectXNetwork(hidden_size=hidden_size)
+    best_path = os.path.join(output_dir, 'gen_0.bin')
+    best.save(best_path)
+
+    slots = InferenceSlots(workers, batch_size)
+    game_queue = mp.Queue()
+    stop_event = mp.Event()
+    control, server_control = mp.Pipe()
+    pipes = [mp.Pipe() for _ in range(workers)]
+
+    server = mp.Process(target=inference_server,
+                        args=(slots.name, workers, batch_size, best_path,
+                              [server_end for _, server_end in pipes], server_control))
+    server.start()
+    processes = []
+    for w in range(workers):
+        p = mp.Process(target=selfplay_worker,
+                       args=(w, slots.name, workers, batch_size, pipes[w][0], game_queue,
+                             stop_event, simulations, temperature_moves, seed + w))
+        p.start()
+        processes.append(p)
+    # The children hold the pipe ends they use
+    server_control.close()
+    for worker_end, server_end in pipes:
+        worker_end.close()
+        server_end.close()
+
+    replay = ReplayBuffer(replay_capacity, path=replay_path)
+    games = 0
+    positions = 0
+    generation = 0
+    history = []
+    dropped = set()
+    start = time.time()
+
+    try:
+        while generation < generations:
+            try:
+                game = game_queue.get(timeout=1)
+            except queue.Empty:
+                if not server.is_alive():
+                    raise RuntimeError("The inference server died")
+                for w, p in enumerate(processes):
+                    if w not in dropped and not p.is_alive():
+                        print(f"Self-play worker {w} died (exit code {p.exitcode}); continuing without it")
+                        control.send(('drop', w))
+                        dropped.add(w)
+                if len(dropped) == workers:
+                    raise RuntimeError("Every self-play worker died")
+                continue
+            positions += replay.add_game(game, game_id=games, generation=game['generation'])
+            games += 1
+
+            if games % games_per_generation:
+                continue
+
+            # Train a candidate from the current best on replay samples
+            candidate = copy.deepcopy(best)
+            losses = np.zeros(3)
+            for _ in range(train_steps):
+                losses += candidate.train_step(*replay.sample(train_batch, rng, recency_half_life))
+            losses /= train_steps
+            replay.flush()
+
+            score = arena(candidate, best, arena_games, seed=generation)
+            generation += 1
+            accepted = score >= gate
+            if accepted:
+                best = candidate
+                best_path = os.path.join(output_dir, f'gen_{generation}.bin')
+                best.save(best_path)
+                control.send(('load', best_path, generation))
+
+            elapsed = time.time() - start
+            history.append({'generation': generation, 'loss': float(losses[0]),
+                            'arena_score': score, 'accepted': accepted})
+            print(f"gen {generation}: loss {losses[0]:.3f}  arena {score:.2f} "
+                  f"{'published' if accepted else 'rejected'}  "
+                  f"{games * 3600 / elapsed:,.0f} games/h  {positions / elapsed:,.1f} pos/s")
+    finally:
+        stop_event.set()
+        if not server.is_alive():
+            # Workers waiting on a dead server would never return
+            for p in processes:
+                p.terminate()
+        # Keep draining so workers blocked on put() can finish
+        while any(p.is_alive() for p in processes):
+            try:
+                game_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        for p in processes:
+            p.join()
+        if server.is_alive():
+            control.send(('stop',))
+            server_stats = control.recv()
+        server.join()
+        slots.close()
+
+    elapsed = time.time() - start
+    report = {
+        'workers': workers,
+        'games': games,
+        'positions': positions,
+        'seconds': elapsed,
+        'games_per_hour': games * 3600 / elapsed,
+        'positions_per_sec': positions / elapsed,
+        'inference_batches': server_stats['batches'],
+        'evaluations_per_sec': server_stats['evaluated'] / elapsed,
+        'mean_batch': server_stats['evaluated'] / max(server_stats['batches'], 1),
+        'batch_fill': server_stats['batch_fill'],
+        'generations': history
+    }
+    return report
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else max(1, mp.cpu_count() - 2)
+    generations = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print("=" * 60)
+    print("ALPHAZERO LOOP")
+    print("=" * 60)
+    print(f"Self-play workers: {workers}, generations: {generations}\n")
+
+    report = run(workers=workers, generations=generations)
+
+    print(f"\nGames: {report['games']}  ({report['games_per_hour']:,.0f}/hour)")
+    print(f"Positions/sec: {report['positions_per_sec']:,.1f}")
+    print(f"Inference: {report['evaluations_per_sec']:,.0f} evals/sec, "
+          f"mean batch {report['mean_batch']:.1f}, fill {report['batch_fill']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
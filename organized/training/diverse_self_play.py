@@ -1,179 +1,22 @@
 """
 Diverse Self-Play Generator
 Creates varied games for robust opening book
+
+Players are the bitboard negamax (numba-compiled when numba is
+installed) at per-style depths, with per-style random moves.
 """
 
-import numpy as np
 import json
 import time
 from collections import defaultdict
 import random
-from numba import jit, types
 import pickle
+import sys
 
-@jit(nopython=True)
-def fast_check_win(board, row, col, mark):
-    """Ultra-fast win detection"""
-    # Horizontal
-    count = 1
-    c = col - 1
-    while c >= 0 and board[row * 7 + c] == mark:
-        count += 1
-        c -= 1
-    c = col + 1
-    while c < 7 and board[row * 7 + c] == mark:
-        count += 1
-        c += 1
-    if count >= 4:
-        return True
-    
-    # Vertical
-    count = 1
-    r = row + 1
-    while r < 6 and board[r * 7 + col] == mark:
-        count += 1
-        r += 1
-    if count >= 4:
-        return True
-    
-    # Diagonal \
-    count = 1
-    r, c = row - 1, col - 1
-    while r >= 0 and c >= 0 and board[r * 7 + c] == mark:
-        count += 1
-        r -= 1
-        c -= 1
-    r, c = row + 1, col + 1
-    while r < 6 and c < 7 and board[r * 7 + c] == mark:
-        count += 1
-        r += 1
-        c += 1
-    if count >= 4:
-        return True
-    
-    # Diagonal /
-    count = 1
-    r, c = row - 1, col + 1
-    while r >= 0 and c < 7 and board[r * 7 + c] == mark:
-        count += 1
-        r -= 1
-        c += 1
-    r, c = row + 1, col - 1
-    while r < 6 and c >= 0 and board[r * 7 + c] == mark:
-        count += 1
-        r += 1
-        c -= 1
-    if count >= 4:
-        return True
-    
-    return False
-
-@jit(nopython=True)
-def evaluate_board_fast(board, player):
-    """Fast board evaluation"""
-    score = 0
-    opp = 3 - player
-    
-    # Center column value
-    for row in range(6):
-        if board[row * 7 + 3] == player:
-            score += 4 + (5 - row)
-        elif board[row * 7 + 3] == opp:
-            score -= 4 + (5 - row)
-    
-    # Adjacent columns
-    for col in [2, 4]:
-        for row in range(6):
-            if board[row * 7 + col] == player:
-                score += 2 + (5 - row) // 2
-            elif board[row * 7 + col] == opp:
-                score -= 2 + (5 - row) // 2
-    
-    return score
-
-@jit(nopython=True)
-def minimax_fast(board, depth, alpha, beta, maximizing, player):
-    """Fast minimax for self-play"""
-    # Get valid moves
-    valid_moves = np.zeros(7, dtype=np.int32)
-    valid_count = 0
-    for col in range(7):
-        if board[col] == 0:
-            valid_moves[valid_count] = col
-            valid_count += 1
-    
-    if valid_count == 0 or depth == 0:
-        return evaluate_board_fast(board, player), -1
-    
-    best_col = valid_moves[0]
-    
-    if maximizing:
-        max_eval = -99999
-        
-        for i in range(valid_count):
-            col = valid_moves[i]
-            
-            # Make move
-            row = -1
-            for r in range(5, -1, -1):
-                if board[r * 7 + col] == 0:
-                    row = r
-                    break
-            
-            if row >= 0:
-                board[row * 7 + col] = player
-                
-                # Check win
-                if fast_check_win(board, row, col, player):
-                    board[row * 7 + col] = 0
-                    return 10000, col
-                
-                eval_score, _ = minimax_fast(board, depth - 1, alpha, beta, False, player)
-                board[row * 7 + col] = 0
-                
-                if eval_score > max_eval:
-                    max_eval = eval_score
-                    best_col = col
-                
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-        
-        return max_eval, best_col
-    
-    else:
-        min_eval = 99999
-        
-        for i in range(valid_count):
-            col = valid_moves[i]
-            
-            # Make move
-            row = -1
-            for r in range(5, -1, -1):
-                if board[r * 7 + col] == 0:
-                    row = r
-                    break
-            
-            if row >= 0:
-                board[row * 7 + col] = 3 - player
-                
-                # Check win
-                if fast_check_win(board, row, col, 3 - player):
-                    board[row * 7 + col] = 0
-                    return -10000, col
-                
-                eval_score, _ = minimax_fast(board, depth - 1, alpha, beta, True, player)
-                board[row * 7 + col] = 0
-                
-                if eval_score < min_eval:
-                    min_eval = eval_score
-                    best_col = col
-                
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
-        
-        return min_eval, best_col
+from bitboard_core import encode_position, is_winning_move
+from bitboard_negamax import make_searcher
+from game_records import GameRecords, write_games
+from run_checkpoint import RunCheckpoint, decode_py_state, encode_py_state
 
 class DiverseSelfPlay:
     """Generate diverse self-play games"""
@@ -190,11 +33,10 @@ class DiverseSelfPlay:
             {'name': 'random', 'depth': 3, 'randomness': 0.3},
             {'name': 'deep', 'depth': 8, 'randomness': 0.02},
         ]
+        self.searcher = make_searcher()
     
     def get_diverse_move(self, board, player, style):
         """Get move with style-based diversity"""
-        board_array = np.array(board, dtype=np.int32)
-        
         # Random move with probability
         if random.random() < style['randomness']:
             valid = [c for c in range(7) if board[c] == 0]
@@ -210,36 +52,9 @@ class DiverseSelfPlay:
                         return col
                 return random.choice(valid)
         
-        # Check immediate wins/blocks first
-        for col in range(7):
-            if board[col] == 0:
-                row = -1
-                for r in range(5, -1, -1):
-                    if board[r * 7 + col] == 0:
-                        row = r
-                        break
-                
-                if row >= 0:
-                    # Check win
-                    board_array[row * 7 + col] = player
-                    if fast_check_win(board_array, row, col, player):
-                        return col
-                    board_array[row * 7 + col] = 0
-                    
-                    # Check block
-                    board_array[row * 7 + col] = 3 - player
-                    if fast_check_win(board_array, row, col, 3 - player):
-                        return col
-                    board_array[row * 7 + col] = 0
-        
-        # Use minimax with style depth
-        _, col = minimax_fast(board_array, style['depth'], -99999, 99999, True, player)
-        
-        if col == -1:
-            # Fallback
-            valid = [c for c in range(7) if board[c] == 0]
-            return valid[0] if valid else 3
-        
+        # Bitboard negamax at the style's depth (takes wins and blocks first)
+        position, mask = encode_position(board, player)
+        col, _, _ = self.searcher.search(position, mask, max_depth=style['depth'])
         return col
     
     def play_game(self, style1_idx, style2_idx):
@@ -250,6 +65,7 @@ class DiverseSelfPlay:
         board = [0] * 42
         moves = []
         current = 1
+        self.searcher.new_game()  # Games depend only on the RNG state, so resumes replay them exactly
         
         for turn in range(42):
             style = style1 if current == 1 else style2
@@ -257,28 +73,47 @@ class DiverseSelfPlay:
             moves.append(move)
             
             # Make move
+            position, mask = encode_position(board, current)
+            won = is_winning_move(position, mask, move)
             for row in range(5, -1, -1):
                 if board[row * 7 + move] == 0:
                     board[row * 7 + move] = current
-                    
-                    # Check win
-                    board_array = np.array(board, dtype=np.int32)
-                    if fast_check_win(board_array, row, move, current):
-                        return moves, current
                     break
+            if won:
+                return moves, current
             
             current = 3 - current
         
         return moves, 0  # Draw
     
-    def generate_diverse_games(self, num_games=10000):
-        """Generate games with style diversity"""
+    def generate_diverse_games(self, num_games=10000, run_dir=None, resume=False, checkpoint_every=1000):
+        """
+        Generate games with style diversity
+        With run_dir, every checkpoint_every games go to a shard with the RNG
+        state and opening book (see run_checkpoint); resume=True continues
+        the run in run_dir from its last checkpoint.
+        """
         print(f"Generating {num_games:,} diverse games...")
         
         start = time.time()
         games_data = []
+        first_game = 0
+        checkpoint = RunCheckpoint(run_dir) if run_dir else None
         
-        for game_num in range(num_games):
+        if checkpoint and resume and checkpoint.exists():
+            manifest, stats = checkpoint.resume()
+            random.setstate(decode_py_state(manifest['rng_state']))
+            self.opening_book.update(stats)
+            first_game = manifest['games']
+            num_games = manifest['num_games']
+            print(f"  Resuming at game {first_game:,}")
+        elif checkpoint:
+            if checkpoint.exists():
+                raise ValueError(f"{run_dir} already holds a run - resume it or pick another directory")
+            checkpoint.start({'num_games': num_games,
+                              'rng_state': encode_py_state(random.getstate())}, {})
+        
+        for game_num in range(first_game, num_games):
             # Select random styles
             style1 = random.randint(0, len(self.styles) - 1)
             style2 = random.randint(0, len(self.styles) - 1)
@@ -303,13 +138,25 @@ class DiverseSelfPlay:
                 else:
                     self.opening_book[position]['draws'] += 1
             
+            if checkpoint and ((game_num + 1) % checkpoint_every == 0 or game_num + 1 == num_games):
+                checkpoint.add_shard(f"games-{game_num + 1 - len(games_data):08d}.c4g", games_data,
+                                     generator=lambda game: '-vs-'.join(game['styles']))
+                checkpoint.stats = dict(self.opening_book)
+                checkpoint.manifest['rng_state'] = encode_py_state(random.getstate())
+                checkpoint.save()
+                games_data = []
+            
             if (game_num + 1) % 1000 == 0:
                 elapsed = time.time() - start
-                rate = (game_num + 1) / elapsed
+                rate = (game_num + 1 - first_game) / elapsed
                 print(f"  {game_num+1:,} games ({rate:.0f} games/sec)")
         
         elapsed = time.time() - start
-        print(f"\nCompleted in {elapsed:.1f}s ({num_games/elapsed:.0f} games/sec)")
+        print(f"\nCompleted in {elapsed:.1f}s ({(num_games - first_game)/elapsed:.0f} games/sec)")
+        
+        if checkpoint:
+            games_data = [dict(game, styles=tuple(game['generator'].split('-vs-')))
+                          for path in checkpoint.shard_paths() for game in GameRecords(path)]
         
         # Analyze diversity
         self.analyze_diversity(games_data)
@@ -400,10 +247,13 @@ class DiverseSelfPlay:
             print(f"  {i}. {pos_str[:20]}... - {stats['total']} games, "
                   f"{stats['win_rate']*100:.1f}% win rate")
     
-    def save_games(self, games_data, filename='diverse_games.pkl'):
-        """Save all game data"""
-        with open(filename, 'wb') as f:
-            pickle.dump(games_data, f)
+    def save_games(self, games_data, filename='diverse_games.c4g'):
+        """Save all game data (.c4g packed records, styles as the generator; otherwise a pickle)"""
+        if filename.endswith('.c4g'):
+            write_games(games_data, filename, generator=lambda game: '-vs-'.join(game['styles']))
+        else:
+            with open(filename, 'wb') as f:
+                pickle.dump(games_data, f)
         print(f"Saved {len(games_data):,} games to {filename}")
 
 
@@ -414,8 +264,9 @@ if __name__ == "__main__":
     
     generator = DiverseSelfPlay()
     
-    # Generate diverse games
-    games = generator.generate_diverse_games(num_games=10000)
+    # Generate diverse games (checkpointed; rerun with --resume after an interruption)
+    games = generator.generate_diverse_games(num_games=10000, run_dir='diverse_run',
+                                             resume='--resume' in sys.argv)
     
     # Save opening book
     generator.save_opening_book(min_games=20)
@@ -1,6 +1,8 @@
 """
-Fast Self-Play Generator using simplified evaluation
-For rapid opening book generation
+Fast Self-Play Generator using the bitboard negamax
+For rapid opening book generation: shallow searches with a small TT
+(numba-compiled when numba is installed), with random center-weighted
+moves mixed in for diversity
 """
 
 import random
@@ -8,160 +10,41 @@ import json
 from collections import defaultdict
 import time
 
+from bitboard_core import is_winning_move, play, valid_columns
+from bitboard_negamax import make_searcher
+
 class FastSelfPlay:
     """Fast self-play for opening book generation"""
     
-    def __init__(self):
+    def __init__(self, depth=4, explore_prob=0.2, seed=None):
         self.opening_book = defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0, 'total': 0})
-        
-    def fast_eval_agent(self, board, mark):
-        """Very fast agent with good play"""
-        
-        # Quick win/block check
-        for col in range(7):
-            if board[col] == 0:
-                # Check win
-                test_board = board[:]
-                for row in range(5, -1, -1):
-                    if test_board[row * 7 + col] == 0:
-                        test_board[row * 7 + col] = mark
-                        if self.check_win_at(test_board, row, col, mark):
-                            return col
-                        test_board[row * 7 + col] = 0
-                        break
-                
-                # Check block
-                test_board = board[:]
-                for row in range(5, -1, -1):
-                    if test_board[row * 7 + col] == 0:
-                        test_board[row * 7 + col] = 3 - mark
-                        if self.check_win_at(test_board, row, col, 3 - mark):
-                            return col
-                        break
-        
-        # Prefer center with some randomness
-        valid = [c for c in range(7) if board[c] == 0]
-        if not valid:
-            return 3
-        
-        # Weight center columns more
-        weights = []
-        for col in valid:
-            weight = 4 - abs(col - 3)  # 4,3,2,1,1,2,3
-            
-            # Bonus for creating threats
-            test_board = board[:]
-            for row in range(5, -1, -1):
-                if test_board[row * 7 + col] == 0:
-                    test_board[row * 7 + col] = mark
-                    # Count threats created
-                    threats = 0
-                    for c2 in range(7):
-                        if c2 != col and test_board[c2] == 0:
-                            for r2 in range(5, -1, -1):
-                                if test_board[r2 * 7 + c2] == 0:
-                                    test_board[r2 * 7 + c2] = mark
-                                    if self.check_win_at(test_board, r2, c2, mark):
-                                        threats += 1
-                                    test_board[r2 * 7 + c2] = 0
-                                    break
-                    weight += threats * 2
-                    break
-            
-            weights.append(weight)
-        
-        # Add randomness for diversity
-        if random.random() < 0.2:  # 20% random
-            return random.choice(valid)
-        
-        # Choose based on weights
-        total = sum(weights)
-        if total == 0:
-            return random.choice(valid)
-        
-        r = random.uniform(0, total)
-        cumsum = 0
-        for col, weight in zip(valid, weights):
-            cumsum += weight
-            if r <= cumsum:
-                return col
-        
-        return valid[-1]
-    
-    def check_win_at(self, board, row, col, mark):
-        """Check if placing mark at row,col creates a win"""
-        # Horizontal
-        count = 1
-        c = col - 1
-        while c >= 0 and board[row * 7 + c] == mark:
-            count += 1
-            c -= 1
-        c = col + 1
-        while c < 7 and board[row * 7 + c] == mark:
-            count += 1
-            c += 1
-        if count >= 4:
-            return True
-        
-        # Vertical
-        count = 1
-        r = row + 1
-        while r < 6 and board[r * 7 + col] == mark:
-            count += 1
-            r += 1
-        if count >= 4:
-            return True
-        
-        # Diagonal \
-        count = 1
-        r, c = row - 1, col - 1
-        while r >= 0 and c >= 0 and board[r * 7 + c] == mark:
-            count += 1
-            r -= 1
-            c -= 1
-        r, c = row + 1, col + 1
-        while r < 6 and c < 7 and board[r * 7 + c] == mark:
-            count += 1
-            r += 1
-            c += 1
-        if count >= 4:
-            return True
-        
-        # Diagonal /
-        count = 1
-        r, c = row - 1, col + 1
-        while r >= 0 and c < 7 and board[r * 7 + c] == mark:
-            count += 1
-            r -= 1
-            c += 1
-        r, c = row + 1, col - 1
-        while r < 6 and c >= 0 and board[r * 7 + c] == mark:
-            count += 1
-            r += 1
-            c -= 1
-        if count >= 4:
-            return True
-        
-        return False
+        self.depth = depth
+        self.explore_prob = explore_prob  # Share of random center-weighted moves
+        self.rng = random.Random(seed)
+        self.searcher = make_searcher(tt_size=1 << 16)
+        
+    def fast_eval_agent(self, position, mask):
+        """Shallow bitboard negamax, or a random center-weighted move for diversity"""
+        if self.rng.random() < self.explore_prob:
+            valid = valid_columns(mask)
+            return self.rng.choices(valid, weights=[4 - abs(c - 3) for c in valid])[0]
+        move, _, _ = self.searcher.search(position, mask, max_depth=self.depth)
+        return move
     
     def play_game(self):
         """Play one fast game"""
-        board = [0] * 42
+        position, mask = 0, 0
         moves = []
         current = 1
         
         for turn in range(42):
-            move = self.fast_eval_agent(board, current)
+            move = self.fast_eval_agent(position, mask)
             moves.append(move)
             
-            # Make move
-            for row in range(5, -1, -1):
-                if board[row * 7 + move] == 0:
-                    board[row * 7 + move] = current
-                    
-                    if self.check_win_at(board, row, move, current):
-                        return moves, current
-                    break
+            won = is_winning_move(position, mask, move)
+            position, mask = play(position, mask, move)
+            if won:
+                return moves, current
             
             current = 3 - current
         
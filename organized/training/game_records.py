@@ -0,0 +1,220 @@
+"""
+Compact Game Records
+Packed binary storage for self-play corpora, read through mmap
+
+File layout (.c4g):
+- 32-byte preamble: magic, game count, index offset, metadata offset
+- Move buffer: every move in 3 bits, games back to back with no padding
+- Index: one fixed-width record per game (bit offset, length, winner,
+  generator id)
+- Metadata: JSON with the generator names behind the ids
+
+A game costs 12 index bytes plus 3 bits per move. Readers unpack moves
+with NumPy, a chunk of games at a time, so scanning a corpus is bound by
+I/O rather than by unpickling.
+"""
+
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+from bitboard_core import BOTTOM_MASKS
+
+MAGIC = b'C4GAMES1'
+PREAMBLE = struct.Struct('<8sQQQ')
+MOVE_BITS = 3
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('length', 'u1'), ('winner', 'u1'), ('generator', '<u2')])
+
+
+class GameRecordWriter:
+    """
+    Streams games into a .c4g file
+    The index and metadata are written on close(); until then the file reads as empty.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(PREAMBLE.pack(MAGIC, 0, 0, 0))
+        self.index = bytearray()
+        self.generators = {}
+        self.count = 0
+        self.bits = 0      # Total move bits written
+        self.pending = 0   # Bits not yet flushed as whole bytes
+        self.pending_bits = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, moves, winner, generator='unknown'):
+        generator_id = self.generators.setdefault(generator, len(self.generators))
+        self.index += struct.pack('<QBBH', self.bits, len(moves), winner, generator_id)
+        for col in moves:
+            self.pending |= int(col) << self.pending_bits
+            self.pending_bits += MOVE_BITS
+        self.bits += MOVE_BITS * len(moves)
+        whole = self.pending_bits // 8
+        if whole:
+            self.file.write((self.pending & ((1 << 8 * whole) - 1)).to_bytes(whole, 'little'))
+            self.pending >>= 8 * whole
+            self.pending_bits -= 8 * whole
+        self.count += 1
+
+    def add_game(self, game, generator='unknown'):
+        """Add a game dict ({'moves': [...], 'winner': 0/1/2})"""
+        self.add(game['moves'], int(game['winner']), generator)
+
+    def close(self):
+        if self.file.closed:
+            return
+        if self.pending_bits:
+            self.file.write(self.pending.to_bytes((self.pending_bits + 7) // 8, 'little'))
+        index_offset = self.file.tell()
+        self.file.write(self.index)
+        meta_offset = self.file.tell()
+        names = sorted(self.generators, key=self.generators.get)
+        self.file.write(json.dumps({'generators': names}).encode())
+        self.file.seek(0)
+        self.file.write(PREAMBLE.pack(MAGIC, self.count, index_offset, meta_offset))
+        self.file.close()
+
+
+def write_games(games, path, generator='unknown'):
+    """Write an iterable of game dicts; generator may be a name or a function of the game"""
+    with GameRecordWriter(path) as writer:
+        for game in games:
+            writer.add_game(game, generator(game) if callable(generator) else generator)
+    return writer.count
+
+
+class GameRecords:
+    """
+    Memory-mapped reader for a .c4g file
+    records[i] and iteration give game dicts; iter_chunks() and
+    iter_positions() decode whole chunks of games with NumPy.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            magic, count, index_offset, meta_offset = PREAMBLE.unpack(f.read(PREAMBLE.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a game record file")
+            f.seek(meta_offset)
+            meta = json.loads(f.read().decode() or '{}') if count else {}
+        self.path = path
+        self.generators = meta.get('generators', [])
+        if count:
+            self.data = np.memmap(path, dtype=np.uint8, mode='r')
+            self.index = self.data[index_offset:meta_offset].view(INDEX_DTYPE)
+            self.moves = self.data[PREAMBLE.size:index_offset]
+        else:
+            self.data = np.zeros(0, dtype=np.uint8)
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+            self.moves = self.data
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        moves, lengths = self.decode(i, i + 1)
+        record = self.index[i]
+        return {'moves': moves[0, :lengths[0]].tolist(), 'winner': int(record['winner']),
+                'length': int(record['length']),
+                'generator': self.generators[record['generator']]}
+
+    def __iter__(self):
+        for start, moves, lengths in self.iter_chunks():
+            index = self.index[start:start + len(lengths)]
+            rows = moves.tolist()
+            for row, length, winner, generator in zip(rows, lengths.tolist(), index['winner'].tolist(),
+                                                      index['generator'].tolist()):
+                yield {'moves': row[:length], 'winner': winner, 'length': length,
+                       'generator': self.generators[generator]}
+
+    def decode(self, start, stop):
+        """Moves of games start..stop-1 as an int8 (games, max length) array (-1 padded) and lengths"""
+        index = self.index[start:stop]
+        lengths = index['length'].astype(np.int64)
+        width = int(lengths.max()) if len(index) else 0
+        if width == 0:
+            return np.full((len(index), 0), -1, dtype=np.int8), lengths
+        first_bit = int(index['offset'][0])
+        last_bit = int(index['offset'][-1]) + MOVE_BITS * int(lengths[-1])
+        raw = np.asarray(self.moves[first_bit // 8:(last_bit + 7) // 8])
+        bits = np.unpackbits(raw, bitorder='little')
+
+        ply = np.arange(width)
+        valid = ply[None, :] < lengths[:, None]
+        base = index['offset'].astype(np.int64) - first_bit // 8 * 8
+        starts = base[:, None] + MOVE_BITS * ply[None, :]
+        starts = np.where(valid, starts, 0)
+        moves = bits[starts] | bits[starts + 1] << 1 | bits[starts + 2] << 2
+        return np.where(valid, moves, -1).astype(np.int8), lengths
+
+    def iter_chunks(self, chunk_size=65536):
+        """(first game index, moves, lengths) for consecutive chunks of games"""
+        for start in range(0, len(self), chunk_size):
+            moves, lengths = self.decode(start, min(start + chunk_size, len(self)))
+            yield start, moves, lengths
+
+    def iter_positions(self, chunk_size=65536):
+        """
+        Every position before each move, a chunk of games at a time
+        Yields (positions, masks, moves, game indices, plies); positions hold
+        the stones of the side to move, as in bitboard_core.
+        """
+        bottoms = np.array(BOTTOM_MASKS, dtype=np.uint64)
+        for start, moves, lengths in self.iter_chunks(chunk_size):
+            position = np.zeros(len(lengths), dtype=np.uint64)
+            mask = np.zeros(len(lengths), dtype=np.uint64)
+            out = []
+            for ply in range(moves.shape[1]):
+                live = np.nonzero(lengths > ply)[0]
+                cols = moves[live, ply].astype(np.int64)
+                out.append((position[live], mask[live], cols, start + live,
+                            np.full(len(live), ply, dtype=np.int8)))
+                # Vectorized bitboard_core.play
+                new_mask = mask[live] | (mask[live] + bottoms[cols])
+                position[live] = position[live] ^ mask[live]
+                mask[live] = new_mask
+            if out:
+                yield tuple(np.concatenate(parts) for parts in zip(*out))
+
+
+def main():
+    """game_records.py output.c4g input.pkl|.jsonl ... - convert and compare"""
+    from selfplay_dataset import iter_games
+
+    if len(sys.argv) < 3:
+        print(main.__doc__)
+        return
+    output, inputs = sys.argv[1], sys.argv[2:]
+
+    start = time.time()
+    with GameRecordWriter(output) as writer:
+        for path in inputs:
+            for game in iter_games(path):
+                writer.add_game(game, game.get('generator', os.path.basename(path)))
+    print(f"Converted {writer.count:,} games in {time.time() - start:.1f}s")
+
+    source = sum(os.path.getsize(path) for path in inputs)
+    packed = os.path.getsize(output)
+    print(f"Size: {source:,} -> {packed:,} bytes ({source / max(packed, 1):.1f}x smaller)")
+
+    start = time.time()
+    records = GameRecords(output)
+    positions = 0
+    for position, mask, _, _, _ in records.iter_positions():
+        positions += len(position)
+    print(f"Scanned {positions:,} positions in {time.time() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
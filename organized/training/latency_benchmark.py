@@ -0,0 +1,232 @@
+"""
+Latency Benchmark
+Per-move latency of every agent over a fixed position suite
+
+- Suite: a few hundred positions from seeded random playouts, by phase:
+  opening (0-8 stones), middlegame (12-24), endgame (26-38) and tactical
+  (the side to move has a win or must block one, any phase)
+- Every agent file in organized/agents that defines `agent`, plus the
+  repository's submission.py, runs in its own persistent worker; load
+  time and the first call (lazy initialization) are reported separately
+  from the suite
+- Each position is a fresh game for the agent (new_game() hook first);
+  latency is measured inside the worker, without pipe overhead
+- A move still running after max_seconds is abandoned (the worker is
+  reloaded), counted at max_seconds and reported as a timeout only
+- Per phase and overall: mean / p50 / p95 / p99 / max latency, moves over
+  actTimeout - margin (margin violations), moves over actTimeout,
+  illegal moves and errors, and the depth agents report through
+  `agent.last_depth` (None for moves made without a search, such as book
+  moves, which the depth statistics leave out)
+- Results are written as JSON for comparing runs over time
+"""
+
+import glob
+import json
+import os
+import random
+import re
+import sys
+import time
+
+import numpy as np
+
+from bitboard_core import WIDTH, can_play, is_winning_move, play, possible, winning_position
+from agent_workers import AgentWorker
+from referee import CONFIGURATION, OVERAGE_TIME, AgentTimeout, Struct, board_after
+
+AGENTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'agents')
+SUBMISSION = os.path.join(AGENTS_DIR, '..', '..', 'submission.py')
+
+# Stone-count ranges of the positional phases; 'tactical' is any phase
+PHASES = {'opening': (0, 8), 'middlegame': (12, 24), 'endgame': (26, 38)}
+CENTER_WEIGHTS = [1, 2, 3, 4, 3, 2, 1]
+
+
+def _random_line(rng, length):
+    """Center-weighted random moves that never end the game, up to `length` stones"""
+    position, mask, moves = 0, 0, []
+    while len(moves) < length:
+        columns = [col for col in range(WIDTH)
+                   if can_play(mask, col) and not is_winning_move(position, mask, col)]
+        if not columns:
+            break
+        col = rng.choices(columns, [CENTER_WEIGHTS[c] for c in columns])[0]
+        position, mask = play(position, mask, col)
+        moves.append(col)
+    return moves, position, mask
+
+
+def position_suite(per_phase=75, seed=0):
+    """[{'phase', 'moves'}]: per_phase distinct positions of each phase"""
+    rng = random.Random(seed)
+    phases = {phase: [] for phase in (*PHASES, 'tactical')}
+    seen = set()
+    while any(len(lines) < per_phase for lines in phases.values()):
+        moves, position, mask = _random_line(rng, rng.randint(0, max(hi for _, hi in PHASES.values())))
+        if position + mask in seen:
+            continue
+        threats = winning_position(position, mask) | winning_position(position ^ mask, mask)
+        if threats & possible(mask):
+            phase = 'tactical'
+        else:
+            phase = next((name for name, (lo, hi) in PHASES.items() if lo <= len(moves) <= hi), None)
+        if phase is None or len(phases[phase]) >= per_phase:
+            continue
+        seen.add(position + mask)
+        phases[phase].append(moves)
+    return [{'phase': phase, 'moves': moves} for phase, lines in phases.items() for moves in lines]
+
+
+def discover_agents():
+    """(name, path) of every agent file in organized/agents, plus submission.py"""
+    agents = []
+    for path in sorted(glob.glob(os.path.join(AGENTS_DIR, '*.py'))):
+        with open(path) as f:
+            if re.search(r'^def agent\(', f.read(), re.MULTILINE):
+                agents.append((os.path.basename(path)[:-3], path))
+    if os.path.exists(SUBMISSION):
+        agents.append(('submission', os.path.normpath(SUBMISSION)))
+    return agents
+
+
+def _observation(moves):
+    return Struct(board=board_after(moves), mark=len(moves) % 2 + 1, step=len(moves),
+                  remainingOverageTime=OVERAGE_TIME)
+
+
+def summarize(moves, limit, margin):
+    """Latency percentiles, violation counts and depths of per-move records"""
+    latencies = np.array([move['seconds'] for move in moves if move['seconds'] is not None])
+    depths = [move['depth'] for move in moves if move['depth'] is not None]
+    summary = {
+        'moves': len(moves),
+        'errors': sum(move['error'] for move in moves),
+        'illegal': sum(move['illegal'] for move in moves),
+        'margin_violations': int((latencies > limit - margin).sum()),
+        'timeouts': sum(move['hung'] or move['seconds'] is not None and move['seconds'] > limit
+                        for move in moves),
+        'depth': {'mean': float(np.mean(depths)), 'min': int(min(depths)), 'max': int(max(depths))}
+        if depths else None
+    }
+    if len(latencies):
+        summary.update(mean=float(latencies.mean()), max=float(latencies.max()), **{
+            f'p{q}': float(np.percentile(latencies, q)) for q in (50, 95, 99)})
+    return summary
+
+
+def benchmark_agent(agent, positions, configuration=None, margin=0.25, max_seconds=10.0):
+    """
+    Time one agent over the suite in a persistent worker
+    Returns {'load_seconds', 'first_call_seconds', 'memory', 'overall',
+    'phases'}, or {'error'} if the agent fails to load.
+    """
+    configuration = Struct(CONFIGURATION, **(configuration or {}))
+    try:
+        worker = AgentWorker(agent, max_seconds=max_seconds)
+    except RuntimeError as e:
+        return {'error': str(e)}
+
+    with worker:
+        first_call = None
+        try:
+            worker(_observation([]), configuration)
+            first_call = worker.last_seconds
+        except (RuntimeError, AgentTimeout):
+            pass
+
+        moves = []
+        for entry in positions:
+            worker.new_game()
+            record = {'phase': entry['phase'], 'error': False, 'illegal': False, 'hung': False}
+            try:
+                move = worker(_observation(entry['moves']), configuration)
+                record['illegal'] = not isinstance(move, (int, np.integer)) or not 0 <= move < WIDTH \
+                    or board_after(entry['moves'])[int(move)] != 0
+            except AgentTimeout:
+                record['hung'] = True
+            except RuntimeError:
+                record['error'] = True
+            record['seconds'], record['depth'] = worker.last_seconds, worker.last_depth
+            moves.append(record)
+        memory = worker.memory()
+
+    limit = configuration.actTimeout
+    return {
+        'load_seconds': worker.init_seconds,
+        'first_call_seconds': first_call,
+        'restarts': worker.restarts,
+        'memory': memory,
+        'overall': summarize(moves, limit, margin),
+        'phases': {phase: summarize([m for m in moves if m['phase'] == phase], limit, margin)
+                   for phase in dict.fromkeys(entry['phase'] for entry in positions)}
+    }
+
+
+def run_benchmark(agents=None, per_phase=75, seed=0, margin=0.25, max_seconds=10.0, configuration=None,
+                  verbose=True):
+    """Benchmark (name, agent) pairs (default: discover_agents()) over one shared suite"""
+    agents = agents if agents is not None else discover_agents()
+    positions = position_suite(per_phase, seed)
+    result = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'suite': {'per_phase': per_phase, 'seed': seed, 'positions': len(positions)},
+        'configuration': dict(CONFIGURATION, **(configuration or {})),
+        'margin': margin,
+        'max_seconds': max_seconds,
+        'agents': {}
+    }
+    for name, agent in agents:
+        if verbose:
+            print(f"{name}...", end=' ', flush=True)
+        start = time.time()
+        result['agents'][name] = benchmark_agent(agent, positions, configuration, margin, max_seconds)
+        if verbose:
+            print(f"{time.time() - start:.1f}s")
+    if verbose:
+        print_report(result)
+    return result
+
+
+def print_report(result):
+    print("\n" + "="*96)
+    print(f"PER-MOVE LATENCY ({result['suite']['positions']} positions, "
+          f"actTimeout {result['configuration']['actTimeout']}s, margin {result['margin']}s)")
+    print("="*96)
+    print(f"{'agent':32s} {'load':>7s} {'first':>7s} {'p50':>7s} {'p95':>7s} {'p99':>7s} {'max':>7s} "
+          f"{'over':>5s} {'fail':>5s} {'depth':>6s}")
+    ms = lambda seconds: f"{seconds * 1000:7.1f}" if seconds is not None else f"{'-':>7s}"
+    for name, entry in result['agents'].items():
+        if 'error' in entry:
+            print(f"{name:32s} {entry['error']}")
+            continue
+        overall = entry['overall']
+        depth = f"{overall['depth']['mean']:6.1f}" if overall['depth'] else f"{'-':>6s}"
+        print(f"{name:32s} {ms(entry['load_seconds'])} {ms(entry['first_call_seconds'])} "
+              f"{ms(overall.get('p50'))} {ms(overall.get('p95'))} {ms(overall.get('p99'))} "
+              f"{ms(overall.get('max'))} {overall['margin_violations']:5d} "
+              f"{overall['errors'] + overall['illegal']:5d} {depth}")
+    print("\nTimes in ms; over = moves past actTimeout - margin, fail = errors + illegal moves")
+
+
+def main():
+    """
+    latency_benchmark.py [agent.py ...] [--per-phase=75] [--margin=0.25] [--max-seconds=10]
+                         [--seed=0] [--out=latency_benchmark.json]
+    """
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) if '=' in arg else (arg[2:], True)
+                   for arg in sys.argv[1:] if arg.startswith('--'))
+    if 'help' in options:
+        print(main.__doc__)
+        return
+    agents = [(os.path.basename(path).rsplit('.', 1)[0], path) for path in args] or None
+    result = run_benchmark(agents, per_phase=int(options.get('per-phase', 75)),
+                           seed=int(options.get('seed', 0)), margin=float(options.get('margin', 0.25)),
+                           max_seconds=float(options.get('max-seconds', 10)))
+    with open(options.get('out', 'latency_benchmark.json'), 'w') as f:
+        json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ import time
 from deep_rl_agent import RLAgent
 from gradient_boost_agent import GradientBoostAgent
 from ensemble_agent import EnsembleAgent
-from kaggle_environments import make
+from referee import play_game
 
 class MLTrainingPipeline:
     """Complete ML training pipeline"""
@@ -121,16 +121,12 @@ class MLTrainingPipeline:
         wins = 0
         
         for i in range(games):
-            env = make('connectx', debug=False)
-            
             try:
                 if i % 2 == 0:
-                    env.run([agent_func, opponent])
-                    if env.state[0].reward == 1:
+                    if play_game(agent_func, opponent)['winner'] == 1:
                         wins += 1
                 else:
-                    env.run([opponent, agent_func])
-                    if env.state[1].reward == 1:
+                    if play_game(opponent, agent_func)['winner'] == 2:
                         wins += 1
             except:
                 pass
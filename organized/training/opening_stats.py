@@ -0,0 +1,248 @@
+"""
+Opening Statistics
+Incremental outcome statistics per opening position, in compact arrays
+
+- Keyed by canonical position (bitboard key, mirror-reduced), so move
+  orders that transpose and mirrored lines share one entry
+- Per position: games, P1 wins, draws, P2 wins (uint32) and the sum and
+  sum of squares of the P1 score (+1 / 0 / -1) as float64 - 40 bytes
+  including the key
+- Updates are buffered and merged into sorted arrays in bulk, so memory
+  grows with distinct positions, not with games
+- Statistics from separate workers or shards merge with merge()
+- to_book() expands the tree of popular positions from the empty board
+  into a JSON book keyed by canonical position, so the book never
+  outgrows the statistics; agents look a move up with
+  bitboard_core.book_candidates, which finds every move order and the
+  mirror image of a line
+"""
+
+import numpy as np
+
+from bitboard_core import WIDTH, BOTTOM_MASKS, TOP_MASKS, key, mirror
+
+COUNT, WINS, DRAWS, LOSSES = range(4)
+
+
+def canonical_keys(positions, masks):
+    """Vectorized bitboard_core.canonical_key (keys only)"""
+    return np.minimum(key(positions, masks), key(mirror(positions), mirror(masks)))
+
+
+class OpeningStats:
+    """Mergeable per-position outcome statistics for the first max_depth plies"""
+
+    def __init__(self, max_depth=12, buffer_size=1 << 20):
+        self.max_depth = max_depth
+        self.buffer_size = buffer_size
+        self.keys = np.zeros(0, dtype=np.uint64)
+        self.counts = np.zeros((0, 4), dtype=np.uint32)
+        self.sums = np.zeros((0, 2), dtype=np.float64)
+        self.games = 0
+        self._reset_buffer()
+
+    def _reset_buffer(self):
+        self._pending_keys = np.empty(self.buffer_size, dtype=np.uint64)
+        self._pending_scores = np.empty(self.buffer_size, dtype=np.int8)
+        self._pending = 0
+
+    def __len__(self):
+        self.flush()
+        return len(self.keys)
+
+    def __getstate__(self):
+        # Pickle the merged arrays only, not the update buffer
+        self.flush()
+        state = self.__dict__.copy()
+        for name in ('_pending_keys', '_pending_scores', '_pending'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset_buffer()
+
+    def add(self, keys, scores):
+        """Record one P1 score (+1 win, 0 draw, -1 loss) for each canonical key"""
+        keys = np.asarray(keys, dtype=np.uint64)
+        scores = np.asarray(scores, dtype=np.int8)
+        for start in range(0, len(keys), self.buffer_size):
+            part = slice(start, start + self.buffer_size)
+            n = len(keys[part])
+            if self._pending + n > self.buffer_size:
+                self.flush()
+            self._pending_keys[self._pending:self._pending + n] = keys[part]
+            self._pending_scores[self._pending:self._pending + n] = scores[part]
+            self._pending += n
+
+    def add_moves(self, moves, lengths, winners):
+        """
+        Add a chunk of games given as a (games, plies) column array (-1 padded),
+        game lengths and winners (0 draw, 1, 2)
+        """
+        lengths = np.asarray(lengths)
+        scores = np.select([np.asarray(winners) == 1, np.asarray(winners) == 2], [1, -1], 0)
+        bottoms = np.array(BOTTOM_MASKS, dtype=np.uint64)
+        position = np.zeros(len(lengths), dtype=np.uint64)
+        mask = np.zeros(len(lengths), dtype=np.uint64)
+        for ply in range(min(self.max_depth, moves.shape[1])):
+            live = np.nonzero(lengths > ply)[0]
+            if len(live) == 0:
+                break
+            cols = moves[live, ply].astype(np.int64)
+            # Vectorized bitboard_core.play
+            new_mask = mask[live] | (mask[live] + bottoms[cols])
+            position[live] = position[live] ^ mask[live]
+            mask[live] = new_mask
+            self.add(canonical_keys(position[live], mask[live]), scores[live])
+        self.games += len(lengths)
+
+    def add_games(self, games, chunk_size=8192):
+        """Add an iterable of game dicts ({'moves': [...], 'winner': ...})"""
+        chunk = []
+        for game in games:
+            chunk.append(game)
+            if len(chunk) == chunk_size:
+                self._add_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._add_chunk(chunk)
+
+    def _add_chunk(self, games):
+        moves = np.full((len(games), self.max_depth), -1, dtype=np.int8)
+        lengths = np.zeros(len(games), dtype=np.int64)
+        for i, game in enumerate(games):
+            line = game['moves'][:self.max_depth]
+            moves[i, :len(line)] = line
+            lengths[i] = len(line)
+        self.add_moves(moves, lengths, [game['winner'] for game in games])
+
+    def add_records(self, records, chunk_size=65536):
+        """Add every game of a GameRecords file without building game dicts"""
+        for start, moves, lengths in records.iter_chunks(chunk_size):
+            winners = records.index['winner'][start:start + len(lengths)]
+            self.add_moves(moves[:, :self.max_depth], lengths, winners)
+
+    def flush(self):
+        """Merge buffered updates into the sorted arrays"""
+        if not self._pending:
+            return
+        keys = self._pending_keys[:self._pending]
+        scores = self._pending_scores[:self._pending]
+        self._pending = 0
+
+        new_keys, inverse = np.unique(keys, return_inverse=True)
+        counts = np.zeros((len(new_keys), 4), dtype=np.uint32)
+        counts[:, COUNT] = np.bincount(inverse, minlength=len(new_keys))
+        counts[:, WINS] = np.bincount(inverse, weights=scores == 1, minlength=len(new_keys))
+        counts[:, DRAWS] = np.bincount(inverse, weights=scores == 0, minlength=len(new_keys))
+        counts[:, LOSSES] = np.bincount(inverse, weights=scores == -1, minlength=len(new_keys))
+        sums = np.zeros((len(new_keys), 2), dtype=np.float64)
+        sums[:, 0] = np.bincount(inverse, weights=scores, minlength=len(new_keys))
+        sums[:, 1] = np.bincount(inverse, weights=scores.astype(np.float64) ** 2, minlength=len(new_keys))
+        self._merge_sorted(new_keys, counts, sums)
+
+    def _merge_sorted(self, keys, counts, sums):
+        index = np.searchsorted(self.keys, keys)
+        found = index < len(self.keys)
+        found[found] = self.keys[index[found]] == keys[found]
+        self.counts[index[found]] += counts[found]
+        self.sums[index[found]] += sums[found]
+        fresh = ~found
+        self.keys = np.insert(self.keys, index[fresh], keys[fresh])
+        self.counts = np.insert(self.counts, index[fresh], counts[fresh], axis=0)
+        self.sums = np.insert(self.sums, index[fresh], sums[fresh], axis=0)
+
+    def merge(self, other):
+        """Fold another aggregator (e.g. from a different worker or shard) into this one"""
+        self.flush()
+        other.flush()
+        self._merge_sorted(other.keys, other.counts, other.sums)
+        self.games += other.games
+        return self
+
+    def lookup(self, keys):
+        """Row index of each canonical key, -1 where the position was never seen"""
+        self.flush()
+        keys = np.asarray(keys, dtype=np.uint64)
+        index = np.searchsorted(self.keys, keys)
+        index[index == len(self.keys)] = 0
+        hit = (self.keys[index] == keys) if len(self.keys) else np.zeros(len(keys), dtype=bool)
+        return np.where(hit, index, -1)
+
+    def get(self, position, mask):
+        """Statistics of one position, or None"""
+        keys = canonical_keys(np.array([position], dtype=np.uint64), np.array([mask], dtype=np.uint64))
+        row = int(self.lookup(keys)[0])
+        return None if row < 0 else self._entry(row)
+
+    def _entry(self, row):
+        count, wins, draws, losses = (int(x) for x in self.counts[row])
+        mean = self.sums[row, 0] / count
+        return {
+            'count': count,
+            'total': count,
+            'score': float(mean),
+            'std': float(np.sqrt(max(self.sums[row, 1] / count - mean ** 2, 0.0))),
+            'win_rate': wins / count,
+            'wins': wins,
+            'losses': losses,
+            'draws': draws
+        }
+
+    def to_book(self, min_games=10, max_depth=None):
+        """
+        {str(canonical key): statistics} for every position seen in at least
+        min_games games and reached through such positions, expanded level by
+        level from the empty board
+        Each entry also holds 'line', the first move order (in column order)
+        reaching the position. Positions are expanded once: their
+        transpositions and mirror image share the entry, so the book grows
+        with positions, not with move orders.
+        """
+        self.flush()
+        max_depth = min(max_depth or self.max_depth, self.max_depth)
+        book = {}
+        lines = np.zeros((1, 0), dtype=np.int8)
+        position = np.zeros(1, dtype=np.uint64)
+        mask = np.zeros(1, dtype=np.uint64)
+        bottoms = np.array(BOTTOM_MASKS, dtype=np.uint64)
+        tops = np.array(TOP_MASKS, dtype=np.uint64)
+
+        for _ in range(max_depth):
+            parents = np.repeat(np.arange(len(lines)), WIDTH)
+            cols = np.tile(np.arange(WIDTH), len(lines))
+            legal = (mask[parents] & tops[cols]) == 0
+            parents, cols = parents[legal], cols[legal]
+
+            child_mask = mask[parents] | (mask[parents] + bottoms[cols])
+            child_position = position[parents] ^ mask[parents]
+            rows = self.lookup(canonical_keys(child_position, child_mask))
+            popular = rows >= 0
+            popular[popular] = self.counts[rows[popular], COUNT] >= min_games
+            if not popular.any():
+                break
+            # First line to each position only (children come in line order)
+            _, first = np.unique(rows[popular], return_index=True)
+            keep = np.nonzero(popular)[0][np.sort(first)]
+
+            lines = np.concatenate([lines[parents[keep]], cols[keep][:, None].astype(np.int8)], axis=1)
+            position, mask = child_position[keep], child_mask[keep]
+            keys = self.keys[rows[keep]]
+            for line, row, k in zip(lines.tolist(), rows[keep].tolist(), keys.tolist()):
+                book[str(k)] = dict(self._entry(row), line=line)
+        return book
+
+    def save(self, path):
+        self.flush()
+        np.savez_compressed(path, keys=self.keys, counts=self.counts, sums=self.sums,
+                            games=np.int64(self.games), max_depth=np.int8(self.max_depth))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            stats = cls(int(data['max_depth']))
+            stats.keys, stats.counts, stats.sums = data['keys'], data['counts'], data['sums']
+            stats.games = int(data['games'])
+        return stats
+
@@ -1,134 +1,49 @@
 """
 Overnight Self-Play Runner
 Generates millions of games for opening book
+
+Runs are checkpointed (see run_checkpoint): games go to packed shards as
+they arrive and `--resume` continues an interrupted run where its last
+checkpoint stopped.
 """
 
 import time
 import json
-import pickle
+import os
+import queue
+import sys
 import multiprocessing as mp
 import numpy as np
 from datetime import datetime
-from collections import defaultdict
+
+from bitboard_core import encode_position, is_winning_move
+from bitboard_negamax import make_searcher
+from opening_stats import OpeningStats
+from run_checkpoint import RunCheckpoint, decode_np_state, encode_np_state, seeded_np_state
+
+_searcher = make_searcher()
 
 def minimax_player(board, mark, depth=5):
-    """Simple minimax player for self-play"""
-    
-    def check_win(board, player):
-        # Check horizontal
-        for row in range(6):
-            for col in range(4):
-                if all(board[row*7 + col + i] == player for i in range(4)):
-                    return True
-        
-        # Check vertical
-        for col in range(7):
-            for row in range(3):
-                if all(board[(row+i)*7 + col] == player for i in range(4)):
-                    return True
-        
-        # Check diagonals
-        for row in range(3):
-            for col in range(4):
-                if all(board[(row+i)*7 + col+i] == player for i in range(4)):
-                    return True
-                if all(board[(row+3-i)*7 + col+i] == player for i in range(4)):
-                    return True
-        
-        return False
-    
-    def evaluate(board, player):
-        if check_win(board, player):
-            return 10000
-        if check_win(board, 3 - player):
-            return -10000
-        
-        score = 0
-        # Center preference
-        for col in range(7):
-            weight = 4 - abs(col - 3)
-            for row in range(6):
-                if board[row * 7 + col] == player:
-                    score += weight * (6 - row)
-                elif board[row * 7 + col] == 3 - player:
-                    score -= weight * (6 - row)
-        
-        return score
-    
-    def minimax(board, depth, alpha, beta, maximizing, player):
-        valid = [c for c in range(7) if board[c] == 0]
-        
-        if not valid or depth == 0:
-            return evaluate(board, player), None
-        
-        # Order moves
-        valid.sort(key=lambda x: abs(x - 3))
-        
-        best_move = valid[0]
-        
-        if maximizing:
-            max_eval = -float('inf')
-            for col in valid:
-                new_board = board[:]
-                for row in range(5, -1, -1):
-                    if new_board[row * 7 + col] == 0:
-                        new_board[row * 7 + col] = player
-                        break
-                
-                if check_win(new_board, player):
-                    return 10000, col
-                
-                eval_score, _ = minimax(new_board, depth-1, alpha, beta, False, player)
-                
-                if eval_score > max_eval:
-                    max_eval = eval_score
-                    best_move = col
-                
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            
-            return max_eval, best_move
-        else:
-            min_eval = float('inf')
-            for col in valid:
-                new_board = board[:]
-                for row in range(5, -1, -1):
-                    if new_board[row * 7 + col] == 0:
-                        new_board[row * 7 + col] = 3 - player
-                        break
-                
-                if check_win(new_board, 3 - player):
-                    return -10000, col
-                
-                eval_score, _ = minimax(new_board, depth-1, alpha, beta, True, player)
-                
-                if eval_score < min_eval:
-                    min_eval = eval_score
-                    best_move = col
-                
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
-            
-            return min_eval, best_move
+    """Bitboard negamax player for self-play (one searcher per process)"""
+    valid = [c for c in range(7) if board[c] == 0]
     
     # Add randomness for diversity
     if np.random.random() < 0.1:  # 10% random moves
-        valid = [c for c in range(7) if board[c] == 0]
         if valid:
             weights = [4 - abs(c - 3) for c in valid]
             probs = np.array(weights) / sum(weights)
-            return np.random.choice(valid, p=probs)
+            return int(np.random.choice(valid, p=probs))
     
-    _, move = minimax(board, depth, -float('inf'), float('inf'), True, mark)
-    return move if move is not None else 3
+    position, mask = encode_position(board, mark)
+    move, _, _ = _searcher.search(position, mask, max_depth=depth)
+    return move
 
 def play_game(game_id, depth1=5, depth2=5):
     """Play a single game"""
     board = [0] * 42
     moves = []
     current = 1
+    _searcher.new_game()  # Games depend only on the RNG state, so resumes replay them exactly
     
     for turn in range(42):
         if current == 1:
@@ -139,20 +54,21 @@ def play_game(game_id, depth1=5, depth2=5):
         moves.append(move)
         
         # Make move
+        position, mask = encode_position(board, current)
+        won = is_winning_move(position, mask, move)
         for row in range(5, -1, -1):
             if board[row * 7 + move] == 0:
                 board[row * 7 + move] = current
-                
-                # Check win
-                if check_winner(board, row, move, current):
-                    return {
-                        'id': game_id,
-                        'moves': moves,
-                        'winner': current,
-                        'length': turn + 1
-                    }
                 break
         
+        if won:
+            return {
+                'id': game_id,
+                'moves': moves,
+                'winner': current,
+                'length': turn + 1
+            }
+        
         current = 3 - current
     
     return {
@@ -162,173 +78,114 @@ def play_game(game_id, depth1=5, depth2=5):
         'length': 42
     }
 
-def check_winner(board, row, col, player):
-    """Check if move at row,col wins for player"""
-    # Horizontal
-    count = 1
-    c = col - 1
-    while c >= 0 and board[row * 7 + c] == player:
-        count += 1
-        c -= 1
-    c = col + 1
-    while c < 7 and board[row * 7 + c] == player:
-        count += 1
-        c += 1
-    if count >= 4:
-        return True
-    
-    # Vertical
-    count = 1
-    r = row + 1
-    while r < 6 and board[r * 7 + col] == player:
-        count += 1
-        r += 1
-    if count >= 4:
-        return True
-    
-    # Diagonal \
-    count = 1
-    r, c = row - 1, col - 1
-    while r >= 0 and c >= 0 and board[r * 7 + c] == player:
-        count += 1
-        r -= 1
-        c -= 1
-    r, c = row + 1, col + 1
-    while r < 6 and c < 7 and board[r * 7 + c] == player:
-        count += 1
-        r += 1
-        c += 1
-    if count >= 4:
-        return True
-    
-    # Diagonal /
-    count = 1
-    r, c = row - 1, col + 1
-    while r >= 0 and c < 7 and board[r * 7 + c] == player:
-        count += 1
-        r -= 1
-        c += 1
-    r, c = row + 1, col - 1
-    while r < 6 and c >= 0 and board[r * 7 + c] == player:
-        count += 1
-        r += 1
-        c -= 1
-    if count >= 4:
-        return True
-    
-    return False
+DEPTHS = [(5, 5), (4, 6), (6, 4), (5, 6), (6, 5), (7, 7), (4, 4), (3, 5)]  # Vary depths for diversity
+PHASES = [100000, 500000, 1000000]
+RUN_DIR = 'overnight_run'
 
-def worker_process(worker_id, num_games, result_queue):
-    """Worker process for parallel game generation"""
-    games = []
-    
-    # Vary depths for diversity
-    depths = [(5, 5), (4, 6), (6, 4), (5, 6), (6, 5), (7, 7), (4, 4), (3, 5)]
-    
-    for i in range(num_games):
-        depth1, depth2 = depths[i % len(depths)]
-        game = play_game(worker_id * num_games + i, depth1, depth2)
-        games.append(game)
+def worker_process(worker_id, first_id, start, num_games, rng_state, batch_size, result_queue):
+    """Play games start..num_games-1 of this worker's share, sending them in batches"""
+    # Each batch carries the RNG state after it, so a resumed worker replays the same games
+    np.random.set_state(decode_np_state(rng_state))
+    batch = []
+    
+    for i in range(start, num_games):
+        depth1, depth2 = DEPTHS[i % len(DEPTHS)]
+        batch.append(play_game(first_id + i, depth1, depth2))
         
-        if (i + 1) % 100 == 0:
-            result_queue.put(('progress', worker_id, i + 1))
-    
-    result_queue.put(('games', worker_id, games))
+        if len(batch) == batch_size or i == num_games - 1:
+            result_queue.put(('batch', worker_id, batch, encode_np_state(np.random.get_state())))
+            batch = []
 
-def generate_games_parallel(total_games=100000, num_workers=8):
-    """Generate games in parallel"""
-    print(f"\nGenerating {total_games:,} games using {num_workers} workers...")
+def _start_worker(checkpoint, worker_id, shares, batch_size, result_queue):
+    manifest = checkpoint.manifest
+    phase = manifest['phase']
+    first_id = sum(manifest['phases'][:phase]) + sum(shares[:worker_id])
+    state = manifest['workers'][worker_id]
+    p = mp.Process(target=worker_process,
+                   args=(worker_id, first_id, state['done'], shares[worker_id],
+                         state['rng_state'], batch_size, result_queue))
+    p.start()
+    return p
+
+def generate_games_parallel(checkpoint, batch_size=200, checkpoint_seconds=300):
+    """
+    Play the current phase of a checkpointed run to completion
+    Batches go straight to shard files and the opening statistics; the
+    manifest is committed every checkpoint_seconds and at the end.
+    """
+    manifest = checkpoint.manifest
+    total_games = manifest['phases'][manifest['phase']]
+    num_workers = manifest['num_workers']
+    shares = [total_games // num_workers + (1 if i < total_games % num_workers else 0)
+              for i in range(num_workers)]
+    workers = manifest['workers']
+    done = sum(state['done'] for state in workers)
+    print(f"\nGenerating {total_games:,} games using {num_workers} workers "
+          f"({done:,} already done)...")
     
-    games_per_worker = total_games // num_workers
     result_queue = mp.Queue()
-    
-    # Start workers
-    processes = []
+    processes = {i: _start_worker(checkpoint, i, shares, batch_size, result_queue)
+                 for i in range(num_workers) if workers[i]['done'] < shares[i]}
     start_time = time.time()
-    
-    for i in range(num_workers):
-        p = mp.Process(target=worker_process, args=(i, games_per_worker, result_queue))
-        p.start()
-        processes.append(p)
-    
-    # Collect results
-    all_games = []
-    workers_done = 0
-    
-    while workers_done < num_workers:
-        msg_type, worker_id, data = result_queue.get()
+    last_save = start_time
+    played = 0
+    
+    while any(workers[i]['done'] < shares[i] for i in processes):
+        try:
+            _, worker_id, games, rng_state = result_queue.get(timeout=10)
+        except queue.Empty:
+            # Restart crashed workers from their last batch
+            for i, p in processes.items():
+                if not p.is_alive() and workers[i]['done'] < shares[i]:
+                    print(f"\nWorker {i} died - restarting at game {workers[i]['done']:,}")
+                    processes[i] = _start_worker(checkpoint, i, shares, batch_size, result_queue)
+            continue
         
-        if msg_type == 'progress':
-            print(f"Worker {worker_id}: {data}/{games_per_worker} games", end='\r')
-        elif msg_type == 'games':
-            all_games.extend(data)
-            workers_done += 1
-            print(f"\nWorker {worker_id} completed!")
+        state = workers[worker_id]
+        checkpoint.add_shard(f"phase{manifest['phase']}-worker{worker_id}-{state['done']:08d}.c4g",
+                             games, 'overnight_self_play')
+        add_opening_stats(checkpoint.stats, games)
+        state['done'] += len(games)
+        state['rng_state'] = rng_state
+        played += len(games)
+        
+        if time.time() - last_save > checkpoint_seconds:
+            checkpoint.save()
+            last_save = time.time()
+        elapsed = time.time() - start_time
+        print(f"{done + played:,}/{total_games:,} games ({played / elapsed:.1f} games/s)", end='\r')
     
-    # Wait for all processes
-    for p in processes:
+    for p in processes.values():
         p.join()
+    checkpoint.save()
     
     elapsed = time.time() - start_time
-    print(f"\nGenerated {len(all_games):,} games in {elapsed:.1f}s")
-    print(f"Speed: {len(all_games)/elapsed:.0f} games/second")
+    print(f"\nGenerated {played:,} games in {elapsed:.1f}s")
+    print(f"Speed: {played / max(elapsed, 1e-9):.1f} games/second")
     
-    return all_games
+    return played
+
+def add_opening_stats(stats, games):
+    """Fold a batch of games into the run's OpeningStats"""
+    stats.add_games(games)
 
-def build_opening_book(games, max_depth=12, min_games=10):
-    """Build opening book from games"""
+def build_opening_book(stats, min_games=10):
+    """Build opening book from accumulated opening statistics"""
     print("\nBuilding opening book...")
     
-    opening_book = defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0, 'total': 0})
-    
-    for game in games:
-        moves = game['moves'][:max_depth]
-        winner = game['winner']
-        
-        # Add all prefixes
-        for length in range(1, min(len(moves) + 1, max_depth + 1)):
-            position = tuple(moves[:length])
-            opening_book[position]['total'] += 1
-            
-            if winner == 1:
-                opening_book[position]['wins'] += 1
-            elif winner == 2:
-                opening_book[position]['losses'] += 1
-            else:
-                opening_book[position]['draws'] += 1
-    
-    # Filter by minimum games
-    filtered_book = {}
-    for position, stats in opening_book.items():
-        if stats['total'] >= min_games:
-            win_rate = stats['wins'] / stats['total']
-            score = (stats['wins'] - stats['losses']) / stats['total']
-            
-            filtered_book[str(position)] = {
-                'total': stats['total'],
-                'win_rate': win_rate,
-                'score': score,
-                'wins': stats['wins'],
-                'losses': stats['losses'],
-                'draws': stats['draws']
-            }
+    # Lines whose positions all reached min_games
+    book = stats.to_book(min_games)
     
-    print(f"Opening book: {len(filtered_book):,} positions")
+    print(f"Opening book: {len(book):,} positions "
+          f"({len(stats):,} distinct positions seen)")
     
-    return filtered_book
+    return book
 
-def save_data(games, opening_book):
-    """Save games and opening book"""
+def save_opening_book(opening_book, run_dir=RUN_DIR, phase=0):
+    """Save the opening book next to the run and as the latest book"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    # Save games
-    games_file = f'self_play_games_{timestamp}.pkl'
-    with open(games_file, 'wb') as f:
-        pickle.dump(games, f)
-    print(f"Saved games to {games_file}")
-    
-    # Save opening book
-    book_file = f'opening_book_{timestamp}.json'
+    book_file = os.path.join(run_dir, f'opening_book_phase{phase + 1}_{timestamp}.json')
     with open(book_file, 'w') as f:
         json.dump(opening_book, f, indent=2)
     print(f"Saved opening book to {book_file}")
@@ -338,35 +195,62 @@ def save_data(games, opening_book):
         json.dump(opening_book, f, indent=2)
     print("Saved as latest_opening_book.json")
 
+def new_run(checkpoint, phases=PHASES, num_workers=8, seed=None):
+    """Start a fresh checkpointed run"""
+    seed = int(time.time()) if seed is None else seed
+    checkpoint.start({
+        'phases': list(phases),
+        'phase': 0,
+        'num_workers': num_workers,
+        'seed': seed,
+        'workers': [{'done': 0, 'rng_state': seeded_np_state(seed, 0, i)} for i in range(num_workers)]
+    }, OpeningStats())
+
+def run(checkpoint, batch_size=200, checkpoint_seconds=300):
+    """Play every remaining phase; an opening book is written after each one"""
+    manifest = checkpoint.manifest
+    while manifest['phase'] < len(manifest['phases']):
+        phase = manifest['phase']
+        print(f"\n📊 Phase {phase + 1}/{len(manifest['phases'])}: "
+              f"{manifest['phases'][phase]:,} games")
+        generate_games_parallel(checkpoint, batch_size, checkpoint_seconds)
+        save_opening_book(build_opening_book(checkpoint.stats), checkpoint.run_dir, phase)
+        
+        manifest['phase'] += 1
+        manifest['workers'] = [{'done': 0, 'rng_state': seeded_np_state(manifest['seed'], phase + 1, i)}
+                               for i in range(manifest['num_workers'])]
+        checkpoint.save()
+
 def main():
-    """Main overnight runner"""
+    """overnight_self_play.py [--resume] [run_dir]"""
     print("="*70)
     print("OVERNIGHT SELF-PLAY RUNNER")
     print("="*70)
     print(f"Start: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
-    # Phase 1: Generate initial batch
-    print("\n📊 Phase 1: Initial batch (100k games)")
-    games = generate_games_parallel(total_games=100000, num_workers=8)
-    opening_book = build_opening_book(games)
-    save_data(games, opening_book)
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    checkpoint = RunCheckpoint(args[0] if args else RUN_DIR)
     
-    # Phase 2: Generate large batch
-    print("\n📊 Phase 2: Large batch (500k games)")
-    games = generate_games_parallel(total_games=500000, num_workers=8)
-    opening_book = build_opening_book(games)
-    save_data(games, opening_book)
+    if '--resume' in sys.argv:
+        if not checkpoint.exists():
+            print(f"No checkpoint in {checkpoint.run_dir} to resume")
+            return
+        manifest, _ = checkpoint.resume()
+        print(f"Resuming phase {manifest['phase'] + 1} with {manifest['games']:,} games "
+              f"in {len(manifest['shards']):,} shards")
+    elif checkpoint.exists():
+        print(f"{checkpoint.run_dir} already holds a run - pass --resume to continue it")
+        return
+    else:
+        new_run(checkpoint)
     
-    # Phase 3: Mega batch (if time permits)
-    print("\n📊 Phase 3: Mega batch (1M games)")
-    games = generate_games_parallel(total_games=1000000, num_workers=8)
-    opening_book = build_opening_book(games)
-    save_data(games, opening_book)
+    run(checkpoint)
     
     print("\n" + "="*70)
     print("OVERNIGHT GENERATION COMPLETE")
+    print(f"Games: {checkpoint.manifest['games']:,} in {checkpoint.shard_dir}/")
     print(f"End: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print("="*70)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,248 @@
+"""
+Local Referee
+In-process ConnectX games with kaggle_environments semantics
+
+- Agents are called as agent(observation, configuration); the
+  observation carries board, mark, step and remainingOverageTime, the
+  configuration the kaggle connectx defaults
+- Rules as in kaggle: an exception, a non-integer or full / off-board
+  column, or running out of overage time loses; the offending agent's
+  reward is None and its opponent's 0. Time over actTimeout is charged
+  to the overage budget after the move returns, as kaggle does when it
+  runs agents locally; an agent that raises AgentTimeout (a hosting
+  wrapper giving up on a hung move) loses on time
+- 'random' and 'negamax' name the built-in kaggle opponents
+- Agents with a new_game() attribute (agent files that define one) have
+  it called before every game to reset their per-game state
+- cross_check() replays games through kaggle_environments and reports
+  any difference in observations, moves or rewards
+"""
+
+import random
+import time
+
+import numpy as np
+
+from bitboard_core import WIDTH, HEIGHT, COLUMN_MASKS, can_play, is_winning_move, play, popcount
+
+CONFIGURATION = {
+    'rows': HEIGHT,
+    'columns': WIDTH,
+    'inarow': 4,
+    'actTimeout': 2,
+    'timeout': 2,
+    'agentTimeout': 60,
+    'episodeSteps': 1000
+}
+OVERAGE_TIME = 60
+
+
+class AgentTimeout(Exception):
+    """Raised in place of a move by agent wrappers that abandoned a hung agent"""
+
+
+class Struct(dict):
+    """dict with attribute access, like kaggle_environments observations"""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def random_agent(observation, configuration):
+    """kaggle's 'random': any non-full column"""
+    return random.choice([c for c in range(configuration.columns) if observation.board[c] == 0])
+
+
+def _drop_row(board, column):
+    return max(r for r in range(HEIGHT) if board[r * WIDTH + column] == 0)
+
+
+def _wins(board, column, mark):
+    """Dropping `mark` into `column` makes four"""
+    row = _drop_row(board, column)
+
+    def count(dr, dc):
+        n = 0
+        r, c = row + dr, column + dc
+        while 0 <= r < HEIGHT and 0 <= c < WIDTH and board[r * WIDTH + c] == mark:
+            n += 1
+            r, c = r + dr, c + dc
+        return n
+
+    return (count(1, 0) >= 3 or count(0, 1) + count(0, -1) >= 3 or
+            count(1, 1) + count(-1, -1) >= 3 or count(1, -1) + count(-1, 1) >= 3)
+
+
+def negamax_agent(observation, configuration, max_depth=4):
+    """
+    kaggle's 'negamax': depth-4 negamax that scores leaves by adjacent own
+    stones and breaks ties by coin flip
+    """
+    size = WIDTH * HEIGHT
+
+    def negamax(board, mark, depth):
+        moves = sum(1 for cell in board if cell)
+        if moves == size:
+            return 0, None
+        for column in range(WIDTH):
+            if board[column] == 0 and _wins(board, column, mark):
+                return (size + 1 - moves) / 2, column
+
+        best_score, best_column = -size, None
+        for column in range(WIDTH):
+            if board[column] != 0:
+                continue
+            row = _drop_row(board, column)
+            if depth <= 0:
+                score = (size + 1 - moves) / 2
+                score += column > 0 and board[row * WIDTH + column - 1] == mark
+                score += column < WIDTH - 1 and board[row * WIDTH + column + 1] == mark
+                score += row > 0 and board[(row - 1) * WIDTH + column] == mark
+                score += row < HEIGHT - 2 and board[(row + 1) * WIDTH + column] == mark
+            else:
+                child = board[:]
+                child[row * WIDTH + column] = mark
+                score = -negamax(child, 3 - mark, depth - 1)[0]
+            if score > best_score or (score == best_score and random.choice([True, False])):
+                best_score, best_column = score, column
+        return best_score, best_column
+
+    _, column = negamax(list(observation.board), observation.mark, max_depth)
+    if column is None:
+        column = random.choice([c for c in range(WIDTH) if observation.board[c] == 0])
+    return column
+
+
+BUILTIN_AGENTS = {'random': random_agent, 'negamax': negamax_agent}
+
+
+def resolve_agent(agent):
+    """Built-in agent for 'random' / 'negamax', otherwise the callable itself"""
+    return BUILTIN_AGENTS[agent] if isinstance(agent, str) else agent
+
+
+def load_agent(agent):
+    """
+    Callable for an agent file path (its `agent` function, with the file's
+    new_game() attached if it defines one), a built-in name, or the agent itself
+    """
+    if callable(agent) or agent in BUILTIN_AGENTS:
+        return resolve_agent(agent)
+    with open(agent) as f:
+        code = f.read()
+    namespace = {'__name__': 'agent_module', '__file__': agent}
+    exec(compile(code, agent, 'exec'), namespace)
+    function = namespace['agent']
+    if callable(namespace.get('new_game')):
+        function.new_game = namespace['new_game']
+    return function
+
+
+def play_game(agent1, agent2, opening=(), configuration=None, enforce_timeouts=True):
+    """
+    Play agent1 (mark 1) against agent2 after the opening moves
+    Returns a dict with winner (0 draw, 1, 2), moves, reason ('four',
+    'draw', 'illegal', 'error' or 'timeout'), kaggle-style rewards and the
+    agents' move times.
+    """
+    configuration = Struct(CONFIGURATION, **(configuration or {}))
+    agents = (resolve_agent(agent1), resolve_agent(agent2))
+    for agent in dict.fromkeys(agents):
+        if callable(getattr(agent, 'new_game', None)):
+            agent.new_game()
+    board = [0] * (WIDTH * HEIGHT)
+    position, mask = 0, 0
+    moves = []
+    overage = [float(OVERAGE_TIME)] * 2
+    times = ([], [])
+
+    def result(winner, reason, loser=None):
+        if loser is not None:
+            # kaggle leaves the opponent of a failed agent at 0
+            rewards = [0, 0]
+            rewards[loser - 1] = None
+        else:
+            rewards = [0, 0] if not winner else [1, -1] if winner == 1 else [-1, 1]
+        return {'winner': winner, 'moves': moves, 'reason': reason, 'rewards': rewards,
+                'times': [list(t) for t in times]}
+
+    for turn in range(WIDTH * HEIGHT):
+        mark = turn % 2 + 1
+        if turn < len(opening):
+            move = opening[turn]
+        else:
+            observation = Struct(board=board[:], mark=mark, step=turn,
+                                 remainingOverageTime=overage[mark - 1])
+            start = time.perf_counter()
+            try:
+                move = agents[mark - 1](observation, configuration)
+            except AgentTimeout:
+                times[mark - 1].append(time.perf_counter() - start)
+                return result(3 - mark, 'timeout', mark)
+            except Exception:
+                return result(3 - mark, 'error', mark)
+            elapsed = time.perf_counter() - start
+            times[mark - 1].append(elapsed)
+            overage[mark - 1] -= max(0.0, elapsed - configuration.actTimeout)
+            if enforce_timeouts and overage[mark - 1] < 0:
+                return result(3 - mark, 'timeout', mark)
+            if not isinstance(move, (int, np.integer)) or not 0 <= move < WIDTH or not can_play(mask, move):
+                return result(3 - mark, 'illegal', mark)
+            move = int(move)
+
+        moves.append(move)
+        won = is_winning_move(position, mask, move)
+        position, mask = play(position, mask, move)
+        board[(HEIGHT - popcount(mask & COLUMN_MASKS[move])) * WIDTH + move] = mark
+        if won:
+            return result(mark, 'four')
+    return result(0, 'draw')
+
+
+def board_after(moves):
+    """kaggle board (row 0 on top) after a move sequence"""
+    board = [0] * (WIDTH * HEIGHT)
+    for ply, col in enumerate(moves):
+        board[_drop_row(board, col) * WIDTH + col] = ply % 2 + 1
+    return board
+
+
+def cross_check(games, sample=None, seed=0):
+    """
+    Replay games from play_game (or a random sample of them) through
+    kaggle_environments with scripted agents; returns (game index, problem)
+    for every mismatch in the observations, the moves played or the rewards
+    """
+    from kaggle_environments import make
+
+    indices = range(len(games))
+    if sample is not None and sample < len(games):
+        indices = sorted(random.Random(seed).sample(indices, sample))
+    problems = []
+    for index in indices:
+        game = games[index]
+        moves = game['moves']
+        seen = []
+
+        def scripted(observation, configuration):
+            step = len(seen)
+            seen.append((list(observation.board), observation.mark, observation.step))
+            if step < len(moves):
+                return moves[step]
+            return -1  # The local game ended with a failed move here
+
+        env = make('connectx', debug=False)
+        steps = env.run([scripted, scripted])
+        expected = [(board_after(moves[:ply]), ply % 2 + 1, ply) for ply in range(len(seen))]
+        if seen != expected:
+            problems.append((index, 'observations differ'))
+        played = [steps[i + 1][i % 2].action for i in range(len(moves))]
+        if played != moves:
+            problems.append((index, f'moves differ: {played}'))
+        rewards = [agent.reward for agent in steps[-1]]
+        if rewards != game['rewards']:
+            problems.append((index, f'rewards {rewards} != {game["rewards"]}'))
+    return problems
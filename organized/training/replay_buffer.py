@@ -0,0 +1,171 @@
+"""
+Ring Replay Buffer
+Fixed-size training memory for continuous self-play
+
+Every field is a preallocated NumPy array (optionally a memory-mapped .npy
+file, so the buffer survives restarts):
+- positions, masks: bitboards of the side to move (uint64 pair per position)
+- values: game result for the side to move
+- policies: 7-float search distribution (or the move played)
+- game_ids, generations: where and under which network the position arose
+
+Appends are O(1) and overwrite the oldest entry once full. Sampling is
+uniform or recency weighted (exponential in age with a given half-life),
+both O(batch).
+"""
+
+import json
+import os
+
+import numpy as np
+
+from bitboard_core import play
+
+
+def planes_from_bitboards(positions, masks):
+    """
+    ConnectXNetwork input planes (N, 6, 7, 3) from side-to-move bitboards
+    Channels: own stones, opponent stones, playable top-row cells.
+    """
+    positions = np.asarray(positions, dtype=np.uint64)
+    masks = np.asarray(masks, dtype=np.uint64)
+    shifts = np.arange(49, dtype=np.uint64)
+    own = ((positions[:, None] >> shifts) & np.uint64(1)).astype(np.int8).reshape(-1, 7, 7)
+    occupied = ((masks[:, None] >> shifts) & np.uint64(1)).astype(np.int8).reshape(-1, 7, 7)
+
+    # [col, row-from-bottom] -> [row-from-top, col]
+    own = own[:, :, :6].transpose(0, 2, 1)[:, ::-1]
+    occupied = occupied[:, :, :6].transpose(0, 2, 1)[:, ::-1]
+
+    planes = np.zeros((len(positions), 6, 7, 3), dtype=np.int8)
+    planes[..., 0] = own
+    planes[..., 1] = occupied - own
+    planes[:, 0, :, 2] = occupied[:, 0, :] == 0
+    return planes
+
+
+class ReplayBuffer:
+    """Ring buffer of encoded positions; pass `path` to keep it on disk"""
+
+    FIELDS = [
+        ('positions', np.uint64, ()),
+        ('masks', np.uint64, ()),
+        ('values', np.float32, ()),
+        ('policies', np.float32, (7,)),
+        ('game_ids', np.int64, ()),
+        ('generations', np.int32, ()),
+    ]
+
+    def __init__(self, capacity, path=None):
+        self.capacity = capacity
+        self.path = path
+        self.next = 0
+        self.size = 0
+
+        if path is None:
+            for field, dtype, shape in self.FIELDS:
+                setattr(self, field, np.zeros((capacity,) + shape, dtype=dtype))
+            return
+
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        exists = os.path.exists(meta_path)
+        if exists:
+            with open(meta_path, 'r') as f:
+                meta = json.load(f)
+            if meta['capacity'] != capacity:
+                raise ValueError(f"Buffer at {path} has capacity {meta['capacity']}, not {capacity}")
+            self.next = meta['next']
+            self.size = meta['size']
+
+        for field, dtype, shape in self.FIELDS:
+            filename = os.path.join(path, f'{field}.npy')
+            if exists:
+                array = np.load(filename, mmap_mode='r+')
+            else:
+                array = np.lib.format.open_memmap(filename, mode='w+', dtype=dtype,
+                                                  shape=(capacity,) + shape)
+            setattr(self, field, array)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, position, mask, value, policy, game_id=0, generation=0):
+        """Store one position, overwriting the oldest when full"""
+        i = self.next
+        self.positions[i] = position
+        self.masks[i] = mask
+        self.values[i] = value
+        self.policies[i] = policy
+        self.game_ids[i] = game_id
+        self.generations[i] = generation
+        self.next = (i + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def add_game(self, game, game_id=0, generation=0):
+        """
+        Append every position of a game record ({'moves', 'winner'} and
+        optionally 'policies'); returns the number of positions added
+        """
+        winner = game['winner']
+        policies = game.get('policies')
+        position, mask = 0, 0
+        for turn, col in enumerate(game['moves']):
+            mover = 1 if turn % 2 == 0 else 2
+            value = 0.0 if winner == 0 else (1.0 if winner == mover else -1.0)
+            if policies is not None:
+                policy = policies[turn]
+            else:
+                policy = np.zeros(7, dtype=np.float32)
+                policy[col] = 1.0
+            self.append(position, mask, value, policy, game_id, generation)
+            position, mask = play(position, mask, col)
+        return len(game['moves'])
+
+    def _index_of_age(self, ages):
+        """Slot holding the entry appended `ages` steps ago (0 = newest)"""
+        return (self.next - 1 - ages) % self.capacity
+
+    def sample_indices(self, batch_size, rng, half_life=None):
+        """
+        Uniform slots, or recency weighted: P(age) proportional to
+        0.5 ** (age / half_life), drawn by inverting the truncated exponential
+        """
+        if self.size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer")
+        if half_life is None:
+            ages = rng.randint(0, self.size, size=batch_size)
+        else:
+            rate = np.log(2) / half_life
+            u = rng.random_sample(batch_size)
+            ages = -np.log1p(-u * -np.expm1(-rate * self.size)) / rate
+            ages = np.minimum(ages.astype(np.int64), self.size - 1)
+        return self._index_of_age(ages)
+
+    def sample(self, batch_size, rng, half_life=None):
+        """Training batch: planes float32 (B, 6, 7, 3), values (B,), policies (B, 7)"""
+        index = self.sample_indices(batch_size, rng, half_life)
+        planes = planes_from_bitboards(self.positions[index], self.masks[index])
+        return planes.astype(np.float32), self.values[index], self.policies[index]
+
+    def flush(self):
+        """Write memory-mapped arrays and the ring state to disk"""
+        if self.path is None:
+            return
+        for field, _, _ in self.FIELDS:
+            getattr(self, field).flush()
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump({'capacity': self.capacity, 'next': self.next, 'size': self.size}, f)
+
+    def get_stats(self):
+        live = self._index_of_age(np.arange(self.size))
+        generations = self.generations[live]
+        return {
+            'size': self.size,
+            'capacity': self.capacity,
+            'bytes': sum(getattr(self, field).nbytes for field, _, _ in self.FIELDS),
+            'games': int(len(np.unique(self.game_ids[live]))) if self.size else 0,
+            'oldest_generation': int(generations.min()) if self.size else 0,
+            'newest_generation': int(generations.max()) if self.size else 0
+        }
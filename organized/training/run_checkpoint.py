@@ -0,0 +1,121 @@
+"""
+Run Checkpoints
+Crash-safe state for long self-play runs
+
+A run directory holds:
+- shards/*.c4g: finished games as packed game records, one file per batch
+- stats-<n>.pkl: aggregated opening statistics as of checkpoint n
+- manifest.json: run settings, per-worker progress and RNG states, the
+  shards and the statistics file that belong to the checkpoint
+
+Every file is written under a temporary name and renamed into place, and
+the manifest is replaced last, so a run killed at any point resumes from
+a consistent checkpoint. Shards written after the last manifest are
+orphans: they are deleted on resume and their games are replayed from
+the saved RNG states.
+"""
+
+import json
+import os
+import pickle
+import random
+import time
+
+import numpy as np
+
+from game_records import write_games
+
+
+def encode_np_state(state):
+    """np.random.get_state() as JSON-friendly data"""
+    name, keys, pos, has_gauss, cached = state
+    return [name, keys.tolist(), int(pos), int(has_gauss), float(cached)]
+
+
+def decode_np_state(data):
+    name, keys, pos, has_gauss, cached = data
+    return name, np.array(keys, dtype=np.uint32), pos, has_gauss, cached
+
+
+def encode_py_state(state):
+    """random.getstate() as JSON-friendly data"""
+    version, internal, gauss = state
+    return [version, list(internal), gauss]
+
+
+def decode_py_state(data):
+    version, internal, gauss = data
+    return version, tuple(internal), gauss
+
+
+class RunCheckpoint:
+    """Manifest, shards and statistics of one run directory"""
+
+    def __init__(self, run_dir):
+        self.run_dir = run_dir
+        self.shard_dir = os.path.join(run_dir, 'shards')
+        self.manifest_path = os.path.join(run_dir, 'manifest.json')
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self.manifest = None
+        self.stats = None
+
+    def exists(self):
+        return os.path.exists(self.manifest_path)
+
+    def start(self, manifest, stats):
+        """Begin a fresh run (settings and worker state in `manifest`)"""
+        manifest.setdefault('shards', [])
+        manifest.setdefault('games', 0)
+        manifest.setdefault('checkpoint', 0)
+        manifest['started'] = time.strftime('%Y-%m-%d %H:%M:%S')
+        self.manifest, self.stats = manifest, stats
+        self.save()
+
+    def resume(self):
+        """Load the last checkpoint and drop shards written after it"""
+        with open(self.manifest_path) as f:
+            self.manifest = json.load(f)
+        with open(os.path.join(self.run_dir, self.manifest['stats']), 'rb') as f:
+            self.stats = pickle.load(f)
+        listed = set(self.manifest['shards'])
+        for name in os.listdir(self.shard_dir):
+            if name not in listed:
+                os.remove(os.path.join(self.shard_dir, name))
+        return self.manifest, self.stats
+
+    def add_shard(self, name, games, generator):
+        """Write a batch of games; it joins the run at the next save()"""
+        path = os.path.join(self.shard_dir, name)
+        write_games(games, path + '.tmp', generator=generator)
+        os.replace(path + '.tmp', path)
+        self.manifest['shards'].append(name)
+        self.manifest['games'] += len(games)
+
+    def save(self):
+        """Commit the current manifest and statistics as the next checkpoint"""
+        previous = self.manifest.get('stats')
+        self.manifest['checkpoint'] += 1
+        self.manifest['stats'] = f"stats-{self.manifest['checkpoint']}.pkl"
+        self.manifest['updated'] = time.strftime('%Y-%m-%d %H:%M:%S')
+
+        self._write(self.manifest['stats'], pickle.dumps(self.stats, protocol=pickle.HIGHEST_PROTOCOL))
+        self._write('manifest.json', json.dumps(self.manifest).encode())
+        if previous and previous != self.manifest['stats']:
+            os.remove(os.path.join(self.run_dir, previous))
+
+    def shard_paths(self):
+        return [os.path.join(self.shard_dir, name) for name in self.manifest['shards']]
+
+    def _write(self, name, data):
+        path = os.path.join(self.run_dir, name)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+
+def seeded_np_state(*parts):
+    """Independent NumPy RNG state for a (seed, phase, worker...) tuple"""
+    return encode_np_state(np.random.RandomState(
+        random.Random('-'.join(map(str, parts))).getrandbits(32)).get_state())
@@ -0,0 +1,315 @@
+"""
+Search Distillation
+Teach a fast evaluator what a deep search thinks of a position
+
+1. Sample positions from self-play games (unique up to mirroring)
+2. Label them in a process pool: exact solver score when few empty cells
+   remain, otherwise a fixed-depth AdvancedSearch score
+3. Store labels compactly (.npz of two uint64 bitboards, int16 score,
+   float32 target and uint8 exact flag: 23 bytes a label before compression)
+4. Fit the NNUE evaluator to the labels and report the fit error
+5. Play the distilled evaluator at depth d against the hand-made cell
+   table searched deeper, to see how much depth the labels bought
+
+Labels are seen from the side to move and squashed into [-1, 1]: proven
+results are +/-1, heuristic scores go through tanh(score / LABEL_SCALE).
+"""
+
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import numpy as np
+
+from advanced_search import AdvancedSearch
+from bitboard_core import (
+    WIDTH, HEIGHT, H1, CENTER_ORDER, can_play, play, popcount,
+    winning_moves, is_winning_move, columns_of, possible, canonical_key
+)
+from bitboard_engine_v2 import BitboardEngine
+from bitboard_solver import Solver
+from nnue_eval import NNUEEvaluator, NNUESearch, self_play_games
+from selfplay_dataset import iter_games
+
+LABEL_SCALE = 300.0   # AdvancedSearch score units per tanh unit
+WIN_THRESHOLD = 9000  # AdvancedSearch mate scores start here
+
+
+def _windows():
+    """Bitmask of every four-in-a-row window"""
+    windows = []
+    for col in range(WIDTH):
+        for row in range(HEIGHT):
+            for dc, dr in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                cells = [(col + i * dc, row + i * dr) for i in range(4)]
+                if all(0 <= c < WIDTH and 0 <= r < HEIGHT for c, r in cells):
+                    windows.append(sum(1 << (c * H1 + r) for c, r in cells))
+    return windows
+
+
+class CoreEngine(BitboardEngine):
+    """
+    BitboardEngine with bitboard_core move generation and win detection
+    BitboardEngine's TOP_MASK assumes 6-bit columns, play_move hands the new
+    stone to the side to move and is_winning_move tests the opponent's
+    stones, so AdvancedSearch goes through this subclass.
+    The evaluation keeps its weights but counts windows in all four directions.
+    """
+
+    WINDOWS = _windows()
+
+    def can_play(self, col, mask):
+        return can_play(mask, col)
+
+    def play_move(self, col, position, mask):
+        return play(position, mask, col)
+
+    def is_winning_move(self, col, position, mask):
+        return is_winning_move(position, mask, col)
+
+    def get_winning_moves(self, position, mask):
+        return columns_of(winning_moves(position, mask))
+
+    def count_winning_moves(self, position, mask):
+        return popcount(winning_moves(position, mask))
+
+    def move_order(self, mask):
+        return [col for col in CENTER_ORDER if can_play(mask, col)]
+
+    def _count_potential_wins(self, position, opponent, mask):
+        w = self.eval_weights
+        own = (0, w['one'], w['two'], w['three'], 0)
+        other = (0, 0, w['opp_two'], w['opp_three'], 0)
+        score = 0
+        for window in self.WINDOWS:
+            mine = popcount(position & window)
+            theirs = popcount(opponent & window)
+            if theirs == 0:
+                score += own[mine]
+            elif mine == 0:
+                score -= other[theirs]
+        return score
+
+
+def sample_positions(games, per_game=4, min_ply=4, seed=0):
+    """
+    Up to `per_game` random positions from each game's move sequence,
+    deduplicated by canonical key; returns (positions, masks) uint64 arrays
+    """
+    rng = np.random.RandomState(seed)
+    seen = set()
+    positions, masks = [], []
+    for game in games:
+        moves = game['moves']
+        if len(moves) <= min_ply:
+            continue
+        plies = rng.choice(np.arange(min_ply, len(moves)),
+                           size=min(per_game, len(moves) - min_ply), replace=False)
+        wanted = set(int(p) for p in plies)
+        position, mask = 0, 0
+        for ply, col in enumerate(moves):
+            if ply in wanted:
+                k = canonical_key(position, mask)[0]
+                if k not in seen:
+                    seen.add(k)
+                    positions.append(position)
+                    masks.append(mask)
+            position, mask = play(position, mask, col)
+    return np.array(positions, dtype=np.uint64), np.array(masks, dtype=np.uint64)
+
+
+# Per-process labelling state (set by _init_labeller in each pool worker)
+_labeller = {}
+
+
+def _init_labeller(depth, exact_empties):
+    _labeller['search'] = AdvancedSearch(CoreEngine())
+    _labeller['search'].time_limit = float('inf')
+    _labeller['solver'] = Solver()
+    _labeller['depth'] = depth
+    _labeller['exact_empties'] = exact_empties
+
+
+def _label(item):
+    """(score, target, exact) for one (position, mask) from the side to move"""
+    position, mask = item
+    empties = WIDTH * HEIGHT - popcount(mask)
+
+    if empties <= _labeller['exact_empties']:
+        score = _labeller['solver'].solve(position, mask)
+        return score, float(np.sign(score)), 1
+
+    # Fresh tables per position so a label does not depend on its neighbours
+    search = _labeller['search']
+    search.tt.table.clear()
+    search.killer_moves.clear()
+    search.history.clear()
+    _, score = search.search(position, mask, _labeller['depth'], time.time())
+    if abs(score) >= WIN_THRESHOLD:
+        target = float(np.sign(score))
+    else:
+        target = float(np.tanh(score / LABEL_SCALE))
+    return int(score), target, 0
+
+
+def label_positions(positions, masks, workers=None, depth=8, exact_empties=14, chunksize=16):
+    """
+    Label positions on a process pool; returns the label dict and labels/sec
+    exact_empties must exceed depth so searches never reach a full board.
+    """
+    if exact_empties <= depth:
+        raise ValueError("exact_empties must be larger than the search depth")
+    workers = workers or max(1, mp.cpu_count() - 1)
+    items = [(int(p), int(m)) for p, m in zip(positions, masks)]
+
+    start = time.time()
+    if workers == 1:
+        _init_labeller(depth, exact_empties)
+        results = [_label(item) for item in items]
+    else:
+        with mp.Pool(workers, initializer=_init_labeller,
+                     initargs=(depth, exact_empties)) as pool:
+            results = list(pool.imap(_label, items, chunksize=chunksize))
+    elapsed = time.time() - start
+
+    labels = {
+        'positions': np.asarray(positions, dtype=np.uint64),
+        'masks': np.asarray(masks, dtype=np.uint64),
+        'scores': np.array([r[0] for r in results], dtype=np.int16),
+        'targets': np.array([r[1] for r in results], dtype=np.float32),
+        'exact': np.array([r[2] for r in results], dtype=np.uint8),
+        'depth': np.int8(depth)
+    }
+    return labels, len(items) / max(elapsed, 1e-9)
+
+
+def save_labels(labels, path):
+    np.savez_compressed(path, **labels)
+
+
+def load_labels(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def predict(evaluator, positions, masks):
+    """Evaluator's expected outcome in [-1, 1] for the side to move"""
+    logits, _ = evaluator._forward(*evaluator.features(positions, masks))
+    return np.tanh(logits / 2)
+
+
+def fit_evaluator(labels, hidden=32, hidden2=16, epochs=30, holdout=0.1, seed=0, verbose=True):
+    """Train NNUEEvaluator on the labels; returns (evaluator, fit report)"""
+    rng = np.random.RandomState(seed)
+    order = rng.permutation(len(labels['targets']))
+    split = int(len(order) * (1 - holdout))
+    train, val = order[:split], order[split:]
+
+    evaluator = NNUEEvaluator(hidden, hidden2, seed=seed)
+    evaluator.train(labels['positions'][train], labels['masks'][train], labels['targets'][train],
+                    epochs=epochs, seed=seed, verbose=verbose)
+
+    report = {}
+    for name, index in (('train', train), ('val', val)):
+        if len(index) == 0:
+            continue
+        targets = labels['targets'][index]
+        predicted = predict(evaluator, labels['positions'][index], labels['masks'][index])
+        report[f'{name}_mae'] = float(np.mean(np.abs(predicted - targets)))
+        decided = np.abs(targets) > 0.2
+        report[f'{name}_sign_agreement'] = float(
+            np.mean(np.sign(predicted[decided]) == np.sign(targets[decided]))) if decided.any() else 1.0
+    return evaluator, report
+
+
+def compare_strength(distilled, depth=4, deep_depth=6, games=10, seed=0):
+    """
+    Distilled evaluator at `depth` against the cell table at `deep_depth`
+    Alternating colors, two random opening plies; returns score and ms/move.
+    """
+    rng = np.random.RandomState(seed)
+    players = {'distilled': (NNUESearch(distilled), depth),
+               'deep': (NNUESearch(NNUEEvaluator.from_cell_values()), deep_depth)}
+    score = 0.0
+    think = {'distilled': [0.0, 0], 'deep': [0.0, 0]}
+
+    for game in range(games):
+        order = ['distilled', 'deep'] if game % 2 == 0 else ['deep', 'distilled']
+        position, mask = 0, 0
+        winner = None
+        ply = 0
+        while possible(mask):
+            name = order[ply % 2]
+            if ply < 2:
+                col = int(rng.choice(columns_of(possible(mask))))
+            else:
+                search, search_depth = players[name]
+                start = time.time()
+                col, _, _ = search.search(position, mask, max_depth=search_depth, time_limit=60)
+                think[name][0] += time.time() - start
+                think[name][1] += 1
+            won = is_winning_move(position, mask, col)
+            position, mask = play(position, mask, col)
+            if won:
+                winner = name
+                break
+            ply += 1
+        score += 0.5 if winner is None else float(winner == 'distilled')
+        for search, _ in players.values():
+            search.tt.clear()
+
+    return {
+        'games': games,
+        'depth': depth,
+        'deep_depth': deep_depth,
+        'distilled_score': score / games,
+        'distilled_ms_per_move': 1000 * think['distilled'][0] / max(think['distilled'][1], 1),
+        'deep_ms_per_move': 1000 * think['deep'][0] / max(think['deep'][1], 1)
+    }
+
+
+def main():
+    games_path = sys.argv[1] if len(sys.argv) > 1 else 'self_play_games.pkl'
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+    print("=" * 60)
+    print("SEARCH DISTILLATION")
+    print("=" * 60)
+
+    if os.path.exists(games_path):
+        games = list(iter_games(games_path))
+        print(f"Loaded {len(games):,} games from {games_path}")
+    else:
+        print(f"{games_path} not found - generating games with the cell-table evaluator")
+        games = self_play_games(NNUEEvaluator.from_cell_values(), max(count // 4, 50), depth=3)
+
+    positions, masks = sample_positions(games)
+    positions, masks = positions[:count], masks[:count]
+    print(f"Sampled {len(positions):,} unique positions")
+
+    labels, rate = label_positions(positions, masks)
+    save_labels(labels, 'search_labels.npz')
+    print(f"Labelled at {rate:,.1f} positions/sec "
+          f"({labels['exact'].mean():.0%} solved exactly) -> search_labels.npz "
+          f"({os.path.getsize('search_labels.npz') / len(positions):.1f} bytes/label)")
+
+    evaluator, fit = fit_evaluator(labels)
+    evaluator.save('nnue_distilled.bin')
+    print(f"Fit: train MAE {fit['train_mae']:.3f}, val MAE {fit['val_mae']:.3f}, "
+          f"val sign agreement {fit['val_sign_agreement']:.1%}")
+
+    strength = compare_strength(evaluator)
+    print(f"Distilled depth {strength['depth']} vs cell table depth {strength['deep_depth']}: "
+          f"{strength['distilled_score']:.2f} "
+          f"({strength['distilled_ms_per_move']:.0f} vs {strength['deep_ms_per_move']:.0f} ms/move)")
+
+    report = {'labels': len(positions), 'labels_per_sec': rate,
+              'exact_fraction': float(labels['exact'].mean()), **fit, **strength}
+    with open('search_distillation_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
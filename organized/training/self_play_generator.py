@@ -3,26 +3,42 @@ Self-Play Game Generator for Connect X
 Generates millions of games for opening book and training data
 """
 
+import glob
 import multiprocessing as mp
 import numpy as np
 import pickle
+import random
 import time
 import os
-from collections import defaultdict
+from collections import defaultdict, deque
 from datetime import datetime
 import json
+from multiprocessing.connection import wait
+
+from bitboard_core import encode_position, is_winning_move, play, valid_columns
+from bitboard_negamax import make_searcher
+from game_records import write_games
+from opening_stats import OpeningStats
+from selfplay_dataset import iter_games, write_shard
 
 class SelfPlayEngine:
     """
     High-performance self-play engine for data generation
-    - Parallel game generation
+    - Parallel game generation streamed to per-worker shard files
+    - Bitboard negamax players (TT, iterative deepening, node/depth budget,
+      root noise), numba-compiled when numba is installed
     - Progressive opening book building
     - Position evaluation and scoring
     """
     
-    def __init__(self, search_depth=9, num_workers=None):
+    def __init__(self, search_depth=9, num_workers=None, node_budget=None, root_noise=10.0, seed=None):
         self.search_depth = search_depth
         self.num_workers = num_workers or mp.cpu_count()
+        self.node_budget = node_budget  # negamax nodes per move (None = depth only)
+        self.root_noise = root_noise    # std of the per-move root bonus, in eval units
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.searcher = None            # created lazily so workers build their own
         
         # Statistics
         self.games_played = 0
@@ -36,185 +52,50 @@ class SelfPlayEngine:
         print(f"Self-Play Engine initialized with {self.num_workers} workers")
     
     def minimax_agent(self, board, mark, depth=None):
-        """Simple but strong minimax agent for self-play"""
-        if depth is None:
-            depth = self.search_depth
-        
-        def check_win(board, mark):
-            # Check horizontal
-            for row in range(6):
-                for col in range(4):
-                    if all(board[row*7 + col + i] == mark for i in range(4)):
-                        return True
-            
-            # Check vertical
-            for col in range(7):
-                for row in range(3):
-                    if all(board[(row+i)*7 + col] == mark for i in range(4)):
-                        return True
-            
-            # Check diagonal \
-            for row in range(3):
-                for col in range(4):
-                    if all(board[(row+i)*7 + col+i] == mark for i in range(4)):
-                        return True
-            
-            # Check diagonal /
-            for row in range(3):
-                for col in range(4):
-                    if all(board[(row+3-i)*7 + col+i] == mark for i in range(4)):
-                        return True
-            
-            return False
-        
-        def evaluate(board, mark):
-            """Fast evaluation function"""
-            if check_win(board, mark):
-                return 10000
-            if check_win(board, 3 - mark):
-                return -10000
-            
-            score = 0
-            
-            # Center column preference
-            for row in range(6):
-                if board[row * 7 + 3] == mark:
-                    score += 3
-                elif board[row * 7 + 3] == 3 - mark:
-                    score -= 3
-            
-            # Pattern evaluation
-            for row in range(6):
-                for col in range(4):
-                    window = [board[row*7 + col + i] for i in range(4)]
-                    score += self.evaluate_window(window, mark)
-            
-            for col in range(7):
-                for row in range(3):
-                    window = [board[(row+i)*7 + col] for i in range(4)]
-                    score += self.evaluate_window(window, mark)
-            
-            return score
-        
-        def minimax(board, depth, alpha, beta, maximizing, mark):
-            # Get valid moves
-            valid_moves = [c for c in range(7) if board[c] == 0]
-            
-            if not valid_moves or depth == 0:
-                return evaluate(board, mark), None
-            
-            # Order moves (center first)
-            valid_moves.sort(key=lambda x: abs(x - 3))
-            
-            best_move = valid_moves[0]
-            
-            if maximizing:
-                max_eval = -float('inf')
-                for col in valid_moves:
-                    # Make move
-                    new_board = board[:]
-                    for row in range(5, -1, -1):
-                        if new_board[row * 7 + col] == 0:
-                            new_board[row * 7 + col] = mark
-                            break
-                    
-                    # Check for immediate win
-                    if check_win(new_board, mark):
-                        return 10000, col
-                    
-                    eval_score, _ = minimax(new_board, depth-1, alpha, beta, False, mark)
-                    
-                    if eval_score > max_eval:
-                        max_eval = eval_score
-                        best_move = col
-                    
-                    alpha = max(alpha, eval_score)
-                    if beta <= alpha:
-                        break
-                
-                return max_eval, best_move
-            else:
-                min_eval = float('inf')
-                for col in valid_moves:
-                    # Make move
-                    new_board = board[:]
-                    for row in range(5, -1, -1):
-                        if new_board[row * 7 + col] == 0:
-                            new_board[row * 7 + col] = 3 - mark
-                            break
-                    
-                    # Check for immediate loss
-                    if check_win(new_board, 3 - mark):
-                        return -10000, col
-                    
-                    eval_score, _ = minimax(new_board, depth-1, alpha, beta, True, mark)
-                    
-                    if eval_score < min_eval:
-                        min_eval = eval_score
-                        best_move = col
-                    
-                    beta = min(beta, eval_score)
-                    if beta <= alpha:
-                        break
-                
-                return min_eval, best_move
-        
-        _, move = minimax(board, depth, -float('inf'), float('inf'), True, mark)
-        return move if move is not None else 3
+        """Bitboard negamax move for a Kaggle board (depth or node budget)"""
+        position, mask = encode_position(board, mark)
+        return self.search_move(position, mask, depth)
     
-    def evaluate_window(self, window, mark):
-        """Evaluate a 4-piece window"""
-        my_count = window.count(mark)
-        opp_count = window.count(3 - mark)
-        empty = window.count(0)
-        
-        if my_count == 3 and empty == 1:
-            return 50
-        elif my_count == 2 and empty == 2:
-            return 10
-        elif my_count == 1 and empty == 3:
-            return 1
-        elif opp_count == 3 and empty == 1:
-            return -50
-        elif opp_count == 2 and empty == 2:
-            return -10
-        
-        return 0
+    def search_move(self, position, mask, depth=None):
+        """Budgeted negamax with root noise; one searcher (and TT) per process"""
+        if self.searcher is None:
+            self.searcher = make_searcher()
+        move, _, _ = self.searcher.search(
+            position, mask,
+            max_depth=depth or self.search_depth,
+            max_nodes=self.node_budget,
+            noise=self.root_noise,
+            rng=self.rng
+        )
+        self.positions_evaluated += self.searcher.nodes
+        return move
     
     def play_game(self, game_id=0, explore_prob=0.1):
         """Play a single self-play game"""
-        board = [0] * 42
+        position, mask = 0, 0
         moves = []
         current_player = 1
         
         for turn in range(42):
             # Add exploration for diversity
-            if np.random.random() < explore_prob and turn < 10:
+            if self.rng.random() < explore_prob and turn < 10:
                 # Random move with center bias
-                valid = [c for c in range(7) if board[c] == 0]
+                valid = valid_columns(mask)
                 weights = [1.0 + (3 - abs(c - 3)) * 0.5 for c in valid]
-                weights = np.array(weights) / sum(weights)
-                move = np.random.choice(valid, p=weights)
+                move = self.rng.choices(valid, weights=weights)[0]
             else:
-                # Use minimax
-                move = self.minimax_agent(board, current_player)
+                move = self.search_move(position, mask)
             
             moves.append(move)
-            
-            # Make move
-            for row in range(5, -1, -1):
-                if board[row * 7 + move] == 0:
-                    board[row * 7 + move] = current_player
-                    
-                    # Check win
-                    if self.check_winner(board, row, move, current_player):
-                        return {
-                            'game_id': game_id,
-                            'moves': moves,
-                            'winner': current_player,
-                            'length': turn + 1
-                        }
-                    break
+            won = is_winning_move(position, mask, move)
+            position, mask = play(position, mask, move)
+            if won:
+                return {
+                    'game_id': game_id,
+                    'moves': moves,
+                    'winner': current_player,
+                    'length': turn + 1
+                }
             
             current_player = 3 - current_player
         
@@ -225,136 +106,93 @@ class SelfPlayEngine:
             'length': 42
         }
     
-    def check_winner(self, board, row, col, player):
-        """Check if the last move created a win"""
-        # Horizontal
-        count = 1
-        # Check left
-        c = col - 1
-        while c >= 0 and board[row * 7 + c] == player:
-            count += 1
-            c -= 1
-        # Check right
-        c = col + 1
-        while c < 7 and board[row * 7 + c] == player:
-            count += 1
-            c += 1
-        if count >= 4:
-            return True
-        
-        # Vertical
-        count = 1
-        r = row + 1
-        while r < 6 and board[r * 7 + col] == player:
-            count += 1
-            r += 1
-        if count >= 4:
-            return True
-        
-        # Diagonal \
-        count = 1
-        r, c = row - 1, col - 1
-        while r >= 0 and c >= 0 and board[r * 7 + c] == player:
-            count += 1
-            r -= 1
-            c -= 1
-        r, c = row + 1, col + 1
-        while r < 6 and c < 7 and board[r * 7 + c] == player:
-            count += 1
-            r += 1
-            c += 1
-        if count >= 4:
-            return True
-        
-        # Diagonal /
-        count = 1
-        r, c = row - 1, col + 1
-        while r >= 0 and c < 7 and board[r * 7 + c] == player:
-            count += 1
-            r -= 1
-            c += 1
-        r, c = row + 1, col - 1
-        while r < 6 and c >= 0 and board[r * 7 + c] == player:
-            count += 1
-            r += 1
-            c -= 1
-        if count >= 4:
-            return True
-        
-        return False
-    
-    def worker_process(self, worker_id, num_games, result_queue):
-        """Worker process for parallel game generation"""
-        games = []
-        
-        for i in range(num_games):
-            game = self.play_game(
-                game_id=worker_id * num_games + i,
-                explore_prob=0.1 if i % 10 == 0 else 0.05  # More exploration every 10th game
-            )
-            games.append(game)
-            
-            if (i + 1) % 100 == 0:
-                result_queue.put(('progress', worker_id, i + 1))
-        
-        result_queue.put(('games', worker_id, games))
+    def __getstate__(self):
+        # Worker processes get the settings, not the parent's searcher or statistics
+        state = self.__dict__.copy()
+        state['searcher'] = None
+        state['opening_stats'] = None
+        return state
     
-    def generate_games(self, total_games=10000):
-        """Generate games in parallel"""
+    def generate_games(self, total_games=10000, shard_dir='self_play_shards', chunk_size=50):
+        """
+        Generate games on worker processes, streaming them to disk
+        Workers append each finished game to their own shard_dir/games-<pid>.jsonl
+        and report only counters, so memory stays constant for any total_games.
+        A worker that dies is replaced and the games of its chunk it had not
+        finished are handed to the new one, so a crash loses no games.
+        """
         print(f"\nGenerating {total_games:,} self-play games...")
-        print(f"Using {self.num_workers} workers")
+        print(f"Using {self.num_workers} workers, shards in {shard_dir}/")
+        os.makedirs(shard_dir, exist_ok=True)
         
-        games_per_worker = total_games // self.num_workers
-        remainder = total_games % self.num_workers
-        
-        # Create result queue
-        result_queue = mp.Queue()
-        
-        # Start worker processes
-        processes = []
+        tasks = deque((first, min(chunk_size, total_games - first))
+                      for first in range(0, total_games, chunk_size))
+        totals = new_counters()
         start_time = time.time()
         
-        for i in range(self.num_workers):
-            games_to_play = games_per_worker + (1 if i < remainder else 0)
-            p = mp.Process(
-                target=self.worker_process,
-                args=(i, games_to_play, result_queue)
-            )
-            p.start()
-            processes.append(p)
-        
-        # Collect results
-        all_games = []
-        workers_done = 0
-        
-        while workers_done < self.num_workers:
-            msg_type, worker_id, data = result_queue.get()
-            
-            if msg_type == 'progress':
-                # Progress update
-                total_progress = sum(games_per_worker * workers_done for _ in range(workers_done))
-                print(f"Worker {worker_id}: {data}/{games_per_worker} games", end='\r')
-            
-            elif msg_type == 'games':
-                # Worker finished
-                all_games.extend(data)
-                workers_done += 1
-                print(f"\nWorker {worker_id} finished!")
+        workers = [_start_generator(self, shard_dir) for _ in range(min(self.num_workers, len(tasks)))]
+        for worker in workers:
+            _assign_chunk(worker, tasks)
+        
+        while any(worker['chunk'] for worker in workers):
+            ready = wait([worker['conn'] for worker in workers if worker['chunk']])
+            for worker in workers:
+                if worker['conn'] not in ready:
+                    continue
+                try:
+                    kind, counts = worker['conn'].recv()
+                except EOFError:
+                    # Worker died: requeue the rest of its chunk on a fresh worker
+                    first, count = worker['chunk']
+                    last = _last_game(worker['shard'])
+                    if last is not None and last.get('game_id') == first:
+                        # Written just before the crash, never reported
+                        merge_counters(totals, _game_counts(last))
+                        first, count = first + 1, count - 1
+                    print(f"\nWorker {worker['process'].pid} died - requeueing "
+                          f"{count} game(s) from game {first:,}")
+                    worker['conn'].close()
+                    worker['process'].join()
+                    if count:
+                        tasks.appendleft((first, count))
+                    worker.update(_start_generator(self, shard_dir))
+                    _assign_chunk(worker, tasks)
+                    continue
+                
+                merge_counters(totals, counts)
+                if kind == 'game':
+                    first, count = worker['chunk']
+                    worker['chunk'] = (first + 1, count - 1)
+                else:
+                    _assign_chunk(worker, tasks)
+                elapsed = time.time() - start_time
+                print(f"{totals['games']:,}/{total_games:,} games "
+                      f"({totals['games'] / elapsed:.1f} games/s)", end='\r')
         
-        # Wait for all processes
-        for p in processes:
-            p.join()
+        for worker in workers:
+            worker['conn'].send(None)
+            worker['conn'].close()
+            worker['process'].join()
         
         elapsed = time.time() - start_time
-        games_per_second = total_games / elapsed
-        
-        print(f"\nGenerated {len(all_games):,} games in {elapsed:.1f}s")
-        print(f"Speed: {games_per_second:.0f} games/second")
-        
-        # Analyze games
-        self.analyze_games(all_games)
-        
-        return all_games
+        self.games_played += totals['games']
+        self.positions_evaluated += totals['nodes']
+        for col in range(7):
+            for i, outcome in enumerate(('wins', 'losses', 'draws')):
+                self.first_move_stats[col][outcome] += totals['first_moves'][col][i]
+        
+        print(f"\nGenerated {totals['games']:,} games in {elapsed:.1f}s")
+        print(f"Speed: {totals['games'] / elapsed:.1f} games/second "
+              f"({totals['games'] / elapsed * 3600:,.0f} games/hour)")
+        games = max(totals['games'], 1)
+        print(f"Player 1 wins: {totals['p1_wins'] / games:.1%}  "
+              f"Player 2 wins: {totals['p2_wins'] / games:.1%}  "
+              f"Draws: {totals['draws'] / games:.1%}  "
+              f"Average length: {totals['moves'] / games:.1f}")
+        if totals['errors']:
+            print(f"{totals['errors']} chunk(s) failed: {totals['last_error']}")
+        
+        return totals
     
     def analyze_games(self, games):
         """Analyze game statistics"""
@@ -374,7 +212,7 @@ class SelfPlayEngine:
         print(f"Draws: {draws:,} ({draws/total*100:.1f}%)")
         
         # Game length statistics
-        lengths = [g['length'] for g in games]
+        lengths = [len(g['moves']) for g in games]
         print(f"\nAverage game length: {np.mean(lengths):.1f} moves")
         print(f"Shortest game: {min(lengths)} moves")
         print(f"Longest game: {max(lengths)} moves")
@@ -423,49 +261,27 @@ class SelfPlayEngine:
             print(f"  {i+1}. {opening[:4]}... ({stats['count']} games, {win_rate:.1f}% P1 win)")
     
     def save_games(self, games, filename="self_play_games.pkl"):
-        """Save games to file"""
-        with open(filename, 'wb') as f:
-            pickle.dump(games, f)
+        """Save games to file (.c4g for packed game records, otherwise a pickle)"""
+        if filename.endswith('.c4g'):
+            write_games(games, filename, generator='self_play_generator')
+        else:
+            with open(filename, 'wb') as f:
+                pickle.dump(games, f)
         print(f"\nSaved {len(games):,} games to {filename}")
     
     def save_opening_book(self, games, min_games=10, max_depth=12):
-        """Extract and save opening book from games"""
-        openings = defaultdict(lambda: {'count': 0, 'scores': []})
-        
-        for game in games:
-            moves = game['moves'][:max_depth]
-            
-            # Track all prefixes
-            for length in range(1, min(len(moves) + 1, max_depth + 1)):
-                position = tuple(moves[:length])
-                openings[position]['count'] += 1
-                
-                # Score: 1 for P1 win, 0 for draw, -1 for P2 win
-                if game['winner'] == 1:
-                    openings[position]['scores'].append(1)
-                elif game['winner'] == 2:
-                    openings[position]['scores'].append(-1)
-                else:
-                    openings[position]['scores'].append(0)
-        
-        # Filter and compute statistics
-        book = {}
-        for position, data in openings.items():
-            if data['count'] >= min_games:
-                scores = data['scores']
-                book[position] = {
-                    'count': data['count'],
-                    'score': np.mean(scores),
-                    'std': np.std(scores),
-                    'win_rate': sum(1 for s in scores if s > 0) / len(scores)
-                }
+        """
+        Extract and save opening book from games
+        Statistics are aggregated per canonical position (see opening_stats),
+        so memory grows with distinct positions rather than with games.
+        """
+        stats = OpeningStats(max_depth)
+        stats.add_games(games)
+        book = stats.to_book(min_games)
         
         # Save as JSON for readability
-        # Convert tuples to lists for JSON serialization
-        json_book = {str(k): v for k, v in book.items()}
-        
         with open('opening_book.json', 'w') as f:
-            json.dump(json_book, f, indent=2)
+            json.dump(book, f, indent=2)
         
         print(f"\nSaved opening book with {len(book):,} positions")
         print(f"Positions with {min_games}+ games, up to depth {max_depth}")
@@ -473,6 +289,100 @@ class SelfPlayEngine:
         return book
 
 
+def new_counters():
+    """Aggregate statistics returned by each generation chunk"""
+    return {'games': 0, 'p1_wins': 0, 'p2_wins': 0, 'draws': 0, 'moves': 0, 'nodes': 0,
+            'first_moves': [[0, 0, 0] for _ in range(7)],  # P1 wins/losses/draws
+            'errors': 0, 'last_error': None}
+
+
+def merge_counters(totals, counts):
+    for name in ('games', 'p1_wins', 'p2_wins', 'draws', 'moves', 'nodes', 'errors'):
+        totals[name] += counts[name]
+    for col in range(7):
+        for i in range(3):
+            totals['first_moves'][col][i] += counts['first_moves'][col][i]
+    if counts['last_error']:
+        totals['last_error'] = counts['last_error']
+
+
+def iter_shard_games(shard_dir='self_play_shards'):
+    """Every game in a shard directory, one shard at a time"""
+    for path in sorted(glob.glob(os.path.join(shard_dir, '*.jsonl'))):
+        yield from iter_games(path)
+
+
+def _game_counts(game, nodes=0):
+    """Counters for one finished game"""
+    counts = new_counters()
+    outcome = {1: 0, 2: 1, 0: 2}[game['winner']]
+    counts['games'] = 1
+    counts['moves'] = len(game['moves'])
+    counts['nodes'] = nodes
+    counts[('p1_wins', 'p2_wins', 'draws')[outcome]] = 1
+    counts['first_moves'][game['moves'][0]][outcome] = 1
+    return counts
+
+
+def _last_game(path):
+    """Last complete game of a shard, or None"""
+    if not os.path.exists(path):
+        return None
+    last = None
+    for last in iter_games(path):
+        pass
+    return last
+
+
+def _start_generator(engine, shard_dir):
+    """A generation worker process and the pipe it takes chunks on"""
+    conn, child = mp.Pipe()
+    process = mp.Process(target=_generator_worker, args=(engine, shard_dir, child), daemon=True)
+    process.start()
+    child.close()
+    return {'process': process, 'conn': conn, 'chunk': None,
+            'shard': os.path.join(shard_dir, f"games-{process.pid}.jsonl")}
+
+
+def _assign_chunk(worker, tasks):
+    worker['chunk'] = tasks.popleft() if tasks else None
+    if worker['chunk']:
+        worker['conn'].send(worker['chunk'])
+
+
+def _generator_worker(engine, shard_dir, conn):
+    """
+    Play chunks (first_id, count) until sent None, appending each game to
+    this worker's shard; reports ('game', counts) after every game written
+    and ('done', counts of any failure) at the end of each chunk
+    """
+    shard = os.path.join(shard_dir, f"games-{os.getpid()}.jsonl")
+    while True:
+        task = conn.recv()
+        if task is None:
+            return
+        first_id, count = task
+        # Seeded runs are reproducible whichever worker gets the chunk
+        engine.rng = random.Random(None if engine.seed is None else f"{engine.seed}-{first_id}")
+        failure = new_counters()
+        
+        try:
+            for game_id in range(first_id, first_id + count):
+                nodes_before = engine.positions_evaluated
+                game = engine.play_game(
+                    game_id=game_id,
+                    explore_prob=0.1 if game_id % 10 == 0 else 0.05  # More exploration every 10th game
+                )
+                write_shard([game], shard)
+                conn.send(('game', _game_counts(game, engine.positions_evaluated - nodes_before)))
+        except Exception as e:
+            # Finished games are already on disk; report the failure and carry on
+            failure['errors'] += 1
+            failure['last_error'] = f"game {game_id}: {e!r}"
+        
+        conn.send(('done', failure))
+
+
 # Main execution
 if __name__ == "__main__":
     print("="*60)
@@ -480,16 +390,13 @@ if __name__ == "__main__":
     print("="*60)
     
     # Create engine
-    engine = SelfPlayEngine(search_depth=7, num_workers=8)
-    
-    # Generate games
-    games = engine.generate_games(total_games=1000)
+    engine = SelfPlayEngine(search_depth=12, num_workers=8, node_budget=20000)
     
-    # Save games
-    engine.save_games(games)
+    # Generate games (streamed to self_play_shards/)
+    engine.generate_games(total_games=1000)
     
     # Create opening book
-    opening_book = engine.save_opening_book(games, min_games=5, max_depth=10)
+    opening_book = engine.save_opening_book(iter_shard_games(), min_games=5, max_depth=10)
     
     print("\n" + "="*60)
     print("SELF-PLAY GENERATION COMPLETE")
@@ -9,6 +9,8 @@ import pickle
 from datetime import datetime
 from collections import defaultdict
 
+from tournament import rounds_for, run_tournament
+
 def play_match(agent1, agent2, verbose=False):
     """Play a match between two agents"""
     board = [0] * 42
@@ -118,40 +120,26 @@ def load_agent(filename):
         return None
 
 def tournament(agents, num_rounds=10):
-    """Run tournament between agents"""
+    """
+    Run tournament between agents (at least num_rounds games per color per
+    pair, over the default opening suite, on all cores)
+    See tournament.run_tournament for opening suites, Elo and SPRT.
+    """
+    result = run_tournament(agents, rounds=rounds_for(2 * num_rounds), verbose=False)
     results = defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0, 'score': 0})
-    
-    for round_num in range(num_rounds):
-        print(f"\nRound {round_num + 1}/{num_rounds}")
-        
-        for i, (name1, agent1) in enumerate(agents):
-            for name2, agent2 in agents[i+1:]:
-                # Play both colors
-                winner1, _ = play_match(agent1, agent2)
-                if winner1 == 1:
-                    results[name1]['wins'] += 1
-                    results[name2]['losses'] += 1
-                elif winner1 == 2:
-                    results[name2]['wins'] += 1
-                    results[name1]['losses'] += 1
-                else:
-                    results[name1]['draws'] += 1
-                    results[name2]['draws'] += 1
-                
-                winner2, _ = play_match(agent2, agent1)
-                if winner2 == 1:
-                    results[name2]['wins'] += 1
-                    results[name1]['losses'] += 1
-                elif winner2 == 2:
-                    results[name1]['wins'] += 1
-                    results[name2]['losses'] += 1
-                else:
-                    results[name1]['draws'] += 1
-                    results[name2]['draws'] += 1
+    for game in result['games']:
+        players = (game['first'], game['second'])
+        if game['winner']:
+            results[players[game['winner'] - 1]]['wins'] += 1
+            results[players[2 - game['winner']]]['losses'] += 1
+        else:
+            for name in players:
+                results[name]['draws'] += 1
     
     # Calculate scores
     for name in results:
         results[name]['score'] = results[name]['wins'] * 3 + results[name]['draws']
+        results[name]['elo'], results[name]['elo_error'] = result['ratings'][name]
     
     return results
 
@@ -195,6 +183,7 @@ def main():
         print(f"\n{rank}. {name}")
         print(f"   Score: {stats['score']}")
         print(f"   Wins: {stats['wins']}, Losses: {stats['losses']}, Draws: {stats['draws']}")
+        print(f"   Elo: {stats['elo']:+.1f} ± {stats['elo_error']:.1f}")
         win_rate = stats['wins'] / (stats['wins'] + stats['losses'] + stats['draws']) * 100
         print(f"   Win Rate: {win_rate:.1f}%")
     
@@ -0,0 +1,280 @@
+"""
+Streaming Self-Play Dataset
+Feeds ConnectXNetwork training from on-disk game shards at constant RAM
+
+- Shards are read one at a time (.jsonl streamed line by line, .c4g
+  packed records through mmap, .pkl one list of games per shard), in
+  chunks of games
+- Each chunk is replayed with vectorized NumPy into the network's input
+  planes (N, 6, 7, 3), value targets and policy targets
+- Left-right mirroring as augmentation
+- Bounded shuffle buffer of compact int8 planes, so memory depends on the
+  buffer size and never on the corpus size
+"""
+
+import glob
+import json
+import os
+import pickle
+import sys
+import time
+
+import numpy as np
+
+from game_records import GameRecords
+
+ROWS = 6
+COLS = 7
+
+
+def iter_games(path):
+    """Games of one shard, without holding more than that shard"""
+    if path.endswith('.jsonl'):
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.endswith('\n'):
+                    break  # Partial record left by a crashed writer
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith('.c4g'):
+        yield from GameRecords(path)
+    else:
+        with open(path, 'rb') as f:
+            games = pickle.load(f)
+        yield from games
+
+
+def write_shard(games, path):
+    """Append games (dicts with 'moves' and 'winner') to a .jsonl shard"""
+    with open(path, 'a') as f:
+        for game in games:
+            record = {'moves': [int(m) for m in game['moves']], 'winner': int(game['winner'])}
+            if 'game_id' in game:
+                record['game_id'] = int(game['game_id'])
+            if 'policies' in game:
+                record['policies'] = [[float(p) for p in policy] for policy in game['policies']]
+            f.write(json.dumps(record) + '\n')
+
+
+def encode_games(games):
+    """
+    Replay a chunk of games into training arrays, vectorized over every move
+    Returns planes (N, 6, 7, 3) int8, values (N,) float32 and policies (N, 7)
+    float32 for the position before each move, seen by the side to move.
+    """
+    lengths = np.array([len(game['moves']) for game in games], dtype=np.int64)
+    total = int(lengths.sum())
+    if total == 0:
+        return (np.zeros((0, ROWS, COLS, 3), dtype=np.int8),
+                np.zeros(0, dtype=np.float32), np.zeros((0, COLS), dtype=np.float32))
+
+    moves = np.concatenate([np.asarray(game['moves'], dtype=np.int64) for game in games])
+    winners = np.repeat([game['winner'] for game in games], lengths)
+    starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    turn = np.arange(total) - starts
+    mover = np.where(turn % 2 == 0, 1, 2)
+
+    # Landing row of each move: earlier moves in the same column of the same game
+    game_index = np.repeat(np.arange(len(games)), lengths)
+    column_key = game_index * COLS + moves
+    order = np.lexsort((np.arange(total), column_key))
+    sorted_keys = column_key[order]
+    group_start = np.r_[0, np.flatnonzero(np.diff(sorted_keys)) + 1]
+    group_sizes = np.diff(np.r_[group_start, total])
+    height = np.empty(total, dtype=np.int64)
+    height[order] = np.arange(total) - np.repeat(group_start, group_sizes)
+    cells = (ROWS - 1 - height) * COLS + moves
+
+    # Board before each move = stones added since the game started
+    stones = np.zeros((total + 1, 2, ROWS * COLS), dtype=np.int32)
+    stones[np.arange(1, total + 1), mover - 1, cells] = 1
+    np.cumsum(stones, axis=0, out=stones)
+    before = stones[:-1] - stones[starts]
+
+    own = np.where((mover == 1)[:, None], before[:, 0], before[:, 1])
+    other = np.where((mover == 1)[:, None], before[:, 1], before[:, 0])
+
+    planes = np.zeros((total, ROWS, COLS, 3), dtype=np.int8)
+    planes[..., 0] = own.reshape(-1, ROWS, COLS)
+    planes[..., 1] = other.reshape(-1, ROWS, COLS)
+    planes[:, 0, :, 2] = (own + other).reshape(-1, ROWS, COLS)[:, 0, :] == 0
+
+    values = np.where(winners == 0, 0.0, np.where(winners == mover, 1.0, -1.0)).astype(np.float32)
+
+    # Search visit distributions if the generator stored them, else the move played
+    policies = np.zeros((total, COLS), dtype=np.float32)
+    policies[np.arange(total), moves] = 1.0
+    offset = 0
+    for game, length in zip(games, lengths):
+        if 'policies' in game:
+            policies[offset:offset + length] = game['policies']
+        offset += length
+
+    return planes, values, policies
+
+
+class ShuffleBuffer:
+    """
+    Fixed-size reservoir of encoded positions
+    Each incoming position replaces a random slot and the evicted one is
+    emitted, so output order is decorrelated from game order.
+    """
+
+    def __init__(self, size, rng):
+        self.size = size
+        self.rng = rng
+        self.planes = np.zeros((size, ROWS, COLS, 3), dtype=np.int8)
+        self.values = np.zeros(size, dtype=np.float32)
+        self.policies = np.zeros((size, COLS), dtype=np.float32)
+        self.count = 0
+
+    def add(self, planes, values, policies):
+        """Insert a chunk; returns the positions it pushed out"""
+        # Fill the free slots first
+        free = min(self.size - self.count, len(values))
+        if free:
+            end = self.count + free
+            self.planes[self.count:end] = planes[:free]
+            self.values[self.count:end] = values[:free]
+            self.policies[self.count:end] = policies[:free]
+            self.count = end
+            planes, values, policies = planes[free:], values[free:], policies[free:]
+
+        out = ([], [], [])
+        for start in range(0, len(values), self.size):
+            stop = min(start + self.size, len(values))
+            slots = self.rng.permutation(self.size)[:stop - start]
+            out[0].append(self.planes[slots].copy())
+            out[1].append(self.values[slots].copy())
+            out[2].append(self.policies[slots].copy())
+            self.planes[slots] = planes[start:stop]
+            self.values[slots] = values[start:stop]
+            self.policies[slots] = policies[start:stop]
+
+        if not out[1]:
+            return None
+        return tuple(np.concatenate(part) for part in out)
+
+    def drain(self):
+        """Everything still buffered, shuffled; empties the buffer"""
+        order = self.rng.permutation(self.count)
+        result = self.planes[order], self.values[order], self.policies[order]
+        self.count = 0
+        return result
+
+
+class SelfPlayDataset:
+    """
+    Iterable of (planes float32 (B, 6, 7, 3), values (B,), policies (B, 7))
+
+    `shards` is a glob pattern or a list of shard paths. Memory is bounded
+    by `shuffle_buffer` plus one chunk of `games_per_chunk` games.
+    """
+
+    def __init__(self, shards, batch_size=256, shuffle_buffer=50000, mirror=True,
+                 games_per_chunk=512, epochs=1, seed=0):
+        if isinstance(shards, str):
+            shards = sorted(glob.glob(shards))
+        self.shards = list(shards)
+        self.batch_size = batch_size
+        self.shuffle_buffer = shuffle_buffer
+        self.mirror = mirror
+        self.games_per_chunk = games_per_chunk
+        self.epochs = epochs
+        self.rng = np.random.RandomState(seed)
+        self.positions_seen = 0
+
+    def _chunks(self):
+        """Encoded chunks of games across all shards (shard order reshuffled per epoch)"""
+        for _ in range(self.epochs):
+            for index in self.rng.permutation(len(self.shards)):
+                chunk = []
+                for game in iter_games(self.shards[index]):
+                    chunk.append(game)
+                    if len(chunk) == self.games_per_chunk:
+                        yield encode_games(chunk)
+                        chunk = []
+                if chunk:
+                    yield encode_games(chunk)
+
+    def _augment(self, planes, values, policies):
+        """Mirror a random half of the positions left to right"""
+        if self.mirror and len(values):
+            flip = self.rng.rand(len(values)) < 0.5
+            planes[flip] = planes[flip, :, ::-1]
+            policies[flip] = policies[flip, ::-1]
+        return planes, values, policies
+
+    def __iter__(self):
+        buffer = ShuffleBuffer(self.shuffle_buffer, self.rng)
+        pending = []
+        pending_count = 0
+
+        def batches(final=False):
+            nonlocal pending, pending_count
+            if not pending:
+                return
+            planes, values, policies = (np.concatenate(part) for part in zip(*pending))
+            usable = len(values) if final else len(values) // self.batch_size * self.batch_size
+            for start in range(0, usable, self.batch_size):
+                stop = start + self.batch_size
+                self.positions_seen += len(values[start:stop])
+                yield (planes[start:stop].astype(np.float32), values[start:stop],
+                       policies[start:stop])
+            rest = (planes[usable:], values[usable:], policies[usable:])
+            pending = [rest] if len(rest[1]) else []
+            pending_count = len(rest[1])
+
+        for chunk in self._chunks():
+            emitted = buffer.add(*self._augment(*chunk))
+            if emitted is None:
+                continue
+            pending.append(emitted)
+            pending_count += len(emitted[1])
+            if pending_count >= self.batch_size:
+                yield from batches()
+
+        pending.append(buffer.drain())
+        yield from batches(final=True)
+
+
+def train_network(network, dataset, log_every=100):
+    """Stream a dataset through ConnectXNetwork.train_step; returns mean losses"""
+    totals = np.zeros(3)
+    steps = 0
+    start = time.time()
+    for planes, values, policies in dataset:
+        totals += network.train_step(planes, values, policies)
+        steps += 1
+        if steps % log_every == 0:
+            rate = dataset.positions_seen / (time.time() - start)
+            mean = totals / steps
+            print(f"step {steps}: loss {mean[0]:.4f} (value {mean[1]:.4f}, "
+                  f"policy {mean[2]:.4f})  {rate:,.0f} positions/s")
+    return totals / max(steps, 1)
+
+
+def main():
+    """Train ConnectXNetwork on every shard matching a pattern"""
+    from neural_network_v2 import ConnectXNetwork
+
+    pattern = sys.argv[1] if len(sys.argv) > 1 else 'shards/*.jsonl'
+    epochs = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    dataset = SelfPlayDataset(pattern, epochs=epochs)
+    if not dataset.shards:
+        print(f"No shards match {pattern}")
+        return
+    print(f"{len(dataset.shards)} shards, {epochs} epoch(s)")
+
+    network = ConnectXNetwork(hidden_size=128)
+    losses = train_network(network, dataset)
+    print(f"Positions: {dataset.positions_seen:,}  final mean loss {losses[0]:.4f}")
+
+    os.makedirs('models', exist_ok=True)
+    network.save('models/selfplay_network.bin')
+    print("Saved models/selfplay_network.bin")
+
+
+if __name__ == "__main__":
+    main()
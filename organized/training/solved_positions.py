@@ -0,0 +1,281 @@
+"""
+Solved Positions
+Self-generated ground-truth positions and an offline engine benchmark
+
+- Positions are sampled from self-play games (or a .c4g game record
+  file) at random plies, at most one per game and phase, in three phases
+  after the classic Connect 4 test sets: L3 end (28-40 stones), L2
+  middle (14-27) and L1 begin (8-13); mirror duplicates and positions
+  with an immediate win are skipped
+- Each position is solved exactly (bitboard_solver.make_solver) for its
+  score and every best move
+- Corpus files (.npz) hold position and mask (uint64), score (int8) and
+  the best moves as a column bitmask (uint8): 18 bytes a position
+- benchmark() runs an engine over the corpus, every position from an
+  empty table, and reports per phase mean nodes, mean / max time and
+  accuracy: exact scores for solvers, best-move hits for everything else
+- compare() lists the phases where a run is slower, searches more nodes
+  or is less accurate than a baseline run, as a regression gate
+"""
+
+import json
+import random
+import sys
+import time
+
+import numpy as np
+
+from bitboard_core import (canonical_key, decode_position, from_moves, popcount,
+                           possible, winning_position)
+from bitboard_negamax import make_searcher
+from bitboard_solver import make_solver
+
+PHASES = {'L3': (28, 40), 'L2': (14, 27), 'L1': (8, 13)}
+
+
+def phase_of(stones, phases=PHASES):
+    return next((name for name, (lo, hi) in phases.items() if lo <= stones <= hi), None)
+
+
+def self_play_games(seed=0, depth=4, explore_prob=0.5):
+    """Endless diverse self-play games from the ultra-fast generator"""
+    from ultra_fast_self_play import play_game_fast
+
+    rng = random.Random(seed)
+    while True:
+        moves, winner = play_game_fast(depth, explore_prob, rng)
+        yield {'moves': moves, 'winner': winner}
+
+
+def sample_positions(games, per_phase=100, phases=PHASES, seed=0):
+    """[(position, mask)]: per_phase distinct positions of each phase, drawn from the games"""
+    rng = random.Random(seed)
+    chosen = {phase: {} for phase in phases}
+    for game in games:
+        moves = game['moves']
+        for phase, (lo, hi) in phases.items():
+            # Only positions the game played on from, so none is already decided
+            top = min(hi, len(moves) - 1)
+            if len(chosen[phase]) >= per_phase or top < lo:
+                continue
+            position, mask = from_moves(moves[:rng.randint(lo, top)])
+            if winning_position(position, mask) & possible(mask):
+                continue
+            chosen[phase].setdefault(canonical_key(position, mask)[0], (position, mask))
+        if all(len(found) >= per_phase for found in chosen.values()):
+            break
+    return [entry for found in chosen.values() for entry in found.values()]
+
+
+def solve_positions(positions, solver=None, verbose=False):
+    """Corpus dict of position, mask, score and best (column bitmask) arrays"""
+    solver = solver or make_solver()
+    corpus = {
+        'position': np.array([position for position, _ in positions], dtype=np.uint64),
+        'mask': np.array([mask for _, mask in positions], dtype=np.uint64),
+        'score': np.zeros(len(positions), dtype=np.int8),
+        'best': np.zeros(len(positions), dtype=np.uint8)
+    }
+    start = time.time()
+    for i, (position, mask) in enumerate(positions):
+        score, best = solver.best_moves(position, mask)
+        corpus['score'][i] = score
+        corpus['best'][i] = sum(1 << col for col in best)
+        if verbose and (i + 1) % 10 == 0:
+            print(f"{i + 1:,}/{len(positions):,} solved ({time.time() - start:.0f}s)", end='\r')
+    if verbose:
+        print()
+    return corpus
+
+
+def build_corpus(games=None, per_phase=100, phases=PHASES, seed=0, solver=None, verbose=False):
+    """Sample from games (default: fresh self-play) and solve"""
+    games = games if games is not None else self_play_games(seed)
+    return solve_positions(sample_positions(games, per_phase, phases, seed), solver, verbose)
+
+
+def save_corpus(path, corpus):
+    np.savez_compressed(path, **corpus)
+
+
+def load_corpus(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in ('position', 'mask', 'score', 'best')}
+
+
+# Engines: engine(position, mask) -> (move, exact score or None, nodes or None,
+# seconds), each call starting from an empty table that is cleared untimed
+
+def solver_engine(backend='auto'):
+    solver = make_solver(backend)
+
+    def engine(position, mask):
+        solver.reset()
+        start = time.perf_counter()
+        score = solver.solve(position, mask)
+        return None, score, solver.nodes, time.perf_counter() - start
+    return engine
+
+
+def searcher_engine(backend='auto', max_depth=12, time_limit=None):
+    searcher = make_searcher(backend, max_depth=max_depth, time_limit=time_limit)
+
+    def engine(position, mask):
+        searcher.new_game()
+        start = time.perf_counter()
+        move, _, _ = searcher.search(position, mask)
+        return move, None, searcher.nodes, time.perf_counter() - start
+    return engine
+
+
+def agent_engine(path):
+    """An agent file in a persistent worker, timed inside the worker"""
+    from agent_workers import AgentWorker
+    from referee import CONFIGURATION, OVERAGE_TIME, AgentTimeout, Struct
+
+    worker = AgentWorker(path)
+    configuration = Struct(CONFIGURATION)
+
+    def engine(position, mask):
+        stones = popcount(mask)
+        worker.new_game()
+        observation = Struct(board=decode_position(position, mask, stones % 2 + 1), mark=stones % 2 + 1,
+                             step=stones, remainingOverageTime=OVERAGE_TIME)
+        try:
+            move = worker(observation, configuration)
+        except (RuntimeError, AgentTimeout):
+            move = None
+        return move, None, None, worker.last_seconds
+    engine.close = worker.close
+    return engine
+
+
+def make_engine(spec):
+    """
+    Engine from a spec: 'solver' / 'solver-python', 'negamax' / 'negamax-python'
+    with optional ':depth=N,time=S', or an agent file path
+    """
+    name, _, arguments = spec.partition(':')
+    options = dict(item.split('=', 1) for item in arguments.split(',') if item)
+    backend = 'python' if name.endswith('-python') else 'auto'
+    if name.startswith('solver'):
+        return solver_engine(backend)
+    if name.startswith('negamax'):
+        return searcher_engine(backend, int(options.get('depth', 12)),
+                               float(options['time']) if 'time' in options else None)
+    if name.endswith('.py'):
+        return agent_engine(name)
+    raise ValueError(f"Unknown engine {spec!r}")
+
+
+def benchmark(engine, corpus, phases=PHASES):
+    """
+    {phase: {'positions', 'mean_nodes', 'mean_seconds', 'max_seconds', 'accuracy'}}
+    One untimed call on the median-depth position first absorbs JIT
+    compilation and lazy initialization.
+    """
+    results = {phase: [] for phase in phases}
+    stones = [popcount(mask) for mask in corpus['mask'].tolist()]
+    if stones:
+        warmup = int(np.argsort(stones, kind='stable')[len(stones) // 2])
+        engine(int(corpus['position'][warmup]), int(corpus['mask'][warmup]))
+    for position, mask, score, best in zip(corpus['position'].tolist(), corpus['mask'].tolist(),
+                                           corpus['score'].tolist(), corpus['best'].tolist()):
+        phase = phase_of(popcount(mask), phases)
+        if phase is None:
+            continue
+        move, found, nodes, seconds = engine(position, mask)
+        correct = found == score if found is not None else move is not None and best >> int(move) & 1
+        results[phase].append((seconds, nodes, bool(correct)))
+
+    report = {}
+    for phase, runs in results.items():
+        if not runs:
+            continue
+        seconds, nodes, correct = zip(*runs)
+        report[phase] = {
+            'positions': len(runs),
+            'mean_nodes': float(np.mean(nodes)) if None not in nodes else None,
+            'mean_seconds': float(np.mean(seconds)),
+            'max_seconds': float(np.max(seconds)),
+            'accuracy': float(np.mean(correct))
+        }
+    return report
+
+
+def compare(report, baseline, tolerance=0.1):
+    """Regressions of report against baseline: slower / more nodes beyond tolerance, or less accurate"""
+    problems = []
+    for phase, base in baseline.items():
+        run = report.get(phase)
+        if run is None:
+            problems.append(f"{phase}: missing")
+            continue
+        for metric in ('mean_nodes', 'mean_seconds'):
+            if base[metric] is not None and run[metric] is not None and \
+                    run[metric] > base[metric] * (1 + tolerance):
+                problems.append(f"{phase}: {metric} {run[metric]:.4g} > {base[metric]:.4g}")
+        if run['accuracy'] < base['accuracy']:
+            problems.append(f"{phase}: accuracy {run['accuracy']:.1%} < {base['accuracy']:.1%}")
+    return problems
+
+
+def print_report(report):
+    print(f"{'phase':6s} {'positions':>9s} {'mean nodes':>12s} {'mean ms':>9s} {'max ms':>9s} {'accuracy':>9s}")
+    for phase, run in report.items():
+        nodes = f"{run['mean_nodes']:12,.0f}" if run['mean_nodes'] is not None else f"{'-':>12s}"
+        print(f"{phase:6s} {run['positions']:9d} {nodes} {run['mean_seconds'] * 1000:9.2f} "
+              f"{run['max_seconds'] * 1000:9.2f} {run['accuracy']:9.1%}")
+
+
+def main():
+    """
+    solved_positions.py build corpus.npz [--per-phase=100] [--games=records.c4g] [--seed=0]
+    solved_positions.py bench corpus.npz engine [--out=run.json] [--baseline=run.json] [--tolerance=0.1]
+      engine: solver, solver-python, negamax[:depth=N,time=S], negamax-python[...] or agent.py
+    """
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) if '=' in arg else (arg[2:], True)
+                   for arg in sys.argv[1:] if arg.startswith('--'))
+    if len(args) < 2 or args[0] not in ('build', 'bench') or (args[0] == 'bench' and len(args) < 3):
+        print(main.__doc__)
+        return
+
+    if args[0] == 'build':
+        games = None
+        if 'games' in options:
+            from game_records import GameRecords
+            games = iter(GameRecords(options['games']))
+        start = time.time()
+        corpus = build_corpus(games, per_phase=int(options.get('per-phase', 100)),
+                              seed=int(options.get('seed', 0)), verbose=True)
+        save_corpus(args[1], corpus)
+        counts = {phase: 0 for phase in PHASES}
+        for mask in corpus['mask'].tolist():
+            counts[phase_of(popcount(mask))] += 1
+        print(f"{len(corpus['score']):,} positions {counts} in {time.time() - start:.1f}s -> {args[1]}")
+        return
+
+    corpus = load_corpus(args[1])
+    engine = make_engine(args[2])
+    try:
+        report = benchmark(engine, corpus)
+    finally:
+        if hasattr(engine, 'close'):
+            engine.close()
+    print_report(report)
+    if 'out' in options:
+        with open(options['out'], 'w') as f:
+            json.dump({'engine': args[2], 'corpus': args[1], 'phases': report}, f, indent=2)
+    if 'baseline' in options:
+        with open(options['baseline']) as f:
+            baseline = json.load(f)['phases']
+        problems = compare(report, baseline, float(options.get('tolerance', 0.1)))
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,505 @@
+"""
+Texel Tuner
+Fit hand-written evaluation weights to game outcomes
+
+Each evaluator's static score is linear in its weights, so every position
+becomes a row of feature counts (computed once, vectorized over uint64
+bitboards) plus a fixed part that no weight touches:
+
+    eval = features @ weights + fixed
+
+The predicted result for the side to move is sigmoid(k * eval). k is fitted
+first with the hand-picked weights, so tuned weights stay in the same units
+as the search's mate scores; then the weights minimise the mean squared
+error to the results (1 / 0.5 / 0) by full-batch Adam.
+
+Positions where the side to move can win at once are dropped (every search
+takes the win before evaluating), as are positions an evaluator answers
+with a mate score instead of its static branch. Results go to
+eval_weights.json, one section per evaluator:
+- pattern_evaluator: PatternEvaluator in submission.py
+- pattern_recognition: PatternRecognition.pattern_values
+- champion_engine: BitboardEngine evaluation used by ChampionEngine
+- elite_evaluation: EliteEvaluation per-phase weights
+"""
+
+import glob
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from bitboard_core import H1, BOARD_MASK, possible, winning_position
+from nnue_eval import NNUEEvaluator, self_play_games, training_positions
+from selfplay_dataset import iter_games
+
+WEIGHTS_PATH = 'eval_weights.json'
+
+M1 = np.uint64(0x5555555555555555)
+M2 = np.uint64(0x3333333333333333)
+M4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+H01 = np.uint64(0x0101010101010101)
+
+
+def popcount64(x):
+    """Set bits of each uint64 (SWAR)"""
+    x = x - ((x >> np.uint64(1)) & M1)
+    x = (x & M2) + ((x >> np.uint64(2)) & M2)
+    x = (x + (x >> np.uint64(4))) & M4
+    return ((x * H01) >> np.uint64(56)).astype(np.int64)
+
+
+def bit_matrix(boards):
+    """(N, 64) float32 0/1 matrix of bitboard bits"""
+    boards = np.ascontiguousarray(boards, dtype='<u8')
+    bits = np.unpackbits(boards.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    return bits.astype(np.float32)
+
+
+def incidence(windows):
+    """(64, W) matrix with a 1 where window w covers bit b"""
+    matrix = np.zeros((64, len(windows)), dtype=np.float32)
+    for w, window in enumerate(windows):
+        for b in range(64):
+            if window >> b & 1:
+                matrix[b, w] = 1
+    return matrix
+
+
+def window_counts(bits, matrix):
+    """Stones of each window, (N, W) int"""
+    return np.rint(bits @ matrix).astype(np.int64)
+
+
+def all_windows():
+    """Every four-in-a-row window of the 7x6 board"""
+    windows = []
+    for col in range(7):
+        for row in range(6):
+            for dc, dr in ((1, 0), (0, 1), (1, 1), (1, -1)):
+                cells = [(col + i * dc, row + i * dr) for i in range(4)]
+                if all(0 <= c < 7 and 0 <= r < 6 for c, r in cells):
+                    windows.append(sum(1 << (c * H1 + r) for c, r in cells))
+    return windows
+
+
+class EvaluatorSpec:
+    """
+    Feature extractor for one evaluator
+    features() returns (X, fixed) with X columns in the order of WEIGHTS.
+    """
+
+    section = None
+    WEIGHTS = {}
+
+    def names(self):
+        return list(self.WEIGHTS)
+
+    def defaults(self):
+        return np.array([self.WEIGHTS[name] for name in self.names()], dtype=np.float64)
+
+    def applies(self, positions, masks):
+        """Rows where the evaluator reaches its static (weighted) branch"""
+        return np.ones(len(positions), dtype=bool)
+
+    def features(self, positions, masks):
+        raise NotImplementedError
+
+    def export(self, weights):
+        """JSON section for tuned weights"""
+        return {name: round(float(w), 2) for name, w in zip(self.names(), weights)}
+
+
+class PatternEvaluatorSpec(EvaluatorSpec):
+    """
+    submission.py PatternEvaluator
+    Its count_threats plays the move with position ^ new_mask, so the
+    'threat' term counts playable cells that complete the opponent's four
+    (and 'opp_threat' ours); the features follow the code as written.
+    """
+
+    section = 'pattern_evaluator'
+    WEIGHTS = {'threat': 100, 'opp_threat': 120, 'center': 10, 'three': 50, 'two': 10}
+    CENTER = np.uint64(0x10204081020408)
+
+    def __init__(self):
+        self.windows = incidence([0xF << start for start in range(39)])
+
+    def features(self, positions, masks):
+        opponents = positions ^ masks
+        moves = possible(masks)
+        own = window_counts(bit_matrix(positions), self.windows)
+        other = window_counts(bit_matrix(opponents), self.windows)
+        X = np.stack([
+            popcount64(winning_position(opponents, masks) & moves),
+            -popcount64(winning_position(positions, masks) & moves),
+            popcount64(positions & self.CENTER) - popcount64(opponents & self.CENTER),
+            ((own == 3) & (other == 0)).sum(1) - ((other == 3) & (own == 0)).sum(1),
+            ((own == 2) & (other == 0)).sum(1) - ((other == 2) & (own == 0)).sum(1)
+        ], axis=1)
+        return X.astype(np.float32), np.zeros(len(positions), dtype=np.float32)
+
+
+class PatternRecognitionSpec(EvaluatorSpec):
+    """
+    PatternRecognition.evaluate_position: own - 1.1 * opponent + positional
+    Pattern lists come from the class itself so the features match it.
+    """
+
+    section = 'pattern_recognition'
+    DEFENSE = 1.1
+
+    def __init__(self):
+        from pattern_recognition import PatternRecognition
+        recognizer = PatternRecognition()
+        self.WEIGHTS = {name: recognizer.pattern_values[name] for name in
+                        ('open_3', 'split_3', 'fork', 'open_2', 'center_control', 'adjacent_center')}
+        self.open_3 = [(np.uint64(p), np.uint64(s)) for p, s in recognizer.patterns['open_3']]
+        self.split_3 = [(np.uint64(p), np.uint64(s)) for p, s in recognizer.patterns['split_3']]
+        fours = []
+        for kind in ('horizontal_4', 'vertical_4', 'diagonal_4_down', 'diagonal_4_up'):
+            fours.extend(recognizer.patterns[kind])
+        self.fours = incidence(fours)
+        self.columns = [np.uint64(0x3F << (col * 7)) for col in range(7)]
+
+    def _player(self, position, mask, bits, other_bits):
+        """Counts behind _evaluate_player for one side"""
+        counts = {}
+        spaces = np.zeros(len(position), dtype=np.uint64)
+        for name, patterns in (('open_3', self.open_3), ('split_3', self.split_3)):
+            total = np.zeros(len(position), dtype=np.int64)
+            for pattern, space in patterns:
+                hit = ((position & pattern) == pattern) & ((mask & space) == 0)
+                total += hit
+                spaces |= np.where(hit, space, np.uint64(0))
+            counts[name] = total
+        counts['fork'] = np.maximum(popcount64(spaces) - 1, 0)
+
+        own = window_counts(bits, self.fours)
+        empty_of_other = window_counts(other_bits, self.fours) == 0
+        counts['open_2'] = ((own == 2) & empty_of_other).sum(1)
+        counts['one'] = ((own == 1) & empty_of_other).sum(1)
+        return counts
+
+    def _height(self, position):
+        """Row + 1 of the highest stone of `position` in each column, (N, 7)"""
+        heights = np.zeros((len(position), 7), dtype=np.int64)
+        for col in range(7):
+            column = (position >> np.uint64(col * 7)) & np.uint64(0x3F)
+            for row in range(6):
+                heights[:, col] = np.where(column >> np.uint64(row) & np.uint64(1), row + 1,
+                                           heights[:, col])
+        return heights
+
+    def features(self, positions, masks):
+        opponents = positions ^ masks
+        own_bits, other_bits = bit_matrix(positions), bit_matrix(opponents)
+        mine = self._player(positions, masks, own_bits, other_bits)
+        theirs = self._player(opponents, masks, other_bits, own_bits)
+
+        def diff(name):
+            return mine[name] - self.DEFENSE * theirs[name]
+
+        def column_diff(cols):
+            return sum(popcount64(positions & self.columns[c]) - popcount64(opponents & self.columns[c])
+                       for c in cols)
+
+        X = np.stack([diff('open_3'), diff('split_3'), diff('fork'), diff('open_2'),
+                      column_diff([3]), column_diff([2, 4])], axis=1)
+        height = (self._height(opponents) - self._height(positions)).sum(1)
+        return X.astype(np.float32), (diff('one') + height).astype(np.float32)
+
+
+class ChampionEngineSpec(EvaluatorSpec):
+    """BitboardEngine.evaluate_position (horizontal windows, center columns)"""
+
+    section = 'champion_engine'
+
+    def __init__(self):
+        from bitboard_engine_v2 import BitboardEngine
+        self.WEIGHTS = dict(BitboardEngine.EVAL_WEIGHTS)
+        self.windows = incidence([sum(1 << ((col + i) * 7 + row) for i in range(4))
+                                  for col in range(4) for row in range(6)])
+        self.columns = [np.uint64(0x7F << (col * 7)) for col in range(7)]
+
+    def applies(self, positions, masks):
+        # An opponent threat returns -10000
+        return ~opponent_can_win(positions, masks)
+
+    def features(self, positions, masks):
+        opponents = positions ^ masks
+        own = window_counts(bit_matrix(positions), self.windows)
+        other = window_counts(bit_matrix(opponents), self.windows)
+
+        def column_diff(cols):
+            return sum(popcount64(positions & self.columns[c]) - popcount64(opponents & self.columns[c])
+                       for c in cols)
+
+        def count(mine, theirs, n):
+            return ((mine == n) & (theirs == 0)).sum(1)
+
+        features = {
+            'center': column_diff([3]),
+            'adjacent': column_diff([2, 4]),
+            'three': count(own, other, 3),
+            'two': count(own, other, 2),
+            'one': count(own, other, 1),
+            'opp_three': -count(other, own, 3),
+            'opp_two': -count(other, own, 2)
+        }
+        X = np.stack([features[name] for name in self.names()], axis=1)
+        return X.astype(np.float32), np.zeros(len(positions), dtype=np.float32)
+
+
+class EliteEvaluationSpec(EvaluatorSpec):
+    """
+    EliteEvaluation, one block of columns per game phase
+    Phase comes from the stone count, as in TopFiveAgent.
+    """
+
+    section = 'elite_evaluation'
+    TERMS = ('center_mult', 'defense_mult', 'threat', 'fork', 'l_shape')
+
+    def __init__(self):
+        from top5_elite_agent import EliteEvaluation
+        self.phases = [('opening', EliteEvaluation.OPENING_VALUES),
+                       ('midgame', EliteEvaluation.MIDGAME_VALUES),
+                       ('endgame', EliteEvaluation.ENDGAME_VALUES)]
+        self.WEIGHTS = {f'{phase}/{term}': EliteEvaluation.PHASE_WEIGHTS[phase][term]
+                        for phase, _ in self.phases for term in self.TERMS}
+        self.tables = []
+        for _, values in self.phases:
+            table = np.zeros(64, dtype=np.float32)
+            for row in range(6):
+                for col in range(7):
+                    table[col * 7 + (5 - row)] = values[row][col]
+            self.tables.append(table)
+        self.windows = incidence(all_windows())
+        # L-shape anchors: top-based rows 0-3, columns 0-4
+        self.l_base = np.uint64(sum(1 << (col * 7 + row) for col in range(5) for row in range(2, 6)))
+
+    def applies(self, positions, masks):
+        # An opponent threat returns -10000
+        return ~opponent_can_win(positions, masks)
+
+    def _threats(self, own_bits, other_bits):
+        own = window_counts(own_bits, self.windows)
+        other = window_counts(other_bits, self.windows)
+        return ((own == 3) & (other == 0)).sum(1)
+
+    def features(self, positions, masks):
+        opponents = positions ^ masks
+        own_bits, other_bits = bit_matrix(positions), bit_matrix(opponents)
+        threats = self._threats(own_bits, other_bits)
+        opp_threats = self._threats(other_bits, own_bits)
+
+        # Fork bonus: columns with an empty bottom cell where a stone there leaves >= 2 threats
+        forks = np.zeros(len(positions), dtype=np.int64)
+        for col in range(7):
+            bottom = col * 7
+            empty = own_bits[:, bottom] + other_bits[:, bottom] == 0
+            placed = own_bits.copy()
+            placed[:, bottom] = 1
+            forks += empty & (self._threats(placed, other_bits) >= 2)
+
+        l_shapes = popcount64(positions & (positions >> np.uint64(7)) & (positions << np.uint64(1))
+                              & self.l_base)
+
+        stones = popcount64(masks)
+        phase = np.where(stones <= 8, 0, np.where(stones <= 20, 1, 2))
+        X = np.zeros((len(positions), len(self.WEIGHTS)), dtype=np.float32)
+        for p, table in enumerate(self.tables):
+            rows = phase == p
+            block = np.stack([own_bits[rows] @ table, -(other_bits[rows] @ table),
+                              threats[rows] - opp_threats[rows], forks[rows], l_shapes[rows]], axis=1)
+            X[rows, p * len(self.TERMS):(p + 1) * len(self.TERMS)] = block
+        return X, np.zeros(len(positions), dtype=np.float32)
+
+    def export(self, weights):
+        section = {}
+        for (phase, _), start in zip(self.phases, range(0, len(weights), len(self.TERMS))):
+            section[phase] = {term: round(float(w), 2)
+                              for term, w in zip(self.TERMS, weights[start:start + len(self.TERMS)])}
+        return section
+
+
+SPECS = {
+    'pattern_evaluator': PatternEvaluatorSpec,
+    'pattern_recognition': PatternRecognitionSpec,
+    'champion_engine': ChampionEngineSpec,
+    'elite_evaluation': EliteEvaluationSpec
+}
+
+
+def opponent_can_win(positions, masks):
+    """The side not to move has a playable winning cell"""
+    return (winning_position(positions ^ masks, masks) & possible(masks)) != 0
+
+
+def quiet_positions(games):
+    """
+    Replay games into uint64 (positions, masks) and results for the side to
+    move in {0, 0.5, 1}, dropping positions the side to move wins at once
+    """
+    positions, masks, targets = training_positions(games)
+    positions = np.array(positions, dtype=np.uint64)
+    masks = np.array(masks, dtype=np.uint64)
+    results = (np.array(targets, dtype=np.float64) + 1) / 2
+
+    moves = possible(masks)
+    quiet = ((winning_position(positions, masks) & moves) == 0) & (masks != np.uint64(BOARD_MASK))
+    return positions[quiet], masks[quiet], results[quiet]
+
+
+def build_matrix(spec, positions, masks, chunk=100000):
+    """Feature matrix and fixed scores, in chunks to bound temporary memory"""
+    parts = [spec.features(positions[i:i + chunk], masks[i:i + chunk])
+             for i in range(0, len(positions), chunk)]
+    return np.concatenate([x for x, _ in parts]), np.concatenate([f for _, f in parts])
+
+
+def sigmoid(z):
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+def texel_loss(X, fixed, results, weights, k):
+    """Mean squared error between sigmoid(k * eval) and the results"""
+    predicted = sigmoid(k * (X @ weights + fixed))
+    return float(np.mean((predicted - results) ** 2))
+
+
+def fit_scale(X, fixed, results, weights):
+    """k minimising the loss for fixed weights (log grid, then golden section)"""
+    grid = np.logspace(-5, 0, 26)
+    losses = [texel_loss(X, fixed, results, weights, k) for k in grid]
+    best = int(np.argmin(losses))
+    lo, hi = np.log(grid[max(best - 1, 0)]), np.log(grid[min(best + 1, len(grid) - 1)])
+    ratio = (np.sqrt(5) - 1) / 2
+    for _ in range(40):
+        a = hi - ratio * (hi - lo)
+        b = lo + ratio * (hi - lo)
+        if texel_loss(X, fixed, results, weights, np.exp(a)) < texel_loss(X, fixed, results, weights, np.exp(b)):
+            hi = b
+        else:
+            lo = a
+    return float(np.exp((lo + hi) / 2))
+
+
+def tune(X, fixed, results, weights, k, steps=500, learning_rate=0.01, verbose=False):
+    """
+    Full-batch Adam on the weights with k fixed
+    Step sizes are relative to each starting weight so 0.5 and 120 move alike.
+    """
+    X = X.astype(np.float64)
+    weights = weights.astype(np.float64).copy()
+    step_size = learning_rate * np.maximum(np.abs(weights), 1.0)
+    m = np.zeros_like(weights)
+    v = np.zeros_like(weights)
+    beta1, beta2 = 0.9, 0.999
+
+    for step in range(1, steps + 1):
+        predicted = sigmoid(k * (X @ weights + fixed))
+        error = predicted - results
+        grad = X.T @ (2 * error * predicted * (1 - predicted) * k) / len(results)
+        m = beta1 * m + (1 - beta1) * grad
+        v = beta2 * v + (1 - beta2) * grad ** 2
+        weights -= step_size * (m / (1 - beta1 ** step)) / (np.sqrt(v / (1 - beta2 ** step)) + 1e-12)
+        if verbose and step % 100 == 0:
+            print(f"  step {step}: loss {np.mean(error ** 2):.5f}")
+    return weights
+
+
+def run(spec, positions, masks, results, steps=500, holdout=0.1, seed=0, verbose=True):
+    """Tune one evaluator; returns (tuned weights, report)"""
+    rows = spec.applies(positions, masks)
+    positions, masks, results = positions[rows], masks[rows], results[rows]
+    start = time.time()
+    X, fixed = build_matrix(spec, positions, masks)
+    build_time = time.time() - start
+
+    order = np.random.RandomState(seed).permutation(len(results))
+    split = int(len(order) * (1 - holdout))
+    train, val = order[:split], order[split:]
+
+    start = time.time()
+    initial = spec.defaults()
+    k = fit_scale(X[train], fixed[train], results[train], initial)
+    tuned = tune(X[train], fixed[train], results[train], initial, k, steps=steps, verbose=verbose)
+    tune_time = time.time() - start
+
+    report = {
+        'positions': len(results),
+        'features': len(initial),
+        'build_seconds': build_time,
+        'tune_seconds': tune_time,
+        'k': k,
+        'train_loss_before': texel_loss(X[train], fixed[train], results[train], initial, k),
+        'train_loss_after': texel_loss(X[train], fixed[train], results[train], tuned, k)
+    }
+    if len(val):
+        report['val_loss_before'] = texel_loss(X[val], fixed[val], results[val], initial, k)
+        report['val_loss_after'] = texel_loss(X[val], fixed[val], results[val], tuned, k)
+    return tuned, report
+
+
+def write_weights(sections, path=WEIGHTS_PATH):
+    """Merge tuned sections into the weights file the agents read"""
+    data = {}
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+    data.update(sections)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def load_games(paths):
+    games = []
+    for path in paths:
+        games.extend(iter_games(path))
+    return games
+
+
+def main():
+    """texel_tuner.py [game shards or globs...]"""
+    paths = [p for pattern in sys.argv[1:] for p in sorted(glob.glob(pattern))]
+    if not paths and os.path.exists('self_play_games.pkl'):
+        paths = ['self_play_games.pkl']
+
+    print("=" * 60)
+    print("TEXEL TUNING")
+    print("=" * 60)
+
+    if paths:
+        games = load_games(paths)
+        print(f"Loaded {len(games):,} games from {len(paths)} file(s)")
+    else:
+        print("No games given - generating 500 with the cell-table evaluator")
+        games = self_play_games(NNUEEvaluator.from_cell_values(), 500, depth=3)
+
+    positions, masks, results = quiet_positions(games)
+    print(f"Quiet positions: {len(results):,}\n")
+
+    sections = {}
+    reports = {}
+    for name, spec_class in SPECS.items():
+        spec = spec_class()
+        print(f"{name}:")
+        tuned, report = run(spec, positions, masks, results, verbose=False)
+        sections[name] = spec.export(tuned)
+        reports[name] = report
+        print(f"  matrix {report['positions']:,} x {report['features']} in {report['build_seconds']:.1f}s, "
+              f"tuned in {report['tune_seconds']:.1f}s (k = {report['k']:.5f})")
+        print(f"  val loss {report.get('val_loss_before', 0):.5f} -> {report.get('val_loss_after', 0):.5f}")
+        print(f"  {sections[name]}\n")
+
+    write_weights(sections)
+    with open('texel_report.json', 'w') as f:
+        json.dump(reports, f, indent=2)
+    print(f"Wrote {WEIGHTS_PATH} and texel_report.json")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Tournament Runner
+Parallel agent matches with Elo ratings and SPRT early stopping
+
+- Agents are (name, agent) pairs; an agent is an agent(observation,
+  configuration) callable, the path of a file defining `agent`, or a
+  referee built-in ('random', 'negamax'). Files are loaded once per
+  worker process; games are played by the local referee
+- Pairings: round robin (every pair) or gauntlet (the first agent
+  against each of the others)
+- Every pairing plays the same opening suite, each opening twice with
+  colors swapped
+- Games run on a process pool; results come back in completion order
+- Ratings: maximum-likelihood Elo over all games with 95% error bars;
+  head-to-head results also get the Elo difference and its error
+- SPRT (head-to-head only): stop as soon as the log-likelihood ratio for
+  elo1 against elo0 crosses a bound
+"""
+
+import itertools
+import json
+import math
+import multiprocessing as mp
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from bitboard_core import WIDTH, is_winning_move, play, can_play
+from referee import load_agent, play_game
+
+Z95 = 1.959964
+
+
+def opening_suite(plies=2):
+    """Every legal move sequence of `plies` moves that does not end the game"""
+    openings = []
+    for line in itertools.product(range(WIDTH), repeat=plies):
+        position, mask = 0, 0
+        for col in line:
+            if not can_play(mask, col) or is_winning_move(position, mask, col):
+                break
+            position, mask = play(position, mask, col)
+        else:
+            openings.append(list(line))
+    return openings
+
+
+def schedule(names, pairing='round_robin', openings=None, rounds=1):
+    """
+    Games as (first, second, opening) tuples, each opening once per color
+    pairing: 'round_robin' or 'gauntlet' (names[0] against the rest)
+    """
+    if pairing == 'round_robin':
+        pairs = list(itertools.combinations(names, 2))
+    elif pairing == 'gauntlet':
+        pairs = [(names[0], name) for name in names[1:]]
+    else:
+        raise ValueError(f"Unknown pairing {pairing!r}")
+    openings = openings if openings is not None else opening_suite()
+
+    games = []
+    for _ in range(rounds):
+        for opening in openings:
+            for a, b in pairs:
+                games.append((a, b, tuple(opening)))
+                games.append((b, a, tuple(opening)))
+    return games
+
+
+def rounds_for(games, openings=None):
+    """Rounds of the opening suite needed for at least `games` games per pairing"""
+    openings = openings if openings is not None else opening_suite()
+    return max(1, math.ceil(games / (2 * len(openings))))
+
+
+# Pool workers load each agent on first use
+_agents = {}
+_loaded = {}
+
+
+def _init_worker(agents):
+    _agents.update(agents)
+
+
+def _get_agent(name):
+    if name not in _loaded:
+        _loaded[name] = load_agent(_agents[name])
+    return _loaded[name]
+
+
+def _play(task):
+    first, second, opening = task
+    start = time.time()
+    game = play_game(_get_agent(first), _get_agent(second), opening)
+    return {'first': first, 'second': second, 'opening': list(opening), 'winner': game['winner'],
+            'moves': game['moves'], 'reason': game['reason'], 'seconds': time.time() - start}
+
+
+def expected_score(elo):
+    """Expected score of a player `elo` points stronger"""
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def elo_from_score(score):
+    score = min(max(score, 1e-6), 1 - 1e-6)
+    return -400 * math.log10(1 / score - 1)
+
+
+def score_stats(wins, draws, losses):
+    """(mean score, per-game variance) of a W/D/L record"""
+    n = wins + draws + losses
+    mean = (wins + draws / 2) / n
+    variance = (wins * (1 - mean) ** 2 + draws * (0.5 - mean) ** 2 + losses * mean ** 2) / n
+    return mean, variance
+
+
+def elo_difference(wins, draws, losses):
+    """(Elo difference, 95% error) of a head-to-head record"""
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0, math.inf
+    mean, variance = score_stats(wins, draws, losses)
+    margin = Z95 * math.sqrt(variance / n)
+    error = (elo_from_score(mean + margin) - elo_from_score(mean - margin)) / 2
+    return elo_from_score(mean), error
+
+
+def sprt_llr(wins, draws, losses, elo0, elo1):
+    """
+    Generalized SPRT log-likelihood ratio of H1 (elo1) against H0 (elo0)
+    One virtual draw keeps a clean sweep from having zero variance.
+    """
+    draws += 1
+    n = wins + draws + losses
+    mean, variance = score_stats(wins, draws, losses)
+    s0, s1 = expected_score(elo0), expected_score(elo1)
+    return n * (s1 - s0) * (2 * mean - s0 - s1) / (2 * variance)
+
+
+def sprt_bounds(alpha=0.05, beta=0.05):
+    """(lower, upper) LLR bounds: below accepts H0, above accepts H1"""
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def pair_records(games):
+    """{(a, b): [a wins, draws, b wins]} for a < b"""
+    records = defaultdict(lambda: [0, 0, 0])
+    for game in games:
+        a, b = sorted((game['first'], game['second']))
+        winner = (game['first'], game['second'])[game['winner'] - 1] if game['winner'] else None
+        records[a, b][0 if winner == a else 2 if winner == b else 1] += 1
+    return dict(records)
+
+
+def elo_ratings(names, records, iterations=200):
+    """
+    Maximum-likelihood Elo (mean 0) and 95% errors from pairwise records
+    One virtual draw per played pairing keeps unbeaten agents finite.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    n = len(names)
+    games = np.zeros((n, n))
+    scores = np.zeros((n, n))
+    for (a, b), (wins, draws, losses) in records.items():
+        i, j = index[a], index[b]
+        games[i, j] = games[j, i] = wins + draws + losses + 1
+        scores[i, j] = wins + (draws + 1) / 2
+        scores[j, i] = losses + (draws + 1) / 2
+
+    # Minorization-maximization for the Bradley-Terry strengths
+    strength = np.ones(n)
+    totals = scores.sum(axis=1)
+    for _ in range(iterations):
+        denominator = (games / (strength[:, None] + strength[None, :])).sum(axis=1)
+        strength = np.where(denominator > 0, totals / np.maximum(denominator, 1e-300), strength)
+        strength /= np.exp(np.log(strength).mean())
+    ratings = 400 * np.log10(strength)
+
+    expected = 1 / (1 + 10 ** ((ratings[None, :] - ratings[:, None]) / 400))
+    information = (games * expected * (1 - expected)).sum(axis=1) * (math.log(10) / 400) ** 2
+    errors = Z95 / np.sqrt(np.maximum(information, 1e-300))
+    return {name: (float(ratings[i]), float(errors[i])) for name, i in index.items()}
+
+
+def run_tournament(agents, pairing='round_robin', openings=None, rounds=1, processes=None,
+                   sprt=None, verbose=True):
+    """
+    Play a tournament on a process pool
+    agents: [(name, agent callable or file path)]
+    sprt: optional dict(elo0=, elo1=, alpha=, beta=, min_games=) for a
+    single pairing; after min_games, play stops once the LLR crosses a bound
+    Returns {'games', 'records', 'ratings', 'sprt', 'seconds'}.
+    """
+    names = [name for name, _ in agents]
+    tasks = schedule(names, pairing, openings, rounds)
+    if sprt is not None:
+        if len({tuple(sorted(task[:2])) for task in tasks}) != 1:
+            raise ValueError("SPRT needs exactly one pairing")
+        sprt = dict({'alpha': 0.05, 'beta': 0.05, 'min_games': 20}, **sprt)
+        lower, upper = sprt_bounds(sprt['alpha'], sprt['beta'])
+        sprt.update(llr=0.0, lower=lower, upper=upper, result=None)
+
+    processes = processes or mp.cpu_count()
+    if verbose:
+        print(f"{len(tasks):,} games, {len(names)} agents, {processes} processes")
+    games = []
+    record = [0, 0, 0]  # First agent's wins, draws, losses for SPRT
+    start = time.time()
+    with mp.Pool(processes, initializer=_init_worker, initargs=(dict(agents),)) as pool:
+        for game in pool.imap_unordered(_play, tasks):
+            games.append(game)
+            if sprt is not None:
+                players = (game['first'], game['second'])
+                record[1 if not game['winner'] else 0 if players[game['winner'] - 1] == names[0] else 2] += 1
+                sprt['llr'] = sprt_llr(*record, sprt['elo0'], sprt['elo1'])
+                if len(games) >= sprt['min_games'] and not lower < sprt['llr'] < upper:
+                    sprt['result'] = 'H1' if sprt['llr'] >= upper else 'H0'
+                    pool.terminate()
+                    break
+            if verbose:
+                print(f"{len(games):,}/{len(tasks):,} games "
+                      f"({len(games) / (time.time() - start):.1f} games/s)", end='\r')
+    elapsed = time.time() - start
+
+    records = pair_records(games)
+    result = {
+        'games': games,
+        'records': {f"{a} vs {b}": counts for (a, b), counts in records.items()},
+        'ratings': elo_ratings(names, records),
+        'sprt': sprt,
+        'seconds': elapsed
+    }
+    if verbose:
+        print()
+        print_report(result)
+    return result
+
+
+def print_report(result):
+    print("\n" + "="*60)
+    print("TOURNAMENT RESULTS")
+    print("="*60)
+    ratings = sorted(result['ratings'].items(), key=lambda item: -item[1][0])
+    for rank, (name, (elo, error)) in enumerate(ratings, 1):
+        print(f"{rank:2d}. {name:30s} {elo:+7.1f} ± {error:.1f}")
+    print()
+    for pair, (wins, draws, losses) in result['records'].items():
+        elo, error = elo_difference(wins, draws, losses)
+        print(f"{pair}: +{wins} ={draws} -{losses}  ({elo:+.1f} ± {error:.1f} Elo)")
+    if result['sprt']:
+        sprt = result['sprt']
+        print(f"\nSPRT [{sprt['elo0']}, {sprt['elo1']}]: LLR {sprt['llr']:.2f} "
+              f"({sprt['lower']:.2f}, {sprt['upper']:.2f}) -> {sprt['result'] or 'inconclusive'}")
+    print(f"\n{len(result['games']):,} games in {result['seconds']:.1f}s")
+
+
+def main():
+    """tournament.py agent.py agent.py ... [--gauntlet] [--rounds=N] [--sprt=elo0,elo1] [--out=file.json]"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].split('=', 1) if '=' in arg else (arg[2:], True)
+                   for arg in sys.argv[1:] if arg.startswith('--'))
+    if len(args) < 2:
+        print(main.__doc__)
+        return
+    agents = [(path.rsplit('/', 1)[-1].rsplit('.', 1)[0], path) for path in args]
+    sprt = None
+    if 'sprt' in options:
+        elo0, elo1 = map(float, options['sprt'].split(','))
+        sprt = {'elo0': elo0, 'elo1': elo1}
+    result = run_tournament(agents, pairing='gauntlet' if 'gauntlet' in options else 'round_robin',
+                            rounds=int(options.get('rounds', 1)), sprt=sprt)
+    with open(options.get('out', 'tournament_results.json'), 'w') as f:
+        json.dump({key: value for key, value in result.items() if key != 'games'}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ import json
 import glob
 import time
 
+from selfplay_dataset import iter_games
+
 class SimpleNN:
     """Simple 2-layer neural network"""
     
@@ -95,7 +97,7 @@ def main():
     print("="*60)
     
     # Try to load games
-    game_files = glob.glob('self_play_games_*.pkl')
+    game_files = glob.glob('self_play_games_*.pkl') + glob.glob('self_play_games_*.c4g')
     
     if not game_files:
         print("No game files found. Creating sample data...")
@@ -109,8 +111,7 @@ def main():
         latest_file = sorted(game_files)[-1]
         print(f"Loading {latest_file}...")
         try:
-            with open(latest_file, 'rb') as f:
-                games = pickle.load(f)
+            games = list(iter_games(latest_file))
             print(f"Loaded {len(games)} games")
         except:
             print("Error loading games, using sample data")
@@ -1,125 +1,37 @@
 """
-Ultra-fast self-play using numba JIT compilation
+Ultra-fast self-play with the numba-compiled bitboard negamax
+Shallow searches with a small TT; random center-weighted moves in the
+opening keep the games diverse.
 """
 
-import numpy as np
-from numba import jit
+import random
 import json
 import time
 from collections import defaultdict
 
-@jit(nopython=True)
-def check_win_fast(board, row, col, mark):
-    """Ultra-fast win check with numba"""
-    # Horizontal
-    count = 1
-    c = col - 1
-    while c >= 0 and board[row * 7 + c] == mark:
-        count += 1
-        c -= 1
-    c = col + 1
-    while c < 7 and board[row * 7 + c] == mark:
-        count += 1
-        c += 1
-    if count >= 4:
-        return True
-    
-    # Vertical
-    count = 1
-    r = row + 1
-    while r < 6 and board[r * 7 + col] == mark:
-        count += 1
-        r += 1
-    if count >= 4:
-        return True
-    
-    # Diagonal \
-    count = 1
-    r, c = row - 1, col - 1
-    while r >= 0 and c >= 0 and board[r * 7 + c] == mark:
-        count += 1
-        r -= 1
-        c -= 1
-    r, c = row + 1, col + 1
-    while r < 6 and c < 7 and board[r * 7 + c] == mark:
-        count += 1
-        r += 1
-        c += 1
-    if count >= 4:
-        return True
-    
-    # Diagonal /
-    count = 1
-    r, c = row - 1, col + 1
-    while r >= 0 and c < 7 and board[r * 7 + c] == mark:
-        count += 1
-        r -= 1
-        c += 1
-    r, c = row + 1, col - 1
-    while r < 6 and c >= 0 and board[r * 7 + c] == mark:
-        count += 1
-        r += 1
-        c -= 1
-    if count >= 4:
-        return True
-    
-    return False
+from bitboard_core import is_winning_move, play, valid_columns
+from bitboard_negamax import make_searcher
 
-@jit(nopython=True)
-def fast_agent(board, mark):
-    """Ultra-fast agent with numba"""
-    # Check wins and blocks
-    for col in range(7):
-        if board[col] == 0:
-            # Find row
-            row = -1
-            for r in range(5, -1, -1):
-                if board[r * 7 + col] == 0:
-                    row = r
-                    break
-            
-            if row >= 0:
-                # Check win
-                board[row * 7 + col] = mark
-                if check_win_fast(board, row, col, mark):
-                    board[row * 7 + col] = 0
-                    return col
-                board[row * 7 + col] = 0
-                
-                # Check block
-                board[row * 7 + col] = 3 - mark
-                if check_win_fast(board, row, col, 3 - mark):
-                    board[row * 7 + col] = 0
-                    return col
-                board[row * 7 + col] = 0
-    
-    # Prefer center columns
-    order = [3, 2, 4, 1, 5, 0, 6]
-    for col in order:
-        if board[col] == 0:
-            return col
-    
-    return 3
+_searcher = make_searcher(tt_size=1 << 16)
 
-@jit(nopython=True)
-def play_game_fast():
-    """Play one game with numba acceleration"""
-    board = np.zeros(42, dtype=np.int32)
-    moves = np.zeros(42, dtype=np.int32)
+def play_game_fast(depth=4, explore_prob=0.1, rng=random):
+    """Play one game; returns (moves, winner)"""
+    position, mask = 0, 0
+    moves = []
     current = 1
     
     for turn in range(42):
-        move = fast_agent(board, current)
-        moves[turn] = move
+        if turn < 10 and rng.random() < explore_prob:
+            valid = valid_columns(mask)
+            move = rng.choices(valid, weights=[4 - abs(c - 3) for c in valid])[0]
+        else:
+            move, _, _ = _searcher.search(position, mask, max_depth=depth)
+        moves.append(move)
         
-        # Make move
-        for row in range(5, -1, -1):
-            if board[row * 7 + move] == 0:
-                board[row * 7 + move] = current
-                
-                if check_win_fast(board, row, move, current):
-                    return moves[:turn+1], current
-                break
+        won = is_winning_move(position, mask, move)
+        position, mask = play(position, mask, move)
+        if won:
+            return moves, current
         
         current = 3 - current
     
@@ -127,7 +39,7 @@ def play_game_fast():
 
 def generate_opening_book(num_games=10000):
     """Generate opening book quickly"""
-    print(f"Generating {num_games:,} games with numba acceleration...")
+    print(f"Generating {num_games:,} games with the bitboard negamax...")
     
     opening_book = defaultdict(lambda: {'wins': 0, 'losses': 0, 'draws': 0, 'total': 0})
     
@@ -139,9 +51,6 @@ def generate_opening_book(num_games=10000):
     for game_num in range(num_games):
         moves, winner = play_game_fast()
         
-        # Convert to Python list
-        moves = moves.tolist()
-        
         # Update opening book
         for length in range(1, min(len(moves) + 1, 13)):
             position = tuple(moves[:length])
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Neural Network Submission Builder
+Packs ConnectXNetwork weights into a single-file Kaggle submission and
+measures agent cold-start time for every weight format
+"""
+
+import json
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+import bitboard_core
+import neural_network_v2
+from bitboard_core import valid_columns, is_winning_move, play
+from neural_network_v2 import (
+    ConnectXNetwork, QuantizedNetwork, positions_from_games, quantization_report
+)
+
+# Kaggle ConnectX actTimeout - the first move has to fit in it, init included
+FIRST_MOVE_BUDGET = 2.0
+
+AGENT_TEMPLATE = '''
+
+# === EMBEDDED WEIGHTS (zlib + base64, {size:,} chars) ===
+MODEL_DATA = (
+{chunks}
+)
+
+
+def agent(observation, configuration):
+    """Neural network agent - weights decoded lazily on the first call"""
+    if not hasattr(agent, 'network'):
+        agent.network = {network_class}.from_encoded(MODEL_DATA)
+
+    board = observation.board
+    mark = observation.mark
+    position, mask = encode_position(board, mark)
+
+    # Immediate win, then forced block
+    for col in CENTER_ORDER:
+        if can_play(mask, col) and is_winning_move(position, mask, col):
+            return col
+    opponent = position ^ mask
+    for col in CENTER_ORDER:
+        if can_play(mask, col) and is_winning_move(opponent, mask, col):
+            return col
+
+    move, _ = agent.network.predict_move(board, mark)
+    return int(move)
+'''
+
+
+def _module_body(module, drop_imports=()):
+    """Source of a module without its __main__ block and local imports"""
+    with open(module.__file__, 'r') as f:
+        source = f.read()
+
+    main_at = source.find('\nif __name__ == "__main__":')
+    if main_at >= 0:
+        source = source[:main_at]
+
+    lines = []
+    skipping = False
+    for line in source.splitlines():
+        if any(line.startswith(f'from {name} import') for name in drop_imports):
+            # Multi-line imports continue until the closing parenthesis
+            skipping = line.rstrip().endswith('(')
+            continue
+        if skipping:
+            skipping = not line.rstrip().endswith(')')
+            continue
+        lines.append(line)
+
+    return '\n'.join(lines).rstrip() + '\n'
+
+
+def build_submission(network, output_path='submission_nn.py'):
+    """Write a self-contained submission with the network embedded"""
+    encoded = network.encode()
+    chunks = '\n'.join(f'    "{encoded[i:i + 100]}"' for i in range(0, len(encoded), 100))
+
+    source = (
+        '"""\nConnectX Neural Network Submission\n'
+        'Generated by nn_submission_builder.py\n"""\n\n'
+        + _module_body(bitboard_core)
+        + '\n\n'
+        + _module_body(neural_network_v2, drop_imports=('bitboard_core',))
+        + AGENT_TEMPLATE.format(size=len(encoded), chunks=chunks,
+                                 network_class=type(network).__name__)
+    )
+
+    with open(output_path, 'w') as f:
+        f.write(source)
+
+    return output_path
+
+
+class _Observation:
+    def __init__(self, board, mark):
+        self.board = board
+        self.mark = mark
+
+
+def measure_cold_start(network, directory=None):
+    """Time loading each weight format plus the first forward pass / agent call"""
+    directory = directory or tempfile.mkdtemp(prefix='cxnw_')
+    os.makedirs(directory, exist_ok=True)
+    board = [0] * 42
+    results = {}
+
+    binary_path = os.path.join(directory, 'weights.bin')
+    network.save(binary_path)
+    formats = [('binary', binary_path, {}), ('mmap', binary_path, {'mmap': True})]
+
+    # Quantized networks have no JSON form
+    if not isinstance(network, QuantizedNetwork):
+        json_path = os.path.join(directory, 'weights.json')
+        network.save(json_path)
+        formats.insert(0, ('json', json_path, {}))
+
+    for name, path, kwargs in formats:
+        start = time.time()
+        loaded = type(network)(hidden_size=8)
+        loaded.load(path, **kwargs)
+        load_time = time.time() - start
+        loaded.forward(board, 1)
+        results[name] = {
+            'bytes': os.path.getsize(path),
+            'load_s': load_time,
+            'first_move_s': time.time() - start
+        }
+
+    # Single-file submission: exec the file, then the first agent call
+    submission_path = build_submission(network, os.path.join(directory, 'submission_nn.py'))
+    start = time.time()
+    with open(submission_path, 'r') as f:
+        code = f.read()
+    exec_globals = {}
+    exec(code, exec_globals)
+    load_time = time.time() - start
+    exec_globals['agent'](_Observation(board, 1), None)
+    results['embedded'] = {
+        'bytes': os.path.getsize(submission_path),
+        'load_s': load_time,
+        'first_move_s': time.time() - start
+    }
+
+    return results
+
+
+def print_report(results):
+    """Print cold-start timings against the first-move budget"""
+    print(f"{'format':>10} {'size':>12} {'load':>10} {'first move':>12} {'budget':>8}")
+    for name, r in results.items():
+        share = r['first_move_s'] / FIRST_MOVE_BUDGET * 100
+        print(f"{name:>10} {r['bytes']:>12,} {r['load_s'] * 1000:>8.1f}ms "
+              f"{r['first_move_s'] * 1000:>10.1f}ms {share:>7.1f}%")
+
+
+def random_games(count, seed=0):
+    """Uniformly random games, for calibration when no self-play file exists"""
+    rng = random.Random(seed)
+    games = []
+    for _ in range(count):
+        position, mask = 0, 0
+        moves = []
+        while True:
+            cols = valid_columns(mask)
+            if not cols:
+                break
+            col = rng.choice(cols)
+            moves.append(col)
+            won = is_winning_move(position, mask, col)
+            position, mask = play(position, mask, col)
+            if won:
+                break
+        games.append({'moves': moves})
+    return games
+
+
+def calibrate_int8(network, games_path='self_play_games.pkl', positions=4000):
+    """Quantize on half of the self-play positions, report error on the other half"""
+    if os.path.exists(games_path):
+        with open(games_path, 'rb') as f:
+            games = pickle.load(f)
+        random.Random(0).shuffle(games)
+    else:
+        print(f"{games_path} not found - calibrating on random games")
+        games = random_games(positions // 10)
+
+    boards, players = positions_from_games(games, positions)
+    half = len(boards) // 2
+    quantized = QuantizedNetwork.from_network(network, boards[:half], players[:half])
+    report = quantization_report(network, quantized, boards[half:], players[half:])
+
+    print(f"Calibration positions: {half}, evaluation positions: {report['positions']}")
+    print(f"Value error:  mean {report['value_mae']:.4f}  max {report['value_max_error']:.4f}")
+    print(f"Policy TV:    mean {report['policy_tv_mean']:.4f}  max {report['policy_tv_max']:.4f}")
+    print(f"Top move agreement: {report['top_move_agreement']:.1%}")
+    print(f"Embedded size: {report['float_encoded_chars']:,} -> {report['int8_encoded_chars']:,} chars")
+    for batch_size in (1, 16):
+        print(f"Forward N={batch_size}: {report['float_ms_per_board'][batch_size]:.3f}ms -> "
+              f"{report['int8_ms_per_board'][batch_size]:.3f}ms per board")
+
+    return quantized, report
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    hidden_size = int(args[0]) if args else 256
+    weights_path = args[1] if len(args) > 1 else None
+
+    network = ConnectXNetwork(hidden_size=hidden_size)
+    if weights_path:
+        network.load(weights_path)
+
+    if '--int8' in sys.argv:
+        print("=" * 60)
+        print("INT8 QUANTIZATION REPORT")
+        print("=" * 60)
+        network, report = calibrate_int8(network)
+        with open('nn_int8_report.json', 'w') as f:
+            json.dump(report, f, indent=2)
+        print()
+
+    print("=" * 60)
+    print("NN COLD-START REPORT")
+    print("=" * 60)
+    results = measure_cold_start(network)
+    print_report(results)
+
+    with open('nn_cold_start.json', 'w') as f:
+        json.dump(results, f, indent=2)
+
+    output = build_submission(network)
+    print(f"\nSubmission written to {output}")
+
+
+if __name__ == "__main__":
+    main()
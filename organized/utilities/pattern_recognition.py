@@ -3,6 +3,8 @@ Pattern Recognition System
 Advanced pattern detection for Connect 4 evaluation
 """
 
+import json
+
 import numpy as np
 from bitboard_engine_v2 import BitboardEngine
 
@@ -113,6 +115,13 @@ class PatternRecognition:
             'center_control': 20,
             'adjacent_center': 10
         }
+
+        # Tuned replacements written by texel_tuner.py
+        try:
+            with open('eval_weights.json', 'r') as f:
+                self.pattern_values.update(json.load(f).get('pattern_recognition', {}))
+        except (OSError, ValueError):
+            pass
     
     def evaluate_position(self, position, mask):
         """Comprehensive position evaluation using patterns"""
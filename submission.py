@@ -23,6 +23,7 @@ def agent(observation, configuration):
         agent.killer_moves = [[None, None] for _ in range(20)]
         agent.history_table = {}
         agent.initialized = True
+    agent.last_depth = None  # Deepest completed iteration, for benchmarks (None: no search)
     
     # Get board info
     board = observation.board
@@ -80,6 +81,7 @@ def agent(observation, configuration):
         if move is not None:
             best_move = move
             best_score = score
+            agent.last_depth = depth
         
         # Stop if winning
         if score > 9000:
@@ -88,6 +90,14 @@ def agent(observation, configuration):
     return best_move
 
 
+def new_game():
+    """Per-game reset for match harnesses: clear the search tables, keep the opening book"""
+    if hasattr(agent, 'initialized'):
+        agent.transposition_table = {}
+        agent.killer_moves = [[None, None] for _ in range(20)]
+        agent.history_table = {}
+
+
 # === BITBOARD ENGINE ===
 class BitboardEngine:
     def __init__(self):
@@ -201,8 +211,21 @@ def check_opening_book(moves, book):
 
 # === PATTERN EVALUATION ===
 class PatternEvaluator:
+    # Defaults; texel_tuner.py writes tuned values to eval_weights.json
+    WEIGHTS = {'threat': 100, 'opp_threat': 120, 'center': 10, 'three': 50, 'two': 10}
+
+    def __init__(self, weights_path='eval_weights.json'):
+        import json
+        self.weights = dict(self.WEIGHTS)
+        try:
+            with open(weights_path, 'r') as f:
+                self.weights.update(json.load(f).get('pattern_evaluator', {}))
+        except (OSError, ValueError):
+            pass
+
     def evaluate(self, position, mask):
         """Evaluate position using patterns"""
+        w = self.weights
         score = 0
         opponent = position ^ mask
         
@@ -210,16 +233,16 @@ class PatternEvaluator:
         my_threats = count_threats(position, mask)
         opp_threats = count_threats(opponent, mask)
         
-        score += my_threats * 100
-        score -= opp_threats * 120
+        score += my_threats * w['threat']
+        score -= opp_threats * w['opp_threat']
         
         # Center control
         center_mask = 0x10204081020408  # Center column
-        score += bin(position & center_mask).count('1') * 10
-        score -= bin(opponent & center_mask).count('1') * 10
+        score += bin(position & center_mask).count('1') * w['center']
+        score -= bin(opponent & center_mask).count('1') * w['center']
         
         # Pattern counting
-        score += count_patterns(position, opponent, mask)
+        score += count_patterns(position, opponent, mask, w['three'], w['two'])
         
         return score
 
@@ -236,7 +259,7 @@ def can_play(col, mask):
     """Check if column is playable"""
     return (mask & (0x20 << (col * 7))) == 0
 
-def count_patterns(position, opponent, mask):
+def count_patterns(position, opponent, mask, three=50, two=10):
     """Count valuable patterns"""
     score = 0
     
@@ -249,14 +272,14 @@ def count_patterns(position, opponent, mask):
             
             if opp_pieces == 0:
                 if my_pieces == 3:
-                    score += 50
+                    score += three
                 elif my_pieces == 2:
-                    score += 10
+                    score += two
             elif my_pieces == 0:
                 if opp_pieces == 3:
-                    score -= 50
+                    score -= three
                 elif opp_pieces == 2:
-                    score -= 10
+                    score -= two
     
     return score
 